@@ -1,13 +1,14 @@
-import time
 from datetime import datetime
+from typing import Callable, Optional
 
+import pyarrow as pa
 import streamlit as st
 
-from app.dashboard_data import (
-    dashboard_connection,
-    get_dashboard_snapshot,
-    get_operational_alerts,
-)
+from app.dashboard_data import get_operational_alerts, pivot_atividade_por_minuto
+from app.kpi_history import get_trend_alerts
+from app.mv_scheduler import MaterializedViewScheduler
+from app.snapshot_api import SnapshotApi, load_api_config
+from app.snapshot_refresher import SnapshotRefresher
 
 
 st.set_page_config(
@@ -17,11 +18,38 @@ st.set_page_config(
 )
 
 
+@st.cache_resource
+def get_refresher() -> SnapshotRefresher:
+    """Refresher unico do processo, compartilhado por todas as sessoes."""
+    refresher = SnapshotRefresher.from_env()
+    refresher.start()
+    return refresher
+
+
+@st.cache_resource
+def get_mv_scheduler() -> MaterializedViewScheduler:
+    """Agendador unico de refresh das materialized views do processo."""
+    scheduler = MaterializedViewScheduler.from_settings()
+    scheduler.start()
+    return scheduler
+
+
+@st.cache_resource
+def get_snapshot_api() -> Optional[SnapshotApi]:
+    """API JSON do processo sobre o mesmo refresher (DASHBOARD_API_PORT)."""
+    config = load_api_config()
+    if not config["port"]:
+        return None
+    api = SnapshotApi(get_refresher(), **config)
+    api.start()
+    return api
+
+
 def render_metric(label: str, value: object) -> None:
     st.metric(label, f"{value:,}".replace(",", "."))
 
 
-def render_status_table(title: str, rows: list[dict]) -> None:
+def render_status_table(title: str, rows: list[dict] | pa.Table) -> None:
     st.subheader(title)
     if rows:
         st.dataframe(rows, hide_index=True, use_container_width=True)
@@ -123,33 +151,149 @@ def render_internacoes(snapshot: dict) -> None:
         render_status_table("Internacoes longas", snapshot["internacoes_longas"])
 
 
-def render_atividade(snapshot: dict, recent_minutes: int) -> None:
+def render_atividade(snapshot: dict, recent_minutes: int, history_minutes: int) -> None:
     render_status_table(
         f"Atividade nos ultimos {recent_minutes} minutos",
         snapshot["atividade_recente"],
     )
+    series = pivot_atividade_por_minuto(snapshot["atividade_por_minuto"])
+    if series:
+        st.subheader(f"Eventos por minuto (ultimos {history_minutes} minutos)")
+        st.line_chart(series, x="minuto", y=[key for key in series[0] if key != "minuto"])
+
+
+def render_pacientes_sem_convenio(snapshot: dict) -> None:
     render_status_table("Pacientes sem convenio", snapshot["pacientes_sem_convenio"])
 
 
+def render_cache_stats(refresher: SnapshotRefresher) -> None:
+    render_status_table("Cache de consultas", refresher.cache.hit_rates())
+
+
+def render_mv_stats(scheduler: MaterializedViewScheduler) -> None:
+    render_status_table("Materialized views", scheduler.stats())
+
+
+def render_diagnostico(refresher: SnapshotRefresher) -> None:
+    if refresher.timer is None:
+        st.info("Medicao de consultas desativada.")
+        return
+    st.caption(
+        f"Ultimas {refresher.timer.window} execucoes por painel; "
+        f"lentas acima de {refresher.timer.slow_ms:g} ms"
+    )
+    render_status_table("Tempo por painel", refresher.timer.stats())
+    if refresher.dimensions is not None:
+        render_status_table("Cache de nomes", refresher.dimensions.stats())
+
+
+def render_trends(refresher: SnapshotRefresher) -> None:
+    history = refresher.history
+    if history is None or len(history) < 2:
+        return
+
+    trends = get_trend_alerts(history)
+    for trend in trends:
+        if trend["alerta"]:
+            st.warning(
+                f"Tendencia: {trend['titulo']} sobe {trend['variacao_por_min']}/min e "
+                f"atinge o limite critico de {trend['limite_critico']} em "
+                f"~{trend['minutos_ate_critico']:.0f} min."
+            )
+
+    st.subheader(f"Tendencia dos indicadores ({len(history)} amostras)")
+    fields = ("exames_pendentes", "internacoes_ativas", "consultas_agendadas")
+    st.line_chart(history.series(fields), x="horario", y=list(fields))
+    render_status_table(
+        f"Variacao nos ultimos {history.trend_minutes:g} minutos",
+        trends,
+    )
+
+
+def render_refresh_status(refresher: SnapshotRefresher) -> None:
+    published = refresher.latest()
+    if published is None:
+        st.error(
+            "Falha ao carregar dados do PostgreSQL: "
+            f"{refresher.last_error or 'snapshot ainda nao disponivel'}"
+        )
+        return
+
+    caption = (
+        f"Ultima leitura: "
+        f"{datetime.fromtimestamp(published['updated_at']):%d/%m/%Y %H:%M:%S} "
+        f"(ha {published['age']:.0f}s, {published['duration'] * 1000:.0f} ms)"
+    )
+    hit_rate = refresher.cache.overall_hit_rate() if refresher.cache else None
+    if hit_rate is not None:
+        caption += f" - cache de consultas: {hit_rate:.0%} de acertos"
+    st.caption(caption)
+    if refresher.last_error:
+        st.warning(
+            f"Exibindo snapshot de {published['age']:.0f}s atras; "
+            f"ultima atualizacao falhou: {refresher.last_error}"
+        )
+
+
+def render_snapshot_panel(
+    refresher: SnapshotRefresher,
+    render: Callable[..., None],
+    *args: object,
+) -> None:
+    """Le o snapshot publicado mais recente e desenha um painel com ele."""
+    published = refresher.latest()
+    if published is None:
+        st.info("Aguardando o primeiro snapshot.")
+        return
+    render(published["snapshot"], *args)
+
+
+def render_fragment(
+    run_every: Optional[float],
+    render: Callable[..., None],
+    *args: object,
+) -> None:
+    """Desenha ``render`` como fragmento reexecutado a cada ``run_every`` s.
+
+    O id do fragmento vem da funcao e do caminho do container; o container
+    proprio separa fragmentos da mesma funcao na mesma aba.
+    """
+    with st.container():
+        st.fragment(render, run_every=run_every)(*args)
+
+
 def main() -> None:
     st.title("Hospital OLTP")
+    refresher = get_refresher()
+    mv_scheduler = get_mv_scheduler()
+    snapshot_api = get_snapshot_api()
+    recent_minutes = refresher.recent_minutes
+
+    # Sessoes apenas leem o ultimo snapshot publicado; nao consultam o banco.
+    refresher.wait(timeout=15)
 
     with st.sidebar:
         st.header("Atualizacao")
         auto_refresh = st.toggle("Atualizar automaticamente", value=True)
-        refresh_seconds = st.slider("Intervalo", 2, 30, 5, 1)
-        recent_minutes = st.slider("Janela de atividade", 5, 120, 15, 5)
-        st.caption(f"Ultima leitura: {datetime.now():%d/%m/%Y %H:%M:%S}")
-
-    try:
-        conn = dashboard_connection()
-        try:
-            snapshot = get_dashboard_snapshot(conn, recent_minutes=recent_minutes)
-        finally:
-            conn.close()
-    except Exception as exc:
-        st.error(f"Falha ao carregar dados do PostgreSQL: {exc}")
-        st.stop()
+        kpi_seconds = st.slider("Indicadores (s)", 2, 30, 5, 1)
+        list_seconds = st.slider("Listas e ocupacao (s)", 5, 120, 30, 5)
+        if refresher.listener is not None:
+            st.caption(
+                f"Snapshot recalculado a cada aviso no canal {refresher.listener.channel} "
+                f"({refresher.listener.notifications} recebidos)"
+            )
+        else:
+            st.caption(f"Snapshot recalculado a cada {refresher.interval:g}s")
+        if snapshot_api is not None:
+            st.caption(
+                f"API JSON em http://{snapshot_api.host}:{snapshot_api.port}/snapshot"
+            )
+
+    # Cada fragmento rerroda sozinho na sua cadencia, sem refazer a pagina.
+    fast = kpi_seconds if auto_refresh else None
+    slow = list_seconds if auto_refresh else None
+
+    render_fragment(fast, render_refresh_status, refresher)
 
     tabs = st.tabs([
         "Visao geral",
@@ -157,21 +301,37 @@ def main() -> None:
         "Exames",
         "Internacoes",
         "Atividade",
+        "Diagnostico",
     ])
     with tabs[0]:
-        render_overview(snapshot, recent_minutes)
+        render_fragment(
+            fast, render_snapshot_panel, refresher, render_overview, recent_minutes
+        )
+        render_fragment(fast, render_trends, refresher)
     with tabs[1]:
-        render_consultas(snapshot)
+        render_fragment(slow, render_snapshot_panel, refresher, render_consultas)
     with tabs[2]:
-        render_exames(snapshot)
+        render_fragment(slow, render_snapshot_panel, refresher, render_exames)
     with tabs[3]:
-        render_internacoes(snapshot)
+        render_fragment(slow, render_snapshot_panel, refresher, render_internacoes)
     with tabs[4]:
-        render_atividade(snapshot, recent_minutes)
-
-    if auto_refresh:
-        time.sleep(refresh_seconds)
-        st.rerun()
+        render_fragment(
+            fast,
+            render_snapshot_panel,
+            refresher,
+            render_atividade,
+            recent_minutes,
+            refresher.history_minutes,
+        )
+        render_fragment(
+            slow, render_snapshot_panel, refresher, render_pacientes_sem_convenio
+        )
+        if refresher.cache:
+            render_fragment(slow, render_cache_stats, refresher)
+        if mv_scheduler.available:
+            render_fragment(slow, render_mv_stats, mv_scheduler)
+    with tabs[5]:
+        render_fragment(slow, render_diagnostico, refresher)
 
 
 if __name__ == "__main__":
@@ -1,8 +1,19 @@
-from typing import Any, Optional
+import os
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Any, Callable, Iterable, Iterator, Optional
 
 import psycopg2
+import pyarrow as pa
 
-from scripts.db_init import create_connection, load_env, load_project_env
+from app.dimension_cache import DimensionCache
+from app.query_cache import QueryCache, read_table_versions
+from app.query_timing import QueryTimer, record_query
+from scripts.db_init import get_pool, load_project_env
+from scripts.activity import activity_counters_available
+from scripts.kpi_summary import kpi_summary_available
+from scripts.matviews import materialized_views_available
 
 
 DEFAULT_ALERT_RULES = [
@@ -33,7 +44,7 @@ DEFAULT_ALERT_RULES = [
     {
         "codigo": "pacientes_sem_convenio",
         "titulo": "Pacientes sem convenio cadastrado",
-        "valor_lista": "pacientes_sem_convenio",
+        "valor_kpi": "pacientes_sem_convenio",
         "atencao": 25,
         "critico": 75,
         "acao": "Conferir cadastro financeiro dos pacientes recentes.",
@@ -41,7 +52,7 @@ DEFAULT_ALERT_RULES = [
     {
         "codigo": "internacoes_longas",
         "titulo": "Internacoes longas aguardando fechamento",
-        "valor_lista": "internacoes_longas",
+        "valor_kpi": "internacoes_longas",
         "atencao": 25,
         "critico": 60,
         "acao": "Revisar casos ativos com maior tempo de permanencia.",
@@ -49,22 +60,367 @@ DEFAULT_ALERT_RULES = [
 ]
 
 
-def dashboard_connection() -> psycopg2.extensions.connection:
-    """Cria conexao para o dashboard usando config/.env."""
+# Contagens do snapshot em uma única consulta: uma leitura por tabela alimenta
+# os KPIs e as distribuições por status.
+RESUMO_SQL = """
+SELECT 'consultas' AS tabela, status, COUNT(*) AS total
+FROM consultas
+GROUP BY status
+UNION ALL
+SELECT
+    'exames',
+    CASE WHEN resultado IS NULL THEN 'pendente' ELSE 'com_resultado' END,
+    COUNT(*)
+FROM exames
+GROUP BY 2
+UNION ALL
+SELECT
+    'internacoes',
+    CASE WHEN data_saida IS NULL THEN 'ativa' ELSE 'encerrada' END,
+    COUNT(*)
+FROM internacoes
+GROUP BY 2
+UNION ALL
+SELECT 'pacientes', NULL, COUNT(*) FROM pacientes
+UNION ALL
+SELECT 'pacientes_sem_convenio', NULL, COUNT(*)
+FROM pacientes p
+WHERE NOT EXISTS (SELECT 1 FROM pacientes_convenios pc WHERE pc.paciente_id = p.id)
+UNION ALL
+SELECT 'medicos', NULL, COUNT(*) FROM medicos
+"""
+
+# Mesmo formato de RESUMO_SQL lido do extra kpi_summary (O(1) por refresh).
+KPI_RESUMO_SQL = """
+SELECT grupo AS tabela, chave AS status, total
+FROM kpi_contagens
+WHERE grupo IN (
+    'consultas', 'exames', 'internacoes', 'pacientes', 'pacientes_sem_convenio', 'medicos'
+)
+  AND total <> 0
+"""
+
+KPI_OCUPACAO_POR_QUARTO_SQL = """
+SELECT chave AS quarto, total AS internacoes_ativas
+FROM kpi_contagens
+WHERE grupo = 'internacoes_quarto'
+  AND total > 0
+ORDER BY internacoes_ativas DESC, quarto
+LIMIT %s
+"""
+
+SNAPSHOT_TRANSACTION_SQL = "SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY"
+
+# Tabelas lidas por cada consulta do snapshot (invalidacao do QueryCache).
+# Paineis que dependem de now() (atividade recente, internacoes longas,
+# consultas agendadas proximas, nas tabelas ou nas views) mudam com o tempo
+# mesmo sem escritas e nunca passam pelo cache. As listas
+# trazem so ids de paciente/medico; os nomes vem do DimensionCache a cada
+# snapshot, entao mudancas em pacientes e medicos nao invalidam essas listas.
+QUERY_TABLES = {
+    "get_resumo": (
+        "consultas", "exames", "internacoes", "pacientes", "pacientes_convenios", "medicos",
+    ),
+    "get_ultimas_consultas": ("consultas",),
+    "get_internacoes_ativas": ("internacoes",),
+    "get_ocupacao_por_quarto": ("internacoes",),
+    "get_exames_pendentes_recentes": ("exames",),
+    "get_pacientes_sem_convenio": ("pacientes", "pacientes_convenios"),
+    "get_resumo_kpi": ("kpi_contagens",),
+    "get_ocupacao_por_quarto_kpi": ("kpi_contagens",),
+    "get_pacientes_sem_convenio_mv": ("mv_pacientes_sem_convenio",),
+}
+
+# Tabelas atualizadas por triggers na mesma transacao das tabelas de origem:
+# um aviso de mudanca em uma origem tambem invalida quem le a derivada.
+DERIVED_TABLES = {
+    "kpi_contagens": (
+        "consultas", "exames", "internacoes", "pacientes", "pacientes_convenios", "medicos",
+    ),
+}
+
+# Listas com janela (DASHBOARD_WINDOW_DAYS) recebem o inicio dela como uma data
+# fixa, parte da chave do cache. Ultimas consultas limita updated_at (uma
+# consulta antiga alterada agora continua na lista) e usa
+# idx_consultas_updated_at; so exames pendentes recentes limita a chave de
+# particao, e ali o planner descarta os meses fora da janela.
+ULTIMAS_CONSULTAS_SQL = """
+SELECT
+    c.id,
+    c.data,
+    c.status,
+    c.paciente_id,
+    c.medico_id,
+    c.updated_at
+FROM consultas c
+WHERE c.updated_at >= %s
+ORDER BY c.updated_at DESC
+LIMIT %s
+"""
+
+INTERNACOES_ATIVAS_SQL = """
+SELECT
+    i.id,
+    i.paciente_id,
+    i.data_entrada,
+    i.motivo,
+    i.quarto,
+    i.updated_at
+FROM internacoes i
+WHERE i.data_saida IS NULL
+ORDER BY i.data_entrada DESC
+LIMIT %s
+"""
+
+# Percorre idx_pacientes_created_at do mais recente para tras, testando cada
+# paciente no indice UNIQUE (paciente_id, convenio_id), e para no LIMIT.
+PACIENTES_SEM_CONVENIO_SQL = """
+SELECT
+    p.id,
+    p.nome,
+    p.cpf,
+    p.telefone,
+    p.created_at
+FROM pacientes p
+WHERE NOT EXISTS (
+    SELECT 1 FROM pacientes_convenios pc WHERE pc.paciente_id = p.id
+)
+ORDER BY p.created_at DESC
+LIMIT %s
+"""
+
+INTERNACOES_LONGAS_SQL = """
+SELECT
+    i.id,
+    i.paciente_id,
+    i.data_entrada,
+    DATE_PART('day', now() - i.data_entrada)::int AS dias_internado,
+    i.motivo,
+    i.quarto
+FROM internacoes i
+WHERE i.data_saida IS NULL
+  AND i.data_entrada <= now() - (%s || ' days')::interval
+ORDER BY dias_internado DESC, i.data_entrada ASC
+LIMIT %s
+"""
+
+# Contagem exata para o alerta; usa o indice parcial idx_internacoes_ativas.
+INTERNACOES_LONGAS_TOTAL_SQL = """
+SELECT COUNT(*) AS total
+FROM internacoes
+WHERE data_saida IS NULL
+  AND data_entrada <= now() - (%s || ' days')::interval
+"""
+
+OCUPACAO_POR_QUARTO_SQL = """
+SELECT
+    COALESCE(quarto, 'sem_quarto') AS quarto,
+    COUNT(*) AS internacoes_ativas
+FROM internacoes
+WHERE data_saida IS NULL
+GROUP BY COALESCE(quarto, 'sem_quarto')
+ORDER BY internacoes_ativas DESC, quarto
+LIMIT %s
+"""
+
+EXAMES_PENDENTES_RECENTES_SQL = """
+SELECT
+    e.id,
+    e.paciente_id,
+    e.tipo_exame,
+    e.data,
+    e.created_at
+FROM exames e
+WHERE e.resultado IS NULL
+  AND e.data >= %s
+ORDER BY e.data DESC
+LIMIT %s
+"""
+
+CONSULTAS_AGENDADAS_PROXIMAS_SQL = """
+SELECT
+    c.id,
+    c.data,
+    c.paciente_id,
+    c.medico_id,
+    c.motivo
+FROM consultas c
+WHERE c.status = 'agendada'
+  AND c.data BETWEEN now() AND now() + (%s || ' days')::interval
+ORDER BY c.data ASC
+LIMIT %s
+"""
+
+# Leituras das materialized views (extra materialized_views). Os cortes que
+# dependem de now() sao aplicados aqui, nao na definicao da view.
+MV_INTERNACOES_LONGAS_SQL = """
+SELECT
+    id,
+    paciente,
+    data_entrada,
+    DATE_PART('day', now() - data_entrada)::int AS dias_internado,
+    motivo,
+    quarto
+FROM mv_internacoes_longas
+WHERE data_entrada <= now() - (%s || ' days')::interval
+ORDER BY data_entrada ASC
+LIMIT %s
+"""
+
+MV_PACIENTES_SEM_CONVENIO_SQL = """
+SELECT id, nome, cpf, telefone, created_at
+FROM mv_pacientes_sem_convenio
+ORDER BY created_at DESC
+LIMIT %s
+"""
+
+MV_CONSULTAS_AGENDADAS_PROXIMAS_SQL = """
+SELECT id, data, paciente, medico, especialidade, motivo
+FROM mv_consultas_agendadas_proximas
+WHERE data BETWEEN now() AND now() + (%s || ' days')::interval
+ORDER BY data ASC
+LIMIT %s
+"""
+
+# updated_at >= created_at sempre (trigger set_updated_at), então o filtro
+# em updated_at cobre inserções e atualizações e usa idx_<tabela>_updated_at.
+ATIVIDADE_RECENTE_SQL = """
+SELECT
+    'consultas' AS tabela,
+    COUNT(*) FILTER (WHERE created_at >= now() - make_interval(mins => %(minutes)s)) AS criados,
+    COUNT(*) FILTER (WHERE updated_at > created_at) AS atualizados
+FROM consultas
+WHERE updated_at >= now() - make_interval(mins => %(minutes)s)
+UNION ALL
+SELECT
+    'exames' AS tabela,
+    COUNT(*) FILTER (WHERE created_at >= now() - make_interval(mins => %(minutes)s)) AS criados,
+    COUNT(*) FILTER (WHERE updated_at > created_at) AS atualizados
+FROM exames
+WHERE updated_at >= now() - make_interval(mins => %(minutes)s)
+UNION ALL
+SELECT
+    'internacoes' AS tabela,
+    COUNT(*) FILTER (WHERE created_at >= now() - make_interval(mins => %(minutes)s)) AS criados,
+    COUNT(*) FILTER (WHERE updated_at > created_at) AS atualizados
+FROM internacoes
+WHERE updated_at >= now() - make_interval(mins => %(minutes)s)
+UNION ALL
+SELECT
+    'pacientes' AS tabela,
+    COUNT(*) FILTER (WHERE created_at >= now() - make_interval(mins => %(minutes)s)) AS criados,
+    COUNT(*) FILTER (WHERE updated_at > created_at) AS atualizados
+FROM pacientes
+WHERE updated_at >= now() - make_interval(mins => %(minutes)s)
+UNION ALL
+SELECT
+    'pacientes_convenios' AS tabela,
+    COUNT(*) FILTER (WHERE created_at >= now() - make_interval(mins => %(minutes)s)) AS criados,
+    COUNT(*) FILTER (WHERE updated_at > created_at) AS atualizados
+FROM pacientes_convenios
+WHERE updated_at >= now() - make_interval(mins => %(minutes)s)
+ORDER BY tabela
+"""
+
+# Leituras de atividade_por_minuto (extra activity_counters): custo
+# proporcional a minutos x tabelas da janela, nao ao tamanho das tabelas.
+ATIVIDADE_RECENTE_CONTADORES_SQL = """
+SELECT
+    t.tabela,
+    COALESCE(SUM(a.criados), 0)::bigint AS criados,
+    COALESCE(SUM(a.atualizados), 0)::bigint AS atualizados
+FROM (
+    VALUES ('consultas'), ('exames'), ('internacoes'), ('pacientes'), ('pacientes_convenios')
+) AS t (tabela)
+LEFT JOIN atividade_por_minuto a
+  ON a.tabela = t.tabela
+ AND a.minuto >= date_trunc('minute', now() - make_interval(mins => %(minutes)s))::timestamp
+GROUP BY t.tabela
+ORDER BY t.tabela
+"""
+
+ATIVIDADE_POR_MINUTO_SQL = """
+SELECT minuto, tabela, criados, atualizados
+FROM atividade_por_minuto
+WHERE minuto >= date_trunc('minute', now() - make_interval(mins => %(minutes)s))::timestamp
+ORDER BY minuto, tabela
+"""
+
+COLUMNAR_ITERSIZE = 2000
+
+
+def window_start(days: Optional[int] = None) -> date:
+    """Primeiro dia da janela das listas particionadas (DASHBOARD_WINDOW_DAYS)."""
+    if days is None:
+        load_project_env()
+        days = int(os.getenv("DASHBOARD_WINDOW_DAYS", 90))
+    return date.today() - timedelta(days=days)
+
+
+@contextmanager
+def dashboard_connection() -> Iterator[psycopg2.extensions.connection]:
+    """Empresta uma conexao do pool compartilhado do dashboard."""
     load_project_env()
-    return create_connection(load_env())
+    with get_pool("dashboard").connection() as conn:
+        yield conn
 
 
 def fetch_rows(
     conn: psycopg2.extensions.connection,
     sql: str,
-    params: tuple = (),
+    params: tuple | dict = (),
 ) -> list[dict[str, Any]]:
     """Executa query e retorna linhas como dicionarios."""
+    started = time.perf_counter()
+    with conn.cursor() as cur:
+        cur.execute(sql, params)
+        executed = time.perf_counter()
+        columns = [col[0] for col in cur.description]
+        rows = [dict(zip(columns, row)) for row in cur.fetchall()]
+    record_query(sql, params, executed - started, time.perf_counter() - executed, len(rows))
+    return rows
+
+
+def fetch_columns(
+    conn: psycopg2.extensions.connection,
+    sql: str,
+    params: tuple | dict = (),
+    itersize: int = COLUMNAR_ITERSIZE,
+) -> pa.Table:
+    """Executa query e retorna as colunas como tabela Arrow.
+
+    As linhas sao lidas em blocos de ``itersize`` e cada bloco vira colunas
+    Arrow na hora, sem um dicionario por linha.
+    """
+    started = time.perf_counter()
     with conn.cursor() as cur:
         cur.execute(sql, params)
+        executed = time.perf_counter()
         columns = [col[0] for col in cur.description]
-        return [dict(zip(columns, row)) for row in cur.fetchall()]
+        blocks = []
+        rows = cur.fetchmany(itersize)
+        while rows:
+            blocks.append(
+                pa.table(
+                    [pa.array(values) for values in zip(*rows)],
+                    names=columns,
+                )
+            )
+            rows = cur.fetchmany(itersize)
+
+    if not blocks:
+        table = pa.table({name: pa.array([]) for name in columns})
+    else:
+        # Colunas so com NULL em um bloco sao promovidas ao tipo dos demais.
+        table = pa.concat_tables(blocks, promote_options="default")
+    record_query(
+        sql,
+        params,
+        executed - started,
+        time.perf_counter() - executed,
+        table.num_rows,
+    )
+    return table
 
 
 def fetch_one(
@@ -77,137 +433,102 @@ def fetch_one(
     return rows[0] if rows else {}
 
 
+def build_resumo(rows: list[dict[str, Any]]) -> dict[str, Any]:
+    """Monta KPIs e distribuicoes por status a partir das linhas de RESUMO_SQL."""
+    por_tabela: dict[str, list[dict[str, Any]]] = {}
+    for row in rows:
+        por_tabela.setdefault(row["tabela"], []).append(
+            {"status": row["status"], "total": row["total"]}
+        )
+
+    def por_status(tabela: str) -> list[dict[str, Any]]:
+        return sorted(
+            por_tabela.get(tabela, []),
+            key=lambda row: row["total"],
+            reverse=True,
+        )
+
+    def total(tabela: str, status: Optional[str] = None) -> int:
+        return sum(
+            row["total"]
+            for row in por_tabela.get(tabela, [])
+            if status is None or row["status"] == status
+        )
+
+    return {
+        "kpis": {
+            "pacientes": total("pacientes"),
+            "medicos": total("medicos"),
+            "consultas": total("consultas"),
+            "exames": total("exames"),
+            "internacoes_ativas": total("internacoes", "ativa"),
+            "pacientes_sem_convenio": total("pacientes_sem_convenio"),
+            "exames_pendentes": total("exames", "pendente"),
+            "consultas_agendadas": total("consultas", "agendada"),
+        },
+        "consultas_por_status": por_status("consultas"),
+        "exames_por_status": por_status("exames"),
+        "internacoes_por_status": por_status("internacoes"),
+    }
+
+
+def get_resumo(conn: psycopg2.extensions.connection) -> dict[str, Any]:
+    """KPIs e distribuicoes por status com uma leitura por tabela."""
+    return build_resumo(fetch_rows(conn, RESUMO_SQL))
+
+
+def get_resumo_kpi(conn: psycopg2.extensions.connection) -> dict[str, Any]:
+    """Mesmo resultado de get_resumo lido da tabela kpi_contagens."""
+    return build_resumo(fetch_rows(conn, KPI_RESUMO_SQL))
+
+
 def get_kpis(conn: psycopg2.extensions.connection) -> dict[str, Any]:
     """Indicadores principais do hospital."""
-    return fetch_one(
-        conn,
-        """
-        SELECT
-            (SELECT COUNT(*) FROM pacientes) AS pacientes,
-            (SELECT COUNT(*) FROM medicos) AS medicos,
-            (SELECT COUNT(*) FROM consultas) AS consultas,
-            (SELECT COUNT(*) FROM exames) AS exames,
-            (
-                SELECT COUNT(*)
-                FROM internacoes
-                WHERE data_saida IS NULL
-            ) AS internacoes_ativas,
-            (
-                SELECT COUNT(*)
-                FROM exames
-                WHERE resultado IS NULL
-            ) AS exames_pendentes,
-            (
-                SELECT COUNT(*)
-                FROM consultas
-                WHERE status = 'agendada'
-            ) AS consultas_agendadas
-        """,
-    )
+    return get_resumo(conn)["kpis"]
 
 
 def get_consultas_por_status(
     conn: psycopg2.extensions.connection,
 ) -> list[dict[str, Any]]:
     """Contagem de consultas por status."""
-    return fetch_rows(
-        conn,
-        """
-        SELECT status, COUNT(*) AS total
-        FROM consultas
-        GROUP BY status
-        ORDER BY total DESC
-        """,
-    )
+    return get_resumo(conn)["consultas_por_status"]
 
 
 def get_exames_por_status(
     conn: psycopg2.extensions.connection,
 ) -> list[dict[str, Any]]:
     """Contagem de exames pendentes e com resultado."""
-    return fetch_rows(
-        conn,
-        """
-        SELECT
-            CASE
-                WHEN resultado IS NULL THEN 'pendente'
-                ELSE 'com_resultado'
-            END AS status,
-            COUNT(*) AS total
-        FROM exames
-        GROUP BY status
-        ORDER BY total DESC
-        """,
-    )
+    return get_resumo(conn)["exames_por_status"]
 
 
 def get_internacoes_por_status(
     conn: psycopg2.extensions.connection,
 ) -> list[dict[str, Any]]:
     """Contagem de internacoes abertas e encerradas."""
-    return fetch_rows(
-        conn,
-        """
-        SELECT
-            CASE
-                WHEN data_saida IS NULL THEN 'ativa'
-                ELSE 'encerrada'
-            END AS status,
-            COUNT(*) AS total
-        FROM internacoes
-        GROUP BY status
-        ORDER BY total DESC
-        """,
-    )
+    return get_resumo(conn)["internacoes_por_status"]
 
 
 def get_ultimas_consultas(
     conn: psycopg2.extensions.connection,
     limit: int = 20,
-) -> list[dict[str, Any]]:
-    """Ultimas consultas alteradas."""
-    return fetch_rows(
+    since: Optional[date] = None,
+) -> pa.Table:
+    """Ultimas consultas alteradas desde ``since``, com ids de paciente e medico."""
+    return fetch_columns(
         conn,
-        """
-        SELECT
-            c.id,
-            c.data,
-            c.status,
-            p.nome AS paciente,
-            m.nome AS medico,
-            m.especialidade,
-            c.updated_at
-        FROM consultas c
-        JOIN pacientes p ON p.id = c.paciente_id
-        JOIN medicos m ON m.id = c.medico_id
-        ORDER BY c.updated_at DESC
-        LIMIT %s
-        """,
-        (limit,),
+        ULTIMAS_CONSULTAS_SQL,
+        (since or window_start(), limit),
     )
 
 
 def get_internacoes_ativas(
     conn: psycopg2.extensions.connection,
     limit: int = 20,
-) -> list[dict[str, Any]]:
-    """Internacoes ativas mais recentes."""
-    return fetch_rows(
+) -> pa.Table:
+    """Internacoes ativas mais recentes, com id do paciente."""
+    return fetch_columns(
         conn,
-        """
-        SELECT
-            i.id,
-            p.nome AS paciente,
-            i.data_entrada,
-            i.motivo,
-            i.quarto,
-            i.updated_at
-        FROM internacoes i
-        JOIN pacientes p ON p.id = i.paciente_id
-        WHERE i.data_saida IS NULL
-        ORDER BY i.data_entrada DESC
-        LIMIT %s
-        """,
+        INTERNACOES_ATIVAS_SQL,
         (limit,),
     )
 
@@ -215,23 +536,11 @@ def get_internacoes_ativas(
 def get_pacientes_sem_convenio(
     conn: psycopg2.extensions.connection,
     limit: int = 20,
-) -> list[dict[str, Any]]:
+) -> pa.Table:
     """Pacientes sem convenio associado."""
-    return fetch_rows(
+    return fetch_columns(
         conn,
-        """
-        SELECT
-            p.id,
-            p.nome,
-            p.cpf,
-            p.telefone,
-            p.created_at
-        FROM pacientes p
-        LEFT JOIN pacientes_convenios pc ON pc.paciente_id = p.id
-        WHERE pc.id IS NULL
-        ORDER BY p.created_at DESC
-        LIMIT %s
-        """,
+        PACIENTES_SEM_CONVENIO_SQL,
         (limit,),
     )
 
@@ -240,98 +549,107 @@ def get_internacoes_longas(
     conn: psycopg2.extensions.connection,
     min_days: int = 7,
     limit: int = 20,
-) -> list[dict[str, Any]]:
-    """Internacoes ativas acima de uma quantidade de dias."""
-    return fetch_rows(
+) -> pa.Table:
+    """Internacoes ativas acima de uma quantidade de dias, com id do paciente."""
+    return fetch_columns(
         conn,
-        """
-        SELECT
-            i.id,
-            p.nome AS paciente,
-            i.data_entrada,
-            DATE_PART('day', now() - i.data_entrada)::int AS dias_internado,
-            i.motivo,
-            i.quarto
-        FROM internacoes i
-        JOIN pacientes p ON p.id = i.paciente_id
-        WHERE i.data_saida IS NULL
-          AND i.data_entrada <= now() - (%s || ' days')::interval
-        ORDER BY dias_internado DESC, i.data_entrada ASC
-        LIMIT %s
-        """,
+        INTERNACOES_LONGAS_SQL,
         (min_days, limit),
     )
 
 
+def get_internacoes_longas_total(
+    conn: psycopg2.extensions.connection,
+    min_days: int = 7,
+) -> int:
+    """Quantidade exata de internacoes ativas acima de ``min_days`` dias."""
+    return int(fetch_one(conn, INTERNACOES_LONGAS_TOTAL_SQL, (min_days,)).get("total", 0))
+
+
 def get_ocupacao_por_quarto(
     conn: psycopg2.extensions.connection,
     limit: int = 20,
-) -> list[dict[str, Any]]:
+) -> pa.Table:
     """Ocupacao atual agrupada por quarto."""
-    return fetch_rows(
+    return fetch_columns(
         conn,
-        """
-        SELECT
-            COALESCE(quarto, 'sem_quarto') AS quarto,
-            COUNT(*) AS internacoes_ativas
-        FROM internacoes
-        WHERE data_saida IS NULL
-        GROUP BY COALESCE(quarto, 'sem_quarto')
-        ORDER BY internacoes_ativas DESC, quarto
-        LIMIT %s
-        """,
+        OCUPACAO_POR_QUARTO_SQL,
         (limit,),
     )
 
 
-def get_exames_pendentes_recentes(
+def get_ocupacao_por_quarto_kpi(
     conn: psycopg2.extensions.connection,
     limit: int = 20,
-) -> list[dict[str, Any]]:
-    """Exames pendentes mais recentes."""
-    return fetch_rows(
+) -> pa.Table:
+    """Ocupacao atual por quarto lida da tabela kpi_contagens."""
+    return fetch_columns(
         conn,
-        """
-        SELECT
-            e.id,
-            p.nome AS paciente,
-            e.tipo_exame,
-            e.data,
-            e.created_at
-        FROM exames e
-        JOIN pacientes p ON p.id = e.paciente_id
-        WHERE e.resultado IS NULL
-        ORDER BY e.data DESC
-        LIMIT %s
-        """,
+        KPI_OCUPACAO_POR_QUARTO_SQL,
         (limit,),
     )
 
 
+def get_exames_pendentes_recentes(
+    conn: psycopg2.extensions.connection,
+    limit: int = 20,
+    since: Optional[date] = None,
+) -> pa.Table:
+    """Exames pendentes mais recentes (data desde ``since``), com id do paciente."""
+    return fetch_columns(
+        conn,
+        EXAMES_PENDENTES_RECENTES_SQL,
+        (since or window_start(), limit),
+    )
+
+
 def get_consultas_agendadas_proximas(
     conn: psycopg2.extensions.connection,
     days: int = 7,
     limit: int = 20,
-) -> list[dict[str, Any]]:
-    """Consultas agendadas dentro da janela informada."""
-    return fetch_rows(
+) -> pa.Table:
+    """Consultas agendadas na janela informada, com ids de paciente e medico."""
+    return fetch_columns(
+        conn,
+        CONSULTAS_AGENDADAS_PROXIMAS_SQL,
+        (days, limit),
+    )
+
+
+def get_internacoes_longas_mv(
+    conn: psycopg2.extensions.connection,
+    min_days: int = 7,
+    limit: int = 20,
+) -> pa.Table:
+    """Internacoes longas lidas de mv_internacoes_longas."""
+    return fetch_columns(
+        conn,
+        MV_INTERNACOES_LONGAS_SQL,
+        (min_days, limit),
+    )
+
+
+def get_pacientes_sem_convenio_mv(
+    conn: psycopg2.extensions.connection,
+    limit: int = 20,
+) -> pa.Table:
+    """Pacientes sem convenio lidos de mv_pacientes_sem_convenio."""
+    return fetch_columns(
+        conn,
+        MV_PACIENTES_SEM_CONVENIO_SQL,
+        (limit,),
+    )
+
+
+def get_consultas_agendadas_proximas_mv(
+    conn: psycopg2.extensions.connection,
+    days: int = 7,
+    limit: int = 20,
+) -> pa.Table:
+    """Consultas agendadas lidas de mv_consultas_agendadas_proximas."""
+    return fetch_columns(
         conn,
-        """
-        SELECT
-            c.id,
-            c.data,
-            p.nome AS paciente,
-            m.nome AS medico,
-            m.especialidade,
-            c.motivo
-        FROM consultas c
-        JOIN pacientes p ON p.id = c.paciente_id
-        JOIN medicos m ON m.id = c.medico_id
-        WHERE c.status = 'agendada'
-          AND c.data BETWEEN now() AND now() + (%s || ' days')::interval
-        ORDER BY c.data ASC
-        LIMIT %s
-        """,
+        MV_CONSULTAS_AGENDADAS_PROXIMAS_SQL,
         (days, limit),
     )
 
@@ -398,56 +716,157 @@ def resolve_alert_limits(
 def get_atividade_recente(
     conn: psycopg2.extensions.connection,
     minutes: int = 15,
-) -> list[dict[str, Any]]:
+) -> pa.Table:
     """Atividade recente por tabela baseada em created_at/updated_at."""
-    return fetch_rows(
+    return fetch_columns(
         conn,
-        """
-        WITH eventos AS (
-            SELECT 'pacientes' AS tabela, created_at, updated_at FROM pacientes
-            UNION ALL
-            SELECT 'consultas', created_at, updated_at FROM consultas
-            UNION ALL
-            SELECT 'exames', created_at, updated_at FROM exames
-            UNION ALL
-            SELECT 'internacoes', created_at, updated_at FROM internacoes
-            UNION ALL
-            SELECT 'pacientes_convenios', created_at, updated_at
-            FROM pacientes_convenios
-        )
-        SELECT
-            tabela,
-            COUNT(*) FILTER (
-                WHERE created_at >= now() - (%s || ' minutes')::interval
-            ) AS criados,
-            COUNT(*) FILTER (
-                WHERE updated_at >= now() - (%s || ' minutes')::interval
-                  AND updated_at > created_at
-            ) AS atualizados
-        FROM eventos
-        GROUP BY tabela
-        ORDER BY tabela
-        """,
-        (minutes, minutes),
+        ATIVIDADE_RECENTE_SQL,
+        {"minutes": minutes},
     )
 
 
+def get_atividade_recente_contadores(
+    conn: psycopg2.extensions.connection,
+    minutes: int = 15,
+) -> pa.Table:
+    """Atividade recente por tabela somada dos contadores por minuto."""
+    return fetch_columns(conn, ATIVIDADE_RECENTE_CONTADORES_SQL, {"minutes": minutes})
+
+
+def get_atividade_por_minuto(
+    conn: psycopg2.extensions.connection,
+    minutes: int = 120,
+) -> list[dict[str, Any]]:
+    """Serie por minuto e tabela para os graficos de atividade."""
+    return fetch_rows(conn, ATIVIDADE_POR_MINUTO_SQL, {"minutes": minutes})
+
+
+def pivot_atividade_por_minuto(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Uma linha por minuto com o total de eventos de cada tabela."""
+    tables = sorted({row["tabela"] for row in rows})
+    series: dict[Any, dict[str, Any]] = {}
+    for row in rows:
+        point = series.setdefault(
+            row["minuto"],
+            {"minuto": row["minuto"], **{table: 0 for table in tables}},
+        )
+        point[row["tabela"]] += row["criados"] + row["atualizados"]
+    return [series[minuto] for minuto in sorted(series)]
+
+
+def affected_tables(changed: Iterable[str]) -> set[str]:
+    """Tabelas alteradas mais as derivadas mantidas a partir delas."""
+    changed = set(changed)
+    return changed | {
+        derived
+        for derived, sources in DERIVED_TABLES.items()
+        if changed.intersection(sources)
+    }
+
+
 def get_dashboard_snapshot(
     conn: psycopg2.extensions.connection,
     recent_minutes: int = 15,
+    cache: Optional[QueryCache] = None,
+    history_minutes: int = 120,
+    timer: Optional[QueryTimer] = None,
+    dimensions: Optional[DimensionCache] = None,
+    window_days: Optional[int] = None,
 ) -> dict[str, Any]:
-    """Retorna todos os dados necessarios para uma renderizacao do dashboard."""
-    return {
-        "kpis": get_kpis(conn),
-        "consultas_por_status": get_consultas_por_status(conn),
-        "exames_por_status": get_exames_por_status(conn),
-        "internacoes_por_status": get_internacoes_por_status(conn),
-        "ultimas_consultas": get_ultimas_consultas(conn),
-        "internacoes_ativas": get_internacoes_ativas(conn),
-        "internacoes_longas": get_internacoes_longas(conn),
-        "ocupacao_por_quarto": get_ocupacao_por_quarto(conn),
-        "exames_pendentes_recentes": get_exames_pendentes_recentes(conn),
-        "consultas_agendadas_proximas": get_consultas_agendadas_proximas(conn),
-        "pacientes_sem_convenio": get_pacientes_sem_convenio(conn),
-        "atividade_recente": get_atividade_recente(conn, recent_minutes),
-    }
+    """Retorna todos os dados necessarios para uma renderizacao do dashboard.
+
+    Todas as consultas rodam em uma unica transacao READ ONLY REPEATABLE READ,
+    entao KPIs e listas refletem o mesmo instante do banco. Com ``cache``,
+    paineis cujas tabelas nao mudaram desde a ultima leitura saem do cache
+    (os que dependem de now() sao sempre consultados).
+    Se o extra kpi_summary estiver instalado, KPIs e ocupacao vem dele; com o
+    extra materialized_views, as listas caras vem das views (atualizadas pelo
+    agendador do app, com alguns segundos de atraso). Com activity_counters, a
+    atividade recente e a serie de ``history_minutes`` minutos vem dos
+    contadores por minuto; sem ele a serie fica vazia. Com ``timer``, cada
+    painel consultado no banco (acertos do cache nao contam) tem seus tempos
+    registrados. Os nomes de pacientes e medicos das listas saem de
+    ``dimensions`` (atualizado aqui pela marca d'agua); sem ele, um cache
+    temporario busca os nomes pela chave primaria. Ultimas consultas (por
+    updated_at) e exames pendentes (pela data) olham so os ultimos
+    ``window_days`` dias (padrao DASHBOARD_WINDOW_DAYS).
+    """
+    conn.rollback()
+    versions = read_table_versions(conn) if cache is not None else {}
+    # Parte da chave do cache: as listas com janela expiram na virada do dia.
+    since = window_start(window_days)
+
+    def timed(function: Callable[..., Any], *args: Any) -> Any:
+        if timer is None:
+            return function(conn, *args)
+        with timer.measure(function.__qualname__, conn):
+            return function(conn, *args)
+
+    def cached(function: Callable[..., Any], *args: Any) -> Any:
+        if cache is None:
+            return timed(function, *args)
+        return cache.fetch(
+            function.__name__,
+            args,
+            QUERY_TABLES[function.__name__],
+            versions,
+            lambda: timed(function, *args),
+        )
+
+    try:
+        with conn.cursor() as cur:
+            cur.execute(SNAPSHOT_TRANSACTION_SQL)
+
+        if dimensions is None:
+            dimensions = DimensionCache()
+        else:
+            timed(dimensions.refresh)
+
+        def named(table: Any) -> Any:
+            return dimensions.resolve(conn, table)
+
+        if kpi_summary_available(conn):
+            resumo = cached(get_resumo_kpi)
+            ocupacao = cached(get_ocupacao_por_quarto_kpi)
+        else:
+            resumo = cached(get_resumo)
+            ocupacao = cached(get_ocupacao_por_quarto)
+
+        if materialized_views_available(conn):
+            internacoes_longas = timed(get_internacoes_longas_mv)
+            agendadas = timed(get_consultas_agendadas_proximas_mv)
+            sem_convenio = cached(get_pacientes_sem_convenio_mv)
+        else:
+            internacoes_longas = named(timed(get_internacoes_longas))
+            agendadas = named(timed(get_consultas_agendadas_proximas))
+            sem_convenio = cached(get_pacientes_sem_convenio)
+
+        if activity_counters_available(conn):
+            atividade = timed(get_atividade_recente_contadores, recent_minutes)
+            atividade_por_minuto = timed(get_atividade_por_minuto, history_minutes)
+        else:
+            atividade = timed(get_atividade_recente, recent_minutes)
+            atividade_por_minuto = []
+
+        return {
+            "kpis": {
+                **resumo["kpis"],
+                "internacoes_longas": timed(get_internacoes_longas_total),
+            },
+            "consultas_por_status": resumo["consultas_por_status"],
+            "exames_por_status": resumo["exames_por_status"],
+            "internacoes_por_status": resumo["internacoes_por_status"],
+            "ultimas_consultas": named(cached(get_ultimas_consultas, 20, since)),
+            "internacoes_ativas": named(cached(get_internacoes_ativas)),
+            "internacoes_longas": internacoes_longas,
+            "ocupacao_por_quarto": ocupacao,
+            "exames_pendentes_recentes": named(
+                cached(get_exames_pendentes_recentes, 20, since)
+            ),
+            "consultas_agendadas_proximas": agendadas,
+            "pacientes_sem_convenio": sem_convenio,
+            "atividade_recente": atividade,
+            "atividade_por_minuto": atividade_por_minuto,
+        }
+    finally:
+        conn.rollback()
@@ -0,0 +1,178 @@
+"""
+Cache em memoria dos nomes de pacientes e medicos das listas do dashboard.
+
+As consultas de lista leem apenas as tabelas de fatos (consultas, exames,
+internacoes) e trazem ``paciente_id``/``medico_id``; os nomes saem deste
+cache. Ids ausentes sao buscados pela chave primaria em uma unica consulta
+por dimensao, e a cada snapshot as linhas com ``updated_at`` acima da marca
+d'agua sao relidas, entao renomeacoes aparecem sem varrer a tabela.
+
+Cada dimensao guarda no maximo ``max_entries`` ids, descartando os usados
+ha mais tempo. O cache e usado apenas pela thread do refresher.
+"""
+
+import os
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Optional
+
+import psycopg2
+import pyarrow as pa
+
+from scripts.db_init import load_project_env
+
+# Marca d'agua inicial quando a tabela ainda esta vazia.
+EPOCH = datetime(1970, 1, 1)
+
+
+def load_dimension_config() -> dict:
+    """Carrega o tamanho maximo de cada dimensao do .env."""
+    load_project_env()
+    return {"max_entries": int(os.getenv("DASHBOARD_DIMENSION_CACHE_SIZE", 5000))}
+
+
+class Dimension:
+    """Ids de uma tabela de dimensao mapeados para as colunas exibidas."""
+
+    def __init__(
+        self,
+        table: str,
+        key: str,
+        columns: dict[str, str],
+        max_entries: int = 5000,
+        overlap: float = 30.0,
+    ):
+        self.table = table
+        self.key = key
+        self.columns = columns
+        self.max_entries = max_entries
+        self.overlap = timedelta(seconds=overlap)
+        self.watermark: Optional[datetime] = None
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[int, tuple] = OrderedDict()
+        select = ", ".join(["id", *columns])
+        self.by_id_sql = f"SELECT {select} FROM {table} WHERE id = ANY(%s)"
+        self.changed_sql = (
+            f"SELECT {select}, updated_at FROM {table} "
+            f"WHERE updated_at > %s ORDER BY updated_at"
+        )
+        self.watermark_sql = f"SELECT MAX(updated_at) FROM {table}"
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _store(self, key: int, values: tuple) -> None:
+        self._entries[key] = values
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def refresh(self, conn: psycopg2.extensions.connection) -> int:
+        """Rele as linhas alteradas desde a marca d'agua; retorna quantas.
+
+        Na primeira chamada so posiciona a marca d'agua. As linhas dos ultimos
+        ``overlap`` segundos sao relidas a cada vez, cobrindo transacoes que
+        confirmaram depois de linhas com ``updated_at`` maior.
+        """
+        with conn.cursor() as cur:
+            if self.watermark is None:
+                cur.execute(self.watermark_sql)
+                row = cur.fetchone()
+                self.watermark = row[0] if row and row[0] is not None else EPOCH
+                return 0
+            cur.execute(self.changed_sql, (self.watermark - self.overlap,))
+            rows = cur.fetchall()
+
+        for row in rows:
+            self._store(row[0], tuple(row[1:-1]))
+        if rows:
+            self.watermark = max(self.watermark, rows[-1][-1])
+        return len(rows)
+
+    def lookup(
+        self,
+        conn: psycopg2.extensions.connection,
+        ids: Iterable[Optional[int]],
+    ) -> dict[int, tuple]:
+        """Valores para os ids pedidos, buscando os ausentes em uma consulta."""
+        wanted = {key for key in ids if key is not None}
+        missing = [key for key in wanted if key not in self._entries]
+        self.hits += len(wanted) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            with conn.cursor() as cur:
+                cur.execute(self.by_id_sql, (missing,))
+                for row in cur.fetchall():
+                    self._store(row[0], tuple(row[1:]))
+
+        found = {}
+        for key in wanted:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                found[key] = self._entries[key]
+        return found
+
+
+class DimensionCache:
+    """Nomes de pacientes e medicos para as listas do dashboard."""
+
+    def __init__(self, max_entries: int = 5000, overlap: float = 30.0):
+        self.dimensions = (
+            Dimension("pacientes", "paciente_id", {"nome": "paciente"}, max_entries, overlap),
+            Dimension(
+                "medicos",
+                "medico_id",
+                {"nome": "medico", "especialidade": "especialidade"},
+                max_entries,
+                overlap,
+            ),
+        )
+
+    @classmethod
+    def from_env(cls) -> "DimensionCache":
+        """Cria o cache com DASHBOARD_DIMENSION_CACHE_SIZE."""
+        return cls(**load_dimension_config())
+
+    def refresh(self, conn: psycopg2.extensions.connection) -> int:
+        """Aplica as alteracoes de todas as dimensoes desde a ultima leitura."""
+        return sum(dimension.refresh(conn) for dimension in self.dimensions)
+
+    def resolve(self, conn: psycopg2.extensions.connection, table: Any) -> Any:
+        """Troca as colunas de id pelas colunas de nome, na mesma posicao.
+
+        Tabelas sem colunas de id (ou que nao sao Arrow) voltam inalteradas.
+        """
+        if not isinstance(table, pa.Table):
+            return table
+
+        for dimension in self.dimensions:
+            if dimension.key not in table.column_names:
+                continue
+            ids = table.column(dimension.key).to_pylist()
+            found = dimension.lookup(conn, ids)
+            position = table.column_names.index(dimension.key)
+            table = table.remove_column(position)
+            for offset, name in enumerate(dimension.columns.values()):
+                values = [
+                    found[key][offset] if key in found else None for key in ids
+                ]
+                table = table.add_column(
+                    position + offset,
+                    name,
+                    pa.array(values, type=pa.string()),
+                )
+        return table
+
+    def stats(self) -> list[dict[str, Any]]:
+        """Tamanho, acertos e marca d'agua por dimensao."""
+        return [
+            {
+                "dimensao": dimension.table,
+                "entradas": len(dimension),
+                "acertos": dimension.hits,
+                "faltas": dimension.misses,
+                "marca_dagua": dimension.watermark,
+            }
+            for dimension in self.dimensions
+        ]
@@ -0,0 +1,221 @@
+"""
+Historico recente dos KPIs do dashboard em memoria.
+
+O refresher grava os KPIs de cada snapshot publicado em um buffer circular de
+tamanho fixo (um array NumPy com uma linha por amostra), entao graficos de
+tendencia, taxa de variacao e estimativa de tempo ate o limite critico saem do
+processo, sem consultas historicas no banco. Com ``path`` o buffer e salvo em
+um arquivo .npy local e recarregado ao reiniciar.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from app.dashboard_data import DEFAULT_ALERT_RULES, resolve_alert_limits
+from scripts.db_init import load_project_env
+
+logger = logging.getLogger(__name__)
+
+KPI_FIELDS = (
+    "pacientes",
+    "medicos",
+    "consultas",
+    "consultas_agendadas",
+    "exames",
+    "exames_pendentes",
+    "internacoes_ativas",
+    "internacoes_longas",
+    "pacientes_sem_convenio",
+)
+
+
+def load_history_config() -> dict:
+    """Carrega tamanho do buffer, arquivo e janelas de tendencia do .env."""
+    load_project_env()
+    return {
+        "capacity": int(os.getenv("DASHBOARD_KPI_HISTORY_SIZE", 720)),
+        "path": os.getenv("DASHBOARD_KPI_HISTORY_FILE") or None,
+        "trend_minutes": float(os.getenv("DASHBOARD_KPI_TREND_MINUTES", 15)),
+        "horizon_minutes": float(os.getenv("DASHBOARD_KPI_TREND_HORIZON_MINUTES", 60)),
+    }
+
+
+class KpiHistory:
+    """Buffer circular de amostras (timestamp + KPIs) com persistencia opcional.
+
+    A coluna 0 guarda o timestamp Unix; as demais seguem ``KPI_FIELDS``, com
+    NaN para KPIs ausentes no snapshot. Ao encher, a amostra mais antiga e
+    sobrescrita.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 720,
+        path: Optional[str] = None,
+        trend_minutes: float = 15.0,
+        horizon_minutes: float = 60.0,
+        save_interval: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.capacity = capacity
+        self.path = Path(path) if path else None
+        self.trend_minutes = trend_minutes
+        self.horizon_minutes = horizon_minutes
+        self.save_interval = save_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._data = np.full((capacity, len(KPI_FIELDS) + 1), np.nan)
+        self._next = 0
+        self._count = 0
+        self._saved_at: Optional[float] = None
+        if self.path is not None and self.path.exists():
+            self.load()
+
+    @classmethod
+    def from_env(cls) -> "KpiHistory":
+        """Cria o historico com DASHBOARD_KPI_HISTORY_*."""
+        return cls(**load_history_config())
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, kpis: dict[str, Any]) -> None:
+        """Grava uma amostra, sobrescrevendo a mais antiga se cheio."""
+        row = [timestamp] + [kpis.get(field, np.nan) for field in KPI_FIELDS]
+        with self._lock:
+            self._data[self._next] = row
+            self._next = (self._next + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+        now = self._clock()
+        if self.path is not None and (
+            self._saved_at is None or now - self._saved_at >= self.save_interval
+        ):
+            self.save()
+            self._saved_at = now
+
+    def samples(self) -> np.ndarray:
+        """Copia das amostras em ordem cronologica."""
+        with self._lock:
+            if self._count < self.capacity:
+                return self._data[: self._count].copy()
+            return np.roll(self._data, -self._next, axis=0)
+
+    def series(self, fields: tuple[str, ...] = KPI_FIELDS) -> list[dict[str, Any]]:
+        """Uma linha por amostra com horario e os KPIs pedidos (graficos)."""
+        columns = [KPI_FIELDS.index(field) + 1 for field in fields]
+        return [
+            {
+                "horario": datetime.fromtimestamp(row[0]),
+                **{
+                    field: None if np.isnan(row[column]) else int(row[column])
+                    for field, column in zip(fields, columns)
+                },
+            }
+            for row in self.samples()
+        ]
+
+    def rate_per_minute(self, field: str, window_seconds: float) -> Optional[float]:
+        """Inclinacao (unidades/min) por minimos quadrados na janela recente."""
+        data = self.samples()
+        if not len(data):
+            return None
+        column = data[:, KPI_FIELDS.index(field) + 1]
+        recent = (data[:, 0] >= data[-1, 0] - window_seconds) & ~np.isnan(column)
+        times, values = data[recent, 0], column[recent]
+        if len(times) < 2 or times[-1] == times[0]:
+            return None
+        slope, _ = np.polyfit(times - times[0], values, 1)
+        return float(slope * 60)
+
+    def save(self) -> None:
+        """Grava as amostras em ordem cronologica no arquivo (troca atomica)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(tmp, "wb") as file:
+                np.save(file, self.samples())
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.error(f"Erro ao salvar historico de KPIs em {self.path}: {e}")
+
+    def load(self) -> None:
+        """Recarrega as amostras mais recentes salvas em ``path``."""
+        try:
+            data = np.load(self.path)
+        except (OSError, ValueError) as e:
+            logger.error(f"Erro ao carregar historico de KPIs de {self.path}: {e}")
+            return
+        if data.ndim != 2 or data.shape[1] != self._data.shape[1]:
+            logger.warning(f"Historico de KPIs em {self.path} ignorado: formato diferente")
+            return
+
+        data = data[-self.capacity :]
+        with self._lock:
+            self._data[: len(data)] = data
+            self._count = len(data)
+            self._next = len(data) % self.capacity
+
+
+def get_trend_alerts(
+    history: KpiHistory,
+    thresholds: Optional[dict[str, Any]] = None,
+) -> list[dict[str, Any]]:
+    """Taxa de variacao e tempo estimado ate o limite critico por regra.
+
+    Usa a janela de ``history.trend_minutes``. ``alerta`` fica verdadeiro para
+    KPIs ainda sem alerta critico (valor <= limite, a mesma comparacao de
+    get_operational_alerts) que passariam do limite em ate
+    ``history.horizon_minutes`` mantida a taxa atual.
+    """
+    thresholds = thresholds or {}
+    data = history.samples()
+    if not len(data):
+        return []
+
+    rows = []
+    for rule in DEFAULT_ALERT_RULES:
+        field = rule["valor_kpi"]
+        current = data[-1, KPI_FIELDS.index(field) + 1]
+        if np.isnan(current):
+            continue
+        rate = history.rate_per_minute(field, history.trend_minutes * 60)
+        _, critical = resolve_alert_limits(rule, thresholds)
+        minutes_to_critical = (
+            (critical - current) / rate
+            if rate is not None and rate > 0 and current <= critical
+            else None
+        )
+        rows.append(
+            {
+                "codigo": rule["codigo"],
+                "titulo": rule["titulo"],
+                "valor": int(current),
+                "limite_critico": critical,
+                "variacao_por_min": round(rate, 2) if rate is not None else None,
+                "minutos_ate_critico": (
+                    round(minutes_to_critical, 1)
+                    if minutes_to_critical is not None
+                    else None
+                ),
+                "alerta": (
+                    minutes_to_critical is not None
+                    and minutes_to_critical <= history.horizon_minutes
+                ),
+            }
+        )
+
+    return sorted(
+        rows,
+        key=lambda row: (
+            row["minutos_ate_critico"] is None,
+            row["minutos_ate_critico"] or 0,
+        ),
+    )
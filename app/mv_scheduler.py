@@ -0,0 +1,180 @@
+"""
+Agendador de refresh das materialized views do dashboard.
+
+Cada view tem sua cadencia (config/settings.toml, [materialized_views]). Na
+hora do refresh, a versao das tabelas de origem (contadores de
+pg_stat_user_tables) e comparada com a do ultimo refresh: sem mudanca, o
+refresh e pulado ate a view atingir ``max_age``.
+"""
+
+import logging
+import threading
+import time
+from contextlib import AbstractContextManager
+from typing import Any, Callable, Optional
+
+import psycopg2
+
+from app.dashboard_data import dashboard_connection
+from app.query_cache import read_table_versions
+from scripts.db_init import load_settings
+from scripts.matviews import (
+    MATERIALIZED_VIEWS,
+    load_refresh_schedule,
+    materialized_views_available,
+    refresh_view,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class MaterializedViewScheduler:
+    """Atualiza as views na cadencia configurada, pulando as inalteradas."""
+
+    def __init__(
+        self,
+        schedule: dict[str, dict[str, float]],
+        connection: Callable[[], AbstractContextManager] = dashboard_connection,
+        refresh: Callable[[psycopg2.extensions.connection, str], float] = refresh_view,
+        clock: Callable[[], float] = time.monotonic,
+        tick: float = 1.0,
+    ):
+        self.schedule = schedule
+        self.tick = tick
+        self.available: Optional[bool] = None
+        self._connection = connection
+        self._refresh = refresh
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = {
+            name: {
+                "next_at": 0.0,
+                "signature": None,
+                "refreshed_at": None,
+                "duration": None,
+                "refreshes": 0,
+                "skips": 0,
+                "error": None,
+            }
+            for name in schedule
+        }
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_settings(cls) -> "MaterializedViewScheduler":
+        """Cria o agendador com a secao [materialized_views] do settings.toml."""
+        return cls(load_refresh_schedule(load_settings()))
+
+    def run_due(self) -> list[str]:
+        """Processa as views vencidas e retorna as que foram atualizadas."""
+        now = self._clock()
+        due = [name for name, state in self._state.items() if now >= state["next_at"]]
+        if not due:
+            return []
+
+        refreshed = []
+        with self._connection() as conn:
+            self.available = materialized_views_available(conn)
+            if not self.available:
+                conn.rollback()
+                self._reschedule(due, now)
+                return []
+
+            versions = read_table_versions(conn)
+            for name in due:
+                signature = tuple(
+                    (table, versions.get(table)) for table in MATERIALIZED_VIEWS[name]
+                )
+                if self._fresh(name, signature, now):
+                    with self._lock:
+                        self._state[name]["skips"] += 1
+                    continue
+
+                try:
+                    duration = self._refresh(conn, name)
+                except psycopg2.Error as e:
+                    logger.error(f"Erro ao atualizar {name}: {e}")
+                    with self._lock:
+                        self._state[name]["error"] = str(e).strip()
+                    continue
+
+                with self._lock:
+                    self._state[name].update(
+                        signature=signature,
+                        refreshed_at=self._clock(),
+                        duration=duration,
+                        refreshes=self._state[name]["refreshes"] + 1,
+                        error=None,
+                    )
+                refreshed.append(name)
+
+        self._reschedule(due, now)
+        return refreshed
+
+    def stats(self) -> list[dict[str, Any]]:
+        """Idade, duracao do ultimo refresh e contadores por view."""
+        now = self._clock()
+        with self._lock:
+            state = {name: dict(values) for name, values in self._state.items()}
+
+        return [
+            {
+                "view": name,
+                "cadencia_s": self.schedule[name]["interval"],
+                "idade_s": (
+                    round(now - values["refreshed_at"], 1)
+                    if values["refreshed_at"] is not None
+                    else None
+                ),
+                "ultimo_refresh_ms": (
+                    round(values["duration"] * 1000, 1)
+                    if values["duration"] is not None
+                    else None
+                ),
+                "refreshes": values["refreshes"],
+                "pulados": values["skips"],
+                "erro": values["error"],
+            }
+            for name, values in state.items()
+        ]
+
+    def start(self) -> None:
+        """Inicia a thread do agendador (idempotente)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="dashboard-mv-refresh",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Sinaliza parada e aguarda a thread terminar."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _fresh(self, name: str, signature: tuple, now: float) -> bool:
+        with self._lock:
+            state = self._state[name]
+            return (
+                state["signature"] == signature
+                and state["refreshed_at"] is not None
+                and now - state["refreshed_at"] < self.schedule[name]["max_age"]
+            )
+
+    def _reschedule(self, names: list[str], now: float) -> None:
+        with self._lock:
+            for name in names:
+                self._state[name]["next_at"] = now + self.schedule[name]["interval"]
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_due()
+            except Exception as e:
+                logger.error(f"Erro no agendador de materialized views: {e}")
+            self._stop.wait(self.tick)
@@ -0,0 +1,146 @@
+"""
+Cache das consultas do dashboard com invalidacao por tabela.
+
+Cada entrada guarda o resultado de uma funcao de ``dashboard_data`` para um
+conjunto de parametros, junto com a "versao" das tabelas que ela le. A versao
+vem dos contadores cumulativos de pg_stat_user_tables (ins + upd + del), lidos
+em uma unica consulta barata por atualizacao: se nenhuma tabela da consulta
+mudou, o painel sai do cache.
+
+Os contadores sao publicados pelos backends com atraso de ate alguns
+segundos, por isso toda entrada expira apos ``max_age`` segundos mesmo sem
+mudanca detectada.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+import psycopg2
+
+from scripts.db_init import load_project_env
+
+# Particoes sao somadas na tabela principal (schema particionado).
+TABLE_VERSIONS_SQL = """
+SELECT
+    COALESCE(parent.relname, s.relname) AS tabela,
+    SUM(s.n_tup_ins + s.n_tup_upd + s.n_tup_del) AS versao
+FROM pg_stat_user_tables s
+LEFT JOIN pg_inherits i ON i.inhrelid = s.relid
+LEFT JOIN pg_class parent ON parent.oid = i.inhparent
+WHERE s.schemaname = 'public'
+GROUP BY 1
+"""
+
+
+def load_cache_config() -> dict:
+    """Carrega a idade maxima das entradas do cache do .env."""
+    load_project_env()
+    return {"max_age": float(os.getenv("DASHBOARD_CACHE_MAX_AGE_SECONDS", 60))}
+
+
+def read_table_versions(conn: psycopg2.extensions.connection) -> dict[str, int]:
+    """Le a versao de cada tabela e encerra a transacao.
+
+    O rollback descarta o snapshot de estatisticas da transacao, para que a
+    proxima leitura veja contadores novos.
+    """
+    with conn.cursor() as cur:
+        cur.execute(TABLE_VERSIONS_SQL)
+        rows = cur.fetchall()
+    conn.rollback()
+    return {table: int(version or 0) for table, version in rows}
+
+
+class QueryCache:
+    """Cache de resultados por funcao e parametros, invalidado por tabela."""
+
+    def __init__(
+        self,
+        max_age: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_age = max_age
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: dict[tuple, tuple[tuple, float, Any]] = {}
+        self._stats: dict[str, dict[str, int]] = {}
+
+    @classmethod
+    def from_env(cls) -> "QueryCache":
+        """Cria o cache com DASHBOARD_CACHE_MAX_AGE_SECONDS."""
+        return cls(**load_cache_config())
+
+    def fetch(
+        self,
+        name: str,
+        params: tuple[Hashable, ...],
+        tables: Iterable[str],
+        versions: dict[str, int],
+        compute: Callable[[], Any],
+    ) -> Any:
+        """Retorna o resultado em cache ou executa ``compute`` e o guarda."""
+        key = (name, params)
+        signature = tuple((table, versions.get(table)) for table in sorted(tables))
+        now = self._clock()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            stats = self._stats.setdefault(name, {"hits": 0, "misses": 0})
+            if (
+                entry is not None
+                and entry[0] == signature
+                and now - entry[1] <= self.max_age
+            ):
+                stats["hits"] += 1
+                return entry[2]
+            stats["misses"] += 1
+
+        value = compute()
+        with self._lock:
+            self._entries[key] = (signature, now, value)
+        return value
+
+    def invalidate(self, tables: Iterable[str]) -> int:
+        """Descarta entradas que leem alguma das tabelas; retorna quantas."""
+        tables = set(tables)
+        with self._lock:
+            stale = [
+                key
+                for key, (signature, _, _) in self._entries.items()
+                if any(table in tables for table, _ in signature)
+            ]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        """Descarta todas as entradas (mantem as estatisticas)."""
+        with self._lock:
+            self._entries.clear()
+
+    def hit_rates(self) -> list[dict[str, Any]]:
+        """Acertos, faltas e taxa de acerto por funcao."""
+        with self._lock:
+            stats = {name: dict(values) for name, values in self._stats.items()}
+
+        return [
+            {
+                "consulta": name,
+                **values,
+                "taxa_acerto": round(
+                    values["hits"] / (values["hits"] + values["misses"]),
+                    3,
+                ),
+            }
+            for name, values in sorted(stats.items())
+        ]
+
+    def overall_hit_rate(self) -> Optional[float]:
+        """Taxa de acerto agregada (None antes da primeira consulta)."""
+        rates = self.hit_rates()
+        total = sum(row["hits"] + row["misses"] for row in rates)
+        if not total:
+            return None
+        return sum(row["hits"] for row in rates) / total
@@ -0,0 +1,179 @@
+"""
+Tempos das consultas do dashboard por painel.
+
+Cada funcao de ``dashboard_data`` executada pelo snapshot e medida em duas
+fases: ``execute`` (tempo ate o servidor responder; em cursores do cliente
+inclui a transferencia das linhas) e ``fetch`` (leitura e montagem do
+resultado no Python). As ultimas ``window`` amostras de cada painel ficam em
+memoria para calcular p50/p95. Consultas acima de ``slow_ms`` sao registradas
+no log e, opcionalmente, tem o plano registrado junto: EXPLAIN simples por
+padrao, ou EXPLAIN (ANALYZE, BUFFERS), que executa a consulta lenta de novo,
+so quando pedido. O EXPLAIN roda dentro de um SAVEPOINT na transacao do
+snapshot, entao uma falha nele nao aborta os paineis seguintes.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+import psycopg2
+
+from scripts.db_init import load_project_env
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_PREFIX = "EXPLAIN "
+EXPLAIN_ANALYZE_PREFIX = "EXPLAIN (ANALYZE, BUFFERS) "
+EXPLAIN_SAVEPOINT = "query_timing_explain"
+
+_active = threading.local()
+
+
+def load_timing_config() -> dict:
+    """Carrega janela, limite de lentidao e auto-EXPLAIN do .env."""
+    load_project_env()
+    return {
+        "window": int(os.getenv("DASHBOARD_TIMING_WINDOW", 200)),
+        "slow_ms": float(os.getenv("DASHBOARD_SLOW_QUERY_MS", 500)),
+        "explain": os.getenv("DASHBOARD_SLOW_QUERY_EXPLAIN", "false").lower()
+        in {"1", "true", "yes", "on"},
+        "analyze": os.getenv("DASHBOARD_SLOW_QUERY_EXPLAIN_ANALYZE", "false").lower()
+        in {"1", "true", "yes", "on"},
+    }
+
+
+def record_query(
+    sql: str,
+    params: Any,
+    execute_seconds: float,
+    fetch_seconds: float,
+    rows: int,
+) -> None:
+    """Soma uma consulta a medicao ativa na thread (sem efeito fora dela)."""
+    sample = getattr(_active, "sample", None)
+    if sample is None:
+        return
+    sample["execute"] += execute_seconds
+    sample["fetch"] += fetch_seconds
+    sample["rows"] += rows
+    sample["statements"].append((sql, params))
+
+
+def percentile(values: list[float], fraction: float) -> Optional[float]:
+    """Percentil por posicao mais proxima (None sem valores)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+class QueryTimer:
+    """Amostras recentes de tempo e linhas por painel do dashboard."""
+
+    def __init__(
+        self,
+        window: int = 200,
+        slow_ms: float = 500.0,
+        explain: bool = False,
+        clock: Callable[[], float] = time.perf_counter,
+        analyze: bool = False,
+    ):
+        self.window = window
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.analyze = analyze
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._samples: dict[str, deque] = {}
+        self._slow: dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls) -> "QueryTimer":
+        """Cria o medidor com DASHBOARD_TIMING_WINDOW e DASHBOARD_SLOW_QUERY_*."""
+        return cls(**load_timing_config())
+
+    @contextmanager
+    def measure(
+        self,
+        name: str,
+        conn: Optional[psycopg2.extensions.connection] = None,
+    ) -> Iterator[dict[str, Any]]:
+        """Mede as consultas executadas na thread durante o bloco."""
+        sample = {"execute": 0.0, "fetch": 0.0, "rows": 0, "statements": []}
+        previous = getattr(_active, "sample", None)
+        _active.sample = sample
+        started = self._clock()
+        try:
+            yield sample
+        finally:
+            _active.sample = previous
+        sample["total"] = self._clock() - started
+
+        with self._lock:
+            self._samples.setdefault(name, deque(maxlen=self.window)).append(
+                (sample["total"], sample["execute"], sample["fetch"], sample["rows"])
+            )
+        if sample["total"] * 1000 >= self.slow_ms:
+            self._report_slow(name, sample, conn)
+
+    def _report_slow(
+        self,
+        name: str,
+        sample: dict[str, Any],
+        conn: Optional[psycopg2.extensions.connection],
+    ) -> None:
+        with self._lock:
+            self._slow[name] = self._slow.get(name, 0) + 1
+        logger.warning(
+            f"Painel lento {name}: {sample['total'] * 1000:.0f} ms "
+            f"(execute {sample['execute'] * 1000:.0f} ms, "
+            f"fetch {sample['fetch'] * 1000:.0f} ms, {sample['rows']} linhas)"
+        )
+        if not self.explain or conn is None:
+            return
+
+        prefix = EXPLAIN_ANALYZE_PREFIX if self.analyze else EXPLAIN_PREFIX
+        for sql, params in sample["statements"]:
+            with conn.cursor() as cur:
+                cur.execute(f"SAVEPOINT {EXPLAIN_SAVEPOINT}")
+                try:
+                    cur.execute(prefix + sql, params)
+                    plan = "\n".join(row[0] for row in cur.fetchall())
+                except psycopg2.Error as e:
+                    cur.execute(f"ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}")
+                    logger.error(f"Erro no EXPLAIN de {name}: {e}")
+                    return
+                cur.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+            logger.warning(f"Plano de {name}:\n{plan}")
+
+    def stats(self) -> list[dict[str, Any]]:
+        """p50/p95 de tempo total, execute e fetch, e linhas por painel."""
+        with self._lock:
+            samples = {name: list(values) for name, values in self._samples.items()}
+            slow = dict(self._slow)
+
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 1) if value is not None else None
+
+        rows = []
+        for name, values in sorted(samples.items()):
+            total, execute, fetch, counts = (list(column) for column in zip(*values))
+            rows.append(
+                {
+                    "painel": name,
+                    "amostras": len(values),
+                    "p50_ms": ms(percentile(total, 0.5)),
+                    "p95_ms": ms(percentile(total, 0.95)),
+                    "execute_p50_ms": ms(percentile(execute, 0.5)),
+                    "fetch_p50_ms": ms(percentile(fetch, 0.5)),
+                    "ultimo_ms": ms(total[-1]),
+                    "linhas": counts[-1],
+                    "lentas": slow.get(name, 0),
+                }
+            )
+        return rows
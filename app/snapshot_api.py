@@ -0,0 +1,176 @@
+"""
+API HTTP local com o snapshot do dashboard em JSON.
+
+Serve o ultimo snapshot publicado pelo ``SnapshotRefresher`` (o mesmo que o
+dashboard exibe), entao consumidores externos nao consultam o banco. O corpo
+de cada endpoint e serializado uma vez por snapshot e tem ETag, calculado so
+sobre os dados (sem ``updated_at``): um recalculo com o mesmo conteudo mantem
+o ETag, e pedidos com ``If-None-Match`` igual recebem 304. Com
+``?max_age=N`` o cliente exige um snapshot de no maximo N segundos (nunca
+menos que o intervalo do refresher): se o publicado for mais velho, um unico
+recalculo e feito e compartilhado por todos os pedidos simultaneos.
+
+Endpoints: ``/snapshot`` (snapshot e alertas) e ``/alerts`` (so alertas).
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import pyarrow as pa
+
+from app.dashboard_data import get_operational_alerts
+from app.snapshot_refresher import SnapshotRefresher
+from scripts.db_init import load_project_env
+
+logger = logging.getLogger(__name__)
+
+ENDPOINTS = ("/snapshot", "/alerts")
+
+
+def load_api_config() -> dict:
+    """Carrega endereco e porta da API do .env (porta 0 desativa)."""
+    load_project_env()
+    return {
+        "host": os.getenv("DASHBOARD_API_HOST", "127.0.0.1"),
+        "port": int(os.getenv("DASHBOARD_API_PORT", 0)),
+    }
+
+
+def json_default(value: Any) -> Any:
+    """Converte tabelas Arrow, datas e Decimal para tipos JSON."""
+    if isinstance(value, pa.Table):
+        return value.to_pylist()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Tipo nao serializavel: {type(value).__name__}")
+
+
+def encode_body(path: str, published: dict[str, Any]) -> tuple[bytes, str]:
+    """Corpo JSON de um endpoint e ETag dos dados (sem ``updated_at``)."""
+    snapshot = published["snapshot"]
+    content: dict[str, Any] = {"alerts": get_operational_alerts(snapshot)}
+    if path == "/snapshot":
+        content["snapshot"] = snapshot
+    payload = json.dumps(content, default=json_default, ensure_ascii=False).encode()
+    updated_at = datetime.fromtimestamp(published["updated_at"]).isoformat()
+    body = b'{"updated_at": "' + updated_at.encode() + b'", ' + payload[1:]
+    return body, f'"{hashlib.sha1(payload).hexdigest()}"'
+
+
+class SnapshotApi:
+    """Servidor HTTP em thread propria sobre um ``SnapshotRefresher``."""
+
+    def __init__(
+        self,
+        refresher: SnapshotRefresher,
+        host: str = "127.0.0.1",
+        port: int = 8600,
+    ):
+        self.refresher = refresher
+        self.host = host
+        self.port = port
+        self._lock = threading.Lock()
+        self._encoded: dict[str, tuple[float, bytes, str]] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def encoded(self, path: str, published: dict[str, Any]) -> tuple[bytes, str]:
+        """Corpo e ETag do endpoint, serializados uma vez por snapshot."""
+        with self._lock:
+            cached = self._encoded.get(path)
+            if cached is not None and cached[0] == published["updated_at"]:
+                return cached[1], cached[2]
+            body, etag = encode_body(path, published)
+            self._encoded[path] = (published["updated_at"], body, etag)
+        return body, etag
+
+    def respond(
+        self,
+        target: str,
+        if_none_match: Optional[str] = None,
+    ) -> tuple[int, dict[str, str], bytes]:
+        """Status, cabecalhos e corpo para um GET em ``target``."""
+        url = urlsplit(target)
+        if url.path not in ENDPOINTS:
+            return 404, {}, b""
+
+        query = parse_qs(url.query)
+        if "max_age" in query:
+            try:
+                max_age = float(query["max_age"][0])
+            except ValueError:
+                return 400, {}, b"max_age invalido"
+            if not math.isfinite(max_age):
+                return 400, {}, b"max_age invalido"
+            # Abaixo do intervalo do refresher, cada pedido forcaria um recalculo.
+            self.refresher.ensure_fresh(max(max_age, self.refresher.interval))
+
+        published = self.refresher.latest()
+        if published is None:
+            return 503, {"Retry-After": "5"}, b"snapshot ainda nao disponivel"
+
+        body, etag = self.encoded(url.path, published)
+        headers = {
+            "ETag": etag,
+            "Age": str(int(published["age"])),
+            "Cache-Control": (
+                f"max-age={max(int(self.refresher.interval - published['age']), 0)}"
+            ),
+        }
+        if if_none_match is not None and etag in {
+            tag.strip() for tag in if_none_match.split(",")
+        }:
+            return 304, headers, b""
+        return 200, {**headers, "Content-Type": "application/json"}, body
+
+    def start(self) -> None:
+        """Inicia o servidor em uma thread daemon (idempotente)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                status, headers, body = api.respond(
+                    self.path,
+                    self.headers.get("If-None-Match"),
+                )
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                logger.debug(format % args)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name="dashboard-snapshot-api",
+            daemon=True,
+        )
+        self._thread.start()
+        logger.info(f"API de snapshot em http://{self.host}:{self.port}")
+
+    def stop(self) -> None:
+        """Encerra o servidor e aguarda a thread."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,238 @@
+"""
+Atualizacao do snapshot do dashboard em segundo plano.
+
+Uma unica thread por processo calcula o snapshot e publica a copia mais
+recente. As sessoes do Streamlit apenas leem essa copia, entao a carga no
+PostgreSQL nao cresce com o numero de usuarios. O recalculo acontece em
+intervalo fixo ou, com DASHBOARD_LISTEN, quando o stream avisa uma mudanca
+pelo canal de LISTEN/NOTIFY.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from app.dashboard_data import (
+    affected_tables,
+    dashboard_connection,
+    get_dashboard_snapshot,
+)
+from app.dimension_cache import DimensionCache
+from app.kpi_history import KpiHistory
+from app.query_cache import QueryCache
+from app.query_timing import QueryTimer
+from scripts.change_notify import ChangeListener, load_notify_config
+from scripts.db_init import load_project_env
+
+logger = logging.getLogger(__name__)
+
+
+def load_refresher_config() -> dict:
+    """Carrega intervalo de atualizacao e janelas de atividade do .env."""
+    load_project_env()
+    return {
+        "interval": float(os.getenv("DASHBOARD_REFRESH_SECONDS", 5)),
+        "recent_minutes": int(os.getenv("DASHBOARD_RECENT_MINUTES", 15)),
+        "history_minutes": int(os.getenv("DASHBOARD_ACTIVITY_HISTORY_MINUTES", 120)),
+        "max_idle": float(os.getenv("DASHBOARD_LISTEN_MAX_IDLE_SECONDS", 300)),
+    }
+
+
+def listen_enabled() -> bool:
+    """Indica se DASHBOARD_LISTEN pede atualizacao por notificacao."""
+    load_project_env()
+    return os.getenv("DASHBOARD_LISTEN", "false").lower() in {"1", "true", "yes", "on"}
+
+
+def compute_snapshot(
+    recent_minutes: int,
+    cache: Optional[QueryCache] = None,
+    history_minutes: int = 120,
+    timer: Optional[QueryTimer] = None,
+    dimensions: Optional[DimensionCache] = None,
+) -> dict[str, Any]:
+    """Calcula um snapshot com uma conexao do pool do dashboard."""
+    with dashboard_connection() as conn:
+        return get_dashboard_snapshot(
+            conn,
+            recent_minutes=recent_minutes,
+            cache=cache,
+            history_minutes=history_minutes,
+            timer=timer,
+            dimensions=dimensions,
+        )
+
+
+class SnapshotRefresher:
+    """Calcula o snapshot periodicamente e publica a copia mais recente.
+
+    A publicacao troca uma unica referencia, entao leitores nunca veem um
+    snapshot pela metade. Em caso de erro o ultimo snapshot valido continua
+    publicado e o erro fica disponivel em ``last_error``. Com ``history``, os
+    KPIs de cada snapshot publicado entram no historico em memoria.
+
+    Com ``listener``, a thread fica parada ate chegar um aviso de mudanca (ou
+    passar ``max_idle`` segundos) e invalida no cache apenas os paineis das
+    tabelas avisadas antes de recalcular.
+    """
+
+    def __init__(
+        self,
+        interval: float = 5.0,
+        recent_minutes: int = 15,
+        compute: Callable[
+            [
+                int,
+                Optional[QueryCache],
+                int,
+                Optional[QueryTimer],
+                Optional[DimensionCache],
+            ],
+            dict[str, Any],
+        ] = None,
+        clock: Callable[[], float] = time.time,
+        cache: Optional[QueryCache] = None,
+        history_minutes: int = 120,
+        listener: Optional[ChangeListener] = None,
+        max_idle: float = 300.0,
+        timer: Optional[QueryTimer] = None,
+        history: Optional[KpiHistory] = None,
+        dimensions: Optional[DimensionCache] = None,
+    ):
+        self.interval = interval
+        self.recent_minutes = recent_minutes
+        self.history_minutes = history_minutes
+        self.listener = listener
+        self.max_idle = max_idle
+        self.last_changes: dict[str, dict[str, int]] = {}
+        self.cache = cache
+        self.timer = timer
+        self.history = history
+        self.dimensions = dimensions
+        self._compute = compute or compute_snapshot
+        self._clock = clock
+        self._published: Optional[dict[str, Any]] = None
+        self._refresh_lock = threading.Lock()
+        self.last_error: Optional[str] = None
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> "SnapshotRefresher":
+        """Cria o refresher com cache, medidor, historico e listener do .env."""
+        listener = (
+            ChangeListener(load_notify_config()["channel"]) if listen_enabled() else None
+        )
+        return cls(
+            **load_refresher_config(),
+            cache=QueryCache.from_env(),
+            listener=listener,
+            timer=QueryTimer.from_env(),
+            history=KpiHistory.from_env(),
+            dimensions=DimensionCache.from_env(),
+        )
+
+    def refresh(self) -> bool:
+        """Calcula e publica um novo snapshot. Retorna False em caso de erro."""
+        with self._refresh_lock:
+            return self._refresh()
+
+    def ensure_fresh(self, max_age: float) -> bool:
+        """Recalcula se o snapshot publicado tiver mais de ``max_age`` segundos.
+
+        Chamadas simultaneas esperam o mesmo recalculo em vez de repeti-lo.
+        Retorna False se o recalculo falhar.
+        """
+        with self._refresh_lock:
+            published = self.latest()
+            if published is not None and published["age"] <= max_age:
+                return True
+            return self._refresh()
+
+    def _refresh(self) -> bool:
+        started = time.monotonic()
+        try:
+            snapshot = self._compute(
+                self.recent_minutes,
+                self.cache,
+                self.history_minutes,
+                self.timer,
+                self.dimensions,
+            )
+        except Exception as e:
+            logger.error(f"Erro ao atualizar snapshot do dashboard: {e}")
+            self.last_error = str(e)
+            self._ready.set()
+            return False
+
+        self._published = {
+            "snapshot": snapshot,
+            "updated_at": self._clock(),
+            "duration": time.monotonic() - started,
+        }
+        if self.history is not None:
+            self.history.append(self._published["updated_at"], snapshot["kpis"])
+        self.last_error = None
+        self._ready.set()
+        return True
+
+    def latest(self) -> Optional[dict[str, Any]]:
+        """Ultimo snapshot publicado com sua idade em segundos (ou None)."""
+        published = self._published
+        if published is None:
+            return None
+        return {
+            **published,
+            "age": max(self._clock() - published["updated_at"], 0.0),
+        }
+
+    def wait(self, timeout: float) -> bool:
+        """Aguarda a primeira tentativa de atualizacao terminar."""
+        return self._ready.wait(timeout)
+
+    def start(self) -> None:
+        """Inicia a thread de atualizacao (idempotente)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="dashboard-snapshot",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Sinaliza parada e aguarda a thread terminar."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wait_for_changes(self) -> bool:
+        """Bloqueia ate um aviso de mudanca; False se so passou ``max_idle``."""
+        deadline = time.monotonic() + self.max_idle
+        while not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            changes = self.listener.wait(min(remaining, 1.0))
+            if changes:
+                self.last_changes = changes
+                if self.cache is not None:
+                    self.cache.invalidate(affected_tables(changes))
+                return True
+        return False
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.refresh()
+            if self.listener is not None:
+                self.wait_for_changes()
+            else:
+                self._stop.wait(max(self.interval - (time.monotonic() - started), 0.0))
+        if self.listener is not None:
+            self.listener.close()
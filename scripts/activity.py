@@ -0,0 +1,53 @@
+"""
+Contadores de atividade por minuto (extra "activity_counters").
+
+atividade_por_minuto é mantida pelos triggers de sql/06_activity_counters.sql;
+aqui fica a poda por retenção, executada periodicamente pelo stream.
+"""
+
+import logging
+import os
+
+import psycopg2
+
+from scripts.db_init import load_project_env
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_COUNTERS_AVAILABLE_SQL = (
+    "SELECT to_regclass('public.atividade_por_minuto') IS NOT NULL"
+)
+
+PRUNE_ACTIVITY_SQL = "SELECT atividade_podar(make_interval(hours => %s))"
+
+
+def load_activity_config() -> dict:
+    """Carrega a retenção dos contadores de atividade do .env."""
+    load_project_env()
+    return {"retention_hours": int(os.getenv("ACTIVITY_RETENTION_HOURS", 24))}
+
+
+def activity_counters_available(conn: psycopg2.extensions.connection) -> bool:
+    """Indica se o extra activity_counters está instalado no banco."""
+    with conn.cursor() as cur:
+        cur.execute(ACTIVITY_COUNTERS_AVAILABLE_SQL)
+        return bool(cur.fetchone()[0])
+
+
+def prune_activity(
+    conn: psycopg2.extensions.connection,
+    retention_hours: int,
+) -> int:
+    """Remove minutos mais antigos que a retenção e retorna quantas linhas."""
+    try:
+        with conn.cursor() as cur:
+            cur.execute(PRUNE_ACTIVITY_SQL, (retention_hours,))
+            removed = int(cur.fetchone()[0])
+        conn.commit()
+    except psycopg2.Error:
+        conn.rollback()
+        raise
+
+    if removed:
+        logger.info(f"Contadores de atividade: {removed} minutos removidos")
+    return removed
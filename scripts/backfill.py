@@ -0,0 +1,527 @@
+"""
+Histórico sintético offline: N dias de atividade hospitalar em Parquet.
+
+Simula, num relógio próprio e sem banco, as inserções do stream (mesma
+proporção entre tabelas de ``STREAM_WEIGHTS``) e o ciclo de vida de cada
+linha:
+
+- consulta agendada -> realizada, cancelada ou faltou;
+- exame sem resultado -> resultado;
+- internação sem alta -> alta após 1 a 10 dias;
+- paciente com trocas de telefone/endereço ao longo do ano seguinte.
+
+Grava o changelog e o estado final das tabelas, particionados por dia:
+
+    <saida>/changelog/<tabela>/dt=AAAA-MM-DD/part-<seq>.parquet
+    <saida>/state/<tabela>/dt=<dia de criação>/part-<bloco>.parquet
+
+O changelog segue a camada bronze do cli cdc-consume (``_op`` e
+``_commit_ts`` seguidos das colunas), com tipos nativos. Cada UPDATE traz a
+imagem completa da linha naquele instante.
+
+Os volumes diários são sorteados antes (fim de semana e madrugada com menos
+movimento), o que fixa as faixas de ids de cada dia; depois cada dia é
+gerado de forma independente, em paralelo, e todo o ciclo de vida de uma
+linha é decidido pelo dia que a criou. Transições que caem em dias seguintes
+vão direto para a partição daquele dia, e as posteriores ao fim da simulação
+ficam de fora. A memória é limitada por blocos de até ``chunk_rows`` linhas
+por tabela.
+
+Como cada dia de origem grava um pedaço em cada dia de destino, uma segunda
+passada junta os pedaços de cada partição do changelog em arquivos de até
+``chunk_rows`` linhas, ordenados por ``_commit_ts``; sem ela um ano de
+histórico deixaria centenas de arquivos pequenos por partição.
+"""
+
+import multiprocessing
+import os
+import random
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from scripts.data_gen import (
+    MOTIVOS_CONSULTA,
+    MOTIVOS_INTERNACAO,
+    QUARTOS,
+    RESULTADOS_ATUALIZACAO_EXAME,
+    STATUS_CONSULTA,
+    STATUS_CONSULTA_FINAIS,
+    STATUS_CONSULTA_PESOS,
+    TIPOS_EXAME,
+    generate_medico,
+    generate_paciente,
+    set_random_seed,
+)
+from scripts.db_init import load_project_env
+from scripts.event_emitter import cpf_from_ids
+from scripts.stream import EVENT_TABLES, STREAM_EVENTS, STREAM_WEIGHTS
+
+HOUR_US = 3_600 * 1_000_000
+DAY_US = 24 * HOUR_US
+
+# Proporção de inserções por tabela, como no stream.
+INSERT_SHARES = {
+    EVENT_TABLES[event]: weight
+    for event, weight in zip(STREAM_EVENTS, STREAM_WEIGHTS)
+    if event.startswith("insert_")
+}
+
+# Trocas de telefone/endereço por paciente no ano após o cadastro
+# (update_paciente / insert_paciente no stream).
+PACIENTE_UPDATES = dict(zip(STREAM_EVENTS, STREAM_WEIGHTS))["update_paciente"] / INSERT_SHARES["pacientes"]
+
+# Movimento por hora do dia (pico das 8h às 18h) e por dia da semana (seg=0).
+HOUR_PROFILE = np.array(
+    [1, 1, 1, 1, 1, 2, 4, 7, 10, 10, 10, 9, 7, 8, 10, 10, 9, 8, 6, 4, 3, 2, 2, 1],
+    dtype=np.float64,
+)
+HOUR_PROFILE /= HOUR_PROFILE.sum()
+WEEKDAY_FACTOR = np.array([1.0, 1.0, 1.0, 1.0, 0.95, 0.55, 0.35])
+
+# Desfechos de consultas agendadas, com os pesos de STATUS_CONSULTA.
+_FINAL_STATUS = np.array([STATUS_CONSULTA.index(status) for status in STATUS_CONSULTA_FINAIS])
+_FINAL_WEIGHTS = np.array([STATUS_CONSULTA_PESOS[i] for i in _FINAL_STATUS])
+_FINAL_WEIGHTS /= _FINAL_WEIGHTS.sum()
+
+TIMESTAMP_COLUMNS = {"data_cadastro", "data", "data_entrada", "data_saida", "created_at", "updated_at"}
+DATE_COLUMNS = {"nascimento"}
+
+# Colunas de texto guardadas como índices (-1 = NULL) em um vocabulário.
+VOCABULARIES = {
+    ("consultas", "motivo"): MOTIVOS_CONSULTA,
+    ("consultas", "status"): STATUS_CONSULTA,
+    ("exames", "tipo_exame"): TIPOS_EXAME,
+    ("exames", "resultado"): RESULTADOS_ATUALIZACAO_EXAME,
+    ("internacoes", "motivo"): MOTIVOS_INTERNACAO,
+    ("internacoes", "quarto"): QUARTOS,
+}
+
+# Pedaços do changelog gravados por dia de origem, antes da compactação.
+PIECE_PREFIX = "piece-"
+
+# Pools de nome/telefone/endereço, criados uma vez por processo.
+_POOLS: dict[str, list[str]] = {}
+
+
+def load_backfill_config() -> dict:
+    """Carrega saída, volume diário, blocos e processos do .env."""
+    load_project_env()
+    return {
+        "output_dir": os.getenv("BACKFILL_OUTPUT_DIR", "data/backfill"),
+        "inserts_per_day": int(os.getenv("BACKFILL_INSERTS_PER_DAY", 50_000)),
+        "chunk_rows": int(os.getenv("BACKFILL_CHUNK_ROWS", 1_000_000)),
+        "pool_size": int(os.getenv("BACKFILL_POOL_SIZE", 4096)),
+        "workers": int(os.getenv("BACKFILL_WORKERS", 0)) or os.cpu_count() or 1,
+    }
+
+
+def _init_worker(pool_size: int, seed: int) -> None:
+    set_random_seed(seed)
+    pacientes = [generate_paciente() for _ in range(pool_size)]
+    _POOLS["nome"] = [p["nome"] for p in pacientes]
+    _POOLS["telefone"] = [p["telefone"] for p in pacientes]
+    _POOLS["endereco"] = [p["endereco"] for p in pacientes]
+
+
+def daily_counts(
+    days: int,
+    start: date,
+    inserts_per_day: int,
+    seed: int,
+) -> dict[str, np.ndarray]:
+    """Inserções por tabela e dia (Poisson sobre o perfil semanal)."""
+    rng = np.random.default_rng([seed, 0])
+    weekday = (start.weekday() + np.arange(days)) % 7
+    expected = inserts_per_day * WEEKDAY_FACTOR[weekday]
+    total = sum(INSERT_SHARES.values())
+    return {
+        table: rng.poisson(expected * share / total).astype(np.int64)
+        for table, share in INSERT_SHARES.items()
+    }
+
+
+def day_specs(
+    days: int,
+    start: date,
+    counts: dict[str, np.ndarray],
+    initial_pacientes: int,
+    medicos: int,
+) -> list[dict[str, Any]]:
+    """Faixas de ids e pacientes disponíveis de cada dia.
+
+    O dia -1 cria os ``initial_pacientes`` já existentes no início.
+    """
+    specs = [
+        {
+            "day": start - timedelta(days=1),
+            "counts": {table: (initial_pacientes if table == "pacientes" else 0) for table in counts},
+            "first_id": dict.fromkeys(counts, 1),
+            "pacientes_before": 0,
+            "medicos": medicos,
+        }
+    ]
+    first = {
+        table: 1 + (initial_pacientes if table == "pacientes" else 0) + np.concatenate(([0], np.cumsum(values)[:-1]))
+        for table, values in counts.items()
+    }
+    for offset in range(days):
+        specs.append(
+            {
+                "day": start + timedelta(days=offset),
+                "counts": {table: int(values[offset]) for table, values in counts.items()},
+                "first_id": {table: int(first[table][offset]) for table in counts},
+                "pacientes_before": int(first["pacientes"][offset]) - 1,
+                "medicos": medicos,
+            }
+        )
+    return specs
+
+
+def _day_start_us(day: date) -> int:
+    return int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()) * 1_000_000
+
+
+def _intraday(rng: np.random.Generator, size: int) -> np.ndarray:
+    """Instantes (µs desde a meia-noite) com o perfil de HOUR_PROFILE."""
+    hours = rng.choice(24, size=size, p=HOUR_PROFILE)
+    return hours * HOUR_US + rng.integers(0, HOUR_US, size)
+
+
+def _uniform(rng: np.random.Generator, low: np.ndarray | int, high: np.ndarray | int, size: int) -> np.ndarray:
+    return (low + rng.random(size) * (np.asarray(high) - low)).astype(np.int64)
+
+
+def _build(table: str, ids: np.ndarray, created: np.ndarray, rng: np.random.Generator, spec: dict) -> tuple[dict, list]:
+    """Colunas da inserção e eventos (linha, instante, coluna, valor) da tabela."""
+    size = len(ids)
+    rows = np.arange(size)
+    pacientes = max(spec["pacientes_before"], 1)
+    events = []
+
+    if table == "pacientes":
+        pool = len(_POOLS["nome"])
+        base = {
+            "nome": rng.integers(0, pool, size),
+            "nascimento": (created // DAY_US) - 18 * 365 - rng.integers(0, 82 * 365, size),
+            "cpf": ids,
+            "telefone": rng.integers(0, pool, size),
+            "endereco": rng.integers(0, pool, size),
+            "data_cadastro": created,
+        }
+        updates = rng.poisson(PACIENTE_UPDATES, size)
+        row = np.repeat(rows, updates)
+        ts = created[row] + rng.integers(0, 365 * DAY_US, len(row))
+        telefone = rng.random(len(row)) < 0.5
+        values = rng.integers(0, pool, len(row))
+        events.append((row[telefone], ts[telefone], "telefone", values[telefone]))
+        events.append((row[~telefone], ts[~telefone], "endereco", values[~telefone]))
+
+    elif table == "consultas":
+        data = created + _uniform(rng, HOUR_US, 30 * DAY_US, size)
+        base = {
+            "paciente_id": 1 + rng.integers(0, pacientes, size),
+            "medico_id": 1 + rng.integers(0, max(spec["medicos"], 1), size),
+            "data": data,
+            "motivo": rng.integers(0, len(MOTIVOS_CONSULTA), size),
+            "status": np.full(size, STATUS_CONSULTA.index("agendada")),
+        }
+        final = rng.choice(_FINAL_STATUS, size=size, p=_FINAL_WEIGHTS)
+        cancelada = final == STATUS_CONSULTA.index("cancelada")
+        ts = np.where(
+            cancelada,
+            _uniform(rng, created, data, size),
+            data + rng.integers(0, 2 * HOUR_US, size),
+        )
+        events.append((rows, ts, "status", final))
+
+    elif table == "exames":
+        data = created + rng.integers(0, 7 * DAY_US, size)
+        base = {
+            "paciente_id": 1 + rng.integers(0, pacientes, size),
+            "tipo_exame": rng.integers(0, len(TIPOS_EXAME), size),
+            "data": data,
+            "resultado": np.full(size, -1),
+        }
+        ts = data + _uniform(rng, 2 * HOUR_US, 72 * HOUR_US, size)
+        events.append((rows, ts, "resultado", rng.integers(0, len(RESULTADOS_ATUALIZACAO_EXAME), size)))
+
+    else:  # internacoes
+        base = {
+            "paciente_id": 1 + rng.integers(0, pacientes, size),
+            "data_entrada": created,
+            "data_saida": np.full(size, -1),
+            "motivo": rng.integers(0, len(MOTIVOS_INTERNACAO), size),
+            "quarto": rng.integers(0, len(QUARTOS), size),
+        }
+        alta = created + rng.integers(1, 11, size) * DAY_US
+        events.append((rows, alta, "data_saida", alta))
+
+    return {"id": ids, **base, "created_at": created, "updated_at": created}, events
+
+
+def _replay(
+    base: dict[str, np.ndarray],
+    events: list,
+    end_us: int,
+) -> tuple[dict[str, np.ndarray], dict[str, np.ndarray]]:
+    """Imagens completas de cada UPDATE e estado final no fim da simulação.
+
+    Os eventos são ordenados por linha e instante; para cada coluna alterada,
+    o último valor até cada evento (da mesma linha) é propagado adiante.
+    """
+    row = np.concatenate([e[0] for e in events])
+    ts = np.concatenate([e[1] for e in events])
+    column = np.concatenate([np.full(len(e[0]), i) for i, e in enumerate(events)])
+    value = np.concatenate([e[3] for e in events])
+
+    keep = ts <= end_us
+    row, ts, column, value = row[keep], ts[keep], column[keep], value[keep]
+    order = np.lexsort((ts, row))
+    row, ts, column, value = row[order], ts[order], column[order], value[order]
+
+    positions = np.arange(len(row))
+    is_start = np.r_[True, row[1:] != row[:-1]] if len(row) else np.zeros(0, bool)
+    group_start = np.maximum.accumulate(np.where(is_start, positions, 0))
+
+    updates = {name: values[row] for name, values in base.items()}
+    updates["updated_at"] = ts
+    for index, (_, _, name, _) in enumerate(events):
+        changed = np.where(column == index, positions, -1)
+        last = np.maximum.accumulate(changed) if len(changed) else changed
+        valid = last >= group_start
+        updates[name] = np.where(valid, value[np.maximum(last, 0)], updates[name])
+
+    state = {name: values.copy() for name, values in base.items()}
+    if len(row):
+        is_last = np.r_[row[1:] != row[:-1], True]
+        for name in updates:
+            if name in state:
+                state[name][row[is_last]] = updates[name][is_last]
+    return updates, state
+
+
+def _arrow(table: str, columns: dict[str, np.ndarray]) -> pa.Table:
+    """Converte as colunas numéricas para tipos do schema."""
+    arrays = {}
+    for name, values in columns.items():
+        if name == "_op":
+            arrays[name] = pa.DictionaryArray.from_arrays(
+                pa.array(values, pa.int8()), pa.array(["c", "u"])
+            )
+        elif name == "cpf":
+            arrays[name] = pa.array(cpf_from_ids(values))
+        elif name in DATE_COLUMNS:
+            arrays[name] = pa.array(values.astype(np.int32), pa.date32())
+        elif name in TIMESTAMP_COLUMNS or name == "_commit_ts":
+            arrays[name] = pa.array(values, pa.timestamp("us", tz="UTC"), mask=values < 0)
+        elif (table, name) in VOCABULARIES or name in _POOLS:
+            vocabulary = VOCABULARIES.get((table, name)) or _POOLS[name]
+            arrays[name] = pa.DictionaryArray.from_arrays(
+                pa.array(values.astype(np.int32), mask=values < 0),
+                pa.array(vocabulary),
+            )
+        else:
+            arrays[name] = pa.array(values, pa.int64())
+    return pa.table(arrays)
+
+
+def _write(path: Path, table: pa.Table) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    pq.write_table(table, tmp)
+    os.replace(tmp, path)
+    return path.stat().st_size
+
+
+def _simulate_chunk(
+    root: Path,
+    table: str,
+    spec: dict,
+    chunk: int,
+    ids: np.ndarray,
+    rng: np.random.Generator,
+    end_us: int,
+) -> dict[str, int]:
+    day = spec["day"]
+    created = _day_start_us(day) + np.sort(_intraday(rng, len(ids)))
+    base, events = _build(table, ids, created, rng, spec)
+    updates, state = _replay(base, events, end_us)
+
+    changelog = {
+        "_op": np.concatenate([np.zeros(len(ids), np.int8), np.ones(len(updates["id"]), np.int8)]),
+        "_commit_ts": np.concatenate([created, updates["updated_at"]]),
+    }
+    for name, values in base.items():
+        changelog[name] = np.concatenate([values, updates[name]])
+
+    stats = {"changes": 0, "updates": len(updates["id"]), "files": 0, "bytes": 0}
+    target_day = changelog["_commit_ts"] // DAY_US
+    order = np.lexsort((changelog["_commit_ts"], target_day))
+    target_day = target_day[order]
+    bounds = np.flatnonzero(np.r_[True, target_day[1:] != target_day[:-1], True])
+    for begin, end in zip(bounds[:-1], bounds[1:]):
+        index = order[begin:end]
+        dt = date(1970, 1, 1) + timedelta(days=int(target_day[begin]))
+        path = root / "changelog" / table / f"dt={dt}" / f"{PIECE_PREFIX}{day}-{chunk:04d}.parquet"
+        stats["bytes"] += _write(path, _arrow(table, {k: v[index] for k, v in changelog.items()}))
+        stats["files"] += 1
+        stats["changes"] += len(index)
+
+    path = root / "state" / table / f"dt={day}" / f"part-{chunk:04d}.parquet"
+    stats["bytes"] += _write(path, _arrow(table, state))
+    stats["files"] += 1
+    return stats
+
+
+def simulate_day(options: dict[str, Any]) -> dict[str, Any]:
+    """Gera todas as tabelas de um dia, em blocos de ``chunk_rows`` linhas."""
+    spec = options["spec"]
+    totals = {"day": spec["day"], "changes": 0, "updates": 0, "files": 0, "bytes": 0}
+    for code, table in enumerate(sorted(spec["counts"])):
+        count = spec["counts"][table]
+        for chunk, begin in enumerate(range(0, count, options["chunk_rows"])):
+            size = min(options["chunk_rows"], count - begin)
+            rng = np.random.default_rng(
+                [options["seed"], spec["day"].toordinal(), code, chunk]
+            )
+            ids = spec["first_id"][table] + begin + np.arange(size, dtype=np.int64)
+            stats = _simulate_chunk(
+                Path(options["root"]), table, spec, chunk, ids, rng, options["end_us"]
+            )
+            for key, value in stats.items():
+                totals[key] += value
+    return totals
+
+
+def compact_partition(options: dict[str, Any]) -> dict[str, int]:
+    """Junta os pedaços de uma partição do changelog em arquivos ``part-<seq>``.
+
+    Os pedaços (em ordem de dia de origem e bloco) são agrupados até
+    ``chunk_rows`` linhas; cada grupo vira um arquivo ordenado por
+    ``_commit_ts``. Retorna a variação de arquivos e bytes.
+    """
+    directory = Path(options["directory"])
+    pieces = sorted(directory.glob(f"{PIECE_PREFIX}*.parquet"))
+    groups: list[list[Path]] = []
+    rows = 0
+    for piece in pieces:
+        size = pq.ParquetFile(piece).metadata.num_rows
+        if not groups or rows + size > options["chunk_rows"]:
+            groups.append([])
+            rows = 0
+        groups[-1].append(piece)
+        rows += size
+
+    stats = {"files": -len(pieces), "bytes": -sum(piece.stat().st_size for piece in pieces)}
+    for seq, group in enumerate(groups):
+        table = pa.concat_tables(pq.read_table(piece) for piece in group)
+        stats["bytes"] += _write(directory / f"part-{seq:04d}.parquet", table.sort_by("_commit_ts"))
+        stats["files"] += 1
+    for piece in pieces:
+        piece.unlink()
+    return stats
+
+
+def write_medicos(root: Path, count: int, start: date, seed: int) -> dict[str, int]:
+    """Médicos fixos, criados antes do primeiro dia (o stream não os altera)."""
+    set_random_seed(seed)
+    created = datetime.combine(start - timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+    rows = [
+        {"id": index, **generate_medico(), "created_at": created, "updated_at": created}
+        for index in range(1, count + 1)
+    ]
+    state = pa.Table.from_pylist(rows)
+    changelog = pa.table(
+        {
+            "_op": pa.array(["c"] * count).dictionary_encode(),
+            "_commit_ts": pa.array([created] * count, pa.timestamp("us", tz="UTC")),
+        }
+    )
+    for name in state.column_names:
+        changelog = changelog.append_column(name, state.column(name))
+    day = start - timedelta(days=1)
+    written = _write(root / "changelog" / "medicos" / f"dt={day}" / "part-medicos.parquet", changelog)
+    written += _write(root / "state" / "medicos" / f"dt={day}" / "part-0000.parquet", state)
+    return {"changes": count, "files": 2, "bytes": written}
+
+
+def run_backfill(
+    root: Path,
+    days: int,
+    start: date,
+    inserts_per_day: int = 50_000,
+    initial: Optional[dict[str, int]] = None,
+    workers: int = 1,
+    chunk_rows: int = 1_000_000,
+    pool_size: int = 4096,
+    seed: Optional[int] = None,
+    progress: Optional[Callable[[dict[str, Any]], None]] = None,
+) -> dict[str, Any]:
+    """Simula ``days`` dias a partir de ``start`` e grava changelog e estado.
+
+    ``initial`` traz pacientes e médicos existentes antes do primeiro dia.
+    """
+    if seed is None:
+        seed = random.randrange(1 << 31)
+    initial = initial or {}
+    root = Path(root)
+    counts = daily_counts(days, start, inserts_per_day, seed)
+    specs = day_specs(
+        days,
+        start,
+        counts,
+        initial.get("pacientes", 0),
+        initial.get("medicos", 0),
+    )
+    end_us = _day_start_us(start + timedelta(days=days)) - 1
+    options = [
+        {
+            "root": str(root),
+            "spec": spec,
+            "seed": seed,
+            "end_us": end_us,
+            "chunk_rows": chunk_rows,
+        }
+        for spec in specs
+    ]
+
+    totals = {"days": days, "changes": 0, "updates": 0, "files": 0, "bytes": 0, "seed": seed}
+    medicos = write_medicos(root, initial.get("medicos", 0), start, seed) if initial.get("medicos") else {}
+    for key, value in medicos.items():
+        totals[key] += value
+
+    def collect(result: dict[str, Any]) -> None:
+        for key in ("changes", "updates", "files", "bytes"):
+            totals[key] += result[key]
+        if progress is not None:
+            progress(result)
+
+    def partitions() -> list[dict[str, Any]]:
+        return [
+            {"directory": str(directory), "chunk_rows": chunk_rows}
+            for table in sorted(INSERT_SHARES)
+            for directory in sorted((root / "changelog" / table).glob("dt=*"))
+        ]
+
+    def compacted(result: dict[str, int]) -> None:
+        for key in ("files", "bytes"):
+            totals[key] += result[key]
+
+    if workers == 1:
+        _init_worker(pool_size, seed)
+        for option in options:
+            collect(simulate_day(option))
+        for option in partitions():
+            compacted(compact_partition(option))
+    else:
+        with multiprocessing.Pool(workers, _init_worker, (pool_size, seed)) as pool:
+            for result in pool.imap_unordered(simulate_day, options):
+                collect(result)
+            for result in pool.imap_unordered(compact_partition, partitions()):
+                compacted(result)
+    return totals
@@ -0,0 +1,146 @@
+"""
+Contrapressão do stream pelo atraso dos slots de replicação.
+
+Quando o consumidor de CDC (Debezium ou cli cdc-consume) fica para trás, o WAL
+retido pelo slot cresce até encher o disco. O stream consulta
+``pg_replication_slots`` a cada CDC_BACKPRESSURE_CHECK_SECONDS e usa o maior
+entre WAL retido e atraso não confirmado dos slots monitorados:
+
+- normal: ritmo configurado;
+- lento: a partir da marca alta, os intervalos entre eventos são
+  multiplicados por CDC_BACKPRESSURE_FACTOR;
+- pausado: a partir da marca de pausa, nenhum evento é gerado.
+
+A volta é com histerese: da pausa para lento abaixo da marca alta, de lento
+para normal só abaixo da marca baixa, evitando alternar a cada leitura.
+"""
+
+import logging
+import os
+import time
+from typing import Callable, Optional
+
+import psycopg2
+
+from scripts.cdc_latency import slot_lag
+from scripts.db_init import load_project_env
+
+logger = logging.getLogger(__name__)
+
+NORMAL = "normal"
+THROTTLED = "lento"
+PAUSED = "pausado"
+
+MB = 1024 * 1024
+
+
+def load_backpressure_config() -> dict:
+    """Carrega slot, marcas d'água e cadência da contrapressão do .env."""
+    load_project_env()
+    return {
+        "enabled": os.getenv("CDC_BACKPRESSURE", "false").lower() in {"1", "true", "yes", "on"},
+        "slot": os.getenv("CDC_BACKPRESSURE_SLOT") or None,
+        "low_bytes": int(float(os.getenv("CDC_LAG_LOW_MB", 128)) * MB),
+        "high_bytes": int(float(os.getenv("CDC_LAG_HIGH_MB", 512)) * MB),
+        "pause_bytes": int(float(os.getenv("CDC_LAG_PAUSE_MB", 2048)) * MB),
+        "check_seconds": float(os.getenv("CDC_BACKPRESSURE_CHECK_SECONDS", 10)),
+        "factor": float(os.getenv("CDC_BACKPRESSURE_FACTOR", 4)),
+    }
+
+
+class SlotBackpressure:
+    """Estado de contrapressão (normal, lento, pausado) a partir do atraso."""
+
+    def __init__(
+        self,
+        slot: Optional[str] = None,
+        low_bytes: int = 128 * MB,
+        high_bytes: int = 512 * MB,
+        pause_bytes: int = 2048 * MB,
+        check_seconds: float = 10.0,
+        factor: float = 4.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not low_bytes <= high_bytes <= pause_bytes:
+            raise ValueError("Marcas d'água devem respeitar baixa <= alta <= pausa.")
+        self.slot = slot
+        self.low_bytes = low_bytes
+        self.high_bytes = high_bytes
+        self.pause_bytes = pause_bytes
+        self.check_seconds = check_seconds
+        self.factor = factor
+        self.state = NORMAL
+        self.lag_bytes = 0
+        self.seconds_in_state = {NORMAL: 0.0, THROTTLED: 0.0, PAUSED: 0.0}
+        self._clock = clock
+        self._changed_at = clock()
+        self._next_check = self._changed_at
+
+    @classmethod
+    def from_env(cls) -> Optional["SlotBackpressure"]:
+        """Cria a partir do .env, ou None com CDC_BACKPRESSURE desligado."""
+        config = load_backpressure_config()
+        if not config.pop("enabled"):
+            return None
+        return cls(**config)
+
+    def update(self, lag_bytes: int) -> str:
+        """Aplica uma leitura de atraso e retorna o estado resultante."""
+        self.lag_bytes = lag_bytes
+        if lag_bytes >= self.pause_bytes:
+            state = PAUSED
+        elif lag_bytes >= self.high_bytes:
+            state = THROTTLED
+        elif self.state == PAUSED:
+            state = THROTTLED if lag_bytes > self.low_bytes else NORMAL
+        elif self.state == THROTTLED and lag_bytes > self.low_bytes:
+            state = THROTTLED
+        else:
+            state = NORMAL
+
+        if state != self.state:
+            now = self._clock()
+            self.seconds_in_state[self.state] += now - self._changed_at
+            self._changed_at = now
+            log = logger.info if state == NORMAL else logger.warning
+            log(
+                f"Contrapressão de CDC: {self.state} -> {state} "
+                f"(atraso {lag_bytes / MB:,.1f} MB; baixa {self.low_bytes / MB:,.0f}, "
+                f"alta {self.high_bytes / MB:,.0f}, pausa {self.pause_bytes / MB:,.0f})"
+            )
+            self.state = state
+        return state
+
+    def check(self, conn: psycopg2.extensions.connection) -> str:
+        """Relê o atraso dos slots se já passou a cadência; retorna o estado.
+
+        Uma falha na consulta mantém o estado anterior.
+        """
+        now = self._clock()
+        if now < self._next_check:
+            return self.state
+        self._next_check = now + self.check_seconds
+        try:
+            rows = slot_lag(conn, self.slot)
+        except psycopg2.Error as e:
+            conn.rollback()
+            logger.error(f"Erro ao ler pg_replication_slots: {e}")
+            return self.state
+        lag = max(
+            (
+                max(row["retido_bytes"] or 0, row["atraso_bytes"] or 0)
+                for row in rows
+            ),
+            default=0,
+        )
+        return self.update(lag)
+
+    def delay(self, seconds: float) -> float:
+        """Intervalo até o próximo evento no estado atual."""
+        return seconds * self.factor if self.state == THROTTLED else seconds
+
+    def summary(self) -> dict[str, float]:
+        """Segundos passados em cada estado até agora."""
+        totals = dict(self.seconds_in_state)
+        totals[self.state] += self._clock() - self._changed_at
+        return totals
@@ -0,0 +1,579 @@
+"""
+Consumidor de replicação lógica que grava uma camada bronze local.
+
+Lê o slot de replicação direto do PostgreSQL (sem Kafka/Debezium), decodifica
+as mensagens de ``pgoutput`` (protocolo binário, nativo do PostgreSQL) ou de
+``wal2json`` (formato 2) e acumula as mudanças confirmadas por tabela. Os lotes
+viram arquivos Parquet ou JSONL particionados por tabela e data do commit:
+
+    <saida>/<tabela>/dt=AAAA-MM-DD/part-<lsn>-<seq>.parquet
+
+O LSN só é confirmado ao servidor (``send_feedback``) depois que as mudanças
+até ele estão gravadas em disco, então uma interrupção reprocessa no máximo o
+último lote (entrega at-least-once; ``_lsn`` permite deduplicar).
+
+Cada arquivo tem esquema explícito: as colunas de metadados são tipadas
+(``_op`` texto, ``_lsn`` e ``_xid`` inteiros, ``_commit_ts`` timestamp UTC) e
+as colunas da tabela são sempre texto, na representação do PostgreSQL. Assim
+um lote em que a coluna veio toda NULL não fixa o tipo ``null`` e os arquivos
+de uma partição continuam legíveis juntos. Cada linha vai para a partição da
+data do próprio commit, mesmo quando o lote atravessa a meia-noite.
+
+Em updates o pgoutput não reenvia valores TOAST que não mudaram. Essas colunas
+ficam fora dos dados da linha (NULL no Parquet) e os nomes vão, separados por
+vírgula, na coluna ``_toast_inalterado``; NULL ali significa que a linha veio
+completa. Quem consolida o estado deve manter o valor anterior dessas colunas.
+
+Cada transação alimenta a latência commit→captura; as batidas da tabela de
+heartbeat (extra "cdc_heartbeat") medem geração→captura e não vão para a
+camada bronze.
+"""
+
+import json
+import logging
+import os
+import select
+import struct
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import psycopg2
+import psycopg2.errors
+import psycopg2.extras
+from psycopg2 import sql
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from scripts.cdc_latency import HEARTBEAT_TABLE, LatencyTracker, parse_timestamp
+from scripts.db_init import TABLES, load_project_env
+
+logger = logging.getLogger(__name__)
+
+PLUGINS = ("pgoutput", "wal2json")
+FORMATS = ("parquet", "jsonl")
+
+PG_EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+# Valor TOAST não enviado pelo pgoutput (coluna inalterada no update).
+UNCHANGED_TOAST = object()
+
+TOAST_COLUMN = "_toast_inalterado"
+
+# Tipos das colunas de metadados; as colunas da tabela são gravadas como texto.
+METADATA_TYPES = {
+    "_op": pa.string(),
+    "_lsn": pa.int64(),
+    "_xid": pa.int64(),
+    "_commit_ts": pa.timestamp("us", tz="UTC"),
+    TOAST_COLUMN: pa.string(),
+}
+
+OPERATIONS = {b"I": "c", b"U": "u", b"D": "d"}
+WAL2JSON_OPERATIONS = {"I": "c", "U": "u", "D": "d"}
+
+PUBLICATION_EXISTS_SQL = "SELECT 1 FROM pg_publication WHERE pubname = %s"
+
+PUBLICATION_TABLES_SQL = (
+    "SELECT tablename FROM pg_publication_tables "
+    "WHERE pubname = %s AND schemaname = 'public'"
+)
+
+# O nome da publicação vem do .env e vai entre aspas (sql.Identifier): assim o
+# nome criado é exatamente o comparado em PUBLICATION_EXISTS_SQL, mesmo com
+# maiúsculas. publish_via_partition_root: no schema particionado as mudanças
+# chegam com o nome da tabela principal, não da partição mensal.
+CREATE_PUBLICATION_SQL = sql.SQL(
+    "CREATE PUBLICATION {name} FOR TABLE {tables} "
+    "WITH (publish_via_partition_root = true)"
+)
+
+ADD_PUBLICATION_TABLES_SQL = sql.SQL("ALTER PUBLICATION {name} ADD TABLE {tables}")
+
+
+def load_cdc_config() -> dict:
+    """Carrega slot, plugin, publicação, saída e cadências do consumidor."""
+    load_project_env()
+    return {
+        "slot": os.getenv("CDC_SLOT_NAME", "bronze_slot"),
+        "plugin": os.getenv("CDC_PLUGIN", "pgoutput"),
+        "publication": os.getenv("CDC_PUBLICATION", "bronze_publication"),
+        "output_dir": os.getenv("CDC_OUTPUT_DIR", "data/bronze"),
+        "output_format": os.getenv("CDC_OUTPUT_FORMAT", "parquet"),
+        "batch_rows": int(os.getenv("CDC_BATCH_ROWS", 5000)),
+        "flush_seconds": float(os.getenv("CDC_FLUSH_SECONDS", 5)),
+        "feedback_seconds": float(os.getenv("CDC_FEEDBACK_SECONDS", 10)),
+        "status_seconds": float(os.getenv("CDC_STATUS_SECONDS", 5)),
+    }
+
+
+def format_lsn(lsn: int) -> str:
+    """LSN no formato do PostgreSQL (ex.: 0/16B3748)."""
+    return f"{lsn >> 32:X}/{lsn & 0xFFFFFFFF:X}"
+
+
+def pg_timestamp(microseconds: int) -> datetime:
+    """Converte timestamp do protocolo (µs desde 2000-01-01 UTC)."""
+    return PG_EPOCH + timedelta(microseconds=microseconds)
+
+
+def create_replication_connection(env_vars: dict) -> psycopg2.extensions.connection:
+    """Abre uma conexão de replicação lógica com as credenciais do .env."""
+    return psycopg2.connect(
+        host=env_vars["host"],
+        port=env_vars["port"],
+        user=env_vars["user"],
+        password=env_vars["password"],
+        database=env_vars["database"],
+        connection_factory=psycopg2.extras.LogicalReplicationConnection,
+    )
+
+
+def _public_tables(tables: list[str]) -> sql.Composed:
+    return sql.SQL(", ").join(sql.Identifier("public", table) for table in tables)
+
+
+def ensure_publication(
+    conn: psycopg2.extensions.connection,
+    name: str,
+    tables: list[str] = TABLES,
+) -> bool:
+    """Cria a publicação das tabelas do simulador se ainda não existir.
+
+    Numa publicação existente, acrescenta as tabelas que faltam (ex.: a de
+    heartbeat instalada depois).
+    """
+    with conn.cursor() as cur:
+        cur.execute(PUBLICATION_EXISTS_SQL, (name,))
+        if cur.fetchone():
+            cur.execute(PUBLICATION_TABLES_SQL, (name,))
+            published = {row[0] for row in cur.fetchall()}
+            missing = [table for table in tables if table not in published]
+            if not missing:
+                conn.rollback()
+                return False
+            cur.execute(
+                ADD_PUBLICATION_TABLES_SQL.format(
+                    name=sql.Identifier(name), tables=_public_tables(missing)
+                )
+            )
+            conn.commit()
+            logger.info(f"Publicação {name}: tabelas adicionadas ({', '.join(missing)}).")
+            return False
+        cur.execute(
+            CREATE_PUBLICATION_SQL.format(
+                name=sql.Identifier(name), tables=_public_tables(tables)
+            )
+        )
+    conn.commit()
+    logger.info(f"Publicação {name} criada.")
+    return True
+
+
+def ensure_slot(cur: Any, slot: str, plugin: str) -> bool:
+    """Cria o slot lógico se ainda não existir; retorna True se criou."""
+    try:
+        cur.create_replication_slot(slot, output_plugin=plugin)
+    except psycopg2.errors.DuplicateObject:
+        return False
+    logger.info(f"Slot de replicação {slot} criado ({plugin}).")
+    return True
+
+
+def start_options(plugin: str, publication: str, tables: list[str] = TABLES) -> dict:
+    """Opções de START_REPLICATION para cada plugin.
+
+    O pgoutput lê ``publication_names`` como lista de identificadores, então o
+    nome vai entre aspas, como na criação da publicação.
+    """
+    if plugin == "pgoutput":
+        quoted = '"' + publication.replace('"', '""') + '"'
+        return {"proto_version": "1", "publication_names": quoted}
+    return {
+        "format-version": "2",
+        "include-timestamp": "1",
+        "add-tables": ",".join(f"public.{table}" for table in tables),
+    }
+
+
+class _Reader:
+    """Leitura sequencial dos campos do protocolo pgoutput."""
+
+    def __init__(self, payload: bytes):
+        self.payload = payload
+        self.offset = 0
+
+    def unpack(self, fmt: str) -> tuple:
+        values = struct.unpack_from(fmt, self.payload, self.offset)
+        self.offset += struct.calcsize(fmt)
+        return values
+
+    def byte(self) -> bytes:
+        value = self.payload[self.offset : self.offset + 1]
+        self.offset += 1
+        return value
+
+    def string(self) -> str:
+        end = self.payload.index(b"\0", self.offset)
+        value = self.payload[self.offset : end].decode()
+        self.offset = end + 1
+        return value
+
+    def tuple_data(self) -> list[Any]:
+        (count,) = self.unpack("!H")
+        values: list[Any] = []
+        for _ in range(count):
+            kind = self.byte()
+            if kind == b"t":
+                (length,) = self.unpack("!I")
+                values.append(self.payload[self.offset : self.offset + length].decode())
+                self.offset += length
+            elif kind == b"u":
+                # TOAST inalterado: o valor não foi enviado, não é NULL.
+                values.append(UNCHANGED_TOAST)
+            else:
+                values.append(None)
+        return values
+
+
+class PgOutputDecoder:
+    """Decodifica mensagens do pgoutput (protocolo 1) em eventos.
+
+    Eventos: ``begin`` (xid, commit_ts), ``change`` (op, tabela, dados e,
+    quando houver, ``unchanged`` com as colunas TOAST não enviadas) e
+    ``commit`` (lsn final, commit_ts). Mensagens de relação alimentam o
+    mapa oid -> (tabela, colunas) e não geram evento.
+    """
+
+    def __init__(self):
+        self.relations: dict[int, tuple[str, list[str]]] = {}
+
+    def decode(self, payload: bytes) -> Optional[dict[str, Any]]:
+        reader = _Reader(payload)
+        kind = reader.byte()
+
+        if kind == b"B":
+            _, commit_ts, xid = reader.unpack("!QqI")
+            return {"type": "begin", "xid": xid, "commit_ts": pg_timestamp(commit_ts)}
+
+        if kind == b"C":
+            _, _, end_lsn, commit_ts = reader.unpack("!BQQq")
+            return {"type": "commit", "lsn": end_lsn, "commit_ts": pg_timestamp(commit_ts)}
+
+        if kind == b"R":
+            (oid,) = reader.unpack("!I")
+            reader.string()
+            table = reader.string()
+            reader.byte()
+            (count,) = reader.unpack("!H")
+            columns = []
+            for _ in range(count):
+                reader.byte()
+                columns.append(reader.string())
+                reader.unpack("!Ii")
+            self.relations[oid] = (table, columns)
+            return None
+
+        if kind in OPERATIONS:
+            (oid,) = reader.unpack("!I")
+            table, columns = self.relations[oid]
+            marker = reader.byte()
+            if kind == b"U" and marker in (b"K", b"O"):
+                reader.tuple_data()
+                marker = reader.byte()
+            values = reader.tuple_data()
+            event = {
+                "type": "change",
+                "op": OPERATIONS[kind],
+                "table": table,
+                "data": {
+                    column: value
+                    for column, value in zip(columns, values)
+                    if value is not UNCHANGED_TOAST
+                },
+            }
+            unchanged = [
+                column
+                for column, value in zip(columns, values)
+                if value is UNCHANGED_TOAST
+            ]
+            if unchanged:
+                event["unchanged"] = unchanged
+            return event
+
+        return None
+
+
+class Wal2JsonDecoder:
+    """Decodifica mensagens do wal2json (format-version 2) em eventos."""
+
+    def decode(self, payload: bytes | str) -> Optional[dict[str, Any]]:
+        message = json.loads(payload)
+        action = message.get("action")
+
+        if action == "B":
+            return {"type": "begin", "xid": message.get("xid"), "commit_ts": None}
+
+        if action == "C":
+            commit_ts = message.get("timestamp")
+            return {
+                "type": "commit",
+                "lsn": None,
+                "commit_ts": (
+                    datetime.fromisoformat(commit_ts) if commit_ts else None
+                ),
+            }
+
+        if action in WAL2JSON_OPERATIONS:
+            columns = message.get("columns") or message.get("identity") or []
+            return {
+                "type": "change",
+                "op": WAL2JSON_OPERATIONS[action],
+                "table": message["table"],
+                "data": {column["name"]: column.get("value") for column in columns},
+            }
+
+        return None
+
+
+def make_decoder(plugin: str) -> PgOutputDecoder | Wal2JsonDecoder:
+    if plugin not in PLUGINS:
+        raise ValueError(f"Plugin não suportado: {plugin}")
+    return PgOutputDecoder() if plugin == "pgoutput" else Wal2JsonDecoder()
+
+
+def _text(value: Any) -> Optional[str]:
+    """Converte um valor da tabela para a representação texto do PostgreSQL."""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+class BronzeWriter:
+    """Acumula mudanças por tabela e grava cada lote como um arquivo."""
+
+    def __init__(self, root: Path, fmt: str = "parquet"):
+        if fmt not in FORMATS:
+            raise ValueError(f"Formato de saída não suportado: {fmt}")
+        self.root = Path(root)
+        self.fmt = fmt
+        self.pending = 0
+        self.files = 0
+        self.bytes_written = 0
+        self._buffers: dict[str, list[dict[str, Any]]] = {}
+        self._seq = 0
+
+    def add(self, table: str, row: dict[str, Any]) -> None:
+        self._buffers.setdefault(table, []).append(row)
+        self.pending += 1
+
+    def flush(self) -> list[Path]:
+        """Grava todos os lotes pendentes; retorna os arquivos criados."""
+        written = []
+        for table, rows in self._buffers.items():
+            by_day: dict[Any, list[dict[str, Any]]] = {}
+            for row in rows:
+                day = row["_commit_ts"].date() if row.get("_commit_ts") else None
+                by_day.setdefault(day, []).append(row)
+            for day, day_rows in by_day.items():
+                written.append(self._write(table, day, day_rows))
+
+        self._buffers.clear()
+        self.pending = 0
+        return written
+
+    def _write(self, table: str, day: Any, rows: list[dict[str, Any]]) -> Path:
+        directory = self.root / table / f"dt={day or 'desconhecida'}"
+        directory.mkdir(parents=True, exist_ok=True)
+        self._seq += 1
+        path = directory / f"part-{rows[-1]['_lsn']:016X}-{self._seq:06d}.{self.fmt}"
+        tmp = path.with_name(path.name + ".tmp")
+        if self.fmt == "parquet":
+            # Deletes trazem só a chave: as colunas são a união dos lotes.
+            columns = dict.fromkeys(key for row in rows for key in row)
+            schema = pa.schema(
+                [(column, METADATA_TYPES.get(column, pa.string())) for column in columns]
+            )
+            table_data = pa.table(
+                {
+                    column: [
+                        row.get(column) if column in METADATA_TYPES else _text(row.get(column))
+                        for row in rows
+                    ]
+                    for column in columns
+                },
+                schema=schema,
+            )
+            pq.write_table(table_data, tmp)
+        else:
+            with open(tmp, "w", encoding="utf-8") as handle:
+                for row in rows:
+                    handle.write(json.dumps(row, default=str, ensure_ascii=False) + "\n")
+        os.replace(tmp, path)
+        self.bytes_written += path.stat().st_size
+        self.files += 1
+        return path
+
+
+class CdcConsumer:
+    """Lê o stream de replicação, grava lotes e confirma o LSN gravado."""
+
+    def __init__(
+        self,
+        cursor: Any,
+        decoder: PgOutputDecoder | Wal2JsonDecoder,
+        writer: BronzeWriter,
+        batch_rows: int = 5000,
+        flush_seconds: float = 5.0,
+        feedback_seconds: float = 10.0,
+        status_seconds: float = 5.0,
+        echo: Callable[[str], None] = print,
+        clock: Callable[[], float] = time.monotonic,
+        latency_window: int = 1000,
+        wall_clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+    ):
+        self.cursor = cursor
+        self.decoder = decoder
+        self.writer = writer
+        self.batch_rows = batch_rows
+        self.flush_seconds = flush_seconds
+        self.feedback_seconds = feedback_seconds
+        self.status_seconds = status_seconds
+        self.echo = echo
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self.commit_latency = LatencyTracker(latency_window)
+        self.heartbeat_latency = LatencyTracker(latency_window)
+        self.changes = 0
+        self.transactions = 0
+        self.bytes_received = 0
+        self.received_lsn = 0
+        self.committed_lsn = 0
+        self.flushed_lsn = 0
+        self.wal_end = 0
+        self.last_commit_ts: Optional[datetime] = None
+        self._txn: list[tuple[int, dict[str, Any]]] = []
+        self._xid: Optional[int] = None
+        now = clock()
+        self._flushed_at = now
+        self._feedback_at = now
+        self._status_at = now
+        self._status_totals = (0, 0)
+
+    def handle(self, msg: Any) -> None:
+        """Processa uma mensagem do stream de replicação."""
+        self.bytes_received += len(msg.payload)
+        self.received_lsn = max(self.received_lsn, msg.data_start)
+        self.wal_end = max(self.wal_end, msg.wal_end)
+        event = self.decoder.decode(msg.payload)
+        if event is None:
+            return
+
+        if event["type"] == "begin":
+            self._txn = []
+            self._xid = event["xid"]
+        elif event["type"] == "change":
+            self._txn.append((msg.data_start, event))
+        elif event["type"] == "commit":
+            self._commit(event["lsn"] or msg.data_start, event["commit_ts"])
+
+    def _commit(self, lsn: int, commit_ts: Optional[datetime]) -> None:
+        captured = self._wall_clock()
+        self.commit_latency.add_between(commit_ts, captured)
+        for change_lsn, event in self._txn:
+            if event["table"] == HEARTBEAT_TABLE:
+                self.heartbeat_latency.add_between(
+                    parse_timestamp(event["data"].get("gerado_em")), captured
+                )
+                continue
+            row = {
+                "_op": event["op"],
+                "_lsn": change_lsn,
+                "_xid": self._xid,
+                "_commit_ts": commit_ts,
+            }
+            if event.get("unchanged"):
+                row[TOAST_COLUMN] = ",".join(event["unchanged"])
+            self.writer.add(event["table"], {**row, **event["data"]})
+            self.changes += 1
+        self.transactions += 1
+        self.committed_lsn = lsn
+        self.last_commit_ts = commit_ts
+        self._txn = []
+        if not self.writer.pending:
+            # Nada a gravar até aqui (só heartbeats): o LSN já pode ser confirmado.
+            self.flushed_lsn = lsn
+        elif self.writer.pending >= self.batch_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        """Grava os lotes pendentes e confirma o LSN do último commit."""
+        self.writer.flush()
+        self._flushed_at = self._clock()
+        if self.committed_lsn > self.flushed_lsn:
+            self.flushed_lsn = self.committed_lsn
+            self.send_feedback()
+
+    def send_feedback(self) -> None:
+        self.cursor.send_feedback(
+            write_lsn=self.received_lsn,
+            flush_lsn=self.flushed_lsn,
+            apply_lsn=self.flushed_lsn,
+        )
+        self._feedback_at = self._clock()
+
+    def lag(self) -> dict[str, Any]:
+        """Atraso em bytes (fim do WAL no servidor - recebido) e em segundos."""
+        lag_bytes = max(self.wal_end - self.received_lsn, 0)
+        lag_seconds = None
+        if self.last_commit_ts is not None and lag_bytes:
+            lag_seconds = (self._wall_clock() - self.last_commit_ts).total_seconds()
+        return {"bytes": lag_bytes, "seconds": lag_seconds or 0.0}
+
+    def tick(self) -> None:
+        """Ações periódicas: flush por tempo, feedback e status."""
+        now = self._clock()
+        if self.writer.pending and now - self._flushed_at >= self.flush_seconds:
+            self.flush()
+        if now - self._feedback_at >= self.feedback_seconds:
+            self.send_feedback()
+        if self.status_seconds and now - self._status_at >= self.status_seconds:
+            self.echo(self.format_status(now - self._status_at))
+            self._status_at = now
+
+    def format_status(self, elapsed: float) -> str:
+        changes, received = self._status_totals
+        self._status_totals = (self.changes, self.bytes_received)
+        elapsed = max(elapsed, 1e-9)
+        lag = self.lag()
+        status = (
+            f"{(self.changes - changes) / elapsed:,.0f} mudanças/s, "
+            f"{(self.bytes_received - received) / elapsed / 1024:,.1f} KiB/s, "
+            f"lag {lag['bytes'] / 1024:,.1f} KiB / {lag['seconds']:.1f}s, "
+            f"commit→captura {self.commit_latency.format()}, "
+            f"confirmado {format_lsn(self.flushed_lsn)}, "
+            f"{self.writer.files} arquivos"
+        )
+        if self.heartbeat_latency.count:
+            status += f", heartbeat {self.heartbeat_latency.format()}"
+        return status
+
+    def run(self, seconds: Optional[float] = None, poll: float = 1.0) -> None:
+        """Consome até ``seconds`` (ou Ctrl+C) e grava o lote final."""
+        deadline = None if seconds is None else self._clock() + seconds
+        try:
+            while deadline is None or self._clock() < deadline:
+                msg = self.cursor.read_message()
+                if msg is not None:
+                    self.handle(msg)
+                    self.tick()
+                    continue
+                self.tick()
+                select.select([self.cursor], [], [], poll)
+        finally:
+            self.flush()
@@ -0,0 +1,192 @@
+"""
+Latência ponta a ponta do CDC e atraso dos slots de replicação.
+
+Duas medidas:
+
+- commit→captura: diferença entre o commit no PostgreSQL e o momento em que a
+  mudança chega a quem lê o slot. O consumidor local (cli cdc-consume) usa o
+  timestamp de commit do protocolo; nas mensagens do Debezium é
+  ``ts_ms - source.ts_ms``.
+- heartbeat: com o extra "cdc_heartbeat", o stream grava ``gerado_em`` a cada
+  CDC_HEARTBEAT_SECONDS; a captura dessa linha mede geração→captura mesmo
+  quando não há outro tráfego.
+
+O atraso dos slots vem de ``pg_replication_slots`` comparado com
+``pg_current_wal_lsn()``: bytes ainda não confirmados pelo consumidor e bytes
+de WAL retidos no servidor por causa do slot.
+
+As latências comparam relógios do servidor e de quem captura; rode os dois na
+mesma máquina (ou com NTP) para valores confiáveis.
+"""
+
+import json
+import os
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+
+import psycopg2
+
+from app.query_timing import percentile
+from scripts.db_init import load_project_env
+
+HEARTBEAT_TABLE = "cdc_heartbeat"
+
+HEARTBEAT_AVAILABLE_SQL = "SELECT to_regclass('public.cdc_heartbeat') IS NOT NULL"
+
+WRITE_HEARTBEAT_SQL = (
+    "UPDATE cdc_heartbeat "
+    "SET gerado_em = clock_timestamp(), sequencia = sequencia + 1 "
+    "WHERE id = 1 RETURNING sequencia"
+)
+
+SLOT_LAG_SQL = """
+SELECT
+  slot_name,
+  plugin,
+  active,
+  pg_wal_lsn_diff(pg_current_wal_lsn(), confirmed_flush_lsn)::bigint AS atraso_bytes,
+  pg_wal_lsn_diff(pg_current_wal_lsn(), restart_lsn)::bigint AS retido_bytes
+FROM pg_replication_slots
+WHERE slot_type = 'logical'
+  AND (%(slot)s::text IS NULL OR slot_name = %(slot)s::text)
+ORDER BY slot_name
+"""
+
+
+def load_latency_config() -> dict:
+    """Carrega a cadência do heartbeat e a janela de amostras do .env."""
+    load_project_env()
+    return {
+        "heartbeat_seconds": float(os.getenv("CDC_HEARTBEAT_SECONDS", 5)),
+        "window": int(os.getenv("CDC_LATENCY_WINDOW", 1000)),
+    }
+
+
+def heartbeat_available(conn: psycopg2.extensions.connection) -> bool:
+    """Indica se o extra cdc_heartbeat está instalado no banco."""
+    with conn.cursor() as cur:
+        cur.execute(HEARTBEAT_AVAILABLE_SQL)
+        return bool(cur.fetchone()[0])
+
+
+def write_heartbeat(conn: psycopg2.extensions.connection) -> int:
+    """Grava uma batida e retorna o número de sequência."""
+    try:
+        with conn.cursor() as cur:
+            cur.execute(WRITE_HEARTBEAT_SQL)
+            row = cur.fetchone()
+        conn.commit()
+    except psycopg2.Error:
+        conn.rollback()
+        raise
+    return int(row[0]) if row else 0
+
+
+def slot_lag(
+    conn: psycopg2.extensions.connection,
+    slot: Optional[str] = None,
+) -> list[dict[str, Any]]:
+    """Atraso confirmado e WAL retido por slot lógico (ou só ``slot``)."""
+    with conn.cursor() as cur:
+        cur.execute(SLOT_LAG_SQL, {"slot": slot})
+        columns = [column[0] for column in cur.description]
+        rows = [dict(zip(columns, row)) for row in cur.fetchall()]
+    conn.rollback()
+    return rows
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """Timestamp vindo do slot (texto do pgoutput/wal2json ou ISO do Debezium)."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, (int, float)):
+        # Debezium com time.precision.mode=connect: milissegundos desde a época.
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+    else:
+        parsed = datetime.fromisoformat(str(value))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class LatencyTracker:
+    """Últimas ``window`` latências (segundos) e seus percentis."""
+
+    def __init__(self, window: int = 1000):
+        self.samples: deque[float] = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.count += 1
+
+    def add_between(self, start: Optional[datetime], end: Optional[datetime]) -> None:
+        """Registra ``end - start`` quando os dois instantes são conhecidos."""
+        if start is not None and end is not None:
+            self.add((end - start).total_seconds())
+
+    def summary(self) -> dict[str, Any]:
+        values = list(self.samples)
+        return {
+            "amostras": self.count,
+            "p50": percentile(values, 0.50),
+            "p95": percentile(values, 0.95),
+            "p99": percentile(values, 0.99),
+            "max": max(values) if values else None,
+        }
+
+    def format(self) -> str:
+        summary = self.summary()
+        if summary["p50"] is None:
+            return "sem amostras"
+        return (
+            f"p50 {summary['p50']:.3f}s / p95 {summary['p95']:.3f}s / "
+            f"p99 {summary['p99']:.3f}s"
+        )
+
+
+def debezium_change(line: str) -> Optional[dict[str, Any]]:
+    """Envelope de mudança de uma linha JSON do Debezium (None se não for um).
+
+    Aceita mensagens com ou sem o invólucro ``{"schema", "payload"}`` do
+    JsonConverter; linhas vazias, tombstones e texto que não é JSON são
+    ignorados.
+    """
+    line = line.strip()
+    if not line.startswith("{"):
+        return None
+    try:
+        message = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    payload = message.get("payload", message) if "schema" in message else message
+    if not isinstance(payload, dict) or "source" not in payload:
+        return None
+    return payload
+
+
+def measure_debezium(
+    lines: Iterable[str],
+    commit_latency: LatencyTracker,
+    heartbeat_latency: LatencyTracker,
+) -> int:
+    """Alimenta as latências com mensagens do Debezium; retorna quantas leu.
+
+    commit→captura é ``ts_ms - source.ts_ms``; para a tabela de heartbeat,
+    ``ts_ms - after.gerado_em``. Eventos de snapshot (``op = r``) não têm
+    commit e ficam de fora.
+    """
+    changes = 0
+    for line in lines:
+        payload = debezium_change(line)
+        if payload is None or payload.get("op") == "r":
+            continue
+        changes += 1
+        captured = parse_timestamp(payload.get("ts_ms"))
+        source = payload["source"] or {}
+        commit_latency.add_between(parse_timestamp(source.get("ts_ms")), captured)
+        if source.get("table") == HEARTBEAT_TABLE:
+            after = payload.get("after") or {}
+            heartbeat_latency.add_between(parse_timestamp(after.get("gerado_em")), captured)
+    return changes
@@ -0,0 +1,147 @@
+"""
+Notificações de mudança via LISTEN/NOTIFY.
+
+O stream publica no canal configurado um aviso por tabela alterada, com as
+contagens de INSERT e UPDATE acumuladas: o primeiro evento após um período
+quieto sai na hora e os seguintes são agrupados, no máximo um aviso por tabela
+a cada ``interval`` segundos. O dashboard escuta o canal e só recalcula o
+snapshot quando chega um aviso.
+"""
+
+import json
+import logging
+import os
+import select
+import time
+from typing import Callable, Optional
+
+import psycopg2
+from psycopg2 import sql
+
+from scripts.db_init import create_connection, load_project_env
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_SQL = "SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload"
+
+
+def load_notify_config() -> dict:
+    """Carrega canal, agrupamento e ativação das notificações do .env."""
+    load_project_env()
+    return {
+        "enabled": os.getenv("STREAM_NOTIFY", "false").lower() in {"1", "true", "yes", "on"},
+        "channel": os.getenv("CHANGE_NOTIFY_CHANNEL", "oltp_changes"),
+        "interval": int(os.getenv("CHANGE_NOTIFY_INTERVAL_MS", 500)) / 1000,
+    }
+
+
+class ChangePublisher:
+    """Acumula mudanças por tabela e publica avisos agrupados."""
+
+    def __init__(
+        self,
+        conn: psycopg2.extensions.connection,
+        channel: str = "oltp_changes",
+        interval: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.conn = conn
+        self.channel = channel
+        self.interval = interval
+        self._clock = clock
+        self._pending: dict[str, dict[str, int]] = {}
+        self._last_sent: dict[str, float] = {}
+
+    def record(self, table: str, operation: str, rows: int = 1) -> None:
+        """Registra ``rows`` linhas afetadas por INSERT ou UPDATE em ``table``."""
+        counts = self._pending.setdefault(table, {"inserts": 0, "updates": 0})
+        counts["inserts" if operation == "INSERT" else "updates"] += rows
+
+    def flush(self, force: bool = False) -> list[str]:
+        """Publica as tabelas pendentes fora da janela de agrupamento."""
+        now = self._clock()
+        due = [
+            table
+            for table in self._pending
+            if force or now - self._last_sent.get(table, float("-inf")) >= self.interval
+        ]
+        if not due:
+            return []
+
+        payloads = [
+            json.dumps({"tabela": table, **self._pending[table]}) for table in due
+        ]
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute(NOTIFY_SQL, (self.channel, payloads))
+            self.conn.commit()
+        except psycopg2.Error as e:
+            self.conn.rollback()
+            logger.warning(f"Falha ao publicar notificação de mudança: {e}")
+            return []
+
+        for table in due:
+            del self._pending[table]
+            self._last_sent[table] = now
+        return due
+
+
+class ChangeListener:
+    """Conexão dedicada em LISTEN que devolve as mudanças recebidas."""
+
+    def __init__(
+        self,
+        channel: str = "oltp_changes",
+        connect: Callable[[], psycopg2.extensions.connection] = create_connection,
+    ):
+        self.channel = channel
+        self.notifications = 0
+        self._connect = connect
+        self._conn: Optional[psycopg2.extensions.connection] = None
+
+    def wait(self, timeout: float) -> dict[str, dict[str, int]]:
+        """Aguarda até ``timeout`` segundos e soma os avisos recebidos por tabela."""
+        try:
+            conn = self._listening_connection()
+            if select.select([conn], [], [], timeout) == ([], [], []):
+                return {}
+            conn.poll()
+        except (psycopg2.Error, OSError) as e:
+            logger.error(f"Erro ao escutar canal {self.channel}: {e}")
+            self.close()
+            time.sleep(timeout)
+            return {}
+
+        changes: dict[str, dict[str, int]] = {}
+        while conn.notifies:
+            notify = conn.notifies.pop(0)
+            self.notifications += 1
+            try:
+                payload = json.loads(notify.payload)
+                table = payload["tabela"]
+            except (ValueError, KeyError, TypeError):
+                logger.warning(f"Aviso ignorado no canal {self.channel}: {notify.payload!r}")
+                continue
+            counts = changes.setdefault(table, {"inserts": 0, "updates": 0})
+            counts["inserts"] += int(payload.get("inserts", 0))
+            counts["updates"] += int(payload.get("updates", 0))
+        return changes
+
+    def close(self) -> None:
+        """Fecha a conexão de escuta (reaberta no próximo ``wait``)."""
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except psycopg2.Error:
+                pass
+            self._conn = None
+
+    def _listening_connection(self) -> psycopg2.extensions.connection:
+        if self._conn is None or self._conn.closed:
+            conn = self._connect()
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.channel)))
+            self._conn = conn
+            logger.info(f"Escutando mudanças no canal {self.channel}")
+        return self._conn
@@ -3,12 +3,44 @@ CLI com Typer para gerenciar o simulador OLTP.
 """
 
 import logging
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Optional
 
+import psycopg2
 import typer
 
+from app.snapshot_api import SnapshotApi, load_api_config
+from app.snapshot_refresher import SnapshotRefresher
+from scripts.backfill import load_backfill_config, run_backfill
+from scripts.cdc_consumer import (
+    FORMATS,
+    PLUGINS,
+    BronzeWriter,
+    CdcConsumer,
+    create_replication_connection,
+    ensure_publication,
+    ensure_slot,
+    format_lsn,
+    load_cdc_config,
+    make_decoder,
+    start_options,
+)
+from scripts.cdc_latency import (
+    HEARTBEAT_TABLE,
+    LatencyTracker,
+    heartbeat_available,
+    load_latency_config,
+    measure_debezium,
+    slot_lag,
+)
 from scripts.db_init import (
+    REPORTED_SETTINGS,
+    TABLES,
+    close_pools,
+    describe_session,
+    get_pool,
     load_env,
     create_connection,
     test_connection,
@@ -16,7 +48,17 @@ from scripts.db_init import (
     get_table_counts,
     load_project_env,
 )
-from scripts.seed import main as seed_main
+from scripts.event_emitter import emit_parallel, load_emitter_config
+from scripts.explain import run_explain
+from scripts.kpi_summary import kpi_summary_available, reconcile
+from scripts.monitor import SampleWriter, watch as watch_stats
+from scripts.partitions import (
+    detach_partitions_before,
+    ensure_partitions,
+    list_partitions,
+    partitioned_tables,
+)
+from scripts.seed import load_config as load_seed_config, main as seed_main
 from scripts.stream import main as stream_main
 from scripts.reset import main as reset_main
 
@@ -39,7 +81,18 @@ logger = logging.getLogger(__name__)
 
 
 @app.command()
-def init_db_cmd():
+def init_db_cmd(
+    partitioned: Optional[bool] = typer.Option(
+        None,
+        "--partitioned/--no-partitioned",
+        help="Usa o schema com partições mensais (padrão: PARTITIONED_SCHEMA).",
+    ),
+    extras: Optional[list[str]] = typer.Option(
+        None,
+        "--extra",
+        help="Extra opcional a instalar (repetível, ex.: kpi_summary). Padrão: DB_EXTRAS.",
+    ),
+):
     """Inicializa o banco de dados (schema, índices, lookups)."""
     logger.info("Inicializando banco de dados...")
     
@@ -52,7 +105,7 @@ def init_db_cmd():
         conn.close()
         raise typer.Exit(code=1)
     
-    if not init_db(conn, drop_first=False):
+    if not init_db(conn, drop_first=False, partitioned=partitioned, extras=extras or None):
         logger.error("Falha ao inicializar banco.")
         conn.close()
         raise typer.Exit(code=1)
@@ -122,14 +175,34 @@ def stream(
 
 
 @app.command()
-def reset():
+def reset(
+    from_template: bool = typer.Option(
+        False,
+        "--from-template",
+        help="Recria o banco via CREATE DATABASE ... TEMPLATE (seed uma única vez).",
+    ),
+    rebuild_template: bool = typer.Option(
+        False,
+        "--rebuild-template",
+        help="Reconstrói o banco template antes de recriar o banco de trabalho.",
+    ),
+    drop_slots: bool = typer.Option(
+        False,
+        "--drop-slots",
+        help="Com --from-template, remove os slots de replicação inativos do banco.",
+    ),
+):
     """Reset total: drop + recreate + seed."""
     logger.info("Executando reset total...")
     
     load_project_env()
     
     try:
-        reset_main()
+        reset_main(
+            from_template=from_template,
+            rebuild_template=rebuild_template,
+            drop_slots=drop_slots,
+        )
         typer.echo("✓ Reset concluído com sucesso!")
     except Exception as e:
         logger.error(f"Erro ao executar reset: {e}")
@@ -137,7 +210,27 @@ def reset():
 
 
 @app.command()
-def counts():
+def counts(
+    watch: bool = typer.Option(
+        False,
+        "--watch",
+        help="Exibe taxas por segundo a partir de pg_stat_user_tables.",
+    ),
+    interval: float = typer.Option(
+        5.0,
+        min=0.5,
+        help="Intervalo entre amostras no modo --watch (segundos).",
+    ),
+    samples: Optional[int] = typer.Option(
+        None,
+        min=1,
+        help="Número de janelas antes de encerrar o modo --watch.",
+    ),
+    output: Optional[Path] = typer.Option(
+        None,
+        help="Grava amostras do modo --watch em CSV (.csv) ou JSONL.",
+    ),
+):
     """Exibe contagem de registros por tabela."""
     logger.info("Buscando contagens...")
     
@@ -150,6 +243,22 @@ def counts():
         conn.close()
         raise typer.Exit(code=1)
     
+    if watch:
+        writer = SampleWriter.open(str(output)) if output else None
+        try:
+            watch_stats(
+                conn,
+                interval,
+                samples=samples,
+                writer=writer,
+                echo=typer.echo,
+            )
+        finally:
+            if writer:
+                writer.close()
+            conn.close()
+        return
+    
     counts_dict = get_table_counts(conn)
     conn.close()
     
@@ -167,5 +276,485 @@ def counts():
     typer.echo(f"{'TOTAL':.<30} {total:>10,}")
 
 
+@app.command()
+def partitions(
+    ensure: bool = typer.Option(
+        False,
+        "--ensure",
+        help="Cria partições mensais faltantes (PARTITION_MONTHS_BACK/AHEAD).",
+    ),
+    detach_before: Optional[datetime] = typer.Option(
+        None,
+        formats=["%Y-%m"],
+        help="Desanexa partições anteriores ao mês informado (AAAA-MM).",
+    ),
+):
+    """Lista e mantém as partições mensais do schema particionado."""
+    load_project_env()
+    conn = create_connection(load_env())
+    
+    try:
+        tables = partitioned_tables(conn)
+        if not tables:
+            typer.echo("Schema sem tabelas particionadas (PARTITIONED_SCHEMA=false).")
+            return
+        
+        if ensure:
+            ensure_partitions(conn)
+        
+        for table in tables:
+            if detach_before:
+                detached = detach_partitions_before(conn, table, detach_before.date())
+                for name in detached:
+                    typer.echo(f"Desanexada: {name}")
+            
+            rows = list_partitions(conn, table)
+            total = sum(max(row["linhas_estimadas"], 0) for row in rows)
+            typer.echo(f"\n=== {table}: {len(rows)} partições, ~{total:,} linhas ===")
+            for row in rows:
+                if row["linhas_estimadas"] > 0:
+                    typer.echo(f"{row['particao']:.<34} {row['linhas_estimadas']:>10,}")
+    except Exception as e:
+        logger.error(f"Erro ao manter partições: {e}")
+        raise typer.Exit(code=1)
+    finally:
+        conn.close()
+
+
+@app.command()
+def session_profiles(
+    roles: Optional[list[str]] = typer.Option(
+        None,
+        "--role",
+        help="Papel a inspecionar (repetível). Padrão: stream, seed, dashboard.",
+    ),
+):
+    """Exibe os parâmetros de sessão efetivos de cada papel do pool."""
+    load_project_env()
+    
+    try:
+        for role in roles or ["stream", "seed", "dashboard"]:
+            pool = get_pool(role)
+            names = list(dict.fromkeys([*REPORTED_SETTINGS, *pool.session_settings]))
+            with pool.connection() as conn:
+                effective = describe_session(conn, names)
+            
+            typer.echo(f"\n=== {role} (perfil {pool.profile}) ===")
+            for name, value in effective.items():
+                typer.echo(f"{name:.<34} {value}")
+    except Exception as e:
+        logger.error(f"Erro ao inspecionar perfis de sessão: {e}")
+        raise typer.Exit(code=1)
+    finally:
+        close_pools()
+
+
+@app.command()
+def kpi_reconcile(
+    fix: bool = typer.Option(
+        False,
+        "--fix",
+        help="Reconstrói kpi_contagens a partir das tabelas de origem.",
+    ),
+):
+    """Compara o resumo incremental de KPIs com um recálculo completo."""
+    load_project_env()
+    conn = create_connection(load_env())
+    
+    try:
+        if not kpi_summary_available(conn):
+            typer.echo("Extra kpi_summary não instalado (init-db-cmd --extra kpi_summary).")
+            raise typer.Exit(code=1)
+        
+        drift = reconcile(conn, fix=fix)
+    except typer.Exit:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao reconciliar resumo de KPIs: {e}")
+        raise typer.Exit(code=1)
+    finally:
+        conn.close()
+    
+    if not drift:
+        typer.echo("✓ Resumo de KPIs consistente.")
+        return
+    
+    typer.echo(f"{'grupo':<20} {'chave':<28} {'esperado':>10} {'atual':>10}")
+    for row in drift:
+        typer.echo(
+            f"{row['grupo']:<20} {row['chave']:<28} "
+            f"{row['esperado']:>10,} {row['atual']:>10,}"
+        )
+    if fix:
+        typer.echo(f"✓ {len(drift)} divergências corrigidas.")
+    else:
+        typer.echo(f"✗ {len(drift)} divergências (use --fix para corrigir).")
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def explain(
+    only: Optional[str] = typer.Option(
+        None,
+        help="Analisa apenas consultas cujo nome contém o texto (ex.: dashboard).",
+    ),
+    min_rows: Optional[int] = typer.Option(
+        None,
+        help="Sinaliza Seq Scan a partir deste número de linhas (EXPLAIN_SEQ_SCAN_MIN_ROWS).",
+    ),
+    strict: bool = typer.Option(
+        False,
+        "--strict",
+        help="Termina com código 1 se houver Seq Scan sinalizado ou erro.",
+    ),
+):
+    """Roda EXPLAIN (ANALYZE, BUFFERS) nas consultas do dashboard e do stream."""
+    load_project_env()
+    conn = create_connection(load_env())
+    
+    try:
+        results = run_explain(conn, min_rows=min_rows, only=only)
+    except Exception as e:
+        logger.error(f"Erro ao analisar planos: {e}")
+        raise typer.Exit(code=1)
+    finally:
+        conn.close()
+    
+    problems = 0
+    for result in results:
+        if "erro" in result:
+            problems += 1
+            typer.echo(f"\n✗ {result['consulta']}: {result['erro']}")
+            continue
+        
+        flagged = [] if result["full_scan_expected"] else result["seq_scans"]
+        problems += bool(flagged)
+        mark = "⚠" if flagged else "✓"
+        typer.echo(
+            f"\n{mark} {result['consulta']}: {result['execution_ms']:.2f} ms, "
+            f"buffers hit={result['shared_hit']} read={result['shared_read']}"
+        )
+        for access in result["access"]:
+            typer.echo(f"    {access}")
+        for table, (read, existing) in result.get("partitions", {}).items():
+            typer.echo(f"    partições de {table}: {read} de {existing}")
+        if flagged:
+            typer.echo(f"    Seq Scan em tabela grande: {', '.join(flagged)}")
+    
+    typer.echo(f"\n{len(results)} consultas analisadas, {problems} com alerta.")
+    if strict and problems:
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def snapshot_api(
+    host: Optional[str] = typer.Option(
+        None,
+        help="Endereço de escuta (DASHBOARD_API_HOST, padrão 127.0.0.1).",
+    ),
+    port: Optional[int] = typer.Option(
+        None,
+        help="Porta HTTP (DASHBOARD_API_PORT, padrão 8600).",
+    ),
+):
+    """Serve o snapshot do dashboard e os alertas em JSON, com ETag."""
+    config = load_api_config()
+    refresher = SnapshotRefresher.from_env()
+    api = SnapshotApi(
+        refresher,
+        host=host or config["host"],
+        port=port or config["port"] or 8600,
+    )
+    refresher.start()
+    try:
+        api.start()
+    except OSError as e:
+        logger.error(f"Erro ao abrir a API de snapshot: {e}")
+        refresher.stop()
+        raise typer.Exit(code=1)
+
+    typer.echo(f"Servindo http://{api.host}:{api.port}/snapshot (Ctrl+C para sair)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.stop()
+        refresher.stop()
+        close_pools()
+
+
+@app.command()
+def cdc_consume(
+    plugin: Optional[str] = typer.Option(
+        None,
+        help=f"Plugin de decodificação ({', '.join(PLUGINS)}; CDC_PLUGIN).",
+    ),
+    slot: Optional[str] = typer.Option(None, help="Slot de replicação (CDC_SLOT_NAME)."),
+    output: Optional[Path] = typer.Option(
+        None,
+        help="Diretório da camada bronze (CDC_OUTPUT_DIR).",
+    ),
+    fmt: Optional[str] = typer.Option(
+        None,
+        "--format",
+        help=f"Formato dos arquivos ({', '.join(FORMATS)}; CDC_OUTPUT_FORMAT).",
+    ),
+    seconds: Optional[float] = typer.Option(
+        None,
+        min=1,
+        help="Encerra após N segundos (benchmark); padrão: até Ctrl+C.",
+    ),
+    drop_slot: bool = typer.Option(
+        False,
+        "--drop-slot",
+        help="Remove o slot ao sair (o WAL deixa de ser retido).",
+    ),
+):
+    """Consome o slot de replicação lógica e grava Parquet/JSONL por tabela."""
+    config = load_cdc_config()
+    plugin = plugin or config["plugin"]
+    slot = slot or config["slot"]
+    fmt = fmt or config["output_format"]
+    if plugin not in PLUGINS or fmt not in FORMATS:
+        typer.echo(f"✗ Plugin ({', '.join(PLUGINS)}) ou formato ({', '.join(FORMATS)}) inválido.")
+        raise typer.Exit(code=1)
+
+    env_vars = load_env()
+    try:
+        conn = create_connection(env_vars)
+        try:
+            tables = [*TABLES, HEARTBEAT_TABLE] if heartbeat_available(conn) else TABLES
+            if plugin == "pgoutput":
+                ensure_publication(conn, config["publication"], tables)
+        finally:
+            conn.close()
+        replication = create_replication_connection(env_vars)
+    except psycopg2.Error as e:
+        logger.error(f"Erro ao preparar a replicação lógica: {e}")
+        raise typer.Exit(code=1)
+
+    cur = replication.cursor()
+    try:
+        ensure_slot(cur, slot, plugin)
+        cur.start_replication(
+            slot_name=slot,
+            decode=False,
+            options=start_options(plugin, config["publication"], tables),
+        )
+        writer = BronzeWriter(output or Path(config["output_dir"]), fmt)
+        consumer = CdcConsumer(
+            cur,
+            make_decoder(plugin),
+            writer,
+            batch_rows=config["batch_rows"],
+            flush_seconds=config["flush_seconds"],
+            feedback_seconds=config["feedback_seconds"],
+            status_seconds=config["status_seconds"],
+            echo=typer.echo,
+            latency_window=load_latency_config()["window"],
+        )
+        typer.echo(f"Consumindo slot {slot} ({plugin}) em {writer.root} ({fmt})...")
+        started = time.monotonic()
+        try:
+            consumer.run(seconds=seconds)
+        except KeyboardInterrupt:
+            pass
+        elapsed = max(time.monotonic() - started, 1e-9)
+        typer.echo(
+            f"\n{consumer.changes:,} mudanças em {consumer.transactions:,} transações, "
+            f"{consumer.changes / elapsed:,.0f}/s, "
+            f"{consumer.bytes_received / elapsed / 1024:,.1f} KiB/s; "
+            f"{writer.files} arquivos ({writer.bytes_written / 1024:,.1f} KiB), "
+            f"confirmado até {format_lsn(consumer.flushed_lsn)}."
+        )
+        typer.echo(f"commit→captura: {consumer.commit_latency.format()}")
+        if consumer.heartbeat_latency.count:
+            typer.echo(f"heartbeat: {consumer.heartbeat_latency.format()}")
+    except psycopg2.Error as e:
+        logger.error(f"Erro na replicação lógica: {e}")
+        raise typer.Exit(code=1)
+    finally:
+        if drop_slot:
+            try:
+                replication.close()
+                replication = create_replication_connection(env_vars)
+                replication.cursor().drop_replication_slot(slot)
+                typer.echo(f"Slot {slot} removido.")
+            except psycopg2.Error as e:
+                logger.error(f"Erro ao remover o slot {slot}: {e}")
+        replication.close()
+
+
+@app.command()
+def cdc_latency(
+    from_file: Optional[Path] = typer.Option(
+        None,
+        "--from-file",
+        help="Mensagens JSON do Debezium, uma por linha (ex.: saída de make cdc-consume).",
+    ),
+    slot: Optional[str] = typer.Option(
+        None,
+        help="Slot a acompanhar (padrão: todos os slots lógicos).",
+    ),
+    samples: int = typer.Option(
+        1,
+        min=0,
+        help="Leituras do atraso dos slots (0 = não consulta o banco).",
+    ),
+    interval: float = typer.Option(5.0, min=0.5, help="Segundos entre leituras."),
+):
+    """Latência commit→captura (Debezium) e atraso dos slots de replicação."""
+    if from_file is not None:
+        commit_latency = LatencyTracker(window=1_000_000)
+        heartbeat_latency = LatencyTracker(window=1_000_000)
+        with open(from_file, encoding="utf-8") as handle:
+            changes = measure_debezium(handle, commit_latency, heartbeat_latency)
+        typer.echo(f"{changes:,} mudanças em {from_file}")
+        typer.echo(f"  commit→captura: {commit_latency.format()}")
+        typer.echo(f"  heartbeat:      {heartbeat_latency.format()}")
+
+    if not samples:
+        return
+
+    try:
+        conn = create_connection(load_env())
+    except psycopg2.Error as e:
+        logger.error(f"Erro ao conectar: {e}")
+        raise typer.Exit(code=1)
+
+    try:
+        for sample in range(samples):
+            if sample:
+                time.sleep(interval)
+            rows = slot_lag(conn, slot)
+            if not rows:
+                typer.echo("Nenhum slot lógico encontrado.")
+                return
+            for row in rows:
+                typer.echo(
+                    f"{row['slot_name']:<20} {row['plugin']:<10} "
+                    f"{'ativo' if row['active'] else 'inativo':<8} "
+                    f"não confirmado {(row['atraso_bytes'] or 0) / 1024:>12,.1f} KiB | "
+                    f"WAL retido {(row['retido_bytes'] or 0) / 1024:>12,.1f} KiB"
+                )
+    except psycopg2.Error as e:
+        logger.error(f"Erro ao consultar pg_replication_slots: {e}")
+        raise typer.Exit(code=1)
+    finally:
+        conn.close()
+
+
+@app.command()
+def emit_events(
+    events: Optional[int] = typer.Option(None, min=1, help="Total de eventos a emitir."),
+    seconds: Optional[float] = typer.Option(None, min=1, help="Emite por N segundos."),
+    rate: Optional[float] = typer.Option(
+        None,
+        min=1,
+        help="Eventos por segundo no total (padrão: o máximo possível).",
+    ),
+    output: Optional[Path] = typer.Option(None, help="Diretório dos tópicos (EMIT_OUTPUT_DIR)."),
+    workers: Optional[int] = typer.Option(
+        None,
+        min=1,
+        help="Processos paralelos, um por partição (EMIT_WORKERS; padrão: CPUs).",
+    ),
+    seed: Optional[int] = typer.Option(None, help="Semente para uma emissão reproduzível."),
+):
+    """Emite envelopes do Debezium direto em arquivos, sem PostgreSQL."""
+    if events is None and seconds is None:
+        typer.echo("✗ Informe --events ou --seconds.")
+        raise typer.Exit(code=1)
+
+    config = load_emitter_config()
+    seed_config = load_seed_config()
+    existing = {
+        table: seed_config[f"seed_{table}"]
+        for table in ("pacientes", "medicos", "consultas", "exames", "internacoes")
+    }
+    root = output or Path(config["output_dir"])
+    workers = workers or config["workers"]
+    typer.echo(f"Emitindo em {root} com {workers} processo(s)...")
+    try:
+        stats = emit_parallel(
+            root,
+            existing,
+            workers=workers,
+            events=events,
+            seconds=seconds,
+            rate=rate,
+            batch_size=config["batch_size"],
+            segment_bytes=int(config["segment_mb"] * 1024 * 1024),
+            pool_size=config["pool_size"],
+            seed=seed,
+        )
+    except FileExistsError as e:
+        typer.echo(f"✗ {e}")
+        raise typer.Exit(code=1)
+    typer.echo(
+        f"{stats['events']:,} eventos em {stats['seconds']:.1f}s: "
+        f"{stats['events'] / stats['seconds']:,.0f} eventos/s, "
+        f"{stats['bytes'] / stats['seconds'] / 1024 / 1024:,.1f} MiB/s "
+        f"({stats['bytes'] / 1024 / 1024:,.1f} MiB)."
+    )
+
+
+@app.command()
+def backfill(
+    days: int = typer.Option(30, min=1, help="Dias de histórico a simular."),
+    start: Optional[datetime] = typer.Option(
+        None,
+        formats=["%Y-%m-%d"],
+        help="Primeiro dia (padrão: DAYS dias antes de hoje).",
+    ),
+    inserts_per_day: Optional[int] = typer.Option(
+        None,
+        min=1,
+        help="Inserções por dia útil (BACKFILL_INSERTS_PER_DAY).",
+    ),
+    output: Optional[Path] = typer.Option(None, help="Diretório de saída (BACKFILL_OUTPUT_DIR)."),
+    workers: Optional[int] = typer.Option(
+        None,
+        min=1,
+        help="Processos paralelos, um dia por vez cada (BACKFILL_WORKERS; padrão: CPUs).",
+    ),
+    seed: Optional[int] = typer.Option(None, help="Semente para um histórico reproduzível."),
+):
+    """Gera histórico sintético (changelog e estado final) em Parquet, sem banco."""
+    config = load_backfill_config()
+    seed_config = load_seed_config()
+    first_day = start.date() if start else datetime.now(timezone.utc).date() - timedelta(days=days)
+    root = output or Path(config["output_dir"])
+    workers = workers or config["workers"]
+    typer.echo(f"Simulando {days} dia(s) a partir de {first_day} em {root} com {workers} processo(s)...")
+
+    started = time.perf_counter()
+    stats = run_backfill(
+        root,
+        days,
+        first_day,
+        inserts_per_day=inserts_per_day or config["inserts_per_day"],
+        initial={
+            "pacientes": seed_config["seed_pacientes"],
+            "medicos": seed_config["seed_medicos"],
+        },
+        workers=workers,
+        chunk_rows=config["chunk_rows"],
+        pool_size=config["pool_size"],
+        seed=seed,
+        progress=lambda result: typer.echo(
+            f"  {result['day']}: {result['changes']:,} alterações"
+        ),
+    )
+    seconds = time.perf_counter() - started
+    typer.echo(
+        f"{stats['changes']:,} alterações ({stats['updates']:,} updates) em {seconds:.1f}s: "
+        f"{stats['changes'] / seconds:,.0f} eventos/s, "
+        f"{stats['files']:,} arquivos, {stats['bytes'] / 1024 / 1024:,.1f} MiB (semente {stats['seed']})."
+    )
+
+
 if __name__ == "__main__":
     app()
@@ -12,6 +12,79 @@ from faker import Faker
 
 fake = Faker("pt_BR")
 
+# Vocabulários dos geradores, compartilhados com o stream e o emissor de eventos.
+ESPECIALIDADES = [
+    "Clínica Geral",
+    "Cardiologia",
+    "Pneumologia",
+    "Gastroenterologia",
+    "Neurologia",
+    "Ortopedia",
+    "Dermatologia",
+    "Oftalmologia",
+    "Otorrinolaringologia",
+    "Psiquiatria",
+]
+
+TIPOS_CONVENIO = ["publico", "privado", "empresarial"]
+COBERTURAS_CONVENIO = [
+    "integral",
+    "ambulatorial e hospitalar",
+    "ambulatorial",
+    "especializado",
+]
+
+MOTIVOS_CONSULTA = [
+    "Consulta de rotina",
+    "Acompanhamento",
+    "Queixa principal",
+    "Revisão de exames",
+    "Prescrição de medicamentos",
+    "Avaliação de sintomas",
+]
+STATUS_CONSULTA = ["agendada", "realizada", "cancelada", "faltou"]
+STATUS_CONSULTA_PESOS = [0.55, 0.35, 0.05, 0.05]
+# Destinos de uma consulta agendada quando o stream a atualiza.
+STATUS_CONSULTA_FINAIS = ["realizada", "cancelada", "faltou"]
+
+TIPOS_EXAME = [
+    "Hemograma",
+    "Raio-X",
+    "Tomografia",
+    "Ultrassom",
+    "PCR",
+    "ECG",
+    "Eletrocardiograma",
+    "Ressonância Magnética",
+    "Biópsia",
+    "Endoscopia",
+]
+RESULTADOS_EXAME = [
+    "Normal",
+    "Alterado",
+    "Pendente de análise",
+    "Requer acompanhamento",
+    "Sem alterações",
+]
+# Resultados gravados quando o stream atualiza um exame pendente.
+RESULTADOS_ATUALIZACAO_EXAME = ["Normal", "Alterado", "Positivo", "Negativo", "Pendente"]
+
+MOTIVOS_INTERNACAO = [
+    "Cirurgia",
+    "Tratamento de infecção",
+    "Observação",
+    "Reabilitação",
+    "Cuidados paliativos",
+    "Avaliação diagnóstica",
+]
+QUARTOS = ["101", "102", "103", "201", "202", "203", "301", "302", "303"]
+
+
+def set_random_seed(seed: int) -> None:
+    """Fixa a semente de random e Faker para gerar dados reproduzíveis."""
+    random.seed(seed)
+    Faker.seed(seed)
+
 
 def _mod11_digit(value: int) -> int:
     """Normaliza dígito verificador mod 11 para um único algarismo."""
@@ -72,42 +145,21 @@ def generate_paciente() -> Dict[str, Any]:
 
 def generate_medico() -> Dict[str, Any]:
     """Gera dados de um médico."""
-    especialidades = [
-        "Clínica Geral",
-        "Cardiologia",
-        "Pneumologia",
-        "Gastroenterologia",
-        "Neurologia",
-        "Ortopedia",
-        "Dermatologia",
-        "Oftalmologia",
-        "Otorrinolaringologia",
-        "Psiquiatria",
-    ]
-    
     return {
         "nome": fake.name(),
         "crm": generate_crm(),
-        "especialidade": random.choice(especialidades),
+        "especialidade": random.choice(ESPECIALIDADES),
         "telefone": fake.phone_number(),
     }
 
 
 def generate_convenio() -> Dict[str, Any]:
     """Gera dados de um convênio."""
-    tipos = ["publico", "privado", "empresarial"]
-    coberturas = [
-        "integral",
-        "ambulatorial e hospitalar",
-        "ambulatorial",
-        "especializado",
-    ]
-    
     return {
         "nome": fake.company(),
         "cnpj": generate_cnpj(),
-        "tipo": random.choice(tipos),
-        "cobertura": random.choice(coberturas),
+        "tipo": random.choice(TIPOS_CONVENIO),
+        "cobertura": random.choice(COBERTURAS_CONVENIO),
     }
 
 
@@ -120,18 +172,6 @@ def generate_consulta(
     if min_date is None:
         min_date = datetime.now() - timedelta(days=730)
     
-    motivos = [
-        "Consulta de rotina",
-        "Acompanhamento",
-        "Queixa principal",
-        "Revisão de exames",
-        "Prescrição de medicamentos",
-        "Avaliação de sintomas",
-    ]
-    
-    status_choices = ["agendada", "realizada", "cancelada", "faltou"]
-    status_weights = [0.55, 0.35, 0.05, 0.05]
-    
     data = fake.date_time_between(
         start_date=min_date,
         end_date="+2y",
@@ -141,8 +181,8 @@ def generate_consulta(
         "paciente_id": paciente_id,
         "medico_id": medico_id,
         "data": data,
-        "motivo": random.choice(motivos),
-        "status": random.choices(status_choices, weights=status_weights)[0],
+        "motivo": random.choice(MOTIVOS_CONSULTA),
+        "status": random.choices(STATUS_CONSULTA, weights=STATUS_CONSULTA_PESOS)[0],
     }
 
 
@@ -154,27 +194,6 @@ def generate_exame(
     if min_date is None:
         min_date = datetime.now() - timedelta(days=730)
     
-    tipos = [
-        "Hemograma",
-        "Raio-X",
-        "Tomografia",
-        "Ultrassom",
-        "PCR",
-        "ECG",
-        "Eletrocardiograma",
-        "Ressonância Magnética",
-        "Biópsia",
-        "Endoscopia",
-    ]
-    
-    resultados = [
-        "Normal",
-        "Alterado",
-        "Pendente de análise",
-        "Requer acompanhamento",
-        "Sem alterações",
-    ]
-    
     data = fake.date_time_between(
         start_date=min_date,
         end_date="+2y",
@@ -182,9 +201,9 @@ def generate_exame(
     
     return {
         "paciente_id": paciente_id,
-        "tipo_exame": random.choice(tipos),
+        "tipo_exame": random.choice(TIPOS_EXAME),
         "data": data,
-        "resultado": random.choice(resultados),
+        "resultado": random.choice(RESULTADOS_EXAME),
     }
 
 
@@ -196,15 +215,6 @@ def generate_internacao(
     if min_date is None:
         min_date = datetime.now() - timedelta(days=730)
     
-    motivos = [
-        "Cirurgia",
-        "Tratamento de infecção",
-        "Observação",
-        "Reabilitação",
-        "Cuidados paliativos",
-        "Avaliação diagnóstica",
-    ]
-    
     data_entrada = fake.date_time_between(
         start_date=min_date,
         end_date="+2y",
@@ -215,22 +225,10 @@ def generate_internacao(
     if random.random() < 0.7:
         data_saida = data_entrada + timedelta(days=random.randint(1, 10))
     
-    quartos = [
-        "101",
-        "102",
-        "103",
-        "201",
-        "202",
-        "203",
-        "301",
-        "302",
-        "303",
-    ]
-    
     return {
         "paciente_id": paciente_id,
         "data_entrada": data_entrada,
         "data_saida": data_saida,
-        "motivo": random.choice(motivos),
-        "quarto": random.choice(quartos),
+        "motivo": random.choice(MOTIVOS_INTERNACAO),
+        "quarto": random.choice(QUARTOS),
     }
@@ -4,16 +4,54 @@ Inicialização do banco de dados: conexão, schema, índices e seed lookups.
 
 import logging
 import os
+import threading
+import time
+import tomllib
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterator, Optional
 
 import psycopg2
 from dotenv import load_dotenv
+from psycopg2.pool import PoolError
 
 logger = logging.getLogger(__name__)
 
 PROJECT_ROOT = Path(__file__).parent.parent
 ENV_FILE = PROJECT_ROOT / "config" / ".env"
+SETTINGS_FILE = PROJECT_ROOT / "config" / "settings.toml"
+SQL_DIR = PROJECT_ROOT / "sql"
+
+TABLES = [
+    "pacientes",
+    "medicos",
+    "convenios",
+    "pacientes_convenios",
+    "consultas",
+    "exames",
+    "internacoes",
+]
+
+APPLICATION_NAME = "oltp-simulator"
+
+# Objetos opcionais aplicados após o schema (DB_EXTRAS ou init-db-cmd --extra).
+SQL_EXTRAS = {
+    "kpi_summary": ("Instalando resumo incremental de KPIs...", "04_kpi_summary.sql"),
+    "materialized_views": ("Criando materialized views...", "05_materialized_views.sql"),
+    "activity_counters": ("Instalando contadores de atividade...", "06_activity_counters.sql"),
+    "cdc_heartbeat": ("Instalando heartbeat de CDC...", "07_cdc_heartbeat.sql"),
+}
+
+# Parâmetros sempre reportados junto com os definidos no perfil do papel.
+REPORTED_SETTINGS = [
+    "synchronous_commit",
+    "statement_timeout",
+    "lock_timeout",
+    "work_mem",
+    "maintenance_work_mem",
+    "default_transaction_read_only",
+    "jit",
+]
 
 
 def load_project_env() -> None:
@@ -33,10 +71,78 @@ def load_env() -> dict:
     }
 
 
+def load_settings(path: Path = SETTINGS_FILE) -> dict:
+    """Lê config/settings.toml (dicionário vazio se o arquivo não existir)."""
+    try:
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+_DB_SETTINGS: Optional[dict] = None
+
+
+def connection_settings() -> dict:
+    """Seção [db] do settings.toml, lida uma vez por processo."""
+    global _DB_SETTINGS
+    if _DB_SETTINGS is None:
+        _DB_SETTINGS = load_settings().get("db", {})
+    return _DB_SETTINGS
+
+
+def _setting_value(value) -> str:
+    """Converte valores TOML para o formato aceito por set_config."""
+    if isinstance(value, bool):
+        return "on" if value else "off"
+    return str(value)
+
+
+def load_session_profile(role: str, settings: Optional[dict] = None) -> tuple[str, dict]:
+    """Resolve nome e parâmetros do perfil de sessão de um papel.
+
+    O perfil vem de ``<PAPEL>_SESSION_PROFILE`` ou de ``[roles]`` (padrão: o
+    próprio nome do papel); ``[db].search_path`` vale para todos os perfis.
+    """
+    if settings is None:
+        load_project_env()
+        settings = load_settings()
+
+    profiles = settings.get("profiles", {})
+    name = os.getenv(f"{role.upper()}_SESSION_PROFILE") or settings.get(
+        "roles", {}
+    ).get(role, role)
+    if name not in profiles and name != role:
+        raise ValueError(f"Perfil de sessão desconhecido para '{role}': {name}")
+
+    session = {}
+    search_path = settings.get("db", {}).get("search_path")
+    if search_path:
+        session["search_path"] = search_path
+    session.update(profiles.get(name, {}))
+    return name, {key: _setting_value(value) for key, value in session.items()}
+
+
+def describe_session(
+    conn: psycopg2.extensions.connection,
+    names: list[str],
+) -> dict:
+    """Retorna o valor efetivo (current_setting) de cada parâmetro."""
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT name, current_setting(name) FROM unnest(%s::text[]) AS name",
+            (names,),
+        )
+        rows = cur.fetchall()
+    conn.rollback()
+    return dict(rows)
+
+
 def create_connection(env_vars: Optional[dict] = None) -> psycopg2.extensions.connection:
     """Cria conexão com o PostgreSQL."""
     if env_vars is None:
         env_vars = load_env()
+    db_settings = connection_settings()
     
     try:
         conn = psycopg2.connect(
@@ -45,8 +151,8 @@ def create_connection(env_vars: Optional[dict] = None) -> psycopg2.extensions.co
             user=env_vars["user"],
             password=env_vars["password"],
             database=env_vars["database"],
-            connect_timeout=10,
-            application_name="oltp-simulator",
+            connect_timeout=int(db_settings.get("connect_timeout", 10)),
+            application_name=db_settings.get("application_name", APPLICATION_NAME),
         )
         conn.autocommit = False
         conn.isolation_level = psycopg2.extensions.ISOLATION_LEVEL_READ_COMMITTED
@@ -57,6 +163,300 @@ def create_connection(env_vars: Optional[dict] = None) -> psycopg2.extensions.co
         raise
 
 
+def apply_session_settings(
+    conn: psycopg2.extensions.connection,
+    settings: dict,
+) -> None:
+    """Aplica parâmetros de sessão (SET) e confirma a transação."""
+    if not settings:
+        return
+
+    with conn.cursor() as cur:
+        for name, value in settings.items():
+            cur.execute("SELECT set_config(%s, %s, false)", (name, str(value)))
+    conn.commit()
+
+
+def load_pool_config() -> dict:
+    """Carrega limites do pool de conexões do .env."""
+    load_project_env()
+    return {
+        "min_size": int(os.getenv("POOL_MIN_SIZE", 1)),
+        "max_size": int(os.getenv("POOL_MAX_SIZE", 5)),
+        "max_lifetime": float(os.getenv("POOL_MAX_LIFETIME_SECONDS", 1800)),
+        "health_check_after": float(os.getenv("POOL_HEALTH_CHECK_SECONDS", 30)),
+        "acquire_timeout": float(os.getenv("POOL_ACQUIRE_TIMEOUT_SECONDS", 30)),
+    }
+
+
+class ConnectionPool:
+    """Pool thread-safe de conexões com health check e reciclagem por idade.
+
+    Conexões ociosas há mais de ``health_check_after`` segundos são validadas
+    com SELECT 1 antes de serem entregues; conexões mais velhas que
+    ``max_lifetime`` são fechadas e reabertas.
+    """
+
+    def __init__(
+        self,
+        env_vars: Optional[dict] = None,
+        role: str = "default",
+        min_size: int = 1,
+        max_size: int = 5,
+        max_lifetime: float = 1800.0,
+        health_check_after: float = 30.0,
+        acquire_timeout: float = 30.0,
+        session_settings: Optional[dict] = None,
+        profile: Optional[str] = None,
+        application_name: str = APPLICATION_NAME,
+        connect: Callable[[dict], psycopg2.extensions.connection] = None,
+    ):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError("Limites do pool inválidos: exige 0 <= min <= max e max >= 1")
+
+        self.env_vars = env_vars if env_vars is not None else load_env()
+        self.role = role
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+        self.acquire_timeout = acquire_timeout
+        self.profile = profile or role
+        self.session_settings = {
+            "application_name": f"{application_name}/{role}",
+            **(session_settings or {}),
+        }
+        self._connect = connect or create_connection
+        self._cond = threading.Condition()
+        self._idle: list[tuple[psycopg2.extensions.connection, float]] = []
+        self._born: dict[int, float] = {}
+        self._size = 0
+        self._closed = False
+        self._stats = {"opened": 0, "recycled": 0, "discarded": 0, "waits": 0}
+
+    def fill(self) -> None:
+        """Abre conexões até atingir o tamanho mínimo."""
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            conn = self._open_reserved()
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def getconn(self) -> psycopg2.extensions.connection:
+        """Empresta uma conexão, aguardando até ``acquire_timeout``."""
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError(f"Pool '{self.role}' fechado.")
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn = None
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolError(
+                        f"Pool '{self.role}' esgotado ({self.max_size} conexões)."
+                    )
+                self._stats["waits"] += 1
+                self._cond.wait(remaining)
+
+        if conn is None:
+            return self._open_reserved()
+
+        if self._expired(conn):
+            self._count("recycled")
+            self._close(conn)
+            return self._open_reserved()
+
+        if time.monotonic() - idle_since > self.health_check_after and not self._healthy(conn):
+            self._count("discarded")
+            self._close(conn)
+            return self._open_reserved()
+
+        return conn
+
+    def putconn(
+        self,
+        conn: psycopg2.extensions.connection,
+        discard: bool = False,
+    ) -> None:
+        """Devolve a conexão ao pool ou a descarta se estiver quebrada/velha."""
+        if id(conn) not in self._born:
+            # Conexão que não pertence ao pool (ex.: já descartada).
+            self._close(conn)
+            return
+
+        if not discard and not conn.closed:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                discard = True
+
+        if discard or conn.closed:
+            reason = "discarded"
+        elif self._expired(conn) or self._closed:
+            reason = "recycled"
+        else:
+            reason = None
+
+        if reason:
+            self._close(conn)
+            with self._cond:
+                self._size -= 1
+                self._stats[reason] += 1
+                self._cond.notify()
+            return
+
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[psycopg2.extensions.connection]:
+        """Context manager que empresta e devolve uma conexão."""
+        conn = self.getconn()
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            self.putconn(conn, discard=True)
+            raise
+        except BaseException:
+            self.putconn(conn)
+            raise
+        else:
+            self.putconn(conn)
+
+    def closeall(self) -> None:
+        """Fecha conexões ociosas e impede novos empréstimos."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._close(conn)
+
+    def stats(self) -> dict:
+        """Retorna tamanho atual e contadores do pool."""
+        with self._cond:
+            return {
+                "role": self.role,
+                "profile": self.profile,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                **self._stats,
+            }
+
+    def _open_reserved(self) -> psycopg2.extensions.connection:
+        """Abre conexão para um slot já reservado em ``_size``."""
+        try:
+            conn = self._connect(self.env_vars)
+            apply_session_settings(conn, self.session_settings)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        self._born[id(conn)] = time.monotonic()
+        self._count("opened")
+        return conn
+
+    def _count(self, key: str) -> None:
+        with self._cond:
+            self._stats[key] += 1
+
+    def _healthy(self, conn: psycopg2.extensions.connection) -> bool:
+        """SELECT 1 silencioso usado antes de entregar conexões ociosas."""
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+                cur.fetchone()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _expired(self, conn: psycopg2.extensions.connection) -> bool:
+        born = self._born.get(id(conn), 0.0)
+        return time.monotonic() - born > self.max_lifetime
+
+    def _close(self, conn: psycopg2.extensions.connection) -> None:
+        self._born.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_POOLS: dict[str, ConnectionPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(role: str = "default", env_vars: Optional[dict] = None) -> ConnectionPool:
+    """Retorna o pool compartilhado do papel, criando-o na primeira chamada."""
+    created = False
+    with _POOLS_LOCK:
+        pool = _POOLS.get(role)
+        if pool is None:
+            pool_config = load_pool_config()
+            settings = load_settings()
+            profile, session_settings = load_session_profile(role, settings)
+            pool = ConnectionPool(
+                env_vars,
+                role=role,
+                session_settings=session_settings,
+                profile=profile,
+                application_name=settings.get("db", {}).get(
+                    "application_name",
+                    APPLICATION_NAME,
+                ),
+                **pool_config,
+            )
+            _POOLS[role] = pool
+            created = True
+    pool.fill()
+    if created:
+        with pool.connection() as conn:
+            log_session_settings(conn, pool)
+    return pool
+
+
+def log_session_settings(
+    conn: psycopg2.extensions.connection,
+    pool: ConnectionPool,
+) -> dict:
+    """Loga os parâmetros efetivos da sessão de um pool e os retorna."""
+    names = list(dict.fromkeys([*REPORTED_SETTINGS, *pool.session_settings]))
+    effective = describe_session(conn, names)
+    logger.info(
+        "Sessão '%s' (perfil %s): %s",
+        pool.role,
+        pool.profile,
+        ", ".join(f"{name}={value}" for name, value in effective.items()),
+    )
+    return effective
+
+
+def close_pools() -> None:
+    """Fecha todos os pools do processo."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.closeall()
+
+
 def test_connection(conn: psycopg2.extensions.connection) -> bool:
     """Testa conexão com SELECT 1."""
     try:
@@ -94,33 +494,74 @@ def execute_sql_file(
         return False
 
 
+def partitioned_schema_enabled() -> bool:
+    """Indica se PARTITIONED_SCHEMA pede o schema particionado."""
+    load_project_env()
+    return os.getenv("PARTITIONED_SCHEMA", "false").lower() in {"1", "true", "yes", "on"}
+
+
+def enabled_extras() -> list[str]:
+    """Extras pedidos em DB_EXTRAS (lista separada por vírgulas)."""
+    load_project_env()
+    return [
+        name.strip()
+        for name in os.getenv("DB_EXTRAS", "").split(",")
+        if name.strip()
+    ]
+
+
+def init_sql_steps(
+    partitioned: Optional[bool] = None,
+    extras: Optional[list[str]] = None,
+) -> list[tuple[str, str]]:
+    """Etapas (mensagem, arquivo) executadas por init_db, em ordem."""
+    if partitioned is None:
+        partitioned = partitioned_schema_enabled()
+    if extras is None:
+        extras = enabled_extras()
+
+    unknown = sorted(set(extras) - set(SQL_EXTRAS))
+    if unknown:
+        raise ValueError(
+            f"Extras desconhecidos: {', '.join(unknown)} "
+            f"(disponíveis: {', '.join(SQL_EXTRAS)})"
+        )
+
+    if partitioned:
+        schema_step = ("Criando schema particionado...", "01_schema_partitioned.sql")
+    else:
+        schema_step = ("Criando schema...", "01_schema.sql")
+
+    return [
+        schema_step,
+        ("Criando índices...", "02_indexes.sql"),
+        ("Carregando dados de lookup...", "03_seed-lookups.sql"),
+        *(SQL_EXTRAS[name] for name in SQL_EXTRAS if name in extras),
+    ]
+
+
 def init_db(
     conn: psycopg2.extensions.connection,
     drop_first: bool = False,
+    partitioned: Optional[bool] = None,
+    extras: Optional[list[str]] = None,
 ) -> bool:
-    """Inicializa o banco: drop, schema, índices, seed lookups."""
-    sql_dir = Path(__file__).parent.parent / "sql"
-    
+    """Inicializa o banco: drop, schema, índices, seed lookups e extras.
+
+    ``partitioned=None`` segue PARTITIONED_SCHEMA e ``extras=None`` segue
+    DB_EXTRAS do .env.
+    """
     # 1) Drop (opcional)
     if drop_first:
         logger.info("Executando drop de todas as tabelas...")
-        if not execute_sql_file(conn, str(sql_dir / "99_drop_all.sql")):
+        if not execute_sql_file(conn, str(SQL_DIR / "99_drop_all.sql")):
             return False
     
-    # 2) Schema
-    logger.info("Criando schema...")
-    if not execute_sql_file(conn, str(sql_dir / "01_schema.sql")):
-        return False
-    
-    # 3) Índices
-    logger.info("Criando índices...")
-    if not execute_sql_file(conn, str(sql_dir / "02_indexes.sql")):
-        return False
-    
-    # 4) Seed lookups
-    logger.info("Carregando dados de lookup...")
-    if not execute_sql_file(conn, str(sql_dir / "03_seed-lookups.sql")):
-        return False
+    # 2) Schema, índices e lookups
+    for message, file_name in init_sql_steps(partitioned, extras):
+        logger.info(message)
+        if not execute_sql_file(conn, str(SQL_DIR / file_name)):
+            return False
     
     logger.info("Banco de dados inicializado com sucesso.")
     return True
@@ -128,20 +569,10 @@ def init_db(
 
 def get_table_counts(conn: psycopg2.extensions.connection) -> dict:
     """Retorna contagem de registros por tabela."""
-    tables = [
-        "pacientes",
-        "medicos",
-        "convenios",
-        "pacientes_convenios",
-        "consultas",
-        "exames",
-        "internacoes",
-    ]
-    
     counts = {}
     try:
         with conn.cursor() as cur:
-            for table in tables:
+            for table in TABLES:
                 cur.execute(f"SELECT COUNT(*) FROM {table}")
                 counts[table] = cur.fetchone()[0]
     except psycopg2.Error as e:
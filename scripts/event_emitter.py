@@ -0,0 +1,617 @@
+"""
+Emissor de eventos no formato do Debezium, sem passar pelo PostgreSQL.
+
+Para testar a ingestão do datalake isoladamente, gera as mesmas mudanças do
+stream (mesma mistura de eventos e vocabulários de ``data_gen``) direto como
+envelopes do conector ``connectors/connector-oltp.json``: ``before``/``after``,
+``op``, ``source`` (lsn, txId, ts_ms), ``transaction`` e, com
+``provide.transaction.metadata``, os eventos BEGIN/END do tópico de
+transações. Os valores seguem o JsonConverter sem schema e o modo de tempo
+``adaptive``: TIMESTAMP em microssegundos e DATE em dias desde 1970.
+
+A geração é vetorizada por lote com NumPy. As colunas de cada linha derivam
+do id por hash, então um UPDATE repete os valores do INSERT correspondente e
+muda só a coluna atualizada. Nomes, telefones e endereços vêm de um pool
+gerado uma vez pelo Faker; CPFs são calculados do id (válidos e únicos).
+
+Os tópicos são gravados como segmentos JSONL no layout de log do Kafka: um
+diretório por tópico e partição, arquivos nomeados pelo offset inicial e
+rotação por tamanho. Cada processo paralelo grava a sua partição:
+
+    <saida>/oltp.public.consultas-0/00000000000000000000.jsonl
+"""
+
+import json
+import multiprocessing
+import os
+import random
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from scripts.data_gen import (
+    MOTIVOS_CONSULTA,
+    MOTIVOS_INTERNACAO,
+    QUARTOS,
+    RESULTADOS_ATUALIZACAO_EXAME,
+    RESULTADOS_EXAME,
+    STATUS_CONSULTA,
+    STATUS_CONSULTA_FINAIS,
+    STATUS_CONSULTA_PESOS,
+    TIPOS_EXAME,
+    generate_paciente,
+    set_random_seed,
+)
+from scripts.db_init import PROJECT_ROOT, load_project_env
+from scripts.stream import EVENT_TABLES, STREAM_EVENTS, STREAM_WEIGHTS
+
+CONNECTOR_FILE = PROJECT_ROOT / "connectors" / "connector-oltp.json"
+
+DEBEZIUM_VERSION = "2.5.0.Final"
+
+DAY_SECONDS = 86_400
+MICROS = 1_000_000
+
+# Avanço do LSN por mudança (tamanho típico de um registro de WAL).
+LSN_STEP = 256
+
+# Fração de internações inseridas já com alta (como generate_internacao).
+INTERNACAO_ALTA = 0.7
+
+# Único status de consulta que o stream atualiza (update_consulta).
+AGENDADA = STATUS_CONSULTA.index("agendada")
+
+_U64 = np.uint64
+_MASK = (1 << 64) - 1
+
+
+def load_emitter_config() -> dict:
+    """Carrega saída, lote, segmento, pool e processos do emissor do .env."""
+    load_project_env()
+    return {
+        "output_dir": os.getenv("EMIT_OUTPUT_DIR", "data/events"),
+        "batch_size": int(os.getenv("EMIT_BATCH_SIZE", 50_000)),
+        "segment_mb": float(os.getenv("EMIT_SEGMENT_MB", 256)),
+        "pool_size": int(os.getenv("EMIT_POOL_SIZE", 4096)),
+        "workers": int(os.getenv("EMIT_WORKERS", 0)) or os.cpu_count() or 1,
+    }
+
+
+def load_connector_settings(path: Path = CONNECTOR_FILE) -> dict:
+    """Prefixo de tópico, banco e metadados de transação do conector."""
+    with open(path, encoding="utf-8") as handle:
+        config = json.load(handle)["config"]
+    return {
+        "topic_prefix": config.get("topic.prefix", "oltp"),
+        "database": config.get("database.dbname", ""),
+        "transactions": str(config.get("provide.transaction.metadata", "false")).lower() == "true",
+    }
+
+
+def mix(values: np.ndarray, salt: int) -> np.ndarray:
+    """Hash 64 bits (splitmix64) de cada valor, determinístico por ``salt``."""
+    x = values.astype(_U64) + _U64((salt * 0x9E3779B97F4A7C15) & _MASK)
+    x ^= x >> _U64(30)
+    x *= _U64(0xBF58476D1CE4E5B9)
+    x ^= x >> _U64(27)
+    x *= _U64(0x94D049BB133111EB)
+    x ^= x >> _U64(31)
+    return x
+
+
+def pick(values: np.ndarray, salt: int, size: int) -> np.ndarray:
+    """Índice em [0, size) derivado de cada valor."""
+    return (mix(values, salt) % _U64(size)).astype(np.int64)
+
+
+def fraction(values: np.ndarray, salt: int) -> np.ndarray:
+    """Número em [0, 1) derivado de cada valor."""
+    return (mix(values, salt) >> _U64(11)).astype(np.float64) / float(1 << 53)
+
+
+def cpf_from_ids(ids: np.ndarray) -> list[str]:
+    """CPFs válidos e distintos para ids até 10⁹ (permutação dos 9 dígitos)."""
+    base = (ids.astype(np.int64) * 387_420_489 + 123_456_789) % 1_000_000_000
+    digits = np.stack([(base // 10 ** (8 - i)) % 10 for i in range(9)], axis=1)
+    first = (11 - (digits @ np.arange(10, 1, -1)) % 11) % 11 % 10
+    digits = np.column_stack([digits, first])
+    second = (11 - (digits @ np.arange(11, 1, -1)) % 11) % 11 % 10
+    return [
+        f"{b // 1_000_000:03d}.{b // 1000 % 1000:03d}.{b % 1000:03d}-{d1}{d2}"
+        for b, d1, d2 in zip(base.tolist(), first.tolist(), second.tolist())
+    ]
+
+
+def _encoded(values: list[Any]) -> list[str]:
+    return [json.dumps(value, ensure_ascii=False) for value in values]
+
+
+class ValuePools:
+    """Valores textuais pré-codificados em JSON para montar as linhas."""
+
+    def __init__(self, size: int = 4096, seed: Optional[int] = None):
+        if seed is not None:
+            set_random_seed(seed)
+        pacientes = [generate_paciente() for _ in range(size)]
+        self.size = size
+        self.nome = _encoded([p["nome"] for p in pacientes])
+        self.telefone = _encoded([p["telefone"] for p in pacientes])
+        self.endereco = _encoded([p["endereco"] for p in pacientes])
+        self.motivo_consulta = _encoded(MOTIVOS_CONSULTA)
+        self.status_consulta = _encoded(STATUS_CONSULTA)
+        self.status_consulta_pesos = np.cumsum(STATUS_CONSULTA_PESOS) / sum(STATUS_CONSULTA_PESOS)
+        self.status_final = _encoded(STATUS_CONSULTA_FINAIS)
+        self.tipo_exame = _encoded(TIPOS_EXAME)
+        self.resultado_exame = _encoded(RESULTADOS_EXAME)
+        self.resultado_atualizado = _encoded(RESULTADOS_ATUALIZACAO_EXAME)
+        self.motivo_internacao = _encoded(MOTIVOS_INTERNACAO)
+        self.quarto = _encoded(QUARTOS)
+
+
+class DebeziumEmitter:
+    """Gera lotes de envelopes do Debezium com a mistura de eventos do stream.
+
+    ``existing`` traz quantas linhas já existem por tabela (ids 1..N): UPDATEs
+    escolhem entre elas e as novas, e as chaves estrangeiras apontam para os
+    pacientes e médicos existentes.
+
+    Com ``partitions`` > 1, cada emissor (``partition``) fica com ids, LSNs e
+    txIds intercalados dos demais, então processos paralelos não colidem.
+    """
+
+    def __init__(
+        self,
+        pools: ValuePools,
+        existing: dict[str, int],
+        connector: Optional[dict] = None,
+        seed: Optional[int] = None,
+        start_lsn: int = 0x1000000,
+        start_txid: int = 1000,
+        partition: int = 0,
+        partitions: int = 1,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.pools = pools
+        self.connector = connector or load_connector_settings()
+        self.rng = np.random.default_rng(None if seed is None else [seed, partition])
+        self.partition = partition
+        self.partitions = partitions
+        tables = sorted(set(EVENT_TABLES.values()))
+        self.existing = {table: existing.get(table, 0) for table in tables}
+        self.inserted = dict.fromkeys(tables, 0)
+        # Consultas (índice local) que já receberam desfecho nesta partição.
+        self.finalizadas = np.zeros(0, dtype=bool)
+        self.sequence = 0
+        self.pacientes = max(existing.get("pacientes", 0), 1)
+        self.medicos = max(existing.get("medicos", 0), 1)
+        self.start_lsn = start_lsn
+        self.start_txid = start_txid
+        self._clock = clock
+        self.anchor_us = int(clock() * MICROS)
+        self.anchor_days = self.anchor_us // (DAY_SECONDS * MICROS)
+        weights = np.asarray(STREAM_WEIGHTS, dtype=np.float64)
+        self.weights = weights / weights.sum()
+        prefix = self.connector["topic_prefix"]
+        self.topics = {table: f"{prefix}.public.{table}" for table in tables}
+        self.transaction_topic = f"{prefix}.transaction"
+        self._source = (
+            f'"version":"{DEBEZIUM_VERSION}","connector":"postgresql",'
+            f'"name":"{prefix}",'
+        )
+        self._builders = {
+            "pacientes": self._pacientes,
+            "consultas": self._consultas,
+            "exames": self._exames,
+            "internacoes": self._internacoes,
+        }
+
+    def global_ids(self, table: str, local: np.ndarray) -> np.ndarray:
+        """Ids globais das linhas visíveis a esta partição (índices 0..n-1).
+
+        As primeiras são as ``existing``; depois vêm as inseridas aqui, a cada
+        ``partitions`` ids a partir de ``partition``.
+        """
+        existing = self.existing[table]
+        own = existing + 1 + self.partition + (local - existing) * self.partitions
+        return np.where(local < existing, local + 1, own)
+
+    def _timestamp(self, ids: np.ndarray, salt: int, past_days: int, future_days: int) -> np.ndarray:
+        """Timestamp (µs) em torno do início da emissão, derivado do id."""
+        span = (past_days + future_days) * DAY_SECONDS
+        seconds = pick(ids, salt, span) - past_days * DAY_SECONDS
+        return self.anchor_us + seconds * MICROS
+
+    def _status_consulta(self, ids: np.ndarray) -> np.ndarray:
+        """Índice em ``STATUS_CONSULTA`` do status com que a consulta é inserida."""
+        return np.searchsorted(self.pools.status_consulta_pesos, fraction(ids, 11), side="right")
+
+    def _finaliza_consultas(self, local: np.ndarray, ids: np.ndarray) -> np.ndarray:
+        """Máscara das consultas sorteadas que ainda estão agendadas.
+
+        Como o stream, só consultas inseridas como agendadas e ainda sem
+        desfecho são atualizadas, uma vez cada; as escolhidas ficam marcadas.
+        """
+        visible = self.existing["consultas"] + self.inserted["consultas"]
+        if len(self.finalizadas) < visible:
+            grown = np.zeros(max(visible, 2 * len(self.finalizadas)), dtype=bool)
+            grown[: len(self.finalizadas)] = self.finalizadas
+            self.finalizadas = grown
+        candidates = np.flatnonzero(
+            (self._status_consulta(ids) == AGENDADA) & ~self.finalizadas[local]
+        )
+        # A mesma consulta sorteada duas vezes no lote só recebe o primeiro desfecho.
+        _, first = np.unique(local[candidates], return_index=True)
+        chosen = np.zeros(len(local), dtype=bool)
+        chosen[candidates[first]] = True
+        self.finalizadas[local[chosen]] = True
+        return chosen
+
+    def _pacientes(self, ids, salts, update, now_us):
+        pools = self.pools
+        telefone = pick(ids, 1, pools.size)
+        endereco = pick(ids, 2, pools.size)
+        if update:
+            # Como update_paciente: troca o telefone ou o endereço.
+            novo = pick(salts, 3, pools.size)
+            muda_telefone = pick(salts, 4, 2) == 0
+            telefone = np.where(muda_telefone, novo, telefone)
+            endereco = np.where(muda_telefone, endereco, novo)
+        nascimento = self.anchor_days - 18 * 365 - pick(ids, 5, 82 * 365)
+        cadastro = self._timestamp(ids, 6, 730, 0)
+        return [
+            f'{{"id":{i},"nome":{pools.nome[n]},"nascimento":{nasc},"cpf":"{cpf}",'
+            f'"telefone":{pools.telefone[t]},"endereco":{pools.endereco[e]},'
+            f'"data_cadastro":{cad},"created_at":{c},"updated_at":{now_us}}}'
+            for i, n, nasc, cpf, t, e, cad, c in zip(
+                ids.tolist(),
+                pick(ids, 7, pools.size).tolist(),
+                nascimento.tolist(),
+                cpf_from_ids(ids),
+                telefone.tolist(),
+                endereco.tolist(),
+                cadastro.tolist(),
+                cadastro.tolist(),
+            )
+        ]
+
+    def _consultas(self, ids, salts, update, now_us):
+        pools = self.pools
+        if update:
+            status = [pools.status_final[s] for s in pick(salts, 10, len(pools.status_final)).tolist()]
+        else:
+            status = [pools.status_consulta[s] for s in self._status_consulta(ids).tolist()]
+        data = self._timestamp(ids, 12, 730, 730)
+        created = self._timestamp(ids, 8, 730, 0)
+        return [
+            f'{{"id":{i},"paciente_id":{p},"medico_id":{m},"data":{d},'
+            f'"motivo":{pools.motivo_consulta[mo]},"status":{s},'
+            f'"created_at":{c},"updated_at":{now_us}}}'
+            for i, p, m, d, mo, s, c in zip(
+                ids.tolist(),
+                (pick(ids, 13, self.pacientes) + 1).tolist(),
+                (pick(ids, 14, self.medicos) + 1).tolist(),
+                data.tolist(),
+                pick(ids, 15, len(pools.motivo_consulta)).tolist(),
+                status,
+                created.tolist(),
+            )
+        ]
+
+    def _exames(self, ids, salts, update, now_us):
+        pools = self.pools
+        if update:
+            resultado = [
+                pools.resultado_atualizado[r]
+                for r in pick(salts, 20, len(pools.resultado_atualizado)).tolist()
+            ]
+        else:
+            resultado = [
+                pools.resultado_exame[r]
+                for r in pick(ids, 21, len(pools.resultado_exame)).tolist()
+            ]
+        data = self._timestamp(ids, 22, 730, 730)
+        created = self._timestamp(ids, 8, 730, 0)
+        return [
+            f'{{"id":{i},"paciente_id":{p},"tipo_exame":{pools.tipo_exame[t]},'
+            f'"data":{d},"resultado":{r},"created_at":{c},"updated_at":{now_us}}}'
+            for i, p, t, d, r, c in zip(
+                ids.tolist(),
+                (pick(ids, 23, self.pacientes) + 1).tolist(),
+                pick(ids, 24, len(pools.tipo_exame)).tolist(),
+                data.tolist(),
+                resultado,
+                created.tolist(),
+            )
+        ]
+
+    def _internacoes(self, ids, salts, update, now_us):
+        pools = self.pools
+        entrada = self._timestamp(ids, 30, 730, 730)
+        saida = entrada + (1 + pick(ids, 31, 10)) * DAY_SECONDS * MICROS
+        if update:
+            # update_internacao registra a alta.
+            saidas = saida.tolist()
+        else:
+            com_alta = fraction(ids, 32) < INTERNACAO_ALTA
+            saidas = [s if alta else "null" for s, alta in zip(saida.tolist(), com_alta.tolist())]
+        created = self._timestamp(ids, 8, 730, 0)
+        return [
+            f'{{"id":{i},"paciente_id":{p},"data_entrada":{e},"data_saida":{s},'
+            f'"motivo":{pools.motivo_internacao[mo]},"quarto":{pools.quarto[q]},'
+            f'"created_at":{c},"updated_at":{now_us}}}'
+            for i, p, e, s, mo, q, c in zip(
+                ids.tolist(),
+                (pick(ids, 33, self.pacientes) + 1).tolist(),
+                entrada.tolist(),
+                saidas,
+                pick(ids, 34, len(pools.motivo_internacao)).tolist(),
+                pick(ids, 35, len(pools.quarto)).tolist(),
+                created.tolist(),
+            )
+        ]
+
+    def batch(self, size: int) -> tuple[dict[str, list[str]], int]:
+        """Sorteia ``size`` eventos; retorna as linhas JSON por tópico, em ordem,
+        e quantas mudanças foram de fato geradas.
+
+        UPDATEs de tabelas ainda vazias, e de consultas que não foram inseridas
+        como agendadas, são descartados, como o SKIP do stream.
+        """
+        now_ms = int(self._clock() * 1000)
+        now_us = now_ms * 1000
+        kinds = self.rng.choice(len(STREAM_EVENTS), size=size, p=self.weights)
+        sequence = (
+            (self.sequence + np.arange(size, dtype=np.int64)) * self.partitions
+            + self.partition
+        )
+        self.sequence += size
+        lsns = self.start_lsn + sequence * LSN_STEP
+        txids = self.start_txid + sequence
+
+        by_table: dict[str, list[tuple[np.ndarray, list[str]]]] = {}
+        for kind, event in enumerate(STREAM_EVENTS):
+            positions = np.flatnonzero(kinds == kind)
+            if not positions.size:
+                continue
+            table = EVENT_TABLES[event]
+            update = event.startswith("update_")
+            visible = self.existing[table] + self.inserted[table]
+            if update:
+                if not visible:
+                    continue
+                local = self.rng.integers(0, visible, positions.size)
+            else:
+                local = visible + np.arange(positions.size, dtype=np.int64)
+                self.inserted[table] += positions.size
+            ids = self.global_ids(table, local)
+            if event == "update_consulta":
+                agendada = self._finaliza_consultas(local, ids)
+                positions, ids = positions[agendada], ids[agendada]
+                if not positions.size:
+                    continue
+            after = self._builders[table](ids, lsns[positions], update, now_us)
+            by_table.setdefault(table, []).append((positions, after, "u" if update else "c"))
+
+        topics: dict[str, list[str]] = {}
+        changes = 0
+        for table, parts in by_table.items():
+            positions = np.concatenate([part[0] for part in parts])
+            rows = [row for part in parts for row in part[1]]
+            ops = [part[2] for part in parts for _ in part[1]]
+            order = np.argsort(positions, kind="stable")
+            ordered = positions[order]
+            envelope = (
+                f'"source":{{{self._source}"ts_ms":{now_ms},"snapshot":"false",'
+                f'"db":"{self.connector["database"]}","schema":"public","table":"{table}",'
+            )
+            tail = f'"ts_ms":{now_ms},"transaction":{{"id":"'
+            topics[self.topics[table]] = [
+                f'{{"before":null,"after":{rows[index]},{envelope}'
+                f'"sequence":"[null,\\"{lsn}\\"]","txId":{txid},"lsn":{lsn},"xmin":null}},'
+                f'"op":"{ops[index]}",{tail}{txid}:{lsn}","total_order":1,'
+                f'"data_collection_order":1}}}}'
+                for index, lsn, txid in zip(
+                    order.tolist(), lsns[ordered].tolist(), txids[ordered].tolist()
+                )
+            ]
+            changes += len(rows)
+
+        if self.connector["transactions"] and by_table:
+            tables = np.full(size, "", dtype=object)
+            for table, parts in by_table.items():
+                for positions, _, _ in parts:
+                    tables[positions] = table
+            committed = np.flatnonzero(tables != "")
+            topics[self.transaction_topic] = [
+                line
+                for table, lsn, txid in zip(
+                    tables[committed].tolist(),
+                    lsns[committed].tolist(),
+                    txids[committed].tolist(),
+                )
+                for line in (
+                    f'{{"status":"BEGIN","id":"{txid}:{lsn}","event_count":null,'
+                    f'"data_collections":null,"ts_ms":{now_ms}}}',
+                    f'{{"status":"END","id":"{txid}:{lsn}","event_count":1,'
+                    f'"data_collections":[{{"data_collection":"public.{table}",'
+                    f'"event_count":1}}],"ts_ms":{now_ms}}}',
+                )
+            ]
+        return topics, changes
+
+
+class SegmentWriter:
+    """Grava tópicos de uma partição como segmentos JSONL por offset inicial.
+
+    Os offsets começam em 0 e o emissor recomeça ids e LSNs a cada execução,
+    então uma partição que já tem segmentos é recusada: continuar nela
+    duplicaria offsets, ids e LSNs.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        segment_bytes: int = 256 * 1024 * 1024,
+        partition: int = 0,
+    ):
+        self.root = Path(root)
+        self.segment_bytes = segment_bytes
+        self.partition = partition
+        used = sorted({path.parent.name for path in self.root.glob(f"*-{partition}/*.jsonl")})
+        if used:
+            raise FileExistsError(
+                f"Partição {partition} já tem segmentos em {self.root}: {', '.join(used)}. "
+                "Use outro diretório de saída ou remova os tópicos."
+            )
+        self.bytes_written = 0
+        self.segments = 0
+        self.offsets: dict[str, int] = {}
+        self._files: dict[str, Any] = {}
+        self._sizes: dict[str, int] = {}
+
+    def _open(self, topic: str) -> Any:
+        directory = self.root / f"{topic}-{self.partition}"
+        directory.mkdir(parents=True, exist_ok=True)
+        offset = self.offsets.setdefault(topic, 0)
+        handle = open(directory / f"{offset:020d}.jsonl", "ab", buffering=1024 * 1024)
+        self._files[topic] = handle
+        self._sizes[topic] = 0
+        self.segments += 1
+        return handle
+
+    def write(self, topic: str, lines: list[str]) -> None:
+        if not lines:
+            return
+        handle = self._files.get(topic) or self._open(topic)
+        data = ("\n".join(lines) + "\n").encode()
+        handle.write(data)
+        self.offsets[topic] += len(lines)
+        self._sizes[topic] += len(data)
+        self.bytes_written += len(data)
+        if self._sizes[topic] >= self.segment_bytes:
+            handle.close()
+            del self._files[topic]
+
+    def close(self) -> None:
+        for handle in self._files.values():
+            handle.close()
+        self._files.clear()
+
+
+def emit(
+    emitter: DebeziumEmitter,
+    writer: SegmentWriter,
+    events: Optional[int] = None,
+    seconds: Optional[float] = None,
+    rate: Optional[float] = None,
+    batch_size: int = 50_000,
+    clock: Callable[[], float] = time.monotonic,
+    sleep: Callable[[float], None] = time.sleep,
+) -> dict[str, float]:
+    """Emite até ``events`` eventos ou ``seconds`` segundos, a até ``rate``/s.
+
+    Sem limite de taxa, gera o mais rápido possível. Retorna eventos, bytes
+    e duração; só contam as mudanças gravadas, não os UPDATEs descartados.
+    """
+    if events is None and seconds is None:
+        raise ValueError("Informe events ou seconds.")
+    started = clock()
+    emitted = 0
+    try:
+        while events is None or emitted < events:
+            if seconds is not None and clock() - started >= seconds:
+                break
+            size = batch_size if events is None else min(batch_size, events - emitted)
+            if rate:
+                size = min(size, max(int(rate), 1))
+            topics, changes = emitter.batch(size)
+            for topic, lines in topics.items():
+                writer.write(topic, lines)
+            emitted += changes
+            if rate:
+                ahead = started + emitted / rate - clock()
+                if ahead > 0:
+                    sleep(ahead)
+    finally:
+        writer.close()
+    return {
+        "events": emitted,
+        "bytes": writer.bytes_written,
+        "seconds": max(clock() - started, 1e-9),
+    }
+
+
+def _emit_partition(options: dict[str, Any]) -> dict[str, float]:
+    """Executa uma partição de ``emit_parallel`` (em processo próprio)."""
+    emitter = DebeziumEmitter(
+        ValuePools(options["pool_size"], options["seed"]),
+        options["existing"],
+        options["connector"],
+        seed=options["seed"],
+        partition=options["partition"],
+        partitions=options["partitions"],
+    )
+    writer = SegmentWriter(options["root"], options["segment_bytes"], options["partition"])
+    return emit(
+        emitter,
+        writer,
+        events=options["events"],
+        seconds=options["seconds"],
+        rate=options["rate"],
+        batch_size=options["batch_size"],
+    )
+
+
+def emit_parallel(
+    root: Path,
+    existing: dict[str, int],
+    workers: int = 1,
+    events: Optional[int] = None,
+    seconds: Optional[float] = None,
+    rate: Optional[float] = None,
+    batch_size: int = 50_000,
+    segment_bytes: int = 256 * 1024 * 1024,
+    pool_size: int = 4096,
+    seed: Optional[int] = None,
+    connector: Optional[dict] = None,
+) -> dict[str, float]:
+    """Divide eventos e taxa entre ``workers`` processos, uma partição cada.
+
+    Todos usam a mesma semente de pools, então as linhas existentes têm os
+    mesmos valores em qualquer partição.
+    """
+    if seed is None:
+        seed = random.randrange(1 << 31)
+    options = [
+        {
+            "root": Path(root),
+            "existing": existing,
+            "connector": connector or load_connector_settings(),
+            "seed": seed,
+            "partition": partition,
+            "partitions": workers,
+            "events": (
+                None if events is None
+                else events // workers + (1 if partition < events % workers else 0)
+            ),
+            "seconds": seconds,
+            "rate": rate / workers if rate else None,
+            "batch_size": batch_size,
+            "segment_bytes": segment_bytes,
+            "pool_size": pool_size,
+        }
+        for partition in range(workers)
+    ]
+    started = time.monotonic()
+    if workers == 1:
+        results = [_emit_partition(options[0])]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(_emit_partition, options)
+    return {
+        "events": sum(result["events"] for result in results),
+        "bytes": sum(result["bytes"] for result in results),
+        "seconds": max(time.monotonic() - started, 1e-9),
+    }
@@ -0,0 +1,257 @@
+"""
+Verificação dos planos de execução do dashboard e do stream.
+
+Roda EXPLAIN (ANALYZE, BUFFERS) em cada consulta conhecida, sempre dentro de
+uma transação desfeita ao final (os UPDATEs do stream não persistem), e
+sinaliza Seq Scans em tabelas grandes para detectar regressões de plano.
+No schema particionado, mostra quantas partições de cada tabela o plano lê,
+o que evidencia o descarte de partições (pruning).
+"""
+
+import logging
+import os
+from datetime import date
+from typing import Any, Iterator, Optional
+
+import psycopg2
+
+from app import dashboard_data
+from scripts import stream
+from scripts.partitions import PARTITIONED_TABLES
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_PREFIX = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) "
+
+TABLE_ROWS_SQL = """
+SELECT relname, n_live_tup
+FROM pg_stat_user_tables
+WHERE schemaname = 'public'
+"""
+
+# (nome, SQL, parâmetros) com os mesmos valores padrão usados pelo código.
+QUERY_CATALOG = [
+    ("dashboard.resumo", dashboard_data.RESUMO_SQL, ()),
+    ("dashboard.resumo_kpi", dashboard_data.KPI_RESUMO_SQL, ()),
+    (
+        "dashboard.ocupacao_por_quarto_kpi",
+        dashboard_data.KPI_OCUPACAO_POR_QUARTO_SQL,
+        (20,),
+    ),
+    (
+        "dashboard.ultimas_consultas",
+        dashboard_data.ULTIMAS_CONSULTAS_SQL,
+        (dashboard_data.window_start(), 20),
+    ),
+    (
+        "dashboard.internacoes_ativas",
+        dashboard_data.INTERNACOES_ATIVAS_SQL,
+        (20,),
+    ),
+    ("dashboard.internacoes_longas", dashboard_data.INTERNACOES_LONGAS_SQL, (7, 20)),
+    (
+        "dashboard.internacoes_longas_total",
+        dashboard_data.INTERNACOES_LONGAS_TOTAL_SQL,
+        (7,),
+    ),
+    (
+        "dashboard.ocupacao_por_quarto",
+        dashboard_data.OCUPACAO_POR_QUARTO_SQL,
+        (20,),
+    ),
+    (
+        "dashboard.exames_pendentes_recentes",
+        dashboard_data.EXAMES_PENDENTES_RECENTES_SQL,
+        (dashboard_data.window_start(), 20),
+    ),
+    (
+        "dashboard.consultas_agendadas_proximas",
+        dashboard_data.CONSULTAS_AGENDADAS_PROXIMAS_SQL,
+        (7, 20),
+    ),
+    ("dashboard.pacientes_sem_convenio", dashboard_data.PACIENTES_SEM_CONVENIO_SQL, (20,)),
+    (
+        "dashboard.internacoes_longas_mv",
+        dashboard_data.MV_INTERNACOES_LONGAS_SQL,
+        (7, 20),
+    ),
+    (
+        "dashboard.consultas_agendadas_proximas_mv",
+        dashboard_data.MV_CONSULTAS_AGENDADAS_PROXIMAS_SQL,
+        (7, 20),
+    ),
+    (
+        "dashboard.pacientes_sem_convenio_mv",
+        dashboard_data.MV_PACIENTES_SEM_CONVENIO_SQL,
+        (20,),
+    ),
+    ("dashboard.atividade_recente", dashboard_data.ATIVIDADE_RECENTE_SQL, {"minutes": 15}),
+    (
+        "dashboard.atividade_recente_contadores",
+        dashboard_data.ATIVIDADE_RECENTE_CONTADORES_SQL,
+        {"minutes": 15},
+    ),
+    (
+        "dashboard.atividade_por_minuto",
+        dashboard_data.ATIVIDADE_POR_MINUTO_SQL,
+        {"minutes": 120},
+    ),
+    ("stream.pick_consulta_agendada", stream.PICK_CONSULTA_AGENDADA_SQL, ()),
+    ("stream.pick_exame_pendente", stream.PICK_EXAME_PENDENTE_SQL, ()),
+    ("stream.pick_internacao_ativa", stream.PICK_INTERNACAO_ATIVA_SQL, ()),
+    (
+        "stream.update_consulta",
+        stream.UPDATE_CONSULTA_STATUS_SQL,
+        ("realizada", 1, date.today()),
+    ),
+    ("stream.update_exame", stream.UPDATE_EXAME_RESULTADO_SQL, ("Normal", 1, date.today())),
+    (
+        "stream.update_internacao",
+        stream.UPDATE_INTERNACAO_SAIDA_SQL,
+        ("2030-01-01", 1, date.today()),
+    ),
+]
+
+# Agregações sobre a tabela inteira: Seq Scan é o plano esperado e não gera
+# alerta (o custo delas é tratado fora do conjunto de índices).
+FULL_SCAN_QUERIES = {"dashboard.resumo"}
+
+# Consultas de extras opcionais: só analisadas se a tabela existir.
+OPTIONAL_QUERIES = {
+    "dashboard.resumo_kpi": "kpi_contagens",
+    "dashboard.ocupacao_por_quarto_kpi": "kpi_contagens",
+    "dashboard.internacoes_longas_mv": "mv_internacoes_longas",
+    "dashboard.consultas_agendadas_proximas_mv": "mv_consultas_agendadas_proximas",
+    "dashboard.pacientes_sem_convenio_mv": "mv_pacientes_sem_convenio",
+    "dashboard.atividade_recente_contadores": "atividade_por_minuto",
+    "dashboard.atividade_por_minuto": "atividade_por_minuto",
+}
+
+
+def load_explain_config() -> dict:
+    """Carrega o limite de linhas a partir do qual Seq Scan é sinalizado."""
+    return {"min_rows": int(os.getenv("EXPLAIN_SEQ_SCAN_MIN_ROWS", 1000))}
+
+
+def table_rows(conn: psycopg2.extensions.connection) -> dict[str, int]:
+    """Linhas vivas por tabela (partições aparecem com o próprio nome)."""
+    with conn.cursor() as cur:
+        cur.execute(TABLE_ROWS_SQL)
+        return {name: int(rows) for name, rows in cur.fetchall()}
+
+
+def plan_nodes(node: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """Percorre recursivamente os nós de um plano JSON."""
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def flag_seq_scans(
+    plan: dict[str, Any],
+    rows_by_table: dict[str, int],
+    min_rows: int,
+) -> list[str]:
+    """Tabelas lidas por Seq Scan com pelo menos ``min_rows`` linhas."""
+    flagged = []
+    for node in plan_nodes(plan):
+        if node.get("Node Type") != "Seq Scan":
+            continue
+        table = node.get("Relation Name")
+        if rows_by_table.get(table, 0) >= min_rows and table not in flagged:
+            flagged.append(table)
+    return flagged
+
+
+def partitions_read(
+    plan: dict[str, Any],
+    rows_by_table: dict[str, int],
+) -> dict[str, tuple[int, int]]:
+    """Partições lidas e existentes por tabela particionada do plano.
+
+    Partições descartadas no planejamento não aparecem no plano; as
+    descartadas na execução entram em "Subplans Removed" e não são contadas.
+    """
+    scanned = {
+        node["Relation Name"]
+        for node in plan_nodes(plan)
+        if "Relation Name" in node
+    }
+    result = {}
+    for table in PARTITIONED_TABLES:
+        existing = {name for name in rows_by_table if name.startswith(f"{table}_")}
+        if scanned & existing:
+            result[table] = (len(scanned & existing), len(existing))
+    return result
+
+
+def summarize_plan(plan: dict[str, Any]) -> dict[str, Any]:
+    """Resume tempo, buffers e métodos de acesso do plano."""
+    root = plan["Plan"]
+    access = []
+    for node in plan_nodes(root):
+        if "Relation Name" not in node:
+            continue
+        label = node["Node Type"]
+        if node.get("Index Name"):
+            label = f"{label} {node['Index Name']}"
+        else:
+            label = f"{label} {node['Relation Name']}"
+        if label not in access:
+            access.append(label)
+
+    return {
+        "execution_ms": plan.get("Execution Time", 0.0),
+        "shared_hit": root.get("Shared Hit Blocks", 0),
+        "shared_read": root.get("Shared Read Blocks", 0),
+        "access": access,
+    }
+
+
+def explain_query(
+    conn: psycopg2.extensions.connection,
+    sql: str,
+    params: tuple | dict = (),
+) -> dict[str, Any]:
+    """Executa EXPLAIN ANALYZE e desfaz a transação em seguida."""
+    try:
+        with conn.cursor() as cur:
+            cur.execute(EXPLAIN_PREFIX + sql, params)
+            return cur.fetchone()[0][0]
+    finally:
+        conn.rollback()
+
+
+def run_explain(
+    conn: psycopg2.extensions.connection,
+    min_rows: Optional[int] = None,
+    only: Optional[str] = None,
+) -> list[dict[str, Any]]:
+    """Analisa cada consulta do catálogo e retorna o resumo por consulta."""
+    min_rows = load_explain_config()["min_rows"] if min_rows is None else min_rows
+    rows_by_table = table_rows(conn)
+    conn.rollback()
+
+    results = []
+    for name, sql, params in QUERY_CATALOG:
+        if only and only not in name:
+            continue
+        if name in OPTIONAL_QUERIES and OPTIONAL_QUERIES[name] not in rows_by_table:
+            continue
+        try:
+            plan = explain_query(conn, sql, params)
+        except psycopg2.Error as e:
+            logger.error(f"Erro ao analisar {name}: {e}")
+            results.append({"consulta": name, "erro": str(e).strip()})
+            continue
+
+        results.append(
+            {
+                "consulta": name,
+                **summarize_plan(plan),
+                "seq_scans": flag_seq_scans(plan["Plan"], rows_by_table, min_rows),
+                "partitions": partitions_read(plan["Plan"], rows_by_table),
+                "full_scan_expected": name in FULL_SCAN_QUERIES,
+            }
+        )
+    return results
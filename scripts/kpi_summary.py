@@ -0,0 +1,74 @@
+"""
+Reconciliação do resumo incremental de KPIs (extra "kpi_summary").
+
+Compara kpi_contagens, mantida pelos triggers de sql/04_kpi_summary.sql, com
+os valores recalculados do zero e, opcionalmente, corrige a divergência.
+"""
+
+import logging
+
+import psycopg2
+
+logger = logging.getLogger(__name__)
+
+KPI_SUMMARY_AVAILABLE_SQL = "SELECT to_regclass('public.kpi_contagens') IS NOT NULL"
+
+# Bloqueia escritas nas tabelas de origem durante a comparação, para que
+# triggers concorrentes não apareçam como divergência.
+LOCK_SOURCES_SQL = """
+LOCK TABLE consultas, exames, internacoes, pacientes, pacientes_convenios, medicos
+IN SHARE MODE
+"""
+
+DRIFT_SQL = """
+SELECT
+    COALESCE(e.grupo, k.grupo) AS grupo,
+    COALESCE(e.chave, k.chave) AS chave,
+    COALESCE(e.total, 0) AS esperado,
+    COALESCE(k.total, 0) AS atual
+FROM kpi_contagens_esperadas e
+FULL JOIN kpi_contagens k ON k.grupo = e.grupo AND k.chave = e.chave
+WHERE COALESCE(e.total, 0) <> COALESCE(k.total, 0)
+ORDER BY 1, 2
+"""
+
+REBUILD_SQL = """
+DELETE FROM kpi_contagens;
+INSERT INTO kpi_contagens (grupo, chave, total)
+SELECT grupo, chave, total FROM kpi_contagens_esperadas;
+"""
+
+
+def kpi_summary_available(conn: psycopg2.extensions.connection) -> bool:
+    """Indica se o extra kpi_summary está instalado no banco."""
+    with conn.cursor() as cur:
+        cur.execute(KPI_SUMMARY_AVAILABLE_SQL)
+        return bool(cur.fetchone()[0])
+
+
+def reconcile(
+    conn: psycopg2.extensions.connection,
+    fix: bool = False,
+) -> list[dict]:
+    """Retorna as chaves divergentes e, com ``fix``, reconstrói o resumo."""
+    try:
+        with conn.cursor() as cur:
+            cur.execute(LOCK_SOURCES_SQL)
+            cur.execute(DRIFT_SQL)
+            columns = [col[0] for col in cur.description]
+            drift = [dict(zip(columns, row)) for row in cur.fetchall()]
+            if fix and drift:
+                cur.execute(REBUILD_SQL)
+    except psycopg2.Error:
+        conn.rollback()
+        raise
+
+    if fix:
+        conn.commit()
+    else:
+        conn.rollback()
+
+    if drift:
+        action = "corrigidas" if fix else "encontradas"
+        logger.warning(f"Resumo de KPIs: {len(drift)} divergências {action}.")
+    return drift
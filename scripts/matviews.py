@@ -0,0 +1,90 @@
+"""
+Materialized views do dashboard (extra "materialized_views").
+
+Registro das views de sql/05_materialized_views.sql com as tabelas de origem
+de cada uma, usado pelo agendador de refresh do app para pular refreshes
+quando nada mudou.
+"""
+
+import logging
+import time
+
+import psycopg2
+from psycopg2 import sql
+
+logger = logging.getLogger(__name__)
+
+# View -> tabelas lidas por ela
+MATERIALIZED_VIEWS = {
+    "mv_internacoes_longas": ("internacoes", "pacientes"),
+    "mv_pacientes_sem_convenio": ("pacientes", "pacientes_convenios"),
+    "mv_consultas_agendadas_proximas": ("consultas", "pacientes", "medicos"),
+}
+
+MATERIALIZED_VIEWS_AVAILABLE_SQL = """
+SELECT COUNT(*) = %s
+FROM pg_matviews
+WHERE schemaname = 'public'
+  AND matviewname = ANY(%s)
+"""
+
+DEFAULT_REFRESH_SECONDS = 30.0
+DEFAULT_MAX_AGE_SECONDS = 300.0
+
+# O pool do dashboard abre transações read-only por padrão.
+READ_WRITE_TRANSACTION_SQL = "SET TRANSACTION READ WRITE"
+
+
+def load_refresh_schedule(settings: dict) -> dict[str, dict[str, float]]:
+    """Cadência e idade máxima de cada view a partir de [materialized_views]."""
+    section = settings.get("materialized_views", {})
+    default_interval = float(section.get("refresh_seconds", DEFAULT_REFRESH_SECONDS))
+    default_max_age = float(section.get("max_age_seconds", DEFAULT_MAX_AGE_SECONDS))
+
+    schedule = {}
+    for name in MATERIALIZED_VIEWS:
+        override = section.get(name, {})
+        schedule[name] = {
+            "interval": float(override.get("refresh_seconds", default_interval)),
+            "max_age": float(override.get("max_age_seconds", default_max_age)),
+        }
+    return schedule
+
+
+def materialized_views_available(conn: psycopg2.extensions.connection) -> bool:
+    """Indica se todas as views do extra estão instaladas."""
+    with conn.cursor() as cur:
+        cur.execute(
+            MATERIALIZED_VIEWS_AVAILABLE_SQL,
+            (len(MATERIALIZED_VIEWS), list(MATERIALIZED_VIEWS)),
+        )
+        return bool(cur.fetchone()[0])
+
+
+def refresh_view(
+    conn: psycopg2.extensions.connection,
+    name: str,
+    concurrently: bool = True,
+) -> float:
+    """Executa REFRESH MATERIALIZED VIEW e retorna a duração em segundos.
+
+    CONCURRENTLY não bloqueia leitores da view durante o refresh.
+    """
+    if name not in MATERIALIZED_VIEWS:
+        raise ValueError(f"Materialized view desconhecida: {name}")
+
+    statement = sql.SQL("REFRESH MATERIALIZED VIEW {}{}").format(
+        sql.SQL("CONCURRENTLY ") if concurrently else sql.SQL(""),
+        sql.Identifier(name),
+    )
+    started = time.monotonic()
+    conn.rollback()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(READ_WRITE_TRANSACTION_SQL)
+            cur.execute(statement)
+        conn.commit()
+    except psycopg2.Error:
+        conn.rollback()
+        raise
+    return time.monotonic() - started
@@ -0,0 +1,206 @@
+"""
+Monitoramento de throughput a partir das estatísticas do PostgreSQL.
+
+Amostra contadores cumulativos de pg_stat_user_tables e pg_stat_database e
+calcula taxas por segundo entre amostras, sem executar COUNT(*).
+"""
+
+import csv
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional, TextIO
+
+import psycopg2
+
+from scripts.db_init import TABLES
+
+logger = logging.getLogger(__name__)
+
+# Partições são somadas na tabela principal (schema particionado).
+TABLE_STATS_SQL = """
+SELECT
+    COALESCE(parent.relname, s.relname) AS tabela,
+    SUM(s.n_tup_ins),
+    SUM(s.n_tup_upd),
+    SUM(s.n_tup_hot_upd)
+FROM pg_stat_user_tables s
+LEFT JOIN pg_inherits i ON i.inhrelid = s.relid
+LEFT JOIN pg_class parent ON parent.oid = i.inhparent
+WHERE s.schemaname = 'public'
+  AND COALESCE(parent.relname, s.relname) = ANY(%s)
+GROUP BY 1
+"""
+
+DATABASE_STATS_SQL = """
+SELECT xact_commit
+FROM pg_stat_database
+WHERE datname = current_database()
+"""
+
+STAT_COLUMNS = ["n_tup_ins", "n_tup_upd", "n_tup_hot_upd"]
+CSV_FIELDS = ["ts", "tabela", *STAT_COLUMNS, "xact_commit"]
+
+
+def sample_stats(conn: psycopg2.extensions.connection) -> dict[str, Any]:
+    """Lê uma amostra dos contadores cumulativos por tabela e do banco."""
+    with conn.cursor() as cur:
+        cur.execute(TABLE_STATS_SQL, (TABLES,))
+        rows = cur.fetchall()
+        cur.execute(DATABASE_STATS_SQL)
+        row = cur.fetchone()
+
+    # Encerra a transação para que a próxima leitura não reuse o snapshot
+    # de estatísticas em cache (stats_fetch_consistency).
+    conn.rollback()
+
+    tables = {
+        table: {column: 0 for column in STAT_COLUMNS}
+        for table in TABLES
+    }
+    for relname, ins, upd, hot_upd in rows:
+        tables[relname] = {
+            "n_tup_ins": int(ins or 0),
+            "n_tup_upd": int(upd or 0),
+            "n_tup_hot_upd": int(hot_upd or 0),
+        }
+
+    return {
+        "ts": time.time(),
+        "xact_commit": int(row[0]) if row else 0,
+        "tables": tables,
+    }
+
+
+def compute_rates(
+    previous: dict[str, Any],
+    current: dict[str, Any],
+) -> dict[str, Any]:
+    """Calcula taxas por segundo e HOT ratio entre duas amostras."""
+    elapsed = max(current["ts"] - previous["ts"], 1e-9)
+    tables = {}
+
+    for table, stats in current["tables"].items():
+        before = previous["tables"].get(table, {})
+        delta = {
+            column: max(stats[column] - before.get(column, 0), 0)
+            for column in STAT_COLUMNS
+        }
+        tables[table] = {
+            "ins_per_sec": delta["n_tup_ins"] / elapsed,
+            "upd_per_sec": delta["n_tup_upd"] / elapsed,
+            "hot_ratio": (
+                delta["n_tup_hot_upd"] / delta["n_tup_upd"]
+                if delta["n_tup_upd"]
+                else None
+            ),
+        }
+
+    commits = max(current["xact_commit"] - previous["xact_commit"], 0)
+    return {
+        "elapsed": elapsed,
+        "commits_per_sec": commits / elapsed,
+        "tables": tables,
+    }
+
+
+def format_rates(rates: dict[str, Any]) -> list[str]:
+    """Formata taxas como linhas de tabela para o terminal."""
+    lines = [
+        f"{'tabela':<22} {'ins/s':>10} {'upd/s':>10} {'HOT':>7}",
+    ]
+    total_ins = 0.0
+    total_upd = 0.0
+    for table, stats in rates["tables"].items():
+        hot = stats["hot_ratio"]
+        hot_label = f"{hot:.0%}" if hot is not None else "-"
+        lines.append(
+            f"{table:<22} {stats['ins_per_sec']:>10.2f} "
+            f"{stats['upd_per_sec']:>10.2f} {hot_label:>7}"
+        )
+        total_ins += stats["ins_per_sec"]
+        total_upd += stats["upd_per_sec"]
+
+    lines.append("=" * 52)
+    lines.append(f"{'TOTAL':<22} {total_ins:>10.2f} {total_upd:>10.2f}")
+    lines.append(
+        f"commits/s: {rates['commits_per_sec']:.2f} "
+        f"(janela de {rates['elapsed']:.1f}s)"
+    )
+    return lines
+
+
+class SampleWriter:
+    """Grava amostras em CSV (uma linha por tabela) ou JSONL (uma por amostra)."""
+
+    def __init__(self, handle: TextIO, fmt: str):
+        if fmt not in {"csv", "jsonl"}:
+            raise ValueError(f"Formato de saída não suportado: {fmt}")
+        self.handle = handle
+        self.fmt = fmt
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(handle, fieldnames=CSV_FIELDS)
+            self._csv.writeheader()
+
+    @classmethod
+    def open(cls, path: str) -> "SampleWriter":
+        """Abre o arquivo e infere o formato pela extensão."""
+        fmt = "csv" if Path(path).suffix.lower() == ".csv" else "jsonl"
+        return cls(open(path, "w", newline="", encoding="utf-8"), fmt)
+
+    def write(self, sample: dict[str, Any]) -> None:
+        """Grava uma amostra e faz flush para não perder dados em Ctrl+C."""
+        if self._csv is not None:
+            for table, stats in sample["tables"].items():
+                self._csv.writerow(
+                    {
+                        "ts": f"{sample['ts']:.3f}",
+                        "tabela": table,
+                        **stats,
+                        "xact_commit": sample["xact_commit"],
+                    }
+                )
+        else:
+            self.handle.write(json.dumps(sample) + "\n")
+        self.handle.flush()
+
+    def close(self) -> None:
+        self.handle.close()
+
+
+def watch(
+    conn: psycopg2.extensions.connection,
+    interval: float,
+    samples: Optional[int] = None,
+    writer: Optional[SampleWriter] = None,
+    echo: Callable[[str], None] = print,
+    sleep: Callable[[float], None] = time.sleep,
+) -> int:
+    """Amostra estatísticas em intervalo fixo e exibe taxas entre amostras.
+
+    Retorna o número de janelas de taxa exibidas.
+    """
+    previous = sample_stats(conn)
+    if writer:
+        writer.write(previous)
+
+    windows = 0
+    try:
+        while samples is None or windows < samples:
+            sleep(interval)
+            current = sample_stats(conn)
+            if writer:
+                writer.write(current)
+
+            echo("")
+            for line in format_rates(compute_rates(previous, current)):
+                echo(line)
+
+            previous = current
+            windows += 1
+    except KeyboardInterrupt:
+        logger.info("Monitoramento interrompido.")
+
+    return windows
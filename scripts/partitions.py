@@ -0,0 +1,144 @@
+"""
+Manutenção das partições mensais do schema particionado.
+
+Usado quando o banco foi criado com PARTITIONED_SCHEMA=true
+(sql/01_schema_partitioned.sql): cria partições à frente das datas geradas
+e desanexa partições antigas para arquivamento.
+"""
+
+import logging
+import os
+from datetime import date
+from typing import Optional
+
+import psycopg2
+from psycopg2 import sql
+
+logger = logging.getLogger(__name__)
+
+# Tabela particionada -> coluna de particionamento
+PARTITIONED_TABLES = {
+    "consultas": "data",
+    "exames": "data",
+    "internacoes": "data_entrada",
+}
+
+PARTITIONED_PARENTS_SQL = """
+SELECT c.relname
+FROM pg_partitioned_table pt
+JOIN pg_class c ON c.oid = pt.partrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE n.nspname = 'public'
+  AND c.relname = ANY(%s)
+"""
+
+ENSURE_PARTITIONS_SQL = """
+SELECT ensure_monthly_partitions(
+    %s::regclass,
+    (date_trunc('month', now()) - make_interval(months => %s))::date,
+    (date_trunc('month', now()) + make_interval(months => %s))::date
+)
+"""
+
+LIST_PARTITIONS_SQL = """
+SELECT child.relname, COALESCE(s.n_live_tup, 0)
+FROM pg_inherits i
+JOIN pg_class parent ON parent.oid = i.inhparent
+JOIN pg_class child ON child.oid = i.inhrelid
+LEFT JOIN pg_stat_user_tables s ON s.relid = child.oid
+WHERE parent.relname = %s
+ORDER BY child.relname
+"""
+
+
+def load_partition_config() -> dict:
+    """Carrega janelas de criação de partições do .env."""
+    return {
+        "months_back": int(os.getenv("PARTITION_MONTHS_BACK", 25)),
+        "months_ahead": int(os.getenv("PARTITION_MONTHS_AHEAD", 26)),
+    }
+
+
+def partitioned_tables(conn: psycopg2.extensions.connection) -> list[str]:
+    """Retorna quais tabelas de PARTITIONED_TABLES estão particionadas no banco."""
+    with conn.cursor() as cur:
+        cur.execute(PARTITIONED_PARENTS_SQL, (list(PARTITIONED_TABLES),))
+        return sorted(row[0] for row in cur.fetchall())
+
+
+def ensure_partitions(
+    conn: psycopg2.extensions.connection,
+    months_back: Optional[int] = None,
+    months_ahead: Optional[int] = None,
+) -> dict[str, int]:
+    """Cria partições mensais faltantes e retorna quantas foram criadas por tabela."""
+    config = load_partition_config()
+    months_back = config["months_back"] if months_back is None else months_back
+    months_ahead = config["months_ahead"] if months_ahead is None else months_ahead
+
+    created = {}
+    with conn.cursor() as cur:
+        for table in partitioned_tables(conn):
+            cur.execute(ENSURE_PARTITIONS_SQL, (table, months_back, months_ahead))
+            created[table] = cur.fetchone()[0]
+    conn.commit()
+
+    for table, count in created.items():
+        if count:
+            logger.info(f"{table}: {count} partições mensais criadas.")
+    return created
+
+
+def partition_month(partition: str) -> Optional[date]:
+    """Extrai o mês de uma partição <tabela>_pYYYYMM (None para as demais)."""
+    _, sep, suffix = partition.rpartition("_p")
+    if not sep or len(suffix) != 6 or not suffix.isdigit():
+        return None
+    return date(int(suffix[:4]), int(suffix[4:]), 1)
+
+
+def list_partitions(
+    conn: psycopg2.extensions.connection,
+    table: str,
+) -> list[dict]:
+    """Lista partições de uma tabela com o mês e a estimativa de linhas."""
+    with conn.cursor() as cur:
+        cur.execute(LIST_PARTITIONS_SQL, (table,))
+        rows = cur.fetchall()
+    return [
+        {"particao": name, "mes": partition_month(name), "linhas_estimadas": rows_estimate}
+        for name, rows_estimate in rows
+    ]
+
+
+def detach_partitions_before(
+    conn: psycopg2.extensions.connection,
+    table: str,
+    before: date,
+) -> list[str]:
+    """Desanexa partições mensais anteriores a ``before``.
+
+    As partições viram tabelas comuns, que podem ser exportadas ou removidas
+    sem afetar a tabela principal.
+    """
+    if table not in PARTITIONED_TABLES:
+        raise ValueError(f"Tabela não particionável: {table}")
+
+    detached = []
+    with conn.cursor() as cur:
+        for partition in list_partitions(conn, table):
+            month = partition["mes"]
+            if month is None or month >= before:
+                continue
+            cur.execute(
+                sql.SQL("ALTER TABLE {} DETACH PARTITION {}").format(
+                    sql.Identifier(table),
+                    sql.Identifier(partition["particao"]),
+                )
+            )
+            detached.append(partition["particao"])
+    conn.commit()
+
+    if detached:
+        logger.info(f"{table}: {len(detached)} partições desanexadas.")
+    return detached
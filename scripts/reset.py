@@ -1,47 +1,256 @@
 """
 Reset: drop + recreate + seed completo.
+
+Também oferece o reset rápido a partir de um banco template ("golden
+snapshot"): o seed roda uma vez em um banco template identificado pela
+configuração do seed, e os resets seguintes recriam o banco de trabalho com
+CREATE DATABASE ... TEMPLATE.
 """
 
+import hashlib
+import json
 import logging
+import os
+import time
+
+import psycopg2
+from psycopg2 import sql
 
-from scripts.db_init import load_env, create_connection, test_connection, init_db, get_table_counts
+from scripts.db_init import (
+    SQL_DIR,
+    apply_session_settings,
+    close_pools,
+    create_connection,
+    get_pool,
+    get_table_counts,
+    init_db,
+    init_sql_steps,
+    load_env,
+    load_project_env,
+    load_session_profile,
+    test_connection,
+)
+from scripts.seed import load_config as load_seed_config
+from scripts.seed import log_seed_summary, run_seed
 from scripts.seed import main as seed_main
 
 logger = logging.getLogger(__name__)
 
+TEMPLATE_SUFFIX = "_tpl_"
 
-def main():
-    """Executa reset completo."""
-    env_vars = load_env()
-    
-    conn = create_connection(env_vars)
-    if not test_connection(conn):
-        logger.error("Falha ao testar conexão com o banco.")
-        conn.close()
+
+def template_key(config: dict) -> str:
+    """Identifica o template pelo volume do seed, semente e arquivos SQL."""
+    digest = hashlib.sha256()
+    seed_config = {
+        key: value
+        for key, value in config.items()
+        if key.startswith("seed_") or key == "random_seed"
+    }
+    digest.update(json.dumps(seed_config, sort_keys=True).encode())
+    for _, file_name in init_sql_steps():
+        digest.update((SQL_DIR / file_name).read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def template_database_name(database: str, key: str) -> str:
+    """Nome do banco template, respeitando o limite de 63 bytes."""
+    suffix = f"{TEMPLATE_SUFFIX}{key}"
+    return f"{database[:63 - len(suffix)]}{suffix}"
+
+
+def maintenance_connection(env_vars: dict) -> psycopg2.extensions.connection:
+    """Conexão em autocommit com o banco de manutenção (CREATE/DROP DATABASE)."""
+    load_project_env()
+    conn = create_connection(
+        {**env_vars, "database": os.getenv("PG_MAINTENANCE_DATABASE", "postgres")}
+    )
+    conn.autocommit = True
+    return conn
+
+
+def database_exists(conn: psycopg2.extensions.connection, name: str) -> bool:
+    """Verifica se o banco existe."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT 1 FROM pg_database WHERE datname = %s", (name,))
+        return cur.fetchone() is not None
+
+
+def drop_database(
+    conn: psycopg2.extensions.connection,
+    name: str,
+    drop_slots: bool = False,
+) -> None:
+    """Remove um banco, encerrando as sessões dele.
+
+    Slots de replicação lógica do banco guardam a posição dos consumidores de
+    CDC (Debezium, cli cdc-consume): sem ``drop_slots`` a remoção é recusada
+    e os slots são listados; com ``drop_slots`` os inativos são removidos.
+    """
+    if not database_exists(conn, name):
         return
-    
-    logger.info("Iniciando reset completo...")
-    
-    # 1) Drop e recreate
-    if not init_db(conn, drop_first=True):
-        logger.error("Falha ao inicializar banco.")
+
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT slot_name, active
+            FROM pg_replication_slots
+            WHERE database = %s
+            ORDER BY slot_name
+            """,
+            (name,),
+        )
+        slots = cur.fetchall()
+        if slots and not drop_slots:
+            listed = ", ".join(
+                f"{slot_name} ({'ativo' if active else 'inativo'})"
+                for slot_name, active in slots
+            )
+            raise RuntimeError(
+                f"O banco {name} tem slots de replicação: {listed}. "
+                "Remover o banco perde a posição do CDC; use --drop-slots para "
+                "removê-los."
+            )
+
+        cur.execute(
+            sql.SQL("ALTER DATABASE {} WITH IS_TEMPLATE false").format(
+                sql.Identifier(name)
+            )
+        )
+        for slot_name, active in slots:
+            if active:
+                continue
+            logger.warning(
+                "Removendo slot de replicação inativo %s do banco %s.",
+                slot_name,
+                name,
+            )
+            cur.execute("SELECT pg_drop_replication_slot(%s)", (slot_name,))
+
+        cur.execute(
+            """
+            SELECT pg_terminate_backend(pid)
+            FROM pg_stat_activity
+            WHERE datname = %s AND pid <> pg_backend_pid()
+            """,
+            (name,),
+        )
+        cur.execute(sql.SQL("DROP DATABASE {}").format(sql.Identifier(name)))
+
+
+def build_template(
+    admin_conn: psycopg2.extensions.connection,
+    env_vars: dict,
+    name: str,
+    config: dict,
+) -> None:
+    """Cria o banco template com schema e seed completos."""
+    logger.info(f"Construindo banco template {name}...")
+    drop_database(admin_conn, name)
+    with admin_conn.cursor() as cur:
+        cur.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(name)))
+
+    conn = create_connection({**env_vars, "database": name})
+    try:
+        apply_session_settings(conn, load_session_profile("seed")[1])
+        if not init_db(conn, drop_first=False):
+            raise RuntimeError(f"Falha ao inicializar o banco template {name}.")
+        log_seed_summary(run_seed(conn, config))
+    finally:
         conn.close()
+
+    with admin_conn.cursor() as cur:
+        cur.execute(
+            sql.SQL(
+                "ALTER DATABASE {} WITH IS_TEMPLATE true ALLOW_CONNECTIONS false"
+            ).format(sql.Identifier(name))
+        )
+        cur.execute(
+            sql.SQL("COMMENT ON DATABASE {} IS %s").format(sql.Identifier(name)),
+            (json.dumps({"seed": config}, sort_keys=True),),
+        )
+
+
+def reset_from_template(rebuild: bool = False, drop_slots: bool = False) -> str:
+    """Recria o banco de trabalho a partir do template (criando-o se preciso).
+
+    ``drop_slots`` autoriza remover os slots de replicação do banco de
+    trabalho (veja drop_database). Retorna o nome do template usado.
+    """
+    env_vars = load_env()
+    config = load_seed_config()
+    database = env_vars["database"]
+    name = template_database_name(database, template_key(config))
+
+    # Nenhuma conexão deste processo pode continuar presa ao banco de trabalho.
+    close_pools()
+
+    admin_conn = maintenance_connection(env_vars)
+    try:
+        if rebuild or not database_exists(admin_conn, name):
+            build_template(admin_conn, env_vars, name, config)
+        else:
+            logger.info(f"Reutilizando banco template {name}.")
+
+        started = time.monotonic()
+        drop_database(admin_conn, database, drop_slots=drop_slots)
+        with admin_conn.cursor() as cur:
+            cur.execute(
+                sql.SQL("CREATE DATABASE {} TEMPLATE {}").format(
+                    sql.Identifier(database),
+                    sql.Identifier(name),
+                )
+            )
+        logger.info(
+            f"Banco {database} recriado a partir de {name} "
+            f"em {time.monotonic() - started:.1f}s."
+        )
+    finally:
+        admin_conn.close()
+
+    return name
+
+
+def main(
+    from_template: bool = False,
+    rebuild_template: bool = False,
+    drop_slots: bool = False,
+):
+    """Executa reset completo."""
+    if from_template or rebuild_template:
+        reset_from_template(rebuild=rebuild_template, drop_slots=drop_slots)
+        logger.info("Reset concluído com sucesso!")
         return
-    
-    conn.close()
-    
-    # 2) Seed
-    seed_main()
-    
-    # 3) Exibe resumo
-    conn = create_connection(env_vars)
-    counts = get_table_counts(conn)
-    
-    logger.info("=== Resumo Final ===")
-    for table, count in counts.items():
-        logger.info(f"{table}: {count} registros")
-    
-    conn.close()
+
+    # Reset, seed e resumo reutilizam a mesma conexão do pool "seed".
+    pool = get_pool("seed")
+
+    try:
+        with pool.connection() as conn:
+            if not test_connection(conn):
+                logger.error("Falha ao testar conexão com o banco.")
+                return
+
+            logger.info("Iniciando reset completo...")
+
+            # 1) Drop e recreate
+            if not init_db(conn, drop_first=True):
+                logger.error("Falha ao inicializar banco.")
+                return
+
+        # 2) Seed
+        seed_main()
+
+        # 3) Exibe resumo
+        with pool.connection() as conn:
+            counts = get_table_counts(conn)
+
+        logger.info("=== Resumo Final ===")
+        for table, count in counts.items():
+            logger.info(f"{table}: {count} registros")
+    finally:
+        close_pools()
+
     logger.info("Reset concluído com sucesso!")
 
 
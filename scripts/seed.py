@@ -11,6 +11,7 @@ import psycopg2
 from psycopg2.extras import execute_values
 
 from scripts.data_gen import (
+    set_random_seed,
     generate_paciente,
     generate_medico,
     generate_convenio,
@@ -19,8 +20,7 @@ from scripts.data_gen import (
     generate_internacao,
 )
 from scripts.db_init import (
-    load_env,
-    create_connection,
+    get_pool,
     test_connection,
     load_project_env,
 )
@@ -156,6 +156,11 @@ def load_config() -> dict:
             os.getenv("SEED_PACIENTES_CONVENIOS", 2500)
         ),
         "batch_size": int(os.getenv("BATCH_SIZE", 50)),
+        "random_seed": (
+            int(os.getenv("SEED_RANDOM_SEED"))
+            if os.getenv("SEED_RANDOM_SEED")
+            else None
+        ),
     }
 
 
@@ -421,6 +426,10 @@ def seed_internacoes(
 
 def run_seed(conn: psycopg2.extensions.connection, config: dict) -> dict:
     """Executa seed em ordem e retorna resumo por tabela."""
+    if config.get("random_seed") is not None:
+        logger.info("Usando semente aleatória fixa: %s", config["random_seed"])
+        set_random_seed(config["random_seed"])
+
     batch_size = config["batch_size"]
     return {
         "medicos": seed_medicos(conn, config["seed_medicos"], batch_size),
@@ -453,19 +462,16 @@ def log_seed_summary(summary: dict) -> None:
 def main():
     """Executa seed completo."""
     config = load_config()
-    env_vars = load_env()
-
-    conn = create_connection(env_vars)
-    if not test_connection(conn):
-        logger.error("Falha ao testar conexão com o banco.")
-        conn.close()
-        return
-
-    logger.info("Iniciando seed de dados...")
-    summary = run_seed(conn, config)
-    log_seed_summary(summary)
-    logger.info("Seed concluído com sucesso!")
-    conn.close()
+
+    with get_pool("seed").connection() as conn:
+        if not test_connection(conn):
+            logger.error("Falha ao testar conexão com o banco.")
+            return
+
+        logger.info("Iniciando seed de dados...")
+        summary = run_seed(conn, config)
+        log_seed_summary(summary)
+        logger.info("Seed concluído com sucesso!")
 
 
 if __name__ == "__main__":
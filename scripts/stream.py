@@ -9,21 +9,33 @@ import random
 import signal
 import time
 from datetime import timedelta
+from typing import Optional
 
 import psycopg2
 
+from scripts.activity import (
+    activity_counters_available,
+    load_activity_config,
+    prune_activity,
+)
+from scripts.backpressure import PAUSED, SlotBackpressure
+from scripts.cdc_latency import heartbeat_available, load_latency_config, write_heartbeat
+from scripts.change_notify import ChangePublisher, load_notify_config
 from scripts.data_gen import (
+    RESULTADOS_ATUALIZACAO_EXAME,
+    STATUS_CONSULTA_FINAIS,
     generate_paciente,
     generate_consulta,
     generate_exame,
     generate_internacao,
 )
 from scripts.db_init import (
-    load_env,
-    create_connection,
+    close_pools,
+    get_pool,
     test_connection,
     load_project_env,
 )
+from scripts.partitions import ensure_partitions
 from scripts.validators import Validators
 
 logger = logging.getLogger(__name__)
@@ -42,6 +54,46 @@ STREAM_EVENTS = [
 ]
 STREAM_WEIGHTS = [5, 30, 15, 20, 8, 10, 7, 5]
 
+# Frequência da manutenção periódica: partições futuras (schema particionado)
+# e poda dos contadores de atividade.
+PARTITION_CHECK_SECONDS = 3600
+
+# Tabela alterada por cada evento (notificações de mudança).
+EVENT_TABLES = {
+    "insert_paciente": "pacientes",
+    "insert_consulta": "consultas",
+    "insert_exame": "exames",
+    "insert_internacao": "internacoes",
+    "update_paciente": "pacientes",
+    "update_consulta": "consultas",
+    "update_exame": "exames",
+    "update_internacao": "internacoes",
+}
+
+PICK_CONSULTA_AGENDADA_SQL = """
+SELECT id, data FROM consultas WHERE status = 'agendada' ORDER BY RANDOM() LIMIT 1
+"""
+
+PICK_EXAME_PENDENTE_SQL = """
+SELECT id, data FROM exames WHERE resultado IS NULL ORDER BY RANDOM() LIMIT 1
+"""
+
+PICK_INTERNACAO_ATIVA_SQL = """
+SELECT id, data_entrada
+FROM internacoes
+WHERE data_saida IS NULL
+ORDER BY RANDOM()
+LIMIT 1
+"""
+
+# A chave de partição completa a chave primária (id, data) do schema
+# particionado, então cada UPDATE toca uma única partição.
+UPDATE_CONSULTA_STATUS_SQL = "UPDATE consultas SET status = %s WHERE id = %s AND data = %s"
+UPDATE_EXAME_RESULTADO_SQL = "UPDATE exames SET resultado = %s WHERE id = %s AND data = %s"
+UPDATE_INTERNACAO_SAIDA_SQL = (
+    "UPDATE internacoes SET data_saida = %s WHERE id = %s AND data_entrada = %s"
+)
+
 
 def handle_signal(signum, frame):
     """Handler para SIGINT/SIGTERM."""
@@ -162,17 +214,17 @@ def update_consulta(conn: psycopg2.extensions.connection) -> bool:
     """Atualiza status de uma consulta."""
     try:
         cur = conn.cursor()
-        cur.execute("SELECT id FROM consultas WHERE status = 'agendada' ORDER BY RANDOM() LIMIT 1")
+        cur.execute(PICK_CONSULTA_AGENDADA_SQL)
         result = cur.fetchone()
         
         if not result:
             cur.close()
             return False
         
-        consulta_id = result[0]
-        novo_status = random.choice(["realizada", "cancelada", "faltou"])
+        consulta_id, data = result
+        novo_status = random.choice(STATUS_CONSULTA_FINAIS)
         
-        cur.execute("UPDATE consultas SET status = %s WHERE id = %s", (novo_status, consulta_id))
+        cur.execute(UPDATE_CONSULTA_STATUS_SQL, (novo_status, consulta_id, data))
         cur.close()
         conn.commit()
         return True
@@ -216,17 +268,17 @@ def update_exame(conn: psycopg2.extensions.connection) -> bool:
     """Atualiza resultado de um exame."""
     try:
         cur = conn.cursor()
-        cur.execute("SELECT id FROM exames WHERE resultado IS NULL ORDER BY RANDOM() LIMIT 1")
+        cur.execute(PICK_EXAME_PENDENTE_SQL)
         result = cur.fetchone()
         
         if not result:
             cur.close()
             return False
         
-        exame_id = result[0]
-        novo_resultado = random.choice(["Normal", "Alterado", "Positivo", "Negativo", "Pendente"])
+        exame_id, data = result
+        novo_resultado = random.choice(RESULTADOS_ATUALIZACAO_EXAME)
         
-        cur.execute("UPDATE exames SET resultado = %s WHERE id = %s", (novo_resultado, exame_id))
+        cur.execute(UPDATE_EXAME_RESULTADO_SQL, (novo_resultado, exame_id, data))
         cur.close()
         conn.commit()
         return True
@@ -270,15 +322,7 @@ def update_internacao(conn: psycopg2.extensions.connection) -> bool:
     """Marca alta de internação."""
     try:
         cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT id, data_entrada
-            FROM internacoes
-            WHERE data_saida IS NULL
-            ORDER BY RANDOM()
-            LIMIT 1
-            """
-        )
+        cur.execute(PICK_INTERNACAO_ATIVA_SQL)
         result = cur.fetchone()
         
         if not result:
@@ -288,7 +332,7 @@ def update_internacao(conn: psycopg2.extensions.connection) -> bool:
         internacao_id, data_entrada = result
         data_saida = data_entrada + timedelta(days=random.randint(1, 10))
         
-        cur.execute("UPDATE internacoes SET data_saida = %s WHERE id = %s", (data_saida, internacao_id))
+        cur.execute(UPDATE_INTERNACAO_SAIDA_SQL, (data_saida, internacao_id, data_entrada))
         cur.close()
         conn.commit()
         return True
@@ -297,6 +341,50 @@ def update_internacao(conn: psycopg2.extensions.connection) -> bool:
         return False
 
 
+def maintain_partitions(conn: psycopg2.extensions.connection) -> None:
+    """Garante partições mensais à frente das datas geradas, se houver."""
+    try:
+        ensure_partitions(conn)
+    except psycopg2.Error as e:
+        conn.rollback()
+        logger.error(f"Erro ao criar partições: {e}")
+
+
+def maintain_activity(conn: psycopg2.extensions.connection) -> None:
+    """Poda os contadores de atividade além da retenção, se instalados."""
+    try:
+        if not activity_counters_available(conn):
+            conn.rollback()
+            return
+        prune_activity(conn, load_activity_config()["retention_hours"])
+    except psycopg2.Error as e:
+        conn.rollback()
+        logger.error(f"Erro ao podar contadores de atividade: {e}")
+
+
+def maintain_heartbeat(conn: psycopg2.extensions.connection) -> None:
+    """Grava uma batida na tabela de heartbeat do CDC."""
+    try:
+        write_heartbeat(conn)
+    except psycopg2.Error as e:
+        conn.rollback()
+        logger.error(f"Erro ao gravar heartbeat de CDC: {e}")
+
+
+def heartbeat_interval(conn: psycopg2.extensions.connection) -> Optional[float]:
+    """Cadência do heartbeat, ou None sem o extra cdc_heartbeat ou com 0."""
+    seconds = load_latency_config()["heartbeat_seconds"]
+    if seconds <= 0:
+        return None
+    try:
+        available = heartbeat_available(conn)
+        conn.rollback()
+    except psycopg2.Error:
+        conn.rollback()
+        return None
+    return seconds if available else None
+
+
 def run_stream_event(
     event: str,
     conn: psycopg2.extensions.connection,
@@ -321,8 +409,21 @@ def stream_loop(
     interval: int,
     max_jitter_ms: int,
     cycles: int = None,
+    publisher: Optional[ChangePublisher] = None,
+    heartbeat_seconds: Optional[float] = None,
+    backpressure: Optional[SlotBackpressure] = None,
 ):
-    """Loop principal de stream contínuo com INSERT e UPDATE."""
+    """Loop principal de stream contínuo com INSERT e UPDATE.
+
+    Com ``publisher``, cada evento bem-sucedido vira um aviso agrupado no canal
+    de mudanças escutado pelo dashboard. Com ``heartbeat_seconds``, grava uma
+    batida na tabela de heartbeat do CDC entre os eventos, no máximo uma por
+    ciclo. Com ``backpressure``, o atraso dos slots de replicação alonga os
+    intervalos ou pausa a geração de eventos.
+
+    Retorna a conexão em uso ao final (a original ou a obtida numa
+    reconexão), ou None se a reconexão falhou e a conexão já foi descartada.
+    """
     global should_stop
     should_stop = False
     
@@ -344,19 +445,32 @@ def stream_loop(
         logger.info(f"Stream encerrará automaticamente após {cycles} ciclos")
     
     cycle = 0
+    next_partition_check = time.monotonic() + PARTITION_CHECK_SECONDS
+    next_heartbeat = time.monotonic()
     while not should_stop:
         try:
+            if backpressure is not None and backpressure.check(conn) == PAUSED:
+                if heartbeat_seconds and time.monotonic() >= next_heartbeat:
+                    maintain_heartbeat(conn)
+                    next_heartbeat = time.monotonic() + heartbeat_seconds
+                time.sleep(min(backpressure.check_seconds, max(interval, 1)))
+                continue
+
             cycle += 1
             jitter = random.randint(0, max_jitter_ms) / 1000
             
             event = random.choices(STREAM_EVENTS, weights=STREAM_WEIGHTS)[0]
             success = run_stream_event(event, conn, validators)
             
-            if success:
-                counters[event] += 1
-            
             # Determinar tipo (INSERT ou UPDATE)
             op_type = "INSERT" if event.startswith("insert_") else "UPDATE"
+
+            if success:
+                counters[event] += 1
+                if publisher is not None:
+                    publisher.record(EVENT_TABLES[event], op_type)
+            if publisher is not None:
+                publisher.flush()
             table = event.replace("insert_", "").replace("update_", "")
             
             ins = sum(v for k, v in counters.items() if k.startswith("insert_"))
@@ -372,7 +486,18 @@ def stream_loop(
                 should_stop = True
                 continue
 
+            if heartbeat_seconds and time.monotonic() >= next_heartbeat:
+                maintain_heartbeat(conn)
+                next_heartbeat = time.monotonic() + heartbeat_seconds
+
+            if time.monotonic() >= next_partition_check:
+                maintain_partitions(conn)
+                maintain_activity(conn)
+                next_partition_check = time.monotonic() + PARTITION_CHECK_SECONDS
+
             sleep_time = interval + jitter
+            if backpressure is not None:
+                sleep_time = backpressure.delay(sleep_time)
             time.sleep(sleep_time)
         
         except KeyboardInterrupt:
@@ -380,31 +505,46 @@ def stream_loop(
             should_stop = True
         except psycopg2.OperationalError:
             logger.error("Conexão perdida. Tentando reconectar...")
-            try:
-                conn.close()
-            except Exception:
-                pass
-            
+            pool = get_pool("stream")
+            pool.putconn(conn, discard=True)
+            conn = None
+
             for attempt in range(1, 6):
+                time.sleep(2 ** (attempt - 1))
                 try:
-                    time.sleep(2 ** (attempt - 1))
-                    conn = create_connection(load_env())
-                    if test_connection(conn):
-                        logger.info("Reconectado com sucesso.")
-                        validators = Validators(conn)
-                        break
-                except Exception:
-                    if attempt == 5:
-                        logger.error("Falha permanente de conexão.")
-                        should_stop = True
+                    candidate = pool.getconn()
+                except Exception as e:
+                    logger.warning(f"Tentativa {attempt} de reconexão falhou: {e}")
+                    continue
+                if test_connection(candidate):
+                    conn = candidate
+                    logger.info("Reconectado com sucesso.")
+                    validators = Validators(conn)
+                    if publisher is not None:
+                        publisher.conn = conn
+                    break
+                pool.putconn(candidate, discard=True)
+
+            if conn is None:
+                logger.error("Falha permanente de conexão.")
+                should_stop = True
         except Exception as e:
             logger.error(f"Erro inesperado: {e}")
             time.sleep(interval)
     
+    if publisher is not None and conn is not None:
+        publisher.flush(force=True)
+
     total_ops = sum(counters.values())
     ins_total = sum(v for k, v in counters.items() if k.startswith("insert_"))
     upd_total = sum(v for k, v in counters.items() if k.startswith("update_"))
     logger.info(f"Stream encerrado: {cycle} ciclos, {total_ops} operações (INSERT: {ins_total}, UPDATE: {upd_total})")
+    if backpressure is not None:
+        logger.info(
+            "Contrapressão de CDC: "
+            + ", ".join(f"{state} {seconds:,.0f}s" for state, seconds in backpressure.summary().items())
+        )
+    return conn
 
 
 def main(interval: int = None, batch_size: int = None, cycles: int = None):
@@ -416,25 +556,42 @@ def main(interval: int = None, batch_size: int = None, cycles: int = None):
     if batch_size is None:
         batch_size = config["batch_size"]
     
-    env_vars = load_env()
-    
-    conn = create_connection(env_vars)
+    pool = get_pool("stream")
+    conn = pool.getconn()
     if not test_connection(conn):
         logger.error("Falha ao testar conexão com o banco.")
-        conn.close()
+        pool.putconn(conn, discard=True)
+        close_pools()
         return
     
+    maintain_partitions(conn)
+    maintain_activity(conn)
+    
     signal.signal(signal.SIGINT, handle_signal)
     signal.signal(signal.SIGTERM, handle_signal)
     
+    notify = load_notify_config()
+    publisher = (
+        ChangePublisher(conn, notify["channel"], notify["interval"])
+        if notify["enabled"]
+        else None
+    )
+
     try:
-        stream_loop(conn, interval, config["max_jitter_ms"], cycles=cycles)
+        conn = stream_loop(
+            conn,
+            interval,
+            config["max_jitter_ms"],
+            cycles=cycles,
+            publisher=publisher,
+            heartbeat_seconds=heartbeat_interval(conn),
+            backpressure=SlotBackpressure.from_env(),
+        )
     finally:
-        try:
-            logger.info("Fechando conexão...")
-            conn.close()
-        except Exception:
-            pass
+        logger.info("Fechando conexões...")
+        if conn is not None:
+            pool.putconn(conn)
+        close_pools()
 
 
 if __name__ == "__main__":
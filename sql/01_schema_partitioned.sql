@@ -0,0 +1,180 @@
+-- Schema alternativo com particionamento mensal por data em consultas,
+-- exames e internacoes (PARTITIONED_SCHEMA=true). As demais tabelas são
+-- idênticas a 01_schema.sql; mantenha os dois arquivos em sincronia.
+
+-- Função para atualizar updated_at automaticamente
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS TRIGGER AS $$
+BEGIN
+  NEW.updated_at := now();
+  RETURN NEW;
+END; $$ LANGUAGE plpgsql;
+
+-- Tabela: pacientes
+CREATE TABLE IF NOT EXISTS pacientes (
+  id            BIGSERIAL PRIMARY KEY,
+  nome          VARCHAR(150) NOT NULL,
+  nascimento    DATE NOT NULL,
+  cpf           VARCHAR(20) UNIQUE NOT NULL,
+  telefone      VARCHAR(20),
+  endereco      VARCHAR(200),
+  data_cadastro TIMESTAMP NOT NULL DEFAULT now(),
+  created_at    TIMESTAMP NOT NULL DEFAULT now(),
+  updated_at    TIMESTAMP NOT NULL DEFAULT now()
+);
+
+DROP TRIGGER IF EXISTS pacientes_updated_at ON pacientes;
+CREATE TRIGGER pacientes_updated_at
+BEFORE UPDATE ON pacientes
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+-- Tabela: medicos
+CREATE TABLE IF NOT EXISTS medicos (
+  id            BIGSERIAL PRIMARY KEY,
+  nome          VARCHAR(150) NOT NULL,
+  crm           VARCHAR(20) UNIQUE NOT NULL,
+  especialidade VARCHAR(80) NOT NULL,
+  telefone      VARCHAR(20),
+  created_at    TIMESTAMP NOT NULL DEFAULT now(),
+  updated_at    TIMESTAMP NOT NULL DEFAULT now()
+);
+
+DROP TRIGGER IF EXISTS medicos_updated_at ON medicos;
+CREATE TRIGGER medicos_updated_at
+BEFORE UPDATE ON medicos
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+-- Tabela: convenios
+CREATE TABLE IF NOT EXISTS convenios (
+  id         BIGSERIAL PRIMARY KEY,
+  nome       VARCHAR(120) NOT NULL,
+  cnpj       VARCHAR(25) UNIQUE NOT NULL,
+  tipo       VARCHAR(40) NOT NULL,
+  cobertura  VARCHAR(120),
+  created_at TIMESTAMP NOT NULL DEFAULT now(),
+  updated_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+DROP TRIGGER IF EXISTS convenios_updated_at ON convenios;
+CREATE TRIGGER convenios_updated_at
+BEFORE UPDATE ON convenios
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+-- Tabela N:N: pacientes_convenios
+CREATE TABLE IF NOT EXISTS pacientes_convenios (
+  id           BIGSERIAL PRIMARY KEY,
+  paciente_id  BIGINT NOT NULL REFERENCES pacientes(id)
+               ON UPDATE CASCADE ON DELETE RESTRICT,
+  convenio_id  BIGINT NOT NULL REFERENCES convenios(id)
+               ON UPDATE CASCADE ON DELETE RESTRICT,
+  numero_carteira VARCHAR(40),
+  validade     DATE,
+  created_at   TIMESTAMP NOT NULL DEFAULT now(),
+  updated_at   TIMESTAMP NOT NULL DEFAULT now(),
+  UNIQUE (paciente_id, convenio_id)
+);
+
+DROP TRIGGER IF EXISTS pacientes_convenios_updated_at ON pacientes_convenios;
+CREATE TRIGGER pacientes_convenios_updated_at
+BEFORE UPDATE ON pacientes_convenios
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+-- Cria partições mensais [mês, mês + 1) de first_month até last_month.
+-- Retorna quantas partições foram criadas.
+CREATE OR REPLACE FUNCTION ensure_monthly_partitions(
+  parent      regclass,
+  first_month date,
+  last_month  date
+) RETURNS integer AS $$
+DECLARE
+  month_start date := date_trunc('month', first_month)::date;
+  partition   text;
+  created     integer := 0;
+BEGIN
+  WHILE month_start <= last_month LOOP
+    partition := format('%s_p%s', parent::text, to_char(month_start, 'YYYYMM'));
+    IF to_regclass(partition) IS NULL THEN
+      EXECUTE format(
+        'CREATE TABLE %I PARTITION OF %s FOR VALUES FROM (%L) TO (%L)',
+        partition,
+        parent,
+        month_start,
+        (month_start + interval '1 month')::date
+      );
+      created := created + 1;
+    END IF;
+    month_start := (month_start + interval '1 month')::date;
+  END LOOP;
+  RETURN created;
+END; $$ LANGUAGE plpgsql;
+
+-- Tabela: consultas (particionada por data)
+CREATE TABLE IF NOT EXISTS consultas (
+  id          BIGSERIAL,
+  paciente_id BIGINT NOT NULL REFERENCES pacientes(id)
+              ON UPDATE CASCADE ON DELETE RESTRICT,
+  medico_id   BIGINT NOT NULL REFERENCES medicos(id)
+              ON UPDATE CASCADE ON DELETE RESTRICT,
+  data        TIMESTAMP NOT NULL,
+  motivo      VARCHAR(200) NOT NULL,
+  status      VARCHAR(20) NOT NULL CHECK (status IN ('agendada','realizada','cancelada','faltou')),
+  created_at  TIMESTAMP NOT NULL DEFAULT now(),
+  updated_at  TIMESTAMP NOT NULL DEFAULT now(),
+  PRIMARY KEY (id, data)
+) PARTITION BY RANGE (data);
+
+CREATE TABLE IF NOT EXISTS consultas_default PARTITION OF consultas DEFAULT;
+
+DROP TRIGGER IF EXISTS consultas_updated_at ON consultas;
+CREATE TRIGGER consultas_updated_at
+BEFORE UPDATE ON consultas
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+-- Tabela: exames (particionada por data)
+CREATE TABLE IF NOT EXISTS exames (
+  id           BIGSERIAL,
+  paciente_id  BIGINT NOT NULL REFERENCES pacientes(id)
+               ON UPDATE CASCADE ON DELETE RESTRICT,
+  tipo_exame   VARCHAR(100) NOT NULL,
+  data         TIMESTAMP NOT NULL,
+  resultado    VARCHAR(200),
+  created_at   TIMESTAMP NOT NULL DEFAULT now(),
+  updated_at   TIMESTAMP NOT NULL DEFAULT now(),
+  PRIMARY KEY (id, data)
+) PARTITION BY RANGE (data);
+
+CREATE TABLE IF NOT EXISTS exames_default PARTITION OF exames DEFAULT;
+
+DROP TRIGGER IF EXISTS exames_updated_at ON exames;
+CREATE TRIGGER exames_updated_at
+BEFORE UPDATE ON exames
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+-- Tabela: internacoes (particionada por data_entrada)
+CREATE TABLE IF NOT EXISTS internacoes (
+  id           BIGSERIAL,
+  paciente_id  BIGINT NOT NULL REFERENCES pacientes(id)
+               ON UPDATE CASCADE ON DELETE RESTRICT,
+  data_entrada TIMESTAMP NOT NULL,
+  data_saida   TIMESTAMP,
+  motivo       VARCHAR(200) NOT NULL,
+  quarto       VARCHAR(20),
+  created_at   TIMESTAMP NOT NULL DEFAULT now(),
+  updated_at   TIMESTAMP NOT NULL DEFAULT now(),
+  PRIMARY KEY (id, data_entrada),
+  CHECK (data_saida IS NULL OR data_saida >= data_entrada)
+) PARTITION BY RANGE (data_entrada);
+
+CREATE TABLE IF NOT EXISTS internacoes_default PARTITION OF internacoes DEFAULT;
+
+DROP TRIGGER IF EXISTS internacoes_updated_at ON internacoes;
+CREATE TRIGGER internacoes_updated_at
+BEFORE UPDATE ON internacoes
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+-- Partições iniciais: o gerador produz datas de -2 anos até +2 anos.
+SELECT ensure_monthly_partitions(
+  t::regclass,
+  (date_trunc('month', now()) - interval '25 months')::date,
+  (date_trunc('month', now()) + interval '26 months')::date
+)
+FROM unnest(ARRAY['consultas', 'exames', 'internacoes']) AS t;
@@ -1,6 +1,8 @@
--- Índices úteis para consultas e CDC (chaves naturais e FK targets)
-CREATE INDEX IF NOT EXISTS idx_pacientes_cpf ON pacientes (cpf);
-CREATE INDEX IF NOT EXISTS idx_medicos_crm ON medicos (crm);
+-- Índices úteis para consultas e CDC (FK targets)
+-- cpf e crm já são indexados pelas constraints UNIQUE; índices extras só
+-- dobravam o custo de escrita.
+DROP INDEX IF EXISTS idx_pacientes_cpf;
+DROP INDEX IF EXISTS idx_medicos_crm;
 CREATE INDEX IF NOT EXISTS idx_consultas_paciente ON consultas (paciente_id);
 CREATE INDEX IF NOT EXISTS idx_consultas_medico ON consultas (medico_id);
 CREATE INDEX IF NOT EXISTS idx_consultas_data ON consultas (data);
@@ -8,3 +10,22 @@ CREATE INDEX IF NOT EXISTS idx_exames_paciente ON exames (paciente_id);
 CREATE INDEX IF NOT EXISTS idx_exames_data ON exames (data);
 CREATE INDEX IF NOT EXISTS idx_internacoes_paciente ON internacoes (paciente_id);
 CREATE INDEX IF NOT EXISTS idx_internacoes_datas ON internacoes (data_entrada, data_saida);
+
+-- Filas operacionais (dashboard e escolhas do stream): índices parciais
+-- pequenos, que encolhem à medida que os itens saem da fila.
+CREATE INDEX IF NOT EXISTS idx_consultas_agendadas
+  ON consultas (data, id) WHERE status = 'agendada';
+CREATE INDEX IF NOT EXISTS idx_exames_pendentes
+  ON exames (data, id) WHERE resultado IS NULL;
+CREATE INDEX IF NOT EXISTS idx_internacoes_ativas
+  ON internacoes (data_entrada, id) WHERE data_saida IS NULL;
+
+-- Pacientes sem convênio mais recentes (NOT EXISTS com parada no LIMIT).
+CREATE INDEX IF NOT EXISTS idx_pacientes_created_at ON pacientes (created_at);
+
+-- Janelas de atividade recente e "últimas consultas alteradas".
+CREATE INDEX IF NOT EXISTS idx_pacientes_updated_at ON pacientes (updated_at);
+CREATE INDEX IF NOT EXISTS idx_pacientes_convenios_updated_at ON pacientes_convenios (updated_at);
+CREATE INDEX IF NOT EXISTS idx_consultas_updated_at ON consultas (updated_at);
+CREATE INDEX IF NOT EXISTS idx_exames_updated_at ON exames (updated_at);
+CREATE INDEX IF NOT EXISTS idx_internacoes_updated_at ON internacoes (updated_at);
@@ -0,0 +1,273 @@
+-- Resumo incremental de KPIs (extra opcional "kpi_summary").
+-- Contagens por status, internações ativas por quarto, totais de pacientes e
+-- médicos e pacientes sem convênio, mantidas por triggers de statement com transition tables: cada
+-- comando aplica um único delta agregado, inclusive nos INSERTs em lote do seed.
+
+CREATE TABLE IF NOT EXISTS kpi_contagens (
+  grupo       VARCHAR(40) NOT NULL,
+  chave       VARCHAR(80) NOT NULL,
+  total       BIGINT      NOT NULL DEFAULT 0,
+  updated_at  TIMESTAMP   NOT NULL DEFAULT now(),
+  PRIMARY KEY (grupo, chave)
+);
+
+-- Valores esperados recalculados do zero (carga inicial e reconciliação).
+CREATE OR REPLACE VIEW kpi_contagens_esperadas AS
+SELECT 'consultas'::varchar AS grupo, status::varchar AS chave, COUNT(*) AS total
+FROM consultas
+GROUP BY status
+UNION ALL
+SELECT 'exames', CASE WHEN resultado IS NULL THEN 'pendente' ELSE 'com_resultado' END, COUNT(*)
+FROM exames
+GROUP BY 2
+UNION ALL
+SELECT 'internacoes', CASE WHEN data_saida IS NULL THEN 'ativa' ELSE 'encerrada' END, COUNT(*)
+FROM internacoes
+GROUP BY 2
+UNION ALL
+SELECT 'internacoes_quarto', COALESCE(quarto, 'sem_quarto'), COUNT(*)
+FROM internacoes
+WHERE data_saida IS NULL
+GROUP BY 2
+UNION ALL
+SELECT 'pacientes', 'total', COUNT(*) FROM pacientes
+UNION ALL
+SELECT 'pacientes_sem_convenio', 'total', COUNT(*)
+FROM pacientes p
+WHERE NOT EXISTS (SELECT 1 FROM pacientes_convenios pc WHERE pc.paciente_id = p.id)
+UNION ALL
+SELECT 'medicos', 'total', COUNT(*) FROM medicos;
+
+CREATE OR REPLACE FUNCTION kpi_somar(p_grupo VARCHAR, p_chave VARCHAR, p_delta BIGINT)
+RETURNS VOID AS $$
+  INSERT INTO kpi_contagens AS k (grupo, chave, total)
+  VALUES (p_grupo, p_chave, p_delta)
+  ON CONFLICT (grupo, chave)
+  DO UPDATE SET total = k.total + EXCLUDED.total, updated_at = now();
+$$ LANGUAGE sql;
+
+-- Cada função recebe as linhas do comando em "novos" e/ou "antigos". Em
+-- UPDATE, +1 da linha nova e -1 da antiga se anulam quando a chave não muda.
+CREATE OR REPLACE FUNCTION kpi_consultas_delta() RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM kpi_somar('consultas', status, COUNT(*)) FROM novos GROUP BY status;
+  ELSIF TG_OP = 'DELETE' THEN
+    PERFORM kpi_somar('consultas', status, -COUNT(*)) FROM antigos GROUP BY status;
+  ELSE
+    PERFORM kpi_somar('consultas', chave, SUM(sinal))
+    FROM (
+      SELECT status AS chave, 1 AS sinal FROM novos
+      UNION ALL
+      SELECT status, -1 FROM antigos
+    ) d
+    GROUP BY chave
+    HAVING SUM(sinal) <> 0;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION kpi_exames_delta() RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM kpi_somar('exames', chave, COUNT(*))
+    FROM (
+      SELECT CASE WHEN resultado IS NULL THEN 'pendente' ELSE 'com_resultado' END AS chave
+      FROM novos
+    ) d
+    GROUP BY chave;
+  ELSIF TG_OP = 'DELETE' THEN
+    PERFORM kpi_somar('exames', chave, -COUNT(*))
+    FROM (
+      SELECT CASE WHEN resultado IS NULL THEN 'pendente' ELSE 'com_resultado' END AS chave
+      FROM antigos
+    ) d
+    GROUP BY chave;
+  ELSE
+    PERFORM kpi_somar('exames', chave, SUM(sinal))
+    FROM (
+      SELECT CASE WHEN resultado IS NULL THEN 'pendente' ELSE 'com_resultado' END AS chave, 1 AS sinal
+      FROM novos
+      UNION ALL
+      SELECT CASE WHEN resultado IS NULL THEN 'pendente' ELSE 'com_resultado' END, -1
+      FROM antigos
+    ) d
+    GROUP BY chave
+    HAVING SUM(sinal) <> 0;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION kpi_internacoes_delta() RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM kpi_somar(grupo, chave, COUNT(*))
+    FROM (
+      SELECT 'internacoes' AS grupo,
+             CASE WHEN data_saida IS NULL THEN 'ativa' ELSE 'encerrada' END AS chave
+      FROM novos
+      UNION ALL
+      SELECT 'internacoes_quarto', COALESCE(quarto, 'sem_quarto')
+      FROM novos
+      WHERE data_saida IS NULL
+    ) d
+    GROUP BY grupo, chave;
+  ELSIF TG_OP = 'DELETE' THEN
+    PERFORM kpi_somar(grupo, chave, -COUNT(*))
+    FROM (
+      SELECT 'internacoes' AS grupo,
+             CASE WHEN data_saida IS NULL THEN 'ativa' ELSE 'encerrada' END AS chave
+      FROM antigos
+      UNION ALL
+      SELECT 'internacoes_quarto', COALESCE(quarto, 'sem_quarto')
+      FROM antigos
+      WHERE data_saida IS NULL
+    ) d
+    GROUP BY grupo, chave;
+  ELSE
+    PERFORM kpi_somar(grupo, chave, SUM(sinal))
+    FROM (
+      SELECT 'internacoes' AS grupo,
+             CASE WHEN data_saida IS NULL THEN 'ativa' ELSE 'encerrada' END AS chave,
+             1 AS sinal
+      FROM novos
+      UNION ALL
+      SELECT 'internacoes_quarto', COALESCE(quarto, 'sem_quarto'), 1
+      FROM novos
+      WHERE data_saida IS NULL
+      UNION ALL
+      SELECT 'internacoes', CASE WHEN data_saida IS NULL THEN 'ativa' ELSE 'encerrada' END, -1
+      FROM antigos
+      UNION ALL
+      SELECT 'internacoes_quarto', COALESCE(quarto, 'sem_quarto'), -1
+      FROM antigos
+      WHERE data_saida IS NULL
+    ) d
+    GROUP BY grupo, chave
+    HAVING SUM(sinal) <> 0;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION kpi_total_delta() RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM kpi_somar(TG_TABLE_NAME::varchar, 'total', COUNT(*)) FROM novos HAVING COUNT(*) > 0;
+  ELSIF TG_OP = 'DELETE' THEN
+    PERFORM kpi_somar(TG_TABLE_NAME::varchar, 'total', -COUNT(*)) FROM antigos HAVING COUNT(*) > 0;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Paciente novo nunca tem convênio; a FK com ON DELETE RESTRICT garante que
+-- paciente removido também não tinha.
+CREATE OR REPLACE FUNCTION kpi_pacientes_delta() RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM kpi_somar(grupo, 'total', COUNT(*))
+    FROM novos CROSS JOIN (VALUES ('pacientes'), ('pacientes_sem_convenio')) AS g (grupo)
+    GROUP BY grupo
+    HAVING COUNT(*) > 0;
+  ELSIF TG_OP = 'DELETE' THEN
+    PERFORM kpi_somar(grupo, 'total', -COUNT(*))
+    FROM antigos CROSS JOIN (VALUES ('pacientes'), ('pacientes_sem_convenio')) AS g (grupo)
+    GROUP BY grupo
+    HAVING COUNT(*) > 0;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Um paciente sai de "sem convênio" quando ganha a primeira associação e volta
+-- quando perde a última. O trigger roda AFTER, então a tabela já contém "novos"
+-- e não contém "antigos".
+CREATE OR REPLACE FUNCTION kpi_pacientes_convenios_delta() RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM kpi_somar('pacientes_sem_convenio', 'total', -COUNT(DISTINCT n.paciente_id))
+    FROM novos n
+    WHERE NOT EXISTS (
+      SELECT 1 FROM pacientes_convenios pc
+      WHERE pc.paciente_id = n.paciente_id
+        AND pc.id NOT IN (SELECT id FROM novos)
+    )
+    HAVING COUNT(*) > 0;
+  ELSIF TG_OP = 'DELETE' THEN
+    PERFORM kpi_somar('pacientes_sem_convenio', 'total', COUNT(DISTINCT a.paciente_id))
+    FROM antigos a
+    WHERE NOT EXISTS (
+      SELECT 1 FROM pacientes_convenios pc WHERE pc.paciente_id = a.paciente_id
+    )
+    HAVING COUNT(*) > 0;
+  ELSE
+    PERFORM kpi_somar('pacientes_sem_convenio', 'total', SUM(antes - depois))
+    FROM (
+      SELECT
+        (
+          EXISTS (SELECT 1 FROM antigos a WHERE a.paciente_id = p.paciente_id)
+          OR EXISTS (
+            SELECT 1 FROM pacientes_convenios pc
+            WHERE pc.paciente_id = p.paciente_id
+              AND pc.id NOT IN (SELECT id FROM novos)
+          )
+        )::int AS antes,
+        EXISTS (
+          SELECT 1 FROM pacientes_convenios pc WHERE pc.paciente_id = p.paciente_id
+        )::int AS depois
+      FROM (SELECT paciente_id FROM novos UNION SELECT paciente_id FROM antigos) p
+    ) d
+    HAVING SUM(antes - depois) <> 0;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables exigem um trigger por evento.
+DO $$
+DECLARE
+  alvo RECORD;
+BEGIN
+  FOR alvo IN
+    SELECT * FROM (VALUES
+      ('consultas', 'kpi_consultas_delta', true),
+      ('exames', 'kpi_exames_delta', true),
+      ('internacoes', 'kpi_internacoes_delta', true),
+      ('pacientes', 'kpi_pacientes_delta', false),
+      ('pacientes_convenios', 'kpi_pacientes_convenios_delta', true),
+      ('medicos', 'kpi_total_delta', false)
+    ) AS t (tabela, funcao, com_update)
+  LOOP
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', alvo.tabela || '_kpi_ins', alvo.tabela);
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', alvo.tabela || '_kpi_upd', alvo.tabela);
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', alvo.tabela || '_kpi_del', alvo.tabela);
+
+    EXECUTE format(
+      'CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS novos '
+      'FOR EACH STATEMENT EXECUTE FUNCTION %I()',
+      alvo.tabela || '_kpi_ins', alvo.tabela, alvo.funcao
+    );
+    EXECUTE format(
+      'CREATE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS antigos '
+      'FOR EACH STATEMENT EXECUTE FUNCTION %I()',
+      alvo.tabela || '_kpi_del', alvo.tabela, alvo.funcao
+    );
+    IF alvo.com_update THEN
+      EXECUTE format(
+        'CREATE TRIGGER %I AFTER UPDATE ON %I '
+        'REFERENCING OLD TABLE AS antigos NEW TABLE AS novos '
+        'FOR EACH STATEMENT EXECUTE FUNCTION %I()',
+        alvo.tabela || '_kpi_upd', alvo.tabela, alvo.funcao
+      );
+    END IF;
+  END LOOP;
+END $$;
+
+-- Carga inicial (banco já populado) ou reinstalação.
+LOCK TABLE consultas, exames, internacoes, pacientes, pacientes_convenios, medicos IN SHARE MODE;
+DELETE FROM kpi_contagens;
+INSERT INTO kpi_contagens (grupo, chave, total)
+SELECT grupo, chave, total FROM kpi_contagens_esperadas;
@@ -0,0 +1,58 @@
+-- Materialized views das listas caras do dashboard (extra opcional
+-- "materialized_views"). Atualizadas com REFRESH MATERIALIZED VIEW
+-- CONCURRENTLY pelo agendador do app, que exige um índice UNIQUE em cada view.
+
+-- Internações ativas; o corte por dias é aplicado na leitura.
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_internacoes_longas AS
+SELECT
+    i.id,
+    p.nome AS paciente,
+    i.data_entrada,
+    i.motivo,
+    i.quarto
+FROM internacoes i
+JOIN pacientes p ON p.id = i.paciente_id
+WHERE i.data_saida IS NULL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS mv_internacoes_longas_id
+  ON mv_internacoes_longas (id);
+CREATE INDEX IF NOT EXISTS mv_internacoes_longas_entrada
+  ON mv_internacoes_longas (data_entrada);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_pacientes_sem_convenio AS
+SELECT
+    p.id,
+    p.nome,
+    p.cpf,
+    p.telefone,
+    p.created_at
+FROM pacientes p
+WHERE NOT EXISTS (
+    SELECT 1 FROM pacientes_convenios pc WHERE pc.paciente_id = p.id
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS mv_pacientes_sem_convenio_id
+  ON mv_pacientes_sem_convenio (id);
+CREATE INDEX IF NOT EXISTS mv_pacientes_sem_convenio_created
+  ON mv_pacientes_sem_convenio (created_at DESC);
+
+-- Agenda dos próximos 31 dias a partir do último refresh; a janela pedida
+-- pelo dashboard (até 30 dias) é aplicada na leitura.
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_consultas_agendadas_proximas AS
+SELECT
+    c.id,
+    c.data,
+    p.nome AS paciente,
+    m.nome AS medico,
+    m.especialidade,
+    c.motivo
+FROM consultas c
+JOIN pacientes p ON p.id = c.paciente_id
+JOIN medicos m ON m.id = c.medico_id
+WHERE c.status = 'agendada'
+  AND c.data BETWEEN now() - interval '1 day' AND now() + interval '31 days';
+
+CREATE UNIQUE INDEX IF NOT EXISTS mv_consultas_agendadas_proximas_id
+  ON mv_consultas_agendadas_proximas (id);
+CREATE INDEX IF NOT EXISTS mv_consultas_agendadas_proximas_data
+  ON mv_consultas_agendadas_proximas (data);
@@ -0,0 +1,96 @@
+-- Contadores de atividade por tabela e minuto (extra opcional
+-- "activity_counters"). Triggers de statement somam inserções e atualizações
+-- no minuto corrente; o painel de atividade lê só as linhas da janela pedida,
+-- independente do tamanho das tabelas. Minutos além da retenção são removidos
+-- por atividade_podar(), chamada pelo stream.
+
+CREATE TABLE IF NOT EXISTS atividade_por_minuto (
+  minuto       TIMESTAMP   NOT NULL,
+  tabela       VARCHAR(40) NOT NULL,
+  criados      BIGINT      NOT NULL DEFAULT 0,
+  atualizados  BIGINT      NOT NULL DEFAULT 0,
+  PRIMARY KEY (minuto, tabela)
+);
+
+CREATE OR REPLACE FUNCTION atividade_somar(p_tabela VARCHAR, p_criados BIGINT, p_atualizados BIGINT)
+RETURNS VOID AS $$
+  INSERT INTO atividade_por_minuto AS a (minuto, tabela, criados, atualizados)
+  VALUES (date_trunc('minute', now())::timestamp, p_tabela, p_criados, p_atualizados)
+  ON CONFLICT (minuto, tabela)
+  DO UPDATE SET
+    criados = a.criados + EXCLUDED.criados,
+    atualizados = a.atualizados + EXCLUDED.atualizados;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION atividade_registrar() RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM atividade_somar(TG_TABLE_NAME::varchar, COUNT(*), 0) FROM novos HAVING COUNT(*) > 0;
+  ELSE
+    PERFORM atividade_somar(TG_TABLE_NAME::varchar, 0, COUNT(*)) FROM novos HAVING COUNT(*) > 0;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION atividade_podar(p_retencao INTERVAL) RETURNS BIGINT AS $$
+  WITH removidos AS (
+    DELETE FROM atividade_por_minuto
+    WHERE minuto < date_trunc('minute', now())::timestamp - p_retencao
+    RETURNING 1
+  )
+  SELECT COUNT(*) FROM removidos;
+$$ LANGUAGE sql;
+
+DO $$
+DECLARE
+  tabela TEXT;
+BEGIN
+  FOREACH tabela IN ARRAY ARRAY['consultas', 'exames', 'internacoes', 'pacientes', 'pacientes_convenios']
+  LOOP
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tabela || '_atividade_ins', tabela);
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tabela || '_atividade_upd', tabela);
+
+    EXECUTE format(
+      'CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS novos '
+      'FOR EACH STATEMENT EXECUTE FUNCTION atividade_registrar()',
+      tabela || '_atividade_ins', tabela
+    );
+    EXECUTE format(
+      'CREATE TRIGGER %I AFTER UPDATE ON %I REFERENCING NEW TABLE AS novos '
+      'FOR EACH STATEMENT EXECUTE FUNCTION atividade_registrar()',
+      tabela || '_atividade_upd', tabela
+    );
+  END LOOP;
+END $$;
+
+-- Carga inicial das últimas 24 horas a partir de created_at/updated_at (cada
+-- linha atualizada conta uma vez, no minuto da última atualização).
+LOCK TABLE consultas, exames, internacoes, pacientes, pacientes_convenios IN SHARE MODE;
+DELETE FROM atividade_por_minuto;
+INSERT INTO atividade_por_minuto (minuto, tabela, criados, atualizados)
+SELECT minuto, tabela, SUM(criados), SUM(atualizados)
+FROM (
+  SELECT 'consultas' AS tabela, created_at, updated_at FROM consultas
+  WHERE updated_at >= now() - interval '24 hours'
+  UNION ALL
+  SELECT 'exames', created_at, updated_at FROM exames
+  WHERE updated_at >= now() - interval '24 hours'
+  UNION ALL
+  SELECT 'internacoes', created_at, updated_at FROM internacoes
+  WHERE updated_at >= now() - interval '24 hours'
+  UNION ALL
+  SELECT 'pacientes', created_at, updated_at FROM pacientes
+  WHERE updated_at >= now() - interval '24 hours'
+  UNION ALL
+  SELECT 'pacientes_convenios', created_at, updated_at FROM pacientes_convenios
+  WHERE updated_at >= now() - interval '24 hours'
+) linhas
+CROSS JOIN LATERAL (
+  SELECT date_trunc('minute', created_at) AS minuto, 1 AS criados, 0 AS atualizados
+  WHERE created_at >= now() - interval '24 hours'
+  UNION ALL
+  SELECT date_trunc('minute', updated_at), 0, 1
+  WHERE updated_at > created_at
+) eventos
+GROUP BY minuto, tabela;
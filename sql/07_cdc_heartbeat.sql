@@ -0,0 +1,13 @@
+-- Heartbeat de CDC (extra opcional "cdc_heartbeat"). O stream atualiza a
+-- única linha a cada CDC_HEARTBEAT_SECONDS com o horário de geração; quem lê o
+-- slot (cli cdc-consume ou os tópicos do Debezium) compara gerado_em com o
+-- momento da captura e mede a latência ponta a ponta mesmo sem tráfego.
+-- Uma linha só: cada batida é um UPDATE e a tabela não cresce.
+
+CREATE TABLE IF NOT EXISTS cdc_heartbeat (
+  id         SMALLINT    PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+  gerado_em  TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp(),
+  sequencia  BIGINT      NOT NULL DEFAULT 0
+);
+
+INSERT INTO cdc_heartbeat (id) VALUES (1) ON CONFLICT (id) DO NOTHING;
@@ -8,3 +8,14 @@ DO $$ DECLARE r RECORD; BEGIN
 END $$;
 
 DROP FUNCTION IF EXISTS set_updated_at() CASCADE;
+DROP FUNCTION IF EXISTS ensure_monthly_partitions(regclass, date, date) CASCADE;
+DROP FUNCTION IF EXISTS kpi_somar(varchar, varchar, bigint) CASCADE;
+DROP FUNCTION IF EXISTS kpi_consultas_delta() CASCADE;
+DROP FUNCTION IF EXISTS kpi_exames_delta() CASCADE;
+DROP FUNCTION IF EXISTS kpi_internacoes_delta() CASCADE;
+DROP FUNCTION IF EXISTS kpi_total_delta() CASCADE;
+DROP FUNCTION IF EXISTS kpi_pacientes_delta() CASCADE;
+DROP FUNCTION IF EXISTS kpi_pacientes_convenios_delta() CASCADE;
+DROP FUNCTION IF EXISTS atividade_somar(varchar, bigint, bigint) CASCADE;
+DROP FUNCTION IF EXISTS atividade_registrar() CASCADE;
+DROP FUNCTION IF EXISTS atividade_podar(interval) CASCADE;
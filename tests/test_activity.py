@@ -0,0 +1,34 @@
+import unittest
+from unittest.mock import MagicMock
+
+import psycopg2
+
+from scripts import activity
+
+
+class PruneActivityTests(unittest.TestCase):
+    def test_prune_commits_and_returns_removed_rows(self):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchone.return_value = (120,)
+
+        removed = activity.prune_activity(conn, retention_hours=24)
+
+        self.assertEqual(removed, 120)
+        cursor.execute.assert_called_once_with(activity.PRUNE_ACTIVITY_SQL, (24,))
+        conn.commit.assert_called_once_with()
+
+    def test_failed_prune_rolls_back(self):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.execute.side_effect = psycopg2.Error("lock timeout")
+
+        with self.assertRaises(psycopg2.Error):
+            activity.prune_activity(conn, retention_hours=24)
+
+        conn.rollback.assert_called_once_with()
+        conn.commit.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
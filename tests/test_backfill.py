@@ -0,0 +1,152 @@
+import tempfile
+import unittest
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from scripts.backfill import daily_counts, day_specs, run_backfill
+
+START = date(2026, 1, 5)
+END = datetime(2026, 1, 8, tzinfo=timezone.utc)
+INITIAL = {"pacientes": 100, "medicos": 5}
+
+
+def read(root, kind, table):
+    return ds.dataset(Path(root) / kind / table, partitioning="hive").to_table().to_pylist()
+
+
+class DailyCountsTests(unittest.TestCase):
+    def test_weekends_are_quieter_and_ids_do_not_overlap(self):
+        counts = daily_counts(14, START, 10_000, seed=3)
+        specs = day_specs(14, START, counts, initial_pacientes=100, medicos=5)
+
+        total = sum(values for values in counts.values())
+        self.assertLess(total[5:7].max(), total[:5].min())  # sáb e dom
+        self.assertEqual(specs[0]["counts"]["pacientes"], 100)
+        for previous, current in zip(specs, specs[1:]):
+            for table in counts:
+                self.assertEqual(
+                    current["first_id"][table],
+                    previous["first_id"][table] + previous["counts"][table],
+                )
+            self.assertEqual(
+                current["pacientes_before"],
+                current["first_id"]["pacientes"] - 1,
+            )
+
+
+class BackfillTests(unittest.TestCase):
+    root = None
+    stats = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.root = Path(cls.tmp.name)
+        cls.stats = run_backfill(
+            cls.root, 3, START, inserts_per_day=2_000, initial=INITIAL,
+            chunk_rows=300, pool_size=16, seed=11,
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_changelog_is_partitioned_by_commit_day_within_simulation(self):
+        for table in ("pacientes", "consultas", "exames", "internacoes"):
+            for row in read(self.root, "changelog", table):
+                self.assertEqual(row["dt"], str(row["_commit_ts"].date()))
+                self.assertLess(row["_commit_ts"], END)
+                self.assertEqual(row["_commit_ts"], row["updated_at"])
+
+    def test_changelog_pieces_are_compacted_per_partition(self):
+        for table in ("pacientes", "consultas", "exames", "internacoes"):
+            for directory in (self.root / "changelog" / table).iterdir():
+                paths = sorted(directory.iterdir())
+                self.assertEqual(
+                    [path.name for path in paths],
+                    [f"part-{seq:04d}.parquet" for seq in range(len(paths))],
+                )
+                sizes = []
+                for path in paths:
+                    commit_ts = pq.read_table(path).column("_commit_ts").to_pylist()
+                    self.assertEqual(commit_ts, sorted(commit_ts))
+                    sizes.append(len(commit_ts))
+                # Um arquivo só é fechado quando o pedaço seguinte não cabe nele.
+                for current, following in zip(sizes, sizes[1:]):
+                    self.assertGreater(current + following, 300)
+
+        files = sum(1 for path in self.root.rglob("*.parquet"))
+        self.assertEqual(self.stats["files"], files)
+
+    def test_state_is_last_changelog_image(self):
+        for table in ("pacientes", "consultas", "exames", "internacoes", "medicos"):
+            latest = {}
+            for row in sorted(read(self.root, "changelog", table), key=lambda r: r["_commit_ts"]):
+                latest[row["id"]] = {k: v for k, v in row.items() if not k.startswith("_") and k != "dt"}
+            state = {
+                row["id"]: {k: v for k, v in row.items() if k != "dt"}
+                for row in read(self.root, "state", table)
+            }
+            self.assertEqual(sorted(state), list(range(1, len(state) + 1)))
+            self.assertEqual(state, latest)
+
+    def test_lifecycle_transitions(self):
+        consultas = read(self.root, "changelog", "consultas")
+        inserted = [row for row in consultas if row["_op"] == "c"]
+        updated = [row for row in consultas if row["_op"] == "u"]
+        self.assertTrue(updated)
+        self.assertEqual({row["status"] for row in inserted}, {"agendada"})
+        self.assertLessEqual({row["status"] for row in updated}, {"realizada", "cancelada", "faltou"})
+
+        exames = read(self.root, "changelog", "exames")
+        self.assertTrue(all(row["resultado"] is None for row in exames if row["_op"] == "c"))
+        for row in exames:
+            if row["_op"] == "u":
+                self.assertIsNotNone(row["resultado"])
+                self.assertGreater(row["_commit_ts"], row["data"])
+
+        for row in read(self.root, "changelog", "internacoes"):
+            if row["_op"] == "u":
+                self.assertEqual(row["data_saida"], row["_commit_ts"])
+                self.assertIn((row["data_saida"] - row["data_entrada"]).days, range(1, 11))
+
+    def test_patient_updates_keep_earlier_changes(self):
+        by_id = {}
+        for row in sorted(read(self.root, "changelog", "pacientes"), key=lambda r: r["_commit_ts"]):
+            previous = by_id.get(row["id"])
+            if previous is not None:
+                changed = {
+                    column
+                    for column in ("nome", "cpf", "telefone", "endereco", "nascimento")
+                    if previous[column] != row[column]
+                }
+                self.assertLessEqual(changed, {"telefone", "endereco"})
+            by_id[row["id"]] = row
+
+    def test_foreign_keys_point_to_existing_rows(self):
+        created = {row["id"]: row["created_at"] for row in read(self.root, "state", "pacientes")}
+        for table in ("consultas", "exames", "internacoes"):
+            for row in read(self.root, "state", table):
+                self.assertLess(created[row["paciente_id"]], row["created_at"])
+        for row in read(self.root, "state", "consultas"):
+            self.assertIn(row["medico_id"], range(1, INITIAL["medicos"] + 1))
+
+    def test_same_seed_is_reproducible_with_processes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            stats = run_backfill(
+                Path(tmp), 3, START, inserts_per_day=2_000, initial=INITIAL,
+                workers=2, chunk_rows=300, pool_size=16, seed=11,
+            )
+
+            self.assertEqual(stats, self.stats)
+            for table in ("consultas", "pacientes"):
+                ours = sorted(read(self.root, "changelog", table), key=lambda r: (r["id"], r["_commit_ts"]))
+                theirs = sorted(read(tmp, "changelog", table), key=lambda r: (r["id"], r["_commit_ts"]))
+                self.assertEqual(ours, theirs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+
+from scripts.backpressure import MB, NORMAL, PAUSED, THROTTLED, SlotBackpressure
+
+
+class SlotBackpressureTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.backpressure = SlotBackpressure(
+            low_bytes=100 * MB,
+            high_bytes=500 * MB,
+            pause_bytes=1000 * MB,
+            check_seconds=10,
+            factor=3,
+            clock=lambda: self.now,
+        )
+
+    def test_watermarks_with_hysteresis(self):
+        steps = [
+            (200, NORMAL),
+            (600, THROTTLED),
+            (300, THROTTLED),
+            (1200, PAUSED),
+            (700, THROTTLED),
+            (800, THROTTLED),
+            (200, THROTTLED),
+            (50, NORMAL),
+        ]
+
+        for lag_mb, expected in steps:
+            with self.subTest(lag_mb=lag_mb):
+                self.assertEqual(self.backpressure.update(lag_mb * MB), expected)
+
+    def test_pause_below_low_watermark_resumes_directly(self):
+        self.backpressure.update(1200 * MB)
+
+        self.assertEqual(self.backpressure.update(10 * MB), NORMAL)
+
+    def test_delay_multiplies_only_when_throttled(self):
+        self.assertEqual(self.backpressure.delay(2), 2)
+        self.backpressure.update(600 * MB)
+        self.assertEqual(self.backpressure.delay(2), 6)
+
+    def test_transitions_are_logged_and_time_accounted(self):
+        with self.assertLogs("scripts.backpressure", level="INFO") as logs:
+            self.now = 5
+            self.backpressure.update(1200 * MB)
+            self.now = 35
+            self.backpressure.update(0)
+        self.now = 40
+
+        self.assertIn("normal -> pausado", logs.output[0])
+        self.assertTrue(logs.output[0].startswith("WARNING"))
+        self.assertEqual(
+            self.backpressure.summary(),
+            {NORMAL: 10.0, THROTTLED: 0.0, PAUSED: 30.0},
+        )
+
+    def test_check_reads_worst_slot_on_cadence(self):
+        rows = [
+            {"retido_bytes": 700 * MB, "atraso_bytes": 10 * MB},
+            {"retido_bytes": None, "atraso_bytes": 20 * MB},
+        ]
+        with patch("scripts.backpressure.slot_lag", return_value=rows) as lag:
+            self.assertEqual(self.backpressure.check(MagicMock()), THROTTLED)
+            self.now = 5
+            self.backpressure.check(MagicMock())
+            self.now = 10
+            self.backpressure.check(MagicMock())
+
+        self.assertEqual(lag.call_count, 2)
+        self.assertEqual(self.backpressure.lag_bytes, 700 * MB)
+
+    def test_query_error_keeps_state(self):
+        self.backpressure.update(1200 * MB)
+        conn = MagicMock()
+        with (
+            self.assertLogs("scripts.backpressure", level="ERROR"),
+            patch("scripts.backpressure.slot_lag", side_effect=psycopg2.Error("x")),
+        ):
+            self.assertEqual(self.backpressure.check(conn), PAUSED)
+        conn.rollback.assert_called_once()
+
+    def test_no_slots_means_no_lag(self):
+        self.backpressure.update(600 * MB)
+        with patch("scripts.backpressure.slot_lag", return_value=[]):
+            self.assertEqual(self.backpressure.check(MagicMock()), NORMAL)
+
+    def test_invalid_watermarks(self):
+        with self.assertRaises(ValueError):
+            SlotBackpressure(low_bytes=10, high_bytes=5, pause_bytes=20)
+
+    def test_from_env_disabled_by_default(self):
+        with patch.dict("os.environ", {"CDC_BACKPRESSURE": "false"}):
+            self.assertIsNone(SlotBackpressure.from_env())
+        with patch.dict("os.environ", {"CDC_BACKPRESSURE": "true", "CDC_LAG_HIGH_MB": "256"}):
+            self.assertEqual(SlotBackpressure.from_env().high_bytes, 256 * MB)
+
+
+if __name__ == "__main__":
+    unittest.main()
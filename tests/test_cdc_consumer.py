@@ -0,0 +1,297 @@
+import json
+import struct
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from psycopg2 import sql
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from scripts.cdc_consumer import (
+    BronzeWriter,
+    CdcConsumer,
+    UNCHANGED_TOAST,
+    PgOutputDecoder,
+    Wal2JsonDecoder,
+    ensure_publication,
+    format_lsn,
+    start_options,
+)
+
+COMMIT_TS = 820_000_000_000_000  # µs desde 2000-01-01
+
+
+def relation(oid, table, columns):
+    body = struct.pack("!I", oid) + b"public\0" + table.encode() + b"\0d"
+    body += struct.pack("!H", len(columns))
+    for column in columns:
+        body += b"\x01" + column.encode() + b"\0" + struct.pack("!Ii", 25, -1)
+    return b"R" + body
+
+
+def tuple_data(values):
+    body = struct.pack("!H", len(values))
+    for value in values:
+        if value is None:
+            body += b"n"
+        elif value is UNCHANGED_TOAST:
+            body += b"u"
+        else:
+            encoded = value.encode()
+            body += b"t" + struct.pack("!I", len(encoded)) + encoded
+    return body
+
+
+def begin(xid=700):
+    return b"B" + struct.pack("!QqI", 0, COMMIT_TS, xid)
+
+
+def commit(end_lsn):
+    return b"C" + struct.pack("!BQQq", 0, end_lsn - 1, end_lsn, COMMIT_TS)
+
+
+def message(payload, lsn, wal_end=None):
+    return SimpleNamespace(payload=payload, data_start=lsn, wal_end=wal_end or lsn)
+
+
+class PgOutputDecoderTests(unittest.TestCase):
+    def test_decodes_begin_changes_and_commit(self):
+        decoder = PgOutputDecoder()
+        self.assertIsNone(decoder.decode(relation(16384, "pacientes", ["id", "nome"])))
+
+        begin_event = decoder.decode(begin())
+        insert = decoder.decode(b"I" + struct.pack("!I", 16384) + b"N" + tuple_data(["1", "Ana"]))
+        update = decoder.decode(
+            b"U" + struct.pack("!I", 16384)
+            + b"O" + tuple_data(["1", "Ana"])
+            + b"N" + tuple_data(["1", "Ana Souza"])
+        )
+        delete = decoder.decode(b"D" + struct.pack("!I", 16384) + b"K" + tuple_data(["1", None]))
+        commit_event = decoder.decode(commit(0x2000))
+
+        self.assertEqual(begin_event["xid"], 700)
+        self.assertEqual(insert, {
+            "type": "change", "op": "c", "table": "pacientes", "data": {"id": "1", "nome": "Ana"},
+        })
+        self.assertEqual(update["data"]["nome"], "Ana Souza")
+        self.assertEqual(delete["op"], "d")
+        self.assertEqual(commit_event["lsn"], 0x2000)
+        self.assertEqual(
+            commit_event["commit_ts"],
+            datetime(2025, 12, 25, 17, 46, 40, tzinfo=timezone.utc),
+        )
+
+    def test_unchanged_toast_is_not_reported_as_null(self):
+        decoder = PgOutputDecoder()
+        decoder.decode(relation(16384, "exames", ["id", "resultado", "laudo"]))
+
+        update = decoder.decode(
+            b"U" + struct.pack("!I", 16384) + b"N" + tuple_data(["1", None, UNCHANGED_TOAST])
+        )
+
+        self.assertEqual(update["data"], {"id": "1", "resultado": None})
+        self.assertEqual(update["unchanged"], ["laudo"])
+
+
+class Wal2JsonDecoderTests(unittest.TestCase):
+    def test_decodes_format_version_2(self):
+        decoder = Wal2JsonDecoder()
+
+        change = decoder.decode(json.dumps({
+            "action": "U",
+            "schema": "public",
+            "table": "exames",
+            "columns": [{"name": "id", "value": 3}, {"name": "resultado", "value": "ok"}],
+        }))
+        done = decoder.decode('{"action":"C","timestamp":"2026-01-02 03:04:05.5+00"}')
+
+        self.assertEqual(change["op"], "u")
+        self.assertEqual(change["data"], {"id": 3, "resultado": "ok"})
+        self.assertEqual(done["commit_ts"].tzinfo, timezone.utc)
+        self.assertIsNone(decoder.decode('{"action":"M"}'))
+
+
+class CdcConsumerTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cursor = MagicMock()
+        self.now = 0.0
+        self.lines = []
+        self.consumer = CdcConsumer(
+            self.cursor,
+            PgOutputDecoder(),
+            BronzeWriter(Path(self.tmp.name)),
+            batch_rows=2,
+            flush_seconds=5,
+            feedback_seconds=10,
+            status_seconds=5,
+            echo=self.lines.append,
+            clock=lambda: self.now,
+            wall_clock=lambda: datetime(2025, 12, 25, 17, 46, 41, 500000, tzinfo=timezone.utc),
+        )
+        self.consumer.handle(message(relation(1, "consultas", ["id", "status"]), 0x100))
+
+    def insert(self, lsn, row_id):
+        payload = b"I" + struct.pack("!I", 1) + b"N" + tuple_data([row_id, "agendada"])
+        self.consumer.handle(message(payload, lsn, wal_end=0x5000))
+
+    def test_uncommitted_changes_are_not_written(self):
+        self.consumer.handle(message(begin(), 0x1000))
+        self.insert(0x1010, "1")
+
+        self.consumer.flush()
+
+        self.assertEqual(self.consumer.writer.files, 0)
+        self.cursor.send_feedback.assert_not_called()
+
+    def test_batch_is_written_then_lsn_confirmed(self):
+        self.consumer.handle(message(begin(), 0x1000))
+        self.insert(0x1010, "1")
+        self.insert(0x1020, "2")
+        self.consumer.handle(message(commit(0x1030), 0x1030))
+
+        [path] = Path(self.tmp.name).glob("consultas/dt=2025-12-25/*.parquet")
+        table = pq.read_table(path)
+        self.assertEqual(table.column("id").to_pylist(), ["1", "2"])
+        self.assertEqual(table.column("_op").to_pylist(), ["c", "c"])
+        self.assertEqual(table.column("_xid").to_pylist(), [700, 700])
+        self.assertEqual(table.column("_lsn").to_pylist(), [0x1010, 0x1020])
+        self.assertEqual(self.consumer.changes, 2)
+        self.cursor.send_feedback.assert_called_once_with(
+            write_lsn=0x1030,
+            flush_lsn=0x1030,
+            apply_lsn=0x1030,
+        )
+
+    def test_tick_flushes_by_time_and_reports_status(self):
+        self.consumer.handle(message(begin(), 0x1000))
+        self.insert(0x1010, "1")
+        self.consumer.handle(message(commit(0x1030), 0x1030))
+        self.assertEqual(self.consumer.writer.files, 0)
+
+        self.now = 6.0
+        self.consumer.tick()
+
+        self.assertEqual(self.consumer.writer.files, 1)
+        self.assertEqual(self.consumer.flushed_lsn, 0x1030)
+        self.assertIn("lag", self.lines[0])
+        self.assertGreater(self.consumer.lag()["bytes"], 0)
+
+    def test_commit_latency_and_heartbeat_are_measured(self):
+        self.consumer.handle(message(relation(2, "cdc_heartbeat", ["id", "gerado_em"]), 0x200))
+        self.consumer.handle(message(begin(), 0x1000))
+        payload = b"U" + struct.pack("!I", 2) + b"N" + tuple_data(
+            ["1", "2025-12-25 17:46:39.5+00"]
+        )
+        self.consumer.handle(message(payload, 0x1010))
+        self.consumer.handle(message(commit(0x1030), 0x1030))
+
+        self.assertEqual(list(self.consumer.commit_latency.samples), [1.5])
+        self.assertEqual(list(self.consumer.heartbeat_latency.samples), [2.0])
+        # Heartbeats não vão para a camada bronze, e o LSN pode ser confirmado.
+        self.assertEqual(self.consumer.writer.pending, 0)
+        self.assertEqual(self.consumer.changes, 0)
+        self.assertEqual(self.consumer.flushed_lsn, 0x1030)
+
+        self.now = 6.0
+        self.consumer.tick()
+        self.assertIn("commit→captura p50 1.500s", self.lines[0])
+        self.assertIn("heartbeat p50 2.000s", self.lines[0])
+
+    def test_unchanged_toast_columns_are_marked_in_the_row(self):
+        self.consumer.handle(message(begin(), 0x1000))
+        payload = b"U" + struct.pack("!I", 1) + b"N" + tuple_data(["1", UNCHANGED_TOAST])
+        self.consumer.handle(message(payload, 0x1010))
+        self.insert(0x1020, "2")
+        self.consumer.handle(message(commit(0x1030), 0x1030))
+
+        [path] = Path(self.tmp.name).glob("consultas/dt=2025-12-25/*.parquet")
+        table = pq.read_table(path)
+        self.assertEqual(table.column("_toast_inalterado").to_pylist(), ["status", None])
+        self.assertEqual(table.column("status").to_pylist(), [None, "agendada"])
+
+    def test_parquet_files_of_a_partition_share_one_schema(self):
+        writer = BronzeWriter(Path(self.tmp.name))
+        ts = datetime(2026, 1, 1, 12, tzinfo=timezone.utc)
+        writer.add("exames", {
+            "_op": "c", "_lsn": 1, "_xid": 9, "_commit_ts": ts,
+            "id": 1, "resultado": None, "urgente": False, "extra": None,
+        })
+        writer.flush()
+        writer.add("exames", {
+            "_op": "u", "_lsn": 2, "_xid": 10, "_commit_ts": ts,
+            "id": 1, "resultado": "ok", "urgente": True, "extra": {"a": 1},
+        })
+        writer.flush()
+
+        table = ds.dataset(Path(self.tmp.name) / "exames", partitioning="hive").to_table()
+
+        rows = sorted(table.to_pylist(), key=lambda row: row["_lsn"])
+        self.assertEqual([row["resultado"] for row in rows], [None, "ok"])
+        self.assertEqual(rows[1]["id"], "1")
+        self.assertEqual(rows[1]["urgente"], "t")
+        self.assertEqual(rows[1]["extra"], '{"a": 1}')
+        self.assertEqual(rows[0]["_commit_ts"], ts)
+        self.assertEqual(table.schema.field("_lsn").type, pa.int64())
+
+    def test_batch_spanning_midnight_is_split_by_commit_day(self):
+        writer = BronzeWriter(Path(self.tmp.name))
+        before = datetime(2026, 1, 1, 23, 59, 59, tzinfo=timezone.utc)
+        after = datetime(2026, 1, 2, 0, 0, 1, tzinfo=timezone.utc)
+        writer.add("exames", {"_op": "c", "_lsn": 1, "_commit_ts": before, "id": "1"})
+        writer.add("exames", {"_op": "c", "_lsn": 2, "_commit_ts": after, "id": "2"})
+
+        paths = writer.flush()
+
+        self.assertEqual(
+            [(path.parent.name, pq.read_table(path).column("id").to_pylist()) for path in paths],
+            [("dt=2026-01-01", ["1"]), ("dt=2026-01-02", ["2"])],
+        )
+
+    def test_jsonl_writer_keeps_columns_of_each_row(self):
+        writer = BronzeWriter(Path(self.tmp.name), "jsonl")
+        ts = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        writer.add("exames", {"_op": "c", "_lsn": 1, "_commit_ts": ts, "id": "1", "tipo": "RX"})
+        writer.add("exames", {"_op": "d", "_lsn": 2, "_commit_ts": ts, "id": "1"})
+
+        [path] = writer.flush()
+
+        rows = [json.loads(line) for line in path.read_text().splitlines()]
+        self.assertEqual(path.parent.name, "dt=2026-01-01")
+        self.assertEqual(rows[1], {
+            "_op": "d", "_lsn": 2, "_commit_ts": "2026-01-01 00:00:00+00:00", "id": "1",
+        })
+
+    def test_publication_name_is_quoted_as_identifier(self):
+        conn = MagicMock()
+        cur = conn.cursor.return_value.__enter__.return_value
+        cur.fetchone.return_value = None
+
+        self.assertTrue(ensure_publication(conn, "Bronze_Pub", ["exames"]))
+        statement = cur.execute.call_args.args[0]
+        self.assertIn(sql.Identifier("Bronze_Pub"), statement.seq)
+        self.assertIn(sql.Identifier("public", "exames"), statement.seq[3].seq)
+
+        cur.fetchone.return_value = (1,)
+        cur.fetchall.return_value = [("exames",)]
+        self.assertFalse(ensure_publication(conn, "Bronze_Pub", ["exames", "consultas"]))
+        statement = cur.execute.call_args.args[0]
+        self.assertIn(sql.Identifier("Bronze_Pub"), statement.seq)
+        self.assertEqual(statement.seq[3].seq, [sql.Identifier("public", "consultas")])
+
+    def test_start_options_and_lsn_format(self):
+        self.assertEqual(
+            start_options("pgoutput", "Bronze_Pub")["publication_names"], '"Bronze_Pub"'
+        )
+        self.assertIn("public.exames", start_options("wal2json", "pub")["add-tables"])
+        self.assertEqual(format_lsn(0x1_0000_0010), "1/10")
+
+
+if __name__ == "__main__":
+    unittest.main()
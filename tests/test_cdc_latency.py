@@ -0,0 +1,131 @@
+import json
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import psycopg2
+
+from scripts.cdc_latency import (
+    LatencyTracker,
+    debezium_change,
+    measure_debezium,
+    parse_timestamp,
+    slot_lag,
+    write_heartbeat,
+)
+
+
+def make_conn(cursor):
+    conn = MagicMock()
+    conn.cursor.return_value.__enter__.return_value = cursor
+    return conn
+
+
+def debezium(table, commit_ms, captured_ms, op="u", after=None, wrapped=False):
+    payload = {
+        "before": None,
+        "after": after or {"id": 1},
+        "source": {"table": table, "ts_ms": commit_ms},
+        "op": op,
+        "ts_ms": captured_ms,
+    }
+    return json.dumps({"schema": {}, "payload": payload} if wrapped else payload)
+
+
+class LatencyTrackerTests(unittest.TestCase):
+    def test_percentiles_over_window(self):
+        tracker = LatencyTracker(window=100)
+        for value in range(1, 201):
+            tracker.add(value / 100)
+
+        summary = tracker.summary()
+
+        self.assertEqual(summary["amostras"], 200)
+        self.assertEqual(summary["p50"], 1.51)
+        self.assertEqual(summary["max"], 2.0)
+        self.assertIn("p99 1.990s", tracker.format())
+
+    def test_empty_and_unknown_instants(self):
+        tracker = LatencyTracker()
+        tracker.add_between(None, datetime.now(timezone.utc))
+
+        self.assertEqual(tracker.format(), "sem amostras")
+
+    def test_parse_timestamp_formats(self):
+        expected = datetime(2026, 1, 1, 12, 0, 0, 500000, tzinfo=timezone.utc)
+
+        self.assertEqual(parse_timestamp("2026-01-01 12:00:00.5+00"), expected)
+        self.assertEqual(parse_timestamp("2026-01-01T12:00:00.500000Z"), expected)
+        self.assertEqual(parse_timestamp(expected.timestamp() * 1000), expected)
+        self.assertEqual(parse_timestamp("2026-01-01 12:00:00.5"), expected)
+
+
+class DebeziumMeasureTests(unittest.TestCase):
+    def test_commit_to_capture_from_envelopes(self):
+        lines = [
+            debezium("consultas", 1_000, 1_250),
+            debezium("exames", 2_000, 2_100, wrapped=True),
+            debezium("pacientes", None, 3_000, op="r"),
+            "null",
+            "",
+        ]
+        commit_latency = LatencyTracker()
+        heartbeat_latency = LatencyTracker()
+
+        changes = measure_debezium(lines, commit_latency, heartbeat_latency)
+
+        self.assertEqual(changes, 2)
+        self.assertEqual(sorted(commit_latency.samples), [0.1, 0.25])
+        self.assertEqual(heartbeat_latency.count, 0)
+
+    def test_heartbeat_measures_generation_to_capture(self):
+        generated = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        captured_ms = generated.timestamp() * 1000 + 400
+        line = debezium(
+            "cdc_heartbeat",
+            captured_ms - 100,
+            captured_ms,
+            after={"id": 1, "gerado_em": "2026-01-01T00:00:00Z"},
+        )
+        commit_latency = LatencyTracker()
+        heartbeat_latency = LatencyTracker()
+
+        measure_debezium([line], commit_latency, heartbeat_latency)
+
+        self.assertAlmostEqual(heartbeat_latency.samples[0], 0.4)
+        self.assertAlmostEqual(commit_latency.samples[0], 0.1)
+
+    def test_non_change_messages_are_ignored(self):
+        self.assertIsNone(debezium_change("Processed a total of 3 messages"))
+        self.assertIsNone(debezium_change('{"status": "BEGIN", "id": "1"}'))
+
+
+class SlotLagTests(unittest.TestCase):
+    def test_rows_become_dicts_and_transaction_ends(self):
+        cursor = MagicMock()
+        cursor.description = [("slot_name",), ("atraso_bytes",)]
+        cursor.fetchall.return_value = [("bronze_slot", 4096)]
+        conn = make_conn(cursor)
+
+        rows = slot_lag(conn, "bronze_slot")
+
+        self.assertEqual(rows, [{"slot_name": "bronze_slot", "atraso_bytes": 4096}])
+        self.assertEqual(cursor.execute.call_args.args[1], {"slot": "bronze_slot"})
+        conn.rollback.assert_called_once()
+
+    def test_write_heartbeat_commits_or_rolls_back(self):
+        cursor = MagicMock()
+        cursor.fetchone.return_value = (7,)
+        conn = make_conn(cursor)
+
+        self.assertEqual(write_heartbeat(conn), 7)
+        conn.commit.assert_called_once()
+
+        cursor.execute.side_effect = psycopg2.Error("sem tabela")
+        with self.assertRaises(psycopg2.Error):
+            write_heartbeat(conn)
+        conn.rollback.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
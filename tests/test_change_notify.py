@@ -0,0 +1,108 @@
+import json
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+from scripts.change_notify import (
+    NOTIFY_SQL,
+    ChangeListener,
+    ChangePublisher,
+    load_notify_config,
+)
+
+
+class NotifyConfigTests(unittest.TestCase):
+    def test_notifications_are_off_by_default(self):
+        env = {key: value for key, value in os.environ.items() if key != "STREAM_NOTIFY"}
+
+        with (
+            patch.dict(os.environ, env, clear=True),
+            patch("scripts.change_notify.load_project_env"),
+        ):
+            self.assertFalse(load_notify_config()["enabled"])
+
+
+class ChangePublisherTests(unittest.TestCase):
+    def build(self, now):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value.__enter__.return_value
+        publisher = ChangePublisher(conn, "canal", interval=1.0, clock=lambda: now[0])
+        return publisher, conn, cursor
+
+    def test_first_change_is_published_immediately(self):
+        publisher, conn, cursor = self.build([0.0])
+
+        publisher.record("consultas", "INSERT")
+        publisher.record("consultas", "UPDATE")
+
+        self.assertEqual(publisher.flush(), ["consultas"])
+        sql, (channel, payloads) = cursor.execute.call_args.args
+        self.assertEqual(sql, NOTIFY_SQL)
+        self.assertEqual(channel, "canal")
+        self.assertEqual(
+            [json.loads(payload) for payload in payloads],
+            [{"tabela": "consultas", "inserts": 1, "updates": 1}],
+        )
+        conn.commit.assert_called_once_with()
+
+    def test_changes_within_interval_are_coalesced(self):
+        now = [0.0]
+        publisher, conn, cursor = self.build(now)
+        publisher.record("exames", "INSERT")
+        publisher.flush()
+
+        now[0] = 0.4
+        publisher.record("exames", "INSERT")
+        publisher.record("exames", "INSERT")
+        self.assertEqual(publisher.flush(), [])
+
+        now[0] = 1.0
+        self.assertEqual(publisher.flush(), ["exames"])
+        payloads = cursor.execute.call_args.args[1][1]
+        self.assertEqual(json.loads(payloads[0])["inserts"], 2)
+
+    def test_force_flushes_pending_changes(self):
+        now = [0.0]
+        publisher, _, _ = self.build(now)
+        publisher.record("exames", "INSERT")
+        publisher.flush()
+        publisher.record("exames", "UPDATE")
+
+        self.assertEqual(publisher.flush(force=True), ["exames"])
+        self.assertEqual(publisher.flush(force=True), [])
+
+
+class ChangeListenerTests(unittest.TestCase):
+    def test_wait_sums_notifications_per_table(self):
+        conn = MagicMock()
+        conn.closed = 0
+        conn.notifies = [
+            MagicMock(payload=json.dumps({"tabela": "consultas", "inserts": 1, "updates": 0})),
+            MagicMock(payload=json.dumps({"tabela": "consultas", "inserts": 2, "updates": 1})),
+            MagicMock(payload="invalido"),
+        ]
+        listener = ChangeListener("canal", connect=lambda: conn)
+
+        with (
+            patch("scripts.change_notify.select.select", return_value=([conn], [], [])),
+            self.assertLogs("scripts.change_notify", level="WARNING"),
+        ):
+            changes = listener.wait(1.0)
+
+        self.assertEqual(changes, {"consultas": {"inserts": 3, "updates": 1}})
+        self.assertEqual(listener.notifications, 3)
+        self.assertTrue(conn.autocommit)
+
+    def test_wait_returns_empty_on_timeout(self):
+        conn = MagicMock()
+        conn.closed = 0
+        listener = ChangeListener("canal", connect=lambda: conn)
+
+        with patch("scripts.change_notify.select.select", return_value=([], [], [])):
+            self.assertEqual(listener.wait(0.1), {})
+
+        conn.poll.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,10 @@
 import os
+import tempfile
 import unittest
+from pathlib import Path
 from unittest.mock import patch
 
-from scripts.db_init import load_env
+from scripts.db_init import create_connection, load_env, load_session_profile, load_settings
 from scripts.seed import load_config as load_seed_config
 from scripts.stream import load_config as load_stream_config
 
@@ -70,5 +72,91 @@ class ConfigTests(unittest.TestCase):
         self.assertEqual(config["batch_size"], 2)
 
 
+class SessionProfileTests(unittest.TestCase):
+    settings = {
+        "db": {"search_path": "public"},
+        "roles": {"seed": "bulk_load"},
+        "profiles": {
+            "bulk_load": {"synchronous_commit": "off", "work_mem": "64MB"},
+            "dashboard": {"default_transaction_read_only": True, "jit": False},
+        },
+    }
+
+    def test_role_mapping_selects_profile_and_adds_search_path(self):
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("SEED_SESSION_PROFILE", None)
+            name, session = load_session_profile("seed", self.settings)
+
+        self.assertEqual(name, "bulk_load")
+        self.assertEqual(
+            session,
+            {
+                "search_path": "public",
+                "synchronous_commit": "off",
+                "work_mem": "64MB",
+            },
+        )
+
+    def test_profile_defaults_to_role_name_and_converts_booleans(self):
+        name, session = load_session_profile("dashboard", self.settings)
+
+        self.assertEqual(name, "dashboard")
+        self.assertEqual(session["default_transaction_read_only"], "on")
+        self.assertEqual(session["jit"], "off")
+
+    def test_environment_overrides_role_profile(self):
+        with patch.dict(os.environ, {"STREAM_SESSION_PROFILE": "bulk_load"}):
+            name, session = load_session_profile("stream", self.settings)
+
+        self.assertEqual(name, "bulk_load")
+        self.assertEqual(session["synchronous_commit"], "off")
+
+    def test_unknown_explicit_profile_raises(self):
+        with (
+            patch.dict(os.environ, {"STREAM_SESSION_PROFILE": "turbo"}),
+            self.assertRaises(ValueError),
+        ):
+            load_session_profile("stream", self.settings)
+
+    def test_role_without_profile_gets_only_search_path(self):
+        name, session = load_session_profile("stream", self.settings)
+
+        self.assertEqual(name, "stream")
+        self.assertEqual(session, {"search_path": "public"})
+
+    def test_load_settings_reads_toml_and_tolerates_missing_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "settings.toml"
+            path.write_text('[profiles.x]\nwork_mem = "8MB"\n', encoding="utf-8")
+
+            self.assertEqual(
+                load_settings(path),
+                {"profiles": {"x": {"work_mem": "8MB"}}},
+            )
+            self.assertEqual(load_settings(Path(tmp) / "missing.toml"), {})
+
+    def test_create_connection_reads_settings_once(self):
+        env = {"host": "h", "port": 1, "user": "u", "password": "p", "database": "d"}
+        with (
+            patch("scripts.db_init._DB_SETTINGS", None),
+            patch("scripts.db_init.load_settings", return_value={"db": {"connect_timeout": 3}}) as load,
+            patch("scripts.db_init.psycopg2.connect") as connect,
+        ):
+            create_connection(env)
+            create_connection(env)
+
+        load.assert_called_once()
+        self.assertEqual(connect.call_args.kwargs["connect_timeout"], 3)
+
+    def test_project_settings_define_profiles_for_every_role(self):
+        settings = load_settings()
+
+        for role in ["stream", "seed", "dashboard"]:
+            with self.subTest(role=role):
+                name, session = load_session_profile(role, settings)
+                self.assertIn(name, settings["profiles"])
+                self.assertTrue(session)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,7 +1,28 @@
 import unittest
-from unittest.mock import MagicMock
+from datetime import date, timedelta
+from unittest.mock import MagicMock, patch
 
-from app.dashboard_data import fetch_one, fetch_rows, get_operational_alerts
+import pyarrow as pa
+
+from app.dashboard_data import (
+    ATIVIDADE_POR_MINUTO_SQL,
+    ATIVIDADE_RECENTE_CONTADORES_SQL,
+    EXAMES_PENDENTES_RECENTES_SQL,
+    INTERNACOES_ATIVAS_SQL,
+    MV_CONSULTAS_AGENDADAS_PROXIMAS_SQL,
+    MV_INTERNACOES_LONGAS_SQL,
+    MV_PACIENTES_SEM_CONVENIO_SQL,
+    OCUPACAO_POR_QUARTO_SQL,
+    SNAPSHOT_TRANSACTION_SQL,
+    ULTIMAS_CONSULTAS_SQL,
+    build_resumo,
+    fetch_columns,
+    fetch_one,
+    fetch_rows,
+    get_dashboard_snapshot,
+    get_operational_alerts,
+    pivot_atividade_por_minuto,
+)
 
 
 class DashboardDataTests(unittest.TestCase):
@@ -26,6 +47,20 @@ class DashboardDataTests(unittest.TestCase):
             ],
         )
 
+    def test_fetch_columns_builds_arrow_table_in_blocks(self):
+        cursor = MagicMock()
+        cursor.description = [("id",), ("convenio",)]
+        cursor.fetchmany.side_effect = [[(1, None), (2, None)], [(3, "Unimed")], []]
+        conn = MagicMock()
+        conn.cursor.return_value.__enter__.return_value = cursor
+
+        table = fetch_columns(conn, "SELECT id, convenio FROM pacientes", itersize=2)
+
+        cursor.fetchmany.assert_called_with(2)
+        self.assertEqual(table.column_names, ["id", "convenio"])
+        self.assertEqual(table.column("id").to_pylist(), [1, 2, 3])
+        self.assertEqual(table.column("convenio").to_pylist(), [None, None, "Unimed"])
+
     def test_fetch_one_returns_first_row(self):
         cursor = MagicMock()
         cursor.description = [("total",)]
@@ -54,9 +89,9 @@ class DashboardDataTests(unittest.TestCase):
                 "exames_pendentes": 12,
                 "consultas_agendadas": 3,
                 "internacoes_ativas": 8,
+                "pacientes_sem_convenio": 1,
+                "internacoes_longas": 2,
             },
-            "pacientes_sem_convenio": [{"id": 1}],
-            "internacoes_longas": [{"id": 2}, {"id": 3}],
         }
 
         alerts = get_operational_alerts(
@@ -89,8 +124,6 @@ class DashboardDataTests(unittest.TestCase):
                 "consultas_agendadas": 11,
                 "internacoes_ativas": 1,
             },
-            "pacientes_sem_convenio": [],
-            "internacoes_longas": [],
         }
 
         alerts = get_operational_alerts(
@@ -115,8 +148,6 @@ class DashboardDataTests(unittest.TestCase):
                 "consultas_agendadas": 2,
                 "internacoes_ativas": 3,
             },
-            "pacientes_sem_convenio": [],
-            "internacoes_longas": [],
         }
 
         alerts = get_operational_alerts(
@@ -132,6 +163,178 @@ class DashboardDataTests(unittest.TestCase):
 
         self.assertEqual(alerts, [])
 
+    def test_get_operational_alerts_uses_exact_counts_beyond_list_limit(self):
+        snapshot = {
+            "kpis": {"pacientes_sem_convenio": 120},
+            "pacientes_sem_convenio": [{"id": i} for i in range(20)],
+        }
+
+        alerts = get_operational_alerts(snapshot)
+
+        self.assertEqual(alerts[0]["codigo"], "pacientes_sem_convenio")
+        self.assertEqual(alerts[0]["valor"], 120)
+        self.assertEqual(alerts[0]["severidade"], "crítico")
+
+
+class DashboardSnapshotTests(unittest.TestCase):
+    def test_build_resumo_derives_kpis_and_status_lists(self):
+        rows = [
+            {"tabela": "consultas", "status": "realizada", "total": 4},
+            {"tabela": "consultas", "status": "agendada", "total": 6},
+            {"tabela": "exames", "status": "pendente", "total": 2},
+            {"tabela": "exames", "status": "com_resultado", "total": 5},
+            {"tabela": "internacoes", "status": "ativa", "total": 3},
+            {"tabela": "internacoes", "status": "encerrada", "total": 1},
+            {"tabela": "pacientes", "status": None, "total": 9},
+            {"tabela": "pacientes_sem_convenio", "status": None, "total": 4},
+            {"tabela": "medicos", "status": None, "total": 2},
+        ]
+
+        resumo = build_resumo(rows)
+
+        self.assertEqual(
+            resumo["kpis"],
+            {
+                "pacientes": 9,
+                "medicos": 2,
+                "consultas": 10,
+                "exames": 7,
+                "internacoes_ativas": 3,
+                "pacientes_sem_convenio": 4,
+                "exames_pendentes": 2,
+                "consultas_agendadas": 6,
+            },
+        )
+        self.assertEqual(
+            resumo["consultas_por_status"],
+            [
+                {"status": "agendada", "total": 6},
+                {"status": "realizada", "total": 4},
+            ],
+        )
+        self.assertEqual(resumo["internacoes_por_status"][0]["status"], "ativa")
+
+    def test_build_resumo_defaults_to_zero_on_empty_tables(self):
+        resumo = build_resumo([])
+
+        self.assertEqual(resumo["kpis"]["exames_pendentes"], 0)
+        self.assertEqual(resumo["exames_por_status"], [])
+
+    def test_snapshot_runs_in_one_read_only_transaction(self):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value.__enter__.return_value
+
+        with (
+            patch("app.dashboard_data.kpi_summary_available", return_value=False),
+            patch("app.dashboard_data.materialized_views_available", return_value=False),
+            patch("app.dashboard_data.activity_counters_available", return_value=False),
+            patch("app.dashboard_data.fetch_rows", return_value=[]) as fetch,
+            patch("app.dashboard_data.fetch_columns", return_value=pa.table({})) as columns,
+        ):
+            snapshot = get_dashboard_snapshot(conn, recent_minutes=30)
+
+        cursor.execute.assert_called_once_with(SNAPSHOT_TRANSACTION_SQL)
+        self.assertEqual(fetch.call_count, 2)
+        self.assertEqual(columns.call_count, 8)
+        self.assertEqual(conn.rollback.call_count, 2)
+        self.assertEqual(
+            set(snapshot),
+            {
+                "kpis",
+                "consultas_por_status",
+                "exames_por_status",
+                "internacoes_por_status",
+                "ultimas_consultas",
+                "internacoes_ativas",
+                "internacoes_longas",
+                "ocupacao_por_quarto",
+                "exames_pendentes_recentes",
+                "consultas_agendadas_proximas",
+                "pacientes_sem_convenio",
+                "atividade_recente",
+                "atividade_por_minuto",
+            },
+        )
+
+    def test_snapshot_bounds_only_windowed_lists(self):
+        conn = MagicMock()
+
+        with (
+            patch("app.dashboard_data.kpi_summary_available", return_value=False),
+            patch("app.dashboard_data.materialized_views_available", return_value=False),
+            patch("app.dashboard_data.activity_counters_available", return_value=False),
+            patch("app.dashboard_data.fetch_rows", return_value=[]),
+            patch("app.dashboard_data.fetch_columns", return_value=pa.table({})) as columns,
+        ):
+            get_dashboard_snapshot(conn, window_days=30)
+
+        params = {call.args[1]: call.args[2] for call in columns.call_args_list}
+        since = date.today() - timedelta(days=30)
+        for sql in (ULTIMAS_CONSULTAS_SQL, EXAMES_PENDENTES_RECENTES_SQL):
+            with self.subTest(sql=sql.split("FROM")[1].split()[0]):
+                self.assertEqual(params[sql], (since, 20))
+        # Ocupacao e internacoes ativas contam todas as internacoes abertas.
+        for sql in (INTERNACOES_ATIVAS_SQL, OCUPACAO_POR_QUARTO_SQL):
+            with self.subTest(sql=sql.split("FROM")[1].split()[0]):
+                self.assertEqual(params[sql], (20,))
+                self.assertNotIn("data_entrada >=", sql)
+        self.assertIn("c.updated_at >= %s", ULTIMAS_CONSULTAS_SQL)
+
+    def test_snapshot_reads_lists_from_materialized_views(self):
+        conn = MagicMock()
+
+        with (
+            patch("app.dashboard_data.kpi_summary_available", return_value=False),
+            patch("app.dashboard_data.materialized_views_available", return_value=True),
+            patch("app.dashboard_data.activity_counters_available", return_value=False),
+            patch("app.dashboard_data.fetch_rows", return_value=[]) as fetch,
+            patch("app.dashboard_data.fetch_columns", return_value=pa.table({})) as columns,
+        ):
+            get_dashboard_snapshot(conn)
+
+        executed = [call.args[1] for call in columns.call_args_list]
+        self.assertIn(MV_INTERNACOES_LONGAS_SQL, executed)
+        self.assertIn(MV_CONSULTAS_AGENDADAS_PROXIMAS_SQL, executed)
+        self.assertIn(MV_PACIENTES_SEM_CONVENIO_SQL, executed)
+        self.assertEqual(fetch.call_count + columns.call_count, 10)
+
+    def test_snapshot_reads_activity_from_counters(self):
+        conn = MagicMock()
+
+        with (
+            patch("app.dashboard_data.kpi_summary_available", return_value=False),
+            patch("app.dashboard_data.materialized_views_available", return_value=False),
+            patch("app.dashboard_data.activity_counters_available", return_value=True),
+            patch("app.dashboard_data.fetch_rows", return_value=[]) as fetch,
+            patch("app.dashboard_data.fetch_columns", return_value=pa.table({})) as columns,
+        ):
+            get_dashboard_snapshot(conn, recent_minutes=30, history_minutes=240)
+
+        calls = {
+            call.args[1]: call.args[2:]
+            for call in fetch.call_args_list + columns.call_args_list
+        }
+        self.assertEqual(calls[ATIVIDADE_RECENTE_CONTADORES_SQL], ({"minutes": 30},))
+        self.assertEqual(calls[ATIVIDADE_POR_MINUTO_SQL], ({"minutes": 240},))
+        self.assertEqual(fetch.call_count + columns.call_count, 11)
+
+    def test_pivot_atividade_por_minuto_fills_missing_tables(self):
+        rows = [
+            {"minuto": 2, "tabela": "exames", "criados": 1, "atualizados": 2},
+            {"minuto": 1, "tabela": "consultas", "criados": 4, "atualizados": 0},
+            {"minuto": 2, "tabela": "consultas", "criados": 0, "atualizados": 1},
+        ]
+
+        series = pivot_atividade_por_minuto(rows)
+
+        self.assertEqual(
+            series,
+            [
+                {"minuto": 1, "consultas": 4, "exames": 0},
+                {"minuto": 2, "consultas": 1, "exames": 3},
+            ],
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,173 @@
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+from psycopg2.pool import PoolError
+
+from scripts.db_init import ConnectionPool, apply_session_settings, init_sql_steps
+
+
+def fake_connect(env_vars):
+    conn = MagicMock()
+    conn.closed = 0
+    return conn
+
+
+def build_pool(**overrides):
+    options = {
+        "env_vars": {},
+        "role": "test",
+        "min_size": 0,
+        "max_size": 2,
+        "acquire_timeout": 0.05,
+        "connect": MagicMock(side_effect=fake_connect),
+    }
+    options.update(overrides)
+    return ConnectionPool(**options)
+
+
+class ApplySessionSettingsTests(unittest.TestCase):
+    def test_sets_each_parameter_and_commits(self):
+        cursor = MagicMock()
+        conn = MagicMock()
+        conn.cursor.return_value.__enter__.return_value = cursor
+
+        apply_session_settings(conn, {"work_mem": "64MB", "jit": "off"})
+
+        cursor.execute.assert_any_call(
+            "SELECT set_config(%s, %s, false)",
+            ("work_mem", "64MB"),
+        )
+        self.assertEqual(cursor.execute.call_count, 2)
+        conn.commit.assert_called_once_with()
+
+    def test_skips_empty_settings(self):
+        conn = MagicMock()
+
+        apply_session_settings(conn, {})
+
+        conn.cursor.assert_not_called()
+
+
+class ConnectionPoolTests(unittest.TestCase):
+    def test_reuses_returned_connection(self):
+        pool = build_pool()
+
+        first = pool.getconn()
+        pool.putconn(first)
+        second = pool.getconn()
+
+        self.assertIs(first, second)
+        self.assertEqual(pool.stats()["opened"], 1)
+        first.rollback.assert_called()
+
+    def test_fill_opens_minimum_connections(self):
+        pool = build_pool(min_size=2)
+
+        pool.fill()
+
+        self.assertEqual(pool.stats()["idle"], 2)
+
+    def test_raises_pool_error_when_exhausted(self):
+        pool = build_pool(max_size=1)
+        pool.getconn()
+
+        with self.assertRaises(PoolError):
+            pool.getconn()
+
+    def test_waiting_borrower_gets_released_connection(self):
+        pool = build_pool(max_size=1, acquire_timeout=2)
+        conn = pool.getconn()
+        timer = threading.Timer(0.05, pool.putconn, args=(conn,))
+        timer.start()
+
+        borrowed = pool.getconn()
+
+        timer.join()
+        self.assertIs(borrowed, conn)
+        self.assertEqual(pool.stats()["waits"], 1)
+
+    def test_recycles_connections_past_max_lifetime(self):
+        pool = build_pool(max_lifetime=10)
+
+        with patch("scripts.db_init.time.monotonic", return_value=0.0):
+            first = pool.getconn()
+            pool.putconn(first)
+        with patch("scripts.db_init.time.monotonic", return_value=11.0):
+            second = pool.getconn()
+
+        self.assertIsNot(first, second)
+        first.close.assert_called_once_with()
+        self.assertEqual(pool.stats()["recycled"], 1)
+
+    def test_health_check_replaces_broken_idle_connection(self):
+        pool = build_pool(health_check_after=5, max_lifetime=1000)
+
+        with patch("scripts.db_init.time.monotonic", return_value=0.0):
+            first = pool.getconn()
+            pool.putconn(first)
+        first.cursor.side_effect = psycopg2.OperationalError("gone")
+        with patch("scripts.db_init.time.monotonic", return_value=6.0):
+            second = pool.getconn()
+
+        self.assertIsNot(first, second)
+        self.assertEqual(pool.stats()["discarded"], 1)
+
+    def test_connection_context_discards_on_operational_error(self):
+        pool = build_pool()
+
+        with self.assertRaises(psycopg2.OperationalError):
+            with pool.connection() as conn:
+                raise psycopg2.OperationalError("lost")
+
+        conn.close.assert_called_once_with()
+        self.assertEqual(pool.stats()["size"], 0)
+
+    def test_session_settings_include_role_application_name(self):
+        pool = build_pool(role="stream", session_settings={"jit": "off"})
+
+        self.assertEqual(
+            pool.session_settings,
+            {"application_name": "oltp-simulator/stream", "jit": "off"},
+        )
+
+    def test_closeall_rejects_new_borrowers(self):
+        pool = build_pool()
+        pool.putconn(pool.getconn())
+
+        pool.closeall()
+
+        self.assertEqual(pool.stats()["size"], 0)
+        with self.assertRaises(PoolError):
+            pool.getconn()
+
+
+class InitSqlStepsTests(unittest.TestCase):
+    def test_extras_run_after_base_files(self):
+        steps = init_sql_steps(partitioned=False, extras=["kpi_summary"])
+
+        self.assertEqual(
+            [file_name for _, file_name in steps],
+            [
+                "01_schema.sql",
+                "02_indexes.sql",
+                "03_seed-lookups.sql",
+                "04_kpi_summary.sql",
+            ],
+        )
+
+    def test_extras_default_to_db_extras_env(self):
+        with patch.dict("os.environ", {"DB_EXTRAS": " kpi_summary , "}):
+            steps = init_sql_steps(partitioned=True)
+
+        self.assertEqual(steps[0][1], "01_schema_partitioned.sql")
+        self.assertEqual(steps[-1][1], "04_kpi_summary.sql")
+
+    def test_unknown_extra_is_rejected(self):
+        with self.assertRaises(ValueError):
+            init_sql_steps(partitioned=False, extras=["nao_existe"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pyarrow as pa
+
+from app.dashboard_data import get_dashboard_snapshot
+from app.dimension_cache import EPOCH, Dimension, DimensionCache
+
+
+def make_conn(cursor):
+    conn = MagicMock()
+    conn.cursor.return_value.__enter__.return_value = cursor
+    return conn
+
+
+class DimensionCacheTests(unittest.TestCase):
+    def test_resolve_replaces_ids_with_names_in_place(self):
+        cursor = MagicMock()
+        cursor.fetchall.side_effect = [
+            [(1, "Ana"), (2, "Bruno")],
+            [(7, "Dra. Carla", "Cardiologia")],
+        ]
+        cache = DimensionCache()
+        table = pa.table({
+            "id": [10, 11],
+            "paciente_id": [1, 2],
+            "medico_id": [7, 7],
+            "status": ["agendada", "realizada"],
+        })
+
+        resolved = cache.resolve(make_conn(cursor), table)
+
+        self.assertEqual(
+            resolved.column_names,
+            ["id", "paciente", "medico", "especialidade", "status"],
+        )
+        self.assertEqual(resolved.column("paciente").to_pylist(), ["Ana", "Bruno"])
+        self.assertEqual(resolved.column("medico").to_pylist(), ["Dra. Carla"] * 2)
+        self.assertEqual(cursor.execute.call_args_list[1].args[1], ([7],))
+
+    def test_cached_ids_are_not_fetched_again(self):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [(1, "Ana")]
+        conn = make_conn(cursor)
+        cache = DimensionCache()
+        table = pa.table({"paciente_id": [1, None]})
+
+        cache.resolve(conn, table)
+        resolved = cache.resolve(conn, table)
+
+        cursor.execute.assert_called_once()
+        self.assertEqual(resolved.column("paciente").to_pylist(), ["Ana", None])
+        self.assertEqual(cache.stats()[0]["acertos"], 1)
+
+    def test_tables_without_ids_pass_through(self):
+        cache = DimensionCache()
+        table = pa.table({"quarto": ["101"]})
+
+        self.assertIs(cache.resolve(MagicMock(), table), table)
+        self.assertEqual(cache.resolve(MagicMock(), []), [])
+
+    def test_lru_bound_evicts_least_recently_used(self):
+        cursor = MagicMock()
+        cursor.fetchall.side_effect = [[(1, "Ana")], [(2, "Bruno")], [(3, "Caio")]]
+        conn = make_conn(cursor)
+        dimension = Dimension("pacientes", "paciente_id", {"nome": "paciente"}, max_entries=2)
+
+        dimension.lookup(conn, [1])
+        dimension.lookup(conn, [2])
+        dimension.lookup(conn, [1])
+        dimension.lookup(conn, [3])
+
+        self.assertEqual(len(dimension), 2)
+        self.assertEqual(set(dimension.lookup(conn, [1, 3])), {1, 3})
+
+    def test_refresh_positions_watermark_then_applies_changes(self):
+        cursor = MagicMock()
+        first = datetime(2026, 1, 1, 12, 0, 0)
+        later = datetime(2026, 1, 1, 12, 0, 5)
+        cursor.fetchone.return_value = (first,)
+        cursor.fetchall.return_value = [(1, "Ana Souza", later)]
+        conn = make_conn(cursor)
+        dimension = Dimension("pacientes", "paciente_id", {"nome": "paciente"}, overlap=30)
+
+        self.assertEqual(dimension.refresh(conn), 0)
+        self.assertEqual(dimension.refresh(conn), 1)
+
+        self.assertEqual(
+            cursor.execute.call_args.args[1],
+            (datetime(2026, 1, 1, 11, 59, 30),),
+        )
+        self.assertEqual(dimension.watermark, later)
+        self.assertEqual(dimension.lookup(conn, [1]), {1: ("Ana Souza",)})
+
+    def test_refresh_on_empty_table_starts_from_epoch(self):
+        cursor = MagicMock()
+        cursor.fetchone.return_value = (None,)
+        dimension = Dimension("medicos", "medico_id", {"nome": "medico"})
+
+        dimension.refresh(make_conn(cursor))
+
+        self.assertEqual(dimension.watermark, EPOCH)
+
+    def test_snapshot_refreshes_and_resolves_list_names(self):
+        dimensions = MagicMock()
+        dimensions.resolve.side_effect = lambda conn, table: ("nomes", table)
+
+        with (
+            patch("app.dashboard_data.kpi_summary_available", return_value=False),
+            patch("app.dashboard_data.materialized_views_available", return_value=True),
+            patch("app.dashboard_data.activity_counters_available", return_value=False),
+            patch("app.dashboard_data.fetch_rows", return_value=[]),
+            patch("app.dashboard_data.fetch_columns", return_value="lista"),
+        ):
+            snapshot = get_dashboard_snapshot(MagicMock(), dimensions=dimensions)
+
+        dimensions.refresh.assert_called_once()
+        self.assertEqual(snapshot["ultimas_consultas"], ("nomes", "lista"))
+        self.assertEqual(snapshot["exames_pendentes_recentes"], ("nomes", "lista"))
+        # Listas das materialized views ja trazem os nomes.
+        self.assertEqual(snapshot["internacoes_longas"], "lista")
+
+
+if __name__ == "__main__":
+    unittest.main()
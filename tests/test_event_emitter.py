@@ -0,0 +1,232 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from scripts.cdc_latency import LatencyTracker, measure_debezium
+from scripts.event_emitter import (
+    DebeziumEmitter,
+    SegmentWriter,
+    ValuePools,
+    cpf_from_ids,
+    emit,
+)
+
+CONNECTOR = {"topic_prefix": "oltp", "database": "teste_pacientes", "transactions": True}
+EXISTING = {"pacientes": 50, "medicos": 5, "consultas": 100, "exames": 80, "internacoes": 30}
+
+
+def cpf_is_valid(cpf):
+    digits = [int(char) for char in cpf if char.isdigit()]
+    for size in (9, 10):
+        total = sum(d * w for d, w in zip(digits[:size], range(size + 1, 1, -1)))
+        if digits[size] != (total * 10 % 11) % 10:
+            return False
+    return True
+
+
+class EmitterTests(unittest.TestCase):
+    pools = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pools = ValuePools(size=16, seed=1)
+
+    def make(self, **kwargs):
+        return DebeziumEmitter(
+            self.pools, EXISTING, CONNECTOR, seed=7, clock=lambda: 1_767_225_600.0, **kwargs
+        )
+
+    def test_cpfs_are_valid_and_distinct(self):
+        cpfs = cpf_from_ids(np.arange(1, 5001))
+
+        self.assertEqual(len(set(cpfs)), 5000)
+        self.assertTrue(all(cpf_is_valid(cpf) for cpf in cpfs))
+
+    def test_batch_produces_debezium_envelopes_and_transactions(self):
+        topics, count = self.make().batch(2000)
+
+        changes = [
+            json.loads(line)
+            for topic, lines in topics.items()
+            if topic != "oltp.transaction"
+            for line in lines
+        ]
+        consulta = json.loads(topics["oltp.public.consultas"][0])
+        self.assertEqual(consulta["source"]["table"], "consultas")
+        self.assertEqual(consulta["source"]["db"], "teste_pacientes")
+        self.assertEqual(consulta["source"]["ts_ms"], 1_767_225_600_000)
+        self.assertEqual(
+            consulta["transaction"]["id"],
+            f"{consulta['source']['txId']}:{consulta['source']['lsn']}",
+        )
+        self.assertIn(consulta["after"]["status"], ["agendada", "realizada", "cancelada", "faltou"])
+        self.assertLessEqual(consulta["after"]["medico_id"], 5)
+
+        self.assertEqual(count, len(changes))
+        self.assertLess(count, 2000)  # update_consulta de não agendadas é descartado
+        transactions = [json.loads(line) for line in topics["oltp.transaction"]]
+        self.assertEqual(len(transactions), 2 * len(changes))
+        self.assertEqual(transactions[0]["status"], "BEGIN")
+        self.assertEqual(transactions[1]["data_collections"][0]["event_count"], 1)
+
+        lsns = [change["source"]["lsn"] for change in changes]
+        self.assertEqual(len(set(lsns)), len(lsns))
+
+    def test_inserts_continue_after_existing_ids_in_lsn_order(self):
+        lines = self.make().batch(500)[0]["oltp.public.exames"]
+        envelopes = [json.loads(line) for line in lines]
+
+        inserted = [e["after"]["id"] for e in envelopes if e["op"] == "c"]
+        self.assertEqual(inserted, list(range(81, 81 + len(inserted))))
+        lsns = [e["source"]["lsn"] for e in envelopes]
+        self.assertEqual(lsns, sorted(lsns))
+
+    def test_update_repeats_row_values_except_changed_column(self):
+        emitter = self.make()
+        ids = np.array([3, 4])
+        inserted = emitter._consultas(ids, np.array([10, 11]), False, 0)
+        updated = emitter._consultas(ids, np.array([12, 13]), True, 0)
+
+        for before, after in zip(inserted, updated):
+            before, after = json.loads(before), json.loads(after)
+            for column in ("paciente_id", "medico_id", "data", "motivo", "created_at"):
+                self.assertEqual(before[column], after[column])
+            self.assertIn(after["status"], ["realizada", "cancelada", "faltou"])
+
+    def test_created_at_is_the_same_on_insert_and_update(self):
+        emitter = self.make()
+        ids = np.array([3, 4])
+        for build in (emitter._pacientes, emitter._exames, emitter._internacoes):
+            inserted = [json.loads(row) for row in build(ids, np.array([10, 11]), False, 5)]
+            updated = [json.loads(row) for row in build(ids, np.array([12, 13]), True, 9)]
+            self.assertEqual(
+                [row["created_at"] for row in inserted],
+                [row["created_at"] for row in updated],
+            )
+            self.assertEqual({row["updated_at"] for row in updated}, {9})
+
+    def test_consulta_updates_only_touch_rows_inserted_as_agendada(self):
+        emitter = self.make()
+        lines = emitter.batch(3000)[0]["oltp.public.consultas"]
+        updated = np.array([
+            envelope["after"]["id"]
+            for envelope in map(json.loads, lines)
+            if envelope["op"] == "u"
+        ])
+
+        self.assertTrue(updated.size)
+        inserted = [json.loads(row)["status"] for row in emitter._consultas(updated, updated, False, 0)]
+        self.assertEqual(set(inserted), {"agendada"})
+
+    def test_each_consulta_receives_at_most_one_outcome(self):
+        emitter = self.make()
+        updated = [
+            json.loads(line)["after"]["id"]
+            for _ in range(5)
+            for line in emitter.batch(2000)[0]["oltp.public.consultas"]
+            if json.loads(line)["op"] == "u"
+        ]
+
+        self.assertTrue(updated)
+        self.assertEqual(len(updated), len(set(updated)))
+
+    def test_partitions_do_not_share_ids_or_lsns(self):
+        first, _ = self.make(partition=0, partitions=2).batch(300)
+        second, _ = self.make(partition=1, partitions=2).batch(300)
+
+        def inserted(topics):
+            return {
+                (topic, json.loads(line)["after"]["id"])
+                for topic, lines in topics.items()
+                if topic != "oltp.transaction"
+                for line in lines
+                if json.loads(line)["op"] == "c"
+            }
+
+        def lsns(topics):
+            return {
+                json.loads(line)["source"]["lsn"]
+                for topic, lines in topics.items()
+                if topic != "oltp.transaction"
+                for line in lines
+            }
+
+        self.assertFalse(inserted(first) & inserted(second))
+        self.assertFalse(lsns(first) & lsns(second))
+
+    def test_latency_reader_accepts_emitted_lines(self):
+        lines = self.make().batch(100)[0]["oltp.public.consultas"]
+        tracker = LatencyTracker()
+
+        self.assertEqual(measure_debezium(lines, tracker, LatencyTracker()), len(lines))
+        self.assertEqual(tracker.summary()["max"], 0.0)
+
+
+class SegmentWriterTests(unittest.TestCase):
+    def test_rotates_segments_named_by_base_offset(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = SegmentWriter(Path(tmp), segment_bytes=10, partition=2)
+            writer.write("oltp.public.exames", ['{"a":1}', '{"a":2}'])
+            writer.write("oltp.public.exames", ['{"a":3}'])
+            writer.close()
+
+            files = sorted(p.name for p in (Path(tmp) / "oltp.public.exames-2").iterdir())
+            self.assertEqual(files, [f"{0:020d}.jsonl", f"{2:020d}.jsonl"])
+            self.assertEqual(writer.offsets["oltp.public.exames"], 3)
+            self.assertEqual(writer.segments, 2)
+
+    def test_refuses_partition_with_existing_segments(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = SegmentWriter(Path(tmp), partition=0)
+            writer.write("oltp.public.exames", ['{"a":1}'])
+            writer.close()
+
+            with self.assertRaises(FileExistsError):
+                SegmentWriter(Path(tmp), partition=0)
+            other = SegmentWriter(Path(tmp), partition=1)
+            other.write("oltp.public.exames", ['{"a":1}'])
+            other.close()
+
+    def test_emit_counts_only_written_changes(self):
+        emitter = DebeziumEmitter(
+            ValuePools(size=16, seed=1), EXISTING, CONNECTOR, seed=7,
+            clock=lambda: 1_767_225_600.0,
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            stats = emit(emitter, SegmentWriter(Path(tmp)), events=1000, batch_size=300)
+
+            written = sum(
+                len(path.read_text().splitlines())
+                for path in Path(tmp).glob("oltp.public.*/*.jsonl")
+            )
+        self.assertEqual(stats["events"], written)
+        self.assertEqual(written, 1000)
+
+    def test_emit_respects_rate_and_event_count(self):
+        now = [0.0]
+        sleeps = []
+        emitter = MagicMock()
+        emitter.batch.side_effect = lambda size: ({"t": ["{}"] * size}, size)
+        writer = MagicMock(bytes_written=0)
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        stats = emit(
+            emitter, writer, events=250, rate=100, batch_size=1000,
+            clock=lambda: now[0], sleep=sleep,
+        )
+
+        self.assertEqual(stats["events"], 250)
+        self.assertEqual([call.args[0] for call in emitter.batch.call_args_list], [100, 100, 50])
+        self.assertEqual(sleeps, [1.0, 1.0, 0.5])
+        writer.close.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
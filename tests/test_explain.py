@@ -0,0 +1,117 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+
+from scripts import explain
+
+
+PLAN = {
+    "Plan": {
+        "Node Type": "Hash Join",
+        "Shared Hit Blocks": 12,
+        "Shared Read Blocks": 3,
+        "Plans": [
+            {"Node Type": "Seq Scan", "Relation Name": "pacientes"},
+            {
+                "Node Type": "Hash",
+                "Plans": [
+                    {"Node Type": "Seq Scan", "Relation Name": "medicos"},
+                    {
+                        "Node Type": "Index Scan",
+                        "Relation Name": "consultas",
+                        "Index Name": "idx_consultas_updated_at",
+                    },
+                ],
+            },
+        ],
+    },
+    "Execution Time": 1.5,
+}
+
+
+class PlanInspectionTests(unittest.TestCase):
+    def test_flags_seq_scans_only_on_large_tables(self):
+        flagged = explain.flag_seq_scans(
+            PLAN["Plan"],
+            {"pacientes": 5000, "medicos": 200},
+            min_rows=1000,
+        )
+
+        self.assertEqual(flagged, ["pacientes"])
+
+    def test_summarize_lists_access_methods(self):
+        summary = explain.summarize_plan(PLAN)
+
+        self.assertEqual(summary["execution_ms"], 1.5)
+        self.assertEqual(summary["shared_hit"], 12)
+        self.assertEqual(summary["shared_read"], 3)
+        self.assertEqual(
+            summary["access"],
+            [
+                "Seq Scan pacientes",
+                "Seq Scan medicos",
+                "Index Scan idx_consultas_updated_at",
+            ],
+        )
+
+
+class PartitionPruningTests(unittest.TestCase):
+    def test_counts_partitions_read_per_partitioned_table(self):
+        plan = {
+            "Node Type": "Append",
+            "Plans": [
+                {"Node Type": "Index Scan", "Relation Name": "consultas_2026_09"},
+                {"Node Type": "Index Scan", "Relation Name": "consultas_2026_10"},
+            ],
+        }
+        rows = {
+            "consultas_2026_08": 10,
+            "consultas_2026_09": 10,
+            "consultas_2026_10": 10,
+            "consultas_default": 0,
+            "exames_2026_10": 10,
+            "pacientes": 50,
+        }
+
+        self.assertEqual(explain.partitions_read(plan, rows), {"consultas": (2, 4)})
+        self.assertEqual(explain.partitions_read(PLAN["Plan"], {"consultas": 5}), {})
+
+
+class RunExplainTests(unittest.TestCase):
+    def test_explain_query_always_rolls_back(self):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchone.return_value = ([PLAN],)
+
+        plan = explain.explain_query(conn, "UPDATE exames SET resultado = %s", ("x",))
+
+        self.assertIs(plan, PLAN)
+        sql = cursor.execute.call_args.args[0]
+        self.assertTrue(sql.startswith("EXPLAIN (ANALYZE, BUFFERS"))
+        conn.rollback.assert_called_once_with()
+
+    def test_run_explain_records_errors_and_marks_full_scans(self):
+        conn = MagicMock()
+        catalog = [
+            ("dashboard.resumo", "SELECT 1", ()),
+            ("stream.quebrada", "SELECT", ()),
+        ]
+
+        with (
+            patch.object(explain, "QUERY_CATALOG", catalog),
+            patch("scripts.explain.table_rows", return_value={"pacientes": 5000}),
+            patch(
+                "scripts.explain.explain_query",
+                side_effect=[PLAN, psycopg2.ProgrammingError("syntax error")],
+            ),
+        ):
+            results = explain.run_explain(conn, min_rows=1000)
+
+        self.assertEqual(results[0]["seq_scans"], ["pacientes"])
+        self.assertTrue(results[0]["full_scan_expected"])
+        self.assertEqual(results[1], {"consulta": "stream.quebrada", "erro": "syntax error"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from app.kpi_history import KpiHistory, get_trend_alerts
+from app.snapshot_refresher import SnapshotRefresher
+
+
+class KpiHistoryTests(unittest.TestCase):
+    def test_ring_buffer_overwrites_oldest_sample(self):
+        history = KpiHistory(capacity=3)
+
+        for second in range(5):
+            history.append(float(second), {"exames_pendentes": second * 10})
+
+        samples = history.samples()
+        self.assertEqual(len(history), 3)
+        self.assertEqual(samples[:, 0].tolist(), [2.0, 3.0, 4.0])
+        self.assertEqual([row["exames_pendentes"] for row in history.series()], [20, 30, 40])
+
+    def test_missing_kpis_are_none_in_series(self):
+        history = KpiHistory(capacity=2)
+        history.append(0.0, {"pacientes": 5})
+
+        [row] = history.series(("pacientes", "internacoes_longas"))
+
+        self.assertEqual(row["pacientes"], 5)
+        self.assertIsNone(row["internacoes_longas"])
+
+    def test_rate_per_minute_uses_recent_window(self):
+        history = KpiHistory()
+        history.append(0.0, {"exames_pendentes": 1000})
+        for minute in range(10, 13):
+            history.append(minute * 60.0, {"exames_pendentes": 100 + 5 * minute})
+
+        self.assertAlmostEqual(history.rate_per_minute("exames_pendentes", 180), 5.0)
+        self.assertIsNone(history.rate_per_minute("internacoes_longas", 180))
+
+    def test_trend_alert_estimates_time_to_critical(self):
+        history = KpiHistory(trend_minutes=10, horizon_minutes=60)
+        for minute in range(5):
+            history.append(minute * 60.0, {"exames_pendentes": 1000 + 10 * minute})
+
+        trends = {row["codigo"]: row for row in get_trend_alerts(history)}
+
+        pendentes = trends["exames_pendentes"]
+        self.assertEqual(pendentes["valor"], 1040)
+        self.assertEqual(pendentes["variacao_por_min"], 10.0)
+        self.assertEqual(pendentes["minutos_ate_critico"], 36.0)
+        self.assertTrue(pendentes["alerta"])
+        self.assertNotIn("internacoes_longas", trends)
+
+    def test_kpi_at_critical_limit_is_still_projected(self):
+        history = KpiHistory(trend_minutes=10, horizon_minutes=60)
+        history.append(0.0, {"exames_pendentes": 1390})
+        history.append(60.0, {"exames_pendentes": 1400})
+
+        trends = {row["codigo"]: row for row in get_trend_alerts(history)}
+
+        self.assertEqual(trends["exames_pendentes"]["minutos_ate_critico"], 0.0)
+        self.assertTrue(trends["exames_pendentes"]["alerta"])
+
+    def test_stable_kpi_has_no_time_to_critical(self):
+        history = KpiHistory()
+        history.append(0.0, {"internacoes_ativas": 300})
+        history.append(60.0, {"internacoes_ativas": 300})
+
+        [trend] = get_trend_alerts(history)
+
+        self.assertIsNone(trend["minutos_ate_critico"])
+        self.assertFalse(trend["alerta"])
+
+    def test_history_survives_restart_through_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "kpis.npy"
+            history = KpiHistory(capacity=4, path=str(path), save_interval=0)
+            for second in range(6):
+                history.append(float(second), {"pacientes": second})
+
+            restored = KpiHistory(capacity=2, path=str(path))
+
+        self.assertEqual(restored.samples()[:, 0].tolist(), [4.0, 5.0])
+        restored.path = None
+        restored.append(6.0, {"pacientes": 6})
+        self.assertEqual(restored.samples()[:, 0].tolist(), [5.0, 6.0])
+
+    def test_refresher_appends_published_kpis(self):
+        history = KpiHistory()
+        refresher = SnapshotRefresher(
+            compute=MagicMock(return_value={"kpis": {"pacientes": 7}}),
+            clock=lambda: 1000.0,
+            history=history,
+        )
+
+        refresher.refresh()
+
+        self.assertEqual(history.series(("pacientes",))[0]["pacientes"], 7)
+        self.assertEqual(history.samples()[0, 0], 1000.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from unittest.mock import MagicMock
+
+from scripts import kpi_summary
+
+
+def build_conn(rows):
+    conn = MagicMock()
+    cursor = conn.cursor.return_value.__enter__.return_value
+    cursor.description = [("grupo",), ("chave",), ("esperado",), ("atual",)]
+    cursor.fetchall.return_value = rows
+    return conn, cursor
+
+
+class ReconcileTests(unittest.TestCase):
+    def test_check_only_reports_drift_and_rolls_back(self):
+        conn, cursor = build_conn([("consultas", "agendada", 331, 336)])
+
+        drift = kpi_summary.reconcile(conn)
+
+        self.assertEqual(
+            drift,
+            [{"grupo": "consultas", "chave": "agendada", "esperado": 331, "atual": 336}],
+        )
+        executed = [call.args[0] for call in cursor.execute.call_args_list]
+        self.assertNotIn(kpi_summary.REBUILD_SQL, executed)
+        conn.rollback.assert_called_once_with()
+        conn.commit.assert_not_called()
+
+    def test_fix_rebuilds_summary_and_commits(self):
+        conn, cursor = build_conn([("exames", "pendente", 0, 2)])
+
+        kpi_summary.reconcile(conn, fix=True)
+
+        cursor.execute.assert_any_call(kpi_summary.REBUILD_SQL)
+        conn.commit.assert_called_once_with()
+
+    def test_consistent_summary_is_not_rewritten(self):
+        conn, cursor = build_conn([])
+
+        drift = kpi_summary.reconcile(conn, fix=True)
+
+        self.assertEqual(drift, [])
+        self.assertEqual(cursor.execute.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
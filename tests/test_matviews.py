@@ -0,0 +1,66 @@
+import unittest
+from unittest.mock import MagicMock
+
+import psycopg2
+
+from scripts import matviews
+
+
+class LoadRefreshScheduleTests(unittest.TestCase):
+    def test_defaults_apply_to_every_view(self):
+        schedule = matviews.load_refresh_schedule({})
+
+        self.assertEqual(set(schedule), set(matviews.MATERIALIZED_VIEWS))
+        self.assertEqual(
+            schedule["mv_pacientes_sem_convenio"],
+            {"interval": 30.0, "max_age": 300.0},
+        )
+
+    def test_view_section_overrides_defaults(self):
+        settings = {
+            "materialized_views": {
+                "refresh_seconds": 20,
+                "mv_internacoes_longas": {"refresh_seconds": 90, "max_age_seconds": 600},
+            }
+        }
+
+        schedule = matviews.load_refresh_schedule(settings)
+
+        self.assertEqual(
+            schedule["mv_internacoes_longas"],
+            {"interval": 90.0, "max_age": 600.0},
+        )
+        self.assertEqual(schedule["mv_consultas_agendadas_proximas"]["interval"], 20.0)
+
+
+class RefreshViewTests(unittest.TestCase):
+    def test_refresh_runs_concurrently_in_read_write_transaction(self):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value.__enter__.return_value
+
+        duration = matviews.refresh_view(conn, "mv_internacoes_longas")
+
+        self.assertGreaterEqual(duration, 0.0)
+        first, second = [call.args[0] for call in cursor.execute.call_args_list]
+        self.assertEqual(first, matviews.READ_WRITE_TRANSACTION_SQL)
+        self.assertIn("CONCURRENTLY", repr(second))
+        conn.commit.assert_called_once_with()
+
+    def test_failed_refresh_rolls_back(self):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.execute.side_effect = [None, psycopg2.Error("lock timeout")]
+
+        with self.assertRaises(psycopg2.Error):
+            matviews.refresh_view(conn, "mv_pacientes_sem_convenio")
+
+        self.assertEqual(conn.rollback.call_count, 2)
+        conn.commit.assert_not_called()
+
+    def test_unknown_view_is_rejected(self):
+        with self.assertRaises(ValueError):
+            matviews.refresh_view(MagicMock(), "pacientes")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import io
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+from scripts.monitor import SampleWriter, compute_rates, sample_stats, watch
+
+
+def build_sample(ts, xact_commit, **tables):
+    return {
+        "ts": ts,
+        "xact_commit": xact_commit,
+        "tables": {
+            name: {"n_tup_ins": ins, "n_tup_upd": upd, "n_tup_hot_upd": hot}
+            for name, (ins, upd, hot) in tables.items()
+        },
+    }
+
+
+class MonitorTests(unittest.TestCase):
+    def test_sample_stats_fills_missing_tables_and_ends_transaction(self):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [("consultas", 10, 4, 3)]
+        cursor.fetchone.return_value = (99,)
+        conn = MagicMock()
+        conn.cursor.return_value.__enter__.return_value = cursor
+
+        sample = sample_stats(conn)
+
+        self.assertEqual(sample["xact_commit"], 99)
+        self.assertEqual(
+            sample["tables"]["consultas"],
+            {"n_tup_ins": 10, "n_tup_upd": 4, "n_tup_hot_upd": 3},
+        )
+        self.assertEqual(sample["tables"]["exames"]["n_tup_ins"], 0)
+        conn.rollback.assert_called_once_with()
+
+    def test_compute_rates_uses_deltas_per_second(self):
+        previous = build_sample(100.0, 50, consultas=(10, 4, 2), exames=(5, 0, 0))
+        current = build_sample(110.0, 150, consultas=(30, 14, 7), exames=(5, 0, 0))
+
+        rates = compute_rates(previous, current)
+
+        self.assertAlmostEqual(rates["commits_per_sec"], 10.0)
+        self.assertAlmostEqual(rates["tables"]["consultas"]["ins_per_sec"], 2.0)
+        self.assertAlmostEqual(rates["tables"]["consultas"]["upd_per_sec"], 1.0)
+        self.assertAlmostEqual(rates["tables"]["consultas"]["hot_ratio"], 0.5)
+        self.assertIsNone(rates["tables"]["exames"]["hot_ratio"])
+
+    def test_compute_rates_ignores_counter_resets(self):
+        previous = build_sample(0.0, 500, consultas=(100, 10, 5))
+        current = build_sample(1.0, 10, consultas=(3, 1, 0))
+
+        rates = compute_rates(previous, current)
+
+        self.assertEqual(rates["commits_per_sec"], 0)
+        self.assertEqual(rates["tables"]["consultas"]["ins_per_sec"], 0)
+
+    def test_sample_writer_csv_writes_one_row_per_table(self):
+        handle = io.StringIO()
+        writer = SampleWriter(handle, "csv")
+
+        writer.write(build_sample(1.5, 7, consultas=(1, 2, 3), exames=(4, 5, 6)))
+
+        lines = handle.getvalue().strip().splitlines()
+        self.assertEqual(
+            lines[0],
+            "ts,tabela,n_tup_ins,n_tup_upd,n_tup_hot_upd,xact_commit",
+        )
+        self.assertEqual(lines[1], "1.500,consultas,1,2,3,7")
+        self.assertEqual(len(lines), 3)
+
+    def test_sample_writer_jsonl_writes_one_line_per_sample(self):
+        handle = io.StringIO()
+        writer = SampleWriter(handle, "jsonl")
+        sample = build_sample(1.0, 2, consultas=(1, 0, 0))
+
+        writer.write(sample)
+
+        self.assertEqual(json.loads(handle.getvalue()), sample)
+
+    def test_watch_renders_requested_number_of_windows(self):
+        samples = iter(
+            [
+                build_sample(0.0, 0, consultas=(0, 0, 0)),
+                build_sample(1.0, 5, consultas=(2, 0, 0)),
+                build_sample(2.0, 9, consultas=(4, 0, 0)),
+            ]
+        )
+        lines = []
+
+        with patch(
+            "scripts.monitor.sample_stats",
+            side_effect=lambda conn: next(samples),
+        ):
+            windows = watch(
+                object(),
+                interval=1,
+                samples=2,
+                echo=lines.append,
+                sleep=lambda seconds: None,
+            )
+
+        self.assertEqual(windows, 2)
+        self.assertTrue(any(line.startswith("consultas") for line in lines))
+        self.assertIn("commits/s: 5.00 (janela de 1.0s)", lines)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+
+from app.mv_scheduler import MaterializedViewScheduler
+
+SCHEDULE = {
+    "mv_internacoes_longas": {"interval": 10.0, "max_age": 60.0},
+    "mv_pacientes_sem_convenio": {"interval": 30.0, "max_age": 60.0},
+    "mv_consultas_agendadas_proximas": {"interval": 10.0, "max_age": 60.0},
+}
+
+
+def build_scheduler(now, refresh=None):
+    conn = MagicMock()
+
+    @contextmanager
+    def connection():
+        yield conn
+
+    return MaterializedViewScheduler(
+        SCHEDULE,
+        connection=connection,
+        refresh=refresh or MagicMock(return_value=0.25),
+        clock=lambda: now[0],
+    )
+
+
+class MaterializedViewSchedulerTests(unittest.TestCase):
+    def setUp(self):
+        available = patch("app.mv_scheduler.materialized_views_available", return_value=True)
+        self.versions = {"internacoes": 1, "pacientes": 1, "pacientes_convenios": 1,
+                         "consultas": 1, "medicos": 1}
+        versions = patch(
+            "app.mv_scheduler.read_table_versions",
+            side_effect=lambda conn: dict(self.versions),
+        )
+        self.available = available.start()
+        versions.start()
+        self.addCleanup(patch.stopall)
+
+    def test_first_run_refreshes_every_view(self):
+        now = [0.0]
+        scheduler = build_scheduler(now)
+
+        refreshed = scheduler.run_due()
+
+        self.assertEqual(set(refreshed), set(SCHEDULE))
+
+    def test_unchanged_tables_skip_refresh(self):
+        now = [0.0]
+        scheduler = build_scheduler(now)
+        scheduler.run_due()
+
+        now[0] = 30.0
+        self.assertEqual(scheduler.run_due(), [])
+
+        stats = {row["view"]: row for row in scheduler.stats()}
+        self.assertEqual(stats["mv_internacoes_longas"]["pulados"], 1)
+        self.assertEqual(stats["mv_internacoes_longas"]["idade_s"], 30.0)
+        self.assertEqual(stats["mv_internacoes_longas"]["ultimo_refresh_ms"], 250.0)
+
+    def test_changed_source_table_triggers_refresh_on_cadence(self):
+        now = [0.0]
+        scheduler = build_scheduler(now)
+        scheduler.run_due()
+
+        self.versions["consultas"] = 2
+        now[0] = 10.0
+
+        self.assertEqual(scheduler.run_due(), ["mv_consultas_agendadas_proximas"])
+
+    def test_view_older_than_max_age_is_refreshed(self):
+        now = [0.0]
+        scheduler = build_scheduler(now)
+        scheduler.run_due()
+
+        now[0] = 60.0
+
+        self.assertEqual(set(scheduler.run_due()), set(SCHEDULE))
+
+    def test_nothing_due_does_not_open_connection(self):
+        now = [0.0]
+        scheduler = build_scheduler(now)
+        scheduler.run_due()
+        self.available.reset_mock()
+
+        now[0] = 5.0
+
+        self.assertEqual(scheduler.run_due(), [])
+        self.available.assert_not_called()
+
+    def test_missing_extra_skips_all_views(self):
+        self.available.return_value = False
+        refresh = MagicMock()
+        scheduler = build_scheduler([0.0], refresh=refresh)
+
+        self.assertEqual(scheduler.run_due(), [])
+        self.assertFalse(scheduler.available)
+        refresh.assert_not_called()
+
+    def test_refresh_error_is_recorded_and_retried(self):
+        now = [0.0]
+        refresh = MagicMock(side_effect=psycopg2.Error("sem indice unico"))
+        scheduler = build_scheduler(now, refresh=refresh)
+
+        self.assertEqual(scheduler.run_due(), [])
+        stats = scheduler.stats()
+
+        self.assertEqual(stats[0]["erro"], "sem indice unico")
+        self.assertIsNone(stats[0]["idade_s"])
+
+        refresh.side_effect = None
+        refresh.return_value = 0.1
+        now[0] = 10.0
+        self.assertIn("mv_internacoes_longas", scheduler.run_due())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+from scripts import partitions
+
+
+class PartitionMonthTests(unittest.TestCase):
+    def test_parses_monthly_partition_suffix(self):
+        self.assertEqual(
+            partitions.partition_month("consultas_p202403"),
+            date(2024, 3, 1),
+        )
+
+    def test_default_partition_has_no_month(self):
+        self.assertIsNone(partitions.partition_month("consultas_default"))
+        self.assertIsNone(partitions.partition_month("exames_p2024"))
+
+
+class EnsurePartitionsTests(unittest.TestCase):
+    def test_calls_function_for_each_partitioned_table(self):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchone.side_effect = [(2,), (0,)]
+
+        with patch(
+            "scripts.partitions.partitioned_tables",
+            return_value=["consultas", "exames"],
+        ):
+            created = partitions.ensure_partitions(conn, months_back=1, months_ahead=3)
+
+        self.assertEqual(created, {"consultas": 2, "exames": 0})
+        params = [call.args[1] for call in cursor.execute.call_args_list]
+        self.assertEqual(params, [("consultas", 1, 3), ("exames", 1, 3)])
+        conn.commit.assert_called_once_with()
+
+    def test_plain_schema_creates_nothing(self):
+        conn = MagicMock()
+
+        with patch("scripts.partitions.partitioned_tables", return_value=[]):
+            created = partitions.ensure_partitions(conn)
+
+        self.assertEqual(created, {})
+
+
+class DetachPartitionsTests(unittest.TestCase):
+    def test_detaches_only_months_before_cutoff(self):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value.__enter__.return_value
+        listed = [
+            {"particao": "exames_default", "mes": None, "linhas_estimadas": 0},
+            {"particao": "exames_p202401", "mes": date(2024, 1, 1), "linhas_estimadas": 10},
+            {"particao": "exames_p202402", "mes": date(2024, 2, 1), "linhas_estimadas": 10},
+            {"particao": "exames_p202403", "mes": date(2024, 3, 1), "linhas_estimadas": 10},
+        ]
+
+        with patch("scripts.partitions.list_partitions", return_value=listed):
+            detached = partitions.detach_partitions_before(
+                conn, "exames", date(2024, 3, 1)
+            )
+
+        self.assertEqual(detached, ["exames_p202401", "exames_p202402"])
+        self.assertEqual(cursor.execute.call_count, 2)
+        conn.commit.assert_called_once_with()
+
+    def test_rejects_unknown_table(self):
+        with self.assertRaises(ValueError):
+            partitions.detach_partitions_before(MagicMock(), "pacientes", date(2024, 1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pyarrow as pa
+
+from app.dashboard_data import get_dashboard_snapshot
+from app.query_cache import QueryCache, read_table_versions
+
+
+class QueryCacheTests(unittest.TestCase):
+    def test_hit_when_tables_unchanged(self):
+        cache = QueryCache()
+        compute = MagicMock(return_value=[{"id": 1}])
+        versions = {"consultas": 10, "pacientes": 5}
+
+        first = cache.fetch("get_x", (20,), ("consultas", "pacientes"), versions, compute)
+        second = cache.fetch("get_x", (20,), ("consultas", "pacientes"), versions, compute)
+
+        self.assertEqual(first, second)
+        compute.assert_called_once_with()
+        self.assertEqual(
+            cache.hit_rates(),
+            [{"consulta": "get_x", "hits": 1, "misses": 1, "taxa_acerto": 0.5}],
+        )
+
+    def test_change_in_dependent_table_invalidates(self):
+        cache = QueryCache()
+        compute = MagicMock(side_effect=["antigo", "novo"])
+
+        cache.fetch("get_x", (), ("exames",), {"exames": 1, "consultas": 1}, compute)
+        unrelated = cache.fetch("get_x", (), ("exames",), {"exames": 1, "consultas": 9}, compute)
+        changed = cache.fetch("get_x", (), ("exames",), {"exames": 2, "consultas": 9}, compute)
+
+        self.assertEqual(unrelated, "antigo")
+        self.assertEqual(changed, "novo")
+
+    def test_invalidate_drops_only_entries_reading_changed_tables(self):
+        cache = QueryCache()
+        versions = {"consultas": 1, "kpi_contagens": 1}
+        cache.fetch("get_x", (), ("consultas",), versions, lambda: "x")
+        cache.fetch("get_y", (), ("kpi_contagens",), versions, lambda: "y")
+
+        removed = cache.invalidate({"consultas"})
+        compute = MagicMock(return_value="x2")
+        value = cache.fetch("get_x", (), ("consultas",), versions, compute)
+
+        self.assertEqual(removed, 1)
+        self.assertEqual(value, "x2")
+        self.assertEqual(cache.fetch("get_y", (), ("kpi_contagens",), versions, MagicMock()), "y")
+
+    def test_parameters_are_part_of_the_key(self):
+        cache = QueryCache()
+        compute = MagicMock(side_effect=["vinte", "cinquenta"])
+
+        cache.fetch("get_x", (20,), ("exames",), {"exames": 1}, compute)
+        result = cache.fetch("get_x", (50,), ("exames",), {"exames": 1}, compute)
+
+        self.assertEqual(result, "cinquenta")
+
+    def test_entries_expire_after_max_age(self):
+        now = [0.0]
+        cache = QueryCache(max_age=10, clock=lambda: now[0])
+        compute = MagicMock(side_effect=["antigo", "novo"])
+
+        cache.fetch("get_x", (), ("exames",), {"exames": 1}, compute)
+        now[0] = 11.0
+        result = cache.fetch("get_x", (), ("exames",), {"exames": 1}, compute)
+
+        self.assertEqual(result, "novo")
+
+    def test_read_table_versions_ends_stats_transaction(self):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = [("consultas", 42), ("medicos", None)]
+
+        versions = read_table_versions(conn)
+
+        self.assertEqual(versions, {"consultas": 42, "medicos": 0})
+        conn.rollback.assert_called_once_with()
+
+    def test_snapshot_reuses_cached_panels(self):
+        conn = MagicMock()
+        cache = QueryCache()
+
+        with (
+            patch("app.dashboard_data.read_table_versions", return_value={"consultas": 1}),
+            patch("app.dashboard_data.kpi_summary_available", return_value=False),
+            patch("app.dashboard_data.materialized_views_available", return_value=False),
+            patch("app.dashboard_data.activity_counters_available", return_value=False),
+            patch("app.dashboard_data.fetch_rows", return_value=[]) as fetch,
+            patch("app.dashboard_data.fetch_columns", return_value=pa.table({})) as columns,
+        ):
+            get_dashboard_snapshot(conn, cache=cache)
+            get_dashboard_snapshot(conn, cache=cache)
+
+        # 10 consultas na primeira leitura; na segunda só os painéis que
+        # dependem de now(): atividade recente, internações longas (lista e
+        # total) e consultas agendadas próximas.
+        self.assertEqual(fetch.call_count + columns.call_count, 14)
+        self.assertEqual(cache.overall_hit_rate(), 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+
+from app.dashboard_data import fetch_rows, get_dashboard_snapshot
+from app.query_timing import QueryTimer, percentile, record_query
+
+
+class FakeClock:
+    def __init__(self, *values):
+        self.values = list(values)
+
+    def __call__(self):
+        return self.values.pop(0)
+
+
+class QueryTimingTests(unittest.TestCase):
+    def test_percentile_uses_nearest_rank(self):
+        values = [5.0, 1.0, 3.0, 2.0, 4.0]
+
+        self.assertEqual(percentile(values, 0.5), 3.0)
+        self.assertEqual(percentile(values, 0.95), 5.0)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_measure_collects_phases_recorded_in_block(self):
+        timer = QueryTimer(clock=FakeClock(0.0, 0.05))
+
+        with timer.measure("get_ultimas_consultas"):
+            record_query("SELECT 1", (), 0.03, 0.01, 20)
+
+        [stats] = timer.stats()
+        self.assertEqual(stats["painel"], "get_ultimas_consultas")
+        self.assertEqual(stats["p50_ms"], 50.0)
+        self.assertEqual(stats["execute_p50_ms"], 30.0)
+        self.assertEqual(stats["fetch_p50_ms"], 10.0)
+        self.assertEqual(stats["linhas"], 20)
+        self.assertEqual(stats["lentas"], 0)
+
+    def test_record_query_outside_measure_is_ignored(self):
+        timer = QueryTimer()
+
+        record_query("SELECT 1", (), 1.0, 1.0, 1)
+
+        self.assertEqual(timer.stats(), [])
+
+    def test_window_keeps_only_recent_samples(self):
+        timer = QueryTimer(window=2, clock=FakeClock(0, 1, 0, 2, 0, 3))
+
+        for _ in range(3):
+            with timer.measure("get_resumo"):
+                pass
+
+        [stats] = timer.stats()
+        self.assertEqual(stats["amostras"], 2)
+        self.assertEqual(stats["ultimo_ms"], 3000.0)
+
+    def test_slow_panel_is_logged_and_explained(self):
+        timer = QueryTimer(slow_ms=100, explain=True, clock=FakeClock(0.0, 0.2))
+        conn = MagicMock()
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = [("Seq Scan on exames",)]
+
+        with self.assertLogs("app.query_timing", level="WARNING") as logs:
+            with timer.measure("get_exames_pendentes_recentes", conn):
+                record_query("SELECT * FROM exames LIMIT %s", (20,), 0.15, 0.05, 20)
+
+        statements = [call.args for call in cursor.execute.call_args_list]
+        self.assertEqual(
+            statements,
+            [
+                ("SAVEPOINT query_timing_explain",),
+                ("EXPLAIN SELECT * FROM exames LIMIT %s", (20,)),
+                ("RELEASE SAVEPOINT query_timing_explain",),
+            ],
+        )
+        self.assertIn("Painel lento get_exames_pendentes_recentes", logs.output[0])
+        self.assertIn("Seq Scan on exames", logs.output[1])
+        self.assertEqual(timer.stats()[0]["lentas"], 1)
+
+    def test_failed_explain_rolls_back_to_savepoint(self):
+        timer = QueryTimer(slow_ms=100, explain=True, analyze=True, clock=FakeClock(0.0, 0.2))
+        conn = MagicMock()
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.execute.side_effect = [None, psycopg2.Error("timeout"), None]
+
+        with self.assertLogs("app.query_timing", level="WARNING") as logs:
+            with timer.measure("get_resumo", conn):
+                record_query("SELECT 1", (), 0.2, 0.0, 1)
+
+        statements = [call.args[0] for call in cursor.execute.call_args_list]
+        self.assertEqual(statements[1], "EXPLAIN (ANALYZE, BUFFERS) SELECT 1")
+        self.assertEqual(statements[2], "ROLLBACK TO SAVEPOINT query_timing_explain")
+        conn.rollback.assert_not_called()
+        self.assertIn("Erro no EXPLAIN de get_resumo", logs.output[1])
+
+    def test_fetch_rows_reports_row_count(self):
+        cursor = MagicMock()
+        cursor.description = [("id",)]
+        cursor.fetchall.return_value = [(1,), (2,)]
+        conn = MagicMock()
+        conn.cursor.return_value.__enter__.return_value = cursor
+        timer = QueryTimer()
+
+        with timer.measure("get_resumo"):
+            fetch_rows(conn, "SELECT id FROM pacientes")
+
+        self.assertEqual(timer.stats()[0]["linhas"], 2)
+
+    def test_snapshot_times_each_panel(self):
+        conn = MagicMock()
+        timer = QueryTimer()
+
+        with (
+            patch("app.dashboard_data.kpi_summary_available", return_value=False),
+            patch("app.dashboard_data.materialized_views_available", return_value=False),
+            patch("app.dashboard_data.activity_counters_available", return_value=False),
+            patch("app.dashboard_data.fetch_rows", return_value=[]),
+            patch("app.dashboard_data.fetch_columns", return_value=[]),
+        ):
+            get_dashboard_snapshot(conn, timer=timer)
+
+        panels = {row["painel"] for row in timer.stats()}
+        self.assertEqual(len(panels), 10)
+        self.assertIn("get_resumo", panels)
+        self.assertIn("get_atividade_recente", panels)
+
+
+if __name__ == "__main__":
+    unittest.main()
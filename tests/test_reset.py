@@ -0,0 +1,113 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from scripts import reset
+
+
+SEED_CONFIG = {
+    "seed_pacientes": 10,
+    "seed_medicos": 2,
+    "batch_size": 50,
+    "random_seed": 42,
+}
+
+
+class TemplateResetTests(unittest.TestCase):
+    def test_template_key_ignores_batch_size(self):
+        other_batch = {**SEED_CONFIG, "batch_size": 500}
+
+        self.assertEqual(
+            reset.template_key(SEED_CONFIG),
+            reset.template_key(other_batch),
+        )
+
+    def test_template_key_changes_with_volume_and_random_seed(self):
+        key = reset.template_key(SEED_CONFIG)
+
+        self.assertNotEqual(
+            key,
+            reset.template_key({**SEED_CONFIG, "seed_pacientes": 11}),
+        )
+        self.assertNotEqual(
+            key,
+            reset.template_key({**SEED_CONFIG, "random_seed": 7}),
+        )
+
+    def test_template_database_name_fits_postgres_identifier_limit(self):
+        name = reset.template_database_name("x" * 80, "abcdef123456")
+
+        self.assertEqual(len(name), 63)
+        self.assertTrue(name.endswith("_tpl_abcdef123456"))
+
+    def test_reset_from_template_reuses_existing_template(self):
+        admin = MagicMock()
+
+        with (
+            patch("scripts.reset.load_env", return_value={"database": "hospital"}),
+            patch("scripts.reset.load_seed_config", return_value=SEED_CONFIG),
+            patch("scripts.reset.close_pools") as close_pools,
+            patch("scripts.reset.maintenance_connection", return_value=admin),
+            patch("scripts.reset.database_exists", return_value=True),
+            patch("scripts.reset.build_template") as build_template,
+            patch("scripts.reset.drop_database") as drop_database,
+        ):
+            name = reset.reset_from_template()
+
+        close_pools.assert_called_once_with()
+        build_template.assert_not_called()
+        drop_database.assert_called_once_with(admin, "hospital", drop_slots=False)
+        self.assertTrue(name.startswith("hospital_tpl_"))
+        statement = admin.cursor.return_value.__enter__.return_value.execute.call_args
+        self.assertIn("TEMPLATE", repr(statement.args[0]))
+        admin.close.assert_called_once_with()
+
+    def test_reset_from_template_builds_missing_template(self):
+        admin = MagicMock()
+
+        with (
+            patch("scripts.reset.load_env", return_value={"database": "hospital"}),
+            patch("scripts.reset.load_seed_config", return_value=SEED_CONFIG),
+            patch("scripts.reset.close_pools"),
+            patch("scripts.reset.maintenance_connection", return_value=admin),
+            patch("scripts.reset.database_exists", return_value=False),
+            patch("scripts.reset.build_template") as build_template,
+            patch("scripts.reset.drop_database"),
+        ):
+            name = reset.reset_from_template()
+
+        build_template.assert_called_once_with(
+            admin,
+            {"database": "hospital"},
+            name,
+            SEED_CONFIG,
+        )
+
+    def test_main_uses_template_path_when_requested(self):
+        with (
+            patch("scripts.reset.reset_from_template") as from_template,
+            patch("scripts.reset.get_pool") as get_pool,
+        ):
+            reset.main(rebuild_template=True)
+
+        from_template.assert_called_once_with(rebuild=True, drop_slots=False)
+        get_pool.assert_not_called()
+
+    def test_drop_database_refuses_replication_slots(self):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = [("bronze_slot", False), ("slot_oltp", True)]
+
+        with patch("scripts.reset.database_exists", return_value=True):
+            with self.assertRaisesRegex(RuntimeError, "bronze_slot .*slot_oltp"):
+                reset.drop_database(conn, "hospital")
+            self.assertEqual(cursor.execute.call_count, 1)
+
+            reset.drop_database(conn, "hospital", drop_slots=True)
+
+        statements = [call.args for call in cursor.execute.call_args_list]
+        self.assertIn(("SELECT pg_drop_replication_slot(%s)", ("bronze_slot",)), statements)
+        self.assertNotIn(("SELECT pg_drop_replication_slot(%s)", ("slot_oltp",)), statements)
+
+
+if __name__ == "__main__":
+    unittest.main()
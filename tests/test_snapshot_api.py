@@ -0,0 +1,149 @@
+import json
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import pyarrow as pa
+
+from app.snapshot_api import SnapshotApi, json_default
+from app.snapshot_refresher import SnapshotRefresher
+
+
+def make_snapshot():
+    return {
+        "kpis": {"exames_pendentes": 1000},
+        "ultimas_consultas": pa.table({"id": [1, 2]}),
+    }
+
+
+class SnapshotApiTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.compute = MagicMock(side_effect=lambda *args: make_snapshot())
+        self.refresher = SnapshotRefresher(
+            interval=5,
+            compute=self.compute,
+            clock=lambda: self.now,
+        )
+        self.api = SnapshotApi(self.refresher)
+
+    def test_json_default_converts_arrow_dates_and_decimals(self):
+        self.assertEqual(json_default(pa.table({"id": [1]})), [{"id": 1}])
+        self.assertEqual(json_default(datetime(2026, 1, 2, 3, 4)), "2026-01-02T03:04:00")
+        self.assertEqual(json_default(Decimal("2.5")), 2.5)
+
+    def test_unavailable_before_first_snapshot(self):
+        status, headers, _ = self.api.respond("/snapshot")
+
+        self.assertEqual(status, 503)
+        self.assertIn("Retry-After", headers)
+
+    def test_snapshot_includes_alerts_and_etag(self):
+        self.refresher.refresh()
+
+        status, headers, body = self.api.respond("/snapshot")
+
+        payload = json.loads(body)
+        self.assertEqual(status, 200)
+        self.assertEqual(payload["snapshot"]["ultimas_consultas"], [{"id": 1}, {"id": 2}])
+        self.assertEqual(payload["alerts"][0]["codigo"], "exames_pendentes")
+        self.assertTrue(headers["ETag"].startswith('"'))
+        self.assertEqual(headers["Cache-Control"], "max-age=5")
+
+    def test_if_none_match_returns_not_modified(self):
+        self.refresher.refresh()
+        _, headers, _ = self.api.respond("/alerts")
+
+        status, _, body = self.api.respond("/alerts", headers["ETag"])
+
+        self.assertEqual(status, 304)
+        self.assertEqual(body, b"")
+
+    def test_etag_survives_refresh_with_same_data(self):
+        self.refresher.refresh()
+        _, first, _ = self.api.respond("/snapshot")
+        self.now += 10
+        self.refresher.refresh()
+
+        status, second, body = self.api.respond("/snapshot", first["ETag"])
+
+        self.assertEqual(self.compute.call_count, 2)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(status, 304)
+
+    def test_body_is_encoded_once_per_snapshot(self):
+        self.refresher.refresh()
+        _, _, first = self.api.respond("/snapshot")
+        _, _, second = self.api.respond("/snapshot")
+
+        self.assertIs(first, second)
+
+    def test_max_age_triggers_one_recompute(self):
+        self.refresher.refresh()
+        self.now += 30
+
+        self.api.respond("/snapshot?max_age=60")
+        self.assertEqual(self.compute.call_count, 1)
+
+        self.api.respond("/snapshot?max_age=10")
+        self.api.respond("/snapshot?max_age=10")
+        self.assertEqual(self.compute.call_count, 2)
+
+    def test_max_age_below_refresh_interval_is_clamped(self):
+        self.refresher.refresh()
+        self.now += 3
+
+        for value in ("0", "-5", "0.001"):
+            self.assertEqual(self.api.respond(f"/alerts?max_age={value}")[0], 200)
+        self.assertEqual(self.compute.call_count, 1)
+
+    def test_invalid_max_age_and_unknown_path(self):
+        self.refresher.refresh()
+
+        self.assertEqual(self.api.respond("/snapshot?max_age=x")[0], 400)
+        for value in ("nan", "inf", "-inf"):
+            self.assertEqual(self.api.respond(f"/snapshot?max_age={value}")[0], 400)
+        self.assertEqual(self.api.respond("/outro")[0], 404)
+
+    def test_concurrent_stale_requests_share_recompute(self):
+        self.refresher.refresh()
+        self.now += 30
+        release = threading.Event()
+        self.compute.side_effect = lambda *args: release.wait(1) and make_snapshot()
+
+        threads = [
+            threading.Thread(target=self.api.respond, args=("/alerts?max_age=10",))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.compute.call_count, 2)
+
+    def test_serves_http_with_etag(self):
+        self.refresher.refresh()
+        api = SnapshotApi(self.refresher, port=0)
+        api.start()
+        self.addCleanup(api.stop)
+        url = f"http://127.0.0.1:{api.port}/alerts"
+
+        with urllib.request.urlopen(url) as response:
+            etag = response.headers["ETag"]
+            self.assertEqual(response.headers["Content-Type"], "application/json")
+            self.assertIn("alerts", json.load(response))
+
+        request = urllib.request.Request(url, headers={"If-None-Match": etag})
+        with self.assertRaises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(request)
+        self.assertEqual(error.exception.code, 304)
+
+
+if __name__ == "__main__":
+    unittest.main()
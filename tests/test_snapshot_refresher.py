@@ -0,0 +1,82 @@
+import unittest
+from unittest.mock import MagicMock
+
+from app.query_cache import QueryCache
+from app.snapshot_refresher import SnapshotRefresher
+
+
+class SnapshotRefresherTests(unittest.TestCase):
+    def test_latest_is_none_before_first_refresh(self):
+        refresher = SnapshotRefresher(compute=MagicMock())
+
+        self.assertIsNone(refresher.latest())
+
+    def test_refresh_publishes_snapshot_with_age(self):
+        now = [100.0]
+        compute = MagicMock(return_value={"kpis": {"pacientes": 3}})
+        refresher = SnapshotRefresher(
+            recent_minutes=30,
+            compute=compute,
+            clock=lambda: now[0],
+        )
+
+        self.assertTrue(refresher.refresh())
+        now[0] = 104.5
+        published = refresher.latest()
+
+        compute.assert_called_once_with(30, None, 120, None, None)
+        self.assertEqual(published["snapshot"], {"kpis": {"pacientes": 3}})
+        self.assertEqual(published["updated_at"], 100.0)
+        self.assertEqual(published["age"], 4.5)
+
+    def test_failed_refresh_keeps_previous_snapshot(self):
+        compute = MagicMock(side_effect=[{"kpis": {}}, RuntimeError("sem conexao")])
+        refresher = SnapshotRefresher(compute=compute)
+
+        refresher.refresh()
+        self.assertFalse(refresher.refresh())
+
+        self.assertEqual(refresher.latest()["snapshot"], {"kpis": {}})
+        self.assertEqual(refresher.last_error, "sem conexao")
+
+    def test_background_thread_refreshes_until_stopped(self):
+        compute = MagicMock(return_value={"kpis": {}})
+        refresher = SnapshotRefresher(interval=0.01, compute=compute)
+
+        refresher.start()
+        self.assertTrue(refresher.wait(timeout=1))
+        refresher.stop()
+
+        self.assertGreaterEqual(compute.call_count, 1)
+        self.assertIsNotNone(refresher.latest())
+
+    def test_change_notification_invalidates_affected_panels(self):
+        cache = QueryCache()
+        versions = {"consultas": 1}
+        cache.fetch("get_resumo_kpi", (), ("kpi_contagens",), versions, lambda: "kpi")
+        cache.fetch("get_internacoes_ativas", (), ("internacoes",), versions, lambda: "ativas")
+        listener = MagicMock()
+        listener.wait.return_value = {"consultas": {"inserts": 2, "updates": 0}}
+        refresher = SnapshotRefresher(compute=MagicMock(), cache=cache, listener=listener)
+
+        self.assertTrue(refresher.wait_for_changes())
+
+        self.assertEqual(refresher.last_changes, {"consultas": {"inserts": 2, "updates": 0}})
+        compute = MagicMock(return_value="novo")
+        cache.fetch("get_resumo_kpi", (), ("kpi_contagens",), versions, compute)
+        compute.assert_called_once_with()
+        self.assertEqual(
+            cache.fetch("get_internacoes_ativas", (), ("internacoes",), versions, MagicMock()),
+            "ativas",
+        )
+
+    def test_wait_for_changes_gives_up_after_max_idle(self):
+        listener = MagicMock()
+        listener.wait.return_value = {}
+        refresher = SnapshotRefresher(compute=MagicMock(), listener=listener, max_idle=0.01)
+
+        self.assertFalse(refresher.wait_for_changes())
+
+
+if __name__ == "__main__":
+    unittest.main()
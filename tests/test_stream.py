@@ -1,5 +1,7 @@
 import unittest
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
+
+import psycopg2
 
 from scripts import stream
 
@@ -47,6 +49,111 @@ class StreamTests(unittest.TestCase):
         self.assertIn("SKIP INSERT     paciente | INSERT:    0 | UPDATE:    0", output)
         self.assertIn("OK INSERT     paciente | INSERT:    1 | UPDATE:    0", output)
 
+    def test_stream_loop_publishes_successful_events(self):
+        publisher = MagicMock()
+        with (
+            patch("scripts.stream.random.choices", return_value=["update_consulta"]),
+            patch("scripts.stream.update_consulta", side_effect=[True, False]),
+        ):
+            stream.stream_loop(
+                conn=object(),
+                interval=0,
+                max_jitter_ms=0,
+                cycles=2,
+                publisher=publisher,
+            )
+
+        publisher.record.assert_called_once_with("consultas", "UPDATE")
+        publisher.flush.assert_called_with(force=True)
+
+    def test_stream_loop_writes_heartbeat_between_events(self):
+        with (
+            patch("scripts.stream.random.choices", return_value=["update_consulta"]),
+            patch("scripts.stream.update_consulta", return_value=True),
+            patch("scripts.stream.write_heartbeat") as heartbeat,
+        ):
+            stream.stream_loop(
+                conn=object(),
+                interval=0,
+                max_jitter_ms=0,
+                cycles=3,
+                heartbeat_seconds=0.001,
+            )
+
+        self.assertGreaterEqual(heartbeat.call_count, 1)
+
+    def test_stream_loop_skips_events_while_paused(self):
+        backpressure = MagicMock(check_seconds=0)
+        backpressure.check.side_effect = ["pausado", "pausado", "normal", "lento"]
+        backpressure.delay.return_value = 0
+        backpressure.summary.return_value = {}
+        with (
+            patch("scripts.stream.random.choices", return_value=["update_exame"]),
+            patch("scripts.stream.update_exame", return_value=True) as update,
+        ):
+            stream.stream_loop(
+                conn=object(),
+                interval=0,
+                max_jitter_ms=0,
+                cycles=2,
+                backpressure=backpressure,
+            )
+
+        self.assertEqual(update.call_count, 2)
+        self.assertEqual(backpressure.check.call_count, 4)
+        backpressure.delay.assert_called_once()
+
+    def test_updates_carry_partition_key(self):
+        cursor = MagicMock()
+        cursor.fetchone.return_value = (7, "2026-10-01 10:00")
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+
+        for update in (stream.update_consulta, stream.update_exame):
+            with self.subTest(update=update.__name__):
+                self.assertTrue(update(conn))
+                sql, params = cursor.execute.call_args.args
+                self.assertIn("AND data = %s", sql)
+                self.assertEqual(params[1:], (7, "2026-10-01 10:00"))
+
+    def test_reconnect_discards_failed_connections_and_stops(self):
+        pool = MagicMock()
+        candidates = [MagicMock() for _ in range(5)]
+        pool.getconn.side_effect = candidates
+        with (
+            patch("scripts.stream.random.choices", return_value=["update_exame"]),
+            patch("scripts.stream.update_exame", side_effect=psycopg2.OperationalError("lost")),
+            patch("scripts.stream.get_pool", return_value=pool),
+            patch("scripts.stream.test_connection", return_value=False),
+            patch("scripts.stream.time.sleep"),
+        ):
+            conn = stream.stream_loop(conn="original", interval=0, max_jitter_ms=0)
+
+        self.assertIsNone(conn)
+        discarded = [call.args[0] for call in pool.putconn.call_args_list]
+        self.assertEqual(discarded, ["original", *candidates])
+        self.assertTrue(all(call.kwargs["discard"] for call in pool.putconn.call_args_list))
+
+    def test_reconnect_returns_live_connection(self):
+        pool = MagicMock()
+        live = MagicMock()
+        pool.getconn.side_effect = [psycopg2.OperationalError("down"), live]
+        with (
+            patch("scripts.stream.random.choices", return_value=["update_exame"]),
+            patch(
+                "scripts.stream.update_exame",
+                side_effect=[psycopg2.OperationalError("lost"), True],
+            ),
+            patch("scripts.stream.get_pool", return_value=pool),
+            patch("scripts.stream.test_connection", return_value=True),
+            patch("scripts.stream.Validators"),
+            patch("scripts.stream.time.sleep"),
+        ):
+            conn = stream.stream_loop(conn="original", interval=0, max_jitter_ms=0, cycles=2)
+
+        self.assertIs(conn, live)
+        pool.putconn.assert_called_once_with("original", discard=True)
+
 
 if __name__ == "__main__":
     unittest.main()